@@ -0,0 +1,865 @@
+"""
+Async (ASGI) entry point for the AI service
+
+Serves the same routes and JSON contracts as app.py with async MongoDB
+(Motor) and Redis clients; CPU-bound work runs on a thread pool so the
+event loop keeps accepting connections. Run with:
+
+    gunicorn asgi:app -k uvicorn.workers.UvicornWorker
+"""
+
+import os
+import logging
+import time
+from quart import Quart, Response, g, jsonify, request, stream_with_context
+from quart_cors import cors
+from dotenv import load_dotenv
+from werkzeug.exceptions import UnsupportedMediaType
+
+# Import AI services
+from services.language_detector import get_detector
+from services.risk_scorer import get_scorer
+from services.recommender import get_recommender
+from services.api import (
+    ApiHelpers, RequestError, batch_recommendation_request, decode_body, events_request, export_school_ids, features_request,
+    health_payload, include_features_arg, job_cancelled_payload, job_request, language_request, offset_arg,
+    phones_request, recommendation_request, records_request, require, root_payload, school_recommendation_request,
+    school_summary_args, school_summary_payload, stream_args, students_request, top_k_args,
+)
+from services.batch_recommendations import arecommend_batch
+from services.columnar import (
+    FORMATS, BatchWriter, columnar_available, export_columns, export_schema, parse_export_args,
+)
+from services.encoding import JsonFormat, fast_json_enabled
+from services.incremental import IncrementalRiskScorer
+from services.job_queue import AsyncJobQueue, JobQueue, job_handlers, job_ttl, job_workers_count, start_workers
+from services.lazy import Lazy, lazy_startup_enabled, warm_up
+from services.metrics import CONTENT_TYPE, get_metrics, risk_cache_families
+from services.parallel import run_blocking
+from services.risk_cache import DEFAULT_TTL_SECONDS, AsyncCachedRiskScorer, CachedRiskScorer
+from services.school_rollups import AsyncSchoolRollupStore, student_schools
+from services.sharded_scorer import ShardedRiskScorer
+from services.streaming import aiter_ndjson, ascore_ndjson, aselect_top_k
+
+# Load environment variables
+load_dotenv()
+
+# Initialize Quart app (no upload size or response time limits, as with Flask)
+app = cors(Quart(__name__), allow_origin='*')
+app.config['MAX_CONTENT_LENGTH'] = None
+app.config['RESPONSE_TIMEOUT'] = None
+
+# Configure logging
+logging.basicConfig(
+    level=getattr(logging, os.getenv('LOG_LEVEL', 'INFO')),
+    format='%(asctime)s [%(levelname)s] %(name)s: %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+# Database connections (drivers are imported here so lazy startup skips
+# them; Redis is pinged when the server starts or on /warmup)
+def connect_mongodb():
+    from motor.motor_asyncio import AsyncIOMotorClient
+    try:
+        mongo_client = AsyncIOMotorClient(os.getenv('MONGODB_URI'))
+        logger.info('MongoDB connected successfully')
+        return mongo_client.edulink
+    except Exception as e:
+        logger.error(f'MongoDB connection failed: {e}')
+        return None
+
+def connect_redis():
+    from redis import asyncio as aioredis
+    try:
+        return aioredis.from_url(os.getenv('REDIS_URL'))
+    except Exception as e:
+        logger.error(f'Redis connection failed: {e}')
+        return None
+
+def create_feature_extractor():
+    from services.feature_extractor import AsyncFeatureExtractor
+    db = mongodb.get()
+    return AsyncFeatureExtractor(db) if db is not None else None
+
+def create_job_queue():
+    redis_client = redis_connection.get()
+    return AsyncJobQueue(redis_client, ttl=job_ttl()) if redis_client is not None else None
+
+def start_job_workers():
+    # Worker threads block on the queue, so they get their own sync client
+    if redis_connection.get() is None or not job_workers_count():
+        return []
+    import redis
+    queue = JobQueue(redis.from_url(os.getenv('REDIS_URL')), ttl=job_ttl())
+    risk_scorer = CachedRiskScorer(
+        scorer.get(),
+        queue.redis,
+        ttl=int(os.getenv('RISK_CACHE_TTL_SECONDS', DEFAULT_TTL_SECONDS))
+    )
+    handlers = job_handlers(risk_scorer.batch_assess, get_recommender())
+    return start_workers(queue, handlers, job_workers_count())
+
+mongodb = Lazy(connect_mongodb)
+redis_connection = Lazy(connect_redis)
+
+# Rule table and trained model (if any)
+scorer = Lazy(get_scorer)
+
+# Risk assessment cache (scores directly when Redis is unavailable)
+cached_scorer = Lazy(lambda: AsyncCachedRiskScorer(
+    scorer.get(),
+    redis_connection.get(),
+    ttl=int(os.getenv('RISK_CACHE_TTL_SECONDS', DEFAULT_TTL_SECONDS)),
+    run_sync=run_blocking
+))
+
+# Very large uncached batches are scored and encoded across worker
+# processes (AI_WORKER_PROCESSES)
+sharded_scorer = Lazy(lambda: ShardedRiskScorer(scorer.get()))
+
+# Rolling attendance windows for incremental rescoring (kept in process memory)
+incremental_scorer = Lazy(lambda: IncrementalRiskScorer(scorer.get()))
+
+# Per-school risk rollups for /ai/schools/summary (Redis, or process memory)
+school_rollups = Lazy(lambda: AsyncSchoolRollupStore(redis_connection.get()))
+
+# Server-side feature extraction (requires MongoDB)
+feature_extractor = Lazy(create_feature_extractor)
+
+# Chunked scoring jobs for /ai/jobs (requires Redis), worked on by
+# AI_JOB_WORKERS threads per process and any standalone workers
+# (python -m scripts.job_worker)
+job_queue = Lazy(create_job_queue)
+job_workers = Lazy(start_job_workers)
+
+RESOURCES = {
+    'mongodb': mongodb,
+    'redis': redis_connection,
+    'scorer': scorer,
+    'riskCache': cached_scorer,
+    'shardedScorer': sharded_scorer,
+    'incremental': incremental_scorer,
+    'schoolRollups': school_rollups,
+    'featureExtractor': feature_extractor,
+    'jobQueue': job_queue,
+    'jobWorkers': job_workers,
+}
+
+# Startup mode: everything is connected and loaded now, unless
+# AI_LAZY_STARTUP=true defers it to first use (or POST /warmup) so a cold
+# instance starts answering sooner
+LAZY_STARTUP = lazy_startup_enabled()
+if not LAZY_STARTUP:
+    warm_up(RESOURCES)
+
+async def ping_redis():
+    """Stop using Redis (and the cache) if it does not answer"""
+    redis_client = redis_connection.peek()
+    if redis_client is None:
+        return
+    try:
+        await redis_client.ping()
+        logger.info('Redis connected successfully')
+    except Exception as e:
+        logger.error(f'Redis connection failed: {e}')
+        redis_connection.set(None)
+        if cached_scorer.loaded:
+            cached_scorer.peek().redis = None
+        if school_rollups.loaded:
+            school_rollups.peek().redis = None
+        if job_queue.loaded:
+            job_queue.set(None)
+
+@app.before_serving
+async def connect_redis_on_start():
+    if not LAZY_STARTUP:
+        await ping_redis()
+
+@app.after_serving
+async def close_connections():
+    redis_client = redis_connection.peek()
+    if redis_client is not None:
+        await redis_client.aclose()
+    db = mongodb.peek()
+    if db is not None:
+        db.client.close()
+
+# JSON responses are encoded with orjson unless AI_FAST_JSON=false; batch
+# endpoints also read and answer MessagePack (see response_format)
+json_format = JsonFormat(fast_json_enabled(), app.json.default)
+
+async def request_json():
+    """Request JSON body, rejecting non-JSON requests like Flask's request.json"""
+    if not request.is_json:
+        raise UnsupportedMediaType(
+            "Did not attempt to load JSON data because the request Content-Type"
+            " was not 'application/json'."
+        )
+    return await request.get_json()
+
+async def request_data():
+    """Request body from JSON or MessagePack (415/400 RequestError if it can't be read)"""
+    return decode_body(await request.get_data(), request.mimetype, request.is_json, json_format)
+
+# Latency histograms, batch sizes and cache counters for /metrics
+# (AI_METRICS_ENABLED=false registers no hooks, so requests pay nothing)
+metrics = get_metrics()
+metrics.add_collector(lambda: risk_cache_families(cached_scorer.peek().stats() if cached_scorer.loaded else None))
+
+# Metrics and response helpers shared with app.py (services/api.py)
+api = ApiHelpers(request, Response, json_format, metrics)
+stage = api.stage
+record_batch_size = api.record_batch_size
+response_format = api.response_format
+encoded_response = api.encoded_response
+payload_response = api.payload_response
+results_response = api.results_response
+
+if metrics.enabled:
+    @app.before_request
+    async def start_request_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    async def record_request_latency(response):
+        start = g.pop('request_start', None)
+        if start is not None:
+            metrics.observe_request(api.route_label(), request.method, response.status_code, time.perf_counter() - start)
+        return response
+
+def request_error(error):
+    """JSON response for a RequestError raised by a services/api.py validator"""
+    return jsonify({'error': error.message}), error.status
+
+# Health check endpoint
+@app.route('/health', methods=['GET'])
+async def health_check():
+    return jsonify(health_payload(RESOURCES, LAZY_STARTUP)), 200
+
+# Warmup endpoint: connects and loads everything a request may need
+@app.route('/warmup', methods=['POST'])
+async def warmup():
+    try:
+        # Database clients belong to the event loop; scorers and models
+        # load on a worker thread
+        was_connected = redis_connection.loaded
+        timings = warm_up({'mongodb': mongodb, 'redis': redis_connection})
+        if not was_connected:
+            await ping_redis()
+        timings = {**await run_blocking(warm_up, RESOURCES), **timings}
+        return jsonify({'status': 'ok', 'loadMs': timings}), 200
+    except Exception as e:
+        logger.error(f'Warmup error: {e}')
+        return jsonify({'error': str(e)}), 500
+
+# Metrics endpoint (Prometheus text format)
+@app.route('/metrics', methods=['GET'])
+async def prometheus_metrics():
+    if not metrics.enabled:
+        return jsonify({'error': 'Metrics are disabled (AI_METRICS_ENABLED=false)'}), 404
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+# Root endpoint
+@app.route('/', methods=['GET'])
+async def root():
+    return jsonify(root_payload()), 200
+
+# Language detection endpoint
+@app.route('/ai/detect-language', methods=['POST'])
+async def detect_language():
+    """
+    Detect language from text, phone, or region
+    Expected JSON: { text, phone, region }
+    Returns: detected language and confidence
+    """
+    try:
+        text, phone, region = language_request(await request_json() or {})
+
+        detector = get_detector()
+        result = detector.detect_combined(text=text, phone=phone, region=region)
+
+        logger.info(f'Language detected: {result["language"]} (confidence: {result["confidence"]})')
+
+        return jsonify(result), 200
+
+    except RequestError as e:
+        return request_error(e)
+    except Exception as e:
+        logger.error(f'Language detection error: {e}')
+        return jsonify({'error': str(e)}), 500
+
+# Batch language detection endpoint
+@app.route('/ai/detect-language/batch', methods=['POST'])
+async def detect_language_batch():
+    """
+    Detect language for many records in one request
+    Expected body (JSON or MessagePack): { records: [{ text, phone, region }, ...] }
+    Returns: detection results in the same order (errors reported per record)
+    """
+    try:
+        with stage('parse'):
+            data = await request_data() or {}
+        records = records_request(data)
+
+        record_batch_size(len(records))
+        detector = get_detector()
+        with stage('detect'):
+            results = await run_blocking(detector.detect_combined_batch, records)
+
+        logger.info(f'Batch language detection completed for {len(results)} records')
+
+        with stage('serialize'):
+            response = payload_response({'results': results})
+        return response, 200
+
+    except RequestError as e:
+        return request_error(e)
+    except Exception as e:
+        logger.error(f'Batch language detection error: {e}')
+        return jsonify({'error': str(e)}), 500
+
+# Bulk phone prefix language detection endpoint
+@app.route('/ai/detect-language/phones', methods=['POST'])
+async def detect_language_phones():
+    """
+    Resolve candidate languages for a contact list from phone prefixes
+    Expected body (JSON or MessagePack): { phones: ['+233241234567', ...] }
+    Returns: language, confidence, prefix and all candidates per number
+    """
+    try:
+        with stage('parse'):
+            data = await request_data() or {}
+        phones = phones_request(data)
+
+        record_batch_size(len(phones))
+        detector = get_detector()
+        with stage('detect'):
+            results = await run_blocking(detector.detect_from_phones, phones)
+
+        logger.info(f'Phone prefix detection completed for {len(results)} numbers')
+
+        with stage('serialize'):
+            response = payload_response({'results': results})
+        return response, 200
+
+    except RequestError as e:
+        return request_error(e)
+    except Exception as e:
+        logger.error(f'Phone prefix detection error: {e}')
+        return jsonify({'error': str(e)}), 500
+
+# Risk scoring endpoint
+@app.route('/ai/score-risk', methods=['POST'])
+async def score_risk():
+    """
+    Calculate dropout risk score for a student
+    Expected JSON: { features: {...} }
+    Returns: risk assessment with score, level, and recommendations
+    """
+    try:
+        with stage('parse'):
+            data = await request_json() or {}
+        features = features_request(data)
+
+        with stage('score'):
+            result = await cached_scorer.get().calculate_risk_score(features)
+
+        logger.info(f'Risk score calculated: {result["riskScore"]} ({result["riskLevel"]})')
+
+        with stage('serialize'):
+            response = jsonify(result)
+        return response, 200
+
+    except RequestError as e:
+        return request_error(e)
+    except Exception as e:
+        logger.error(f'Risk scoring error: {e}')
+        return jsonify({'error': str(e)}), 500
+
+# Batch risk scoring endpoint
+@app.route('/ai/score-risk/batch', methods=['POST'])
+async def score_risk_batch():
+    """
+    Calculate risk scores for multiple students
+    Expected body (JSON or MessagePack): { students: [{features: {...}}, ...] }
+    Returns: list of risk assessments
+    """
+    try:
+        with stage('parse'):
+            data = await request_data() or {}
+        students = students_request(data)
+
+        record_batch_size(len(students))
+        if cached_scorer.get().enabled:
+            with stage('score'):
+                results = await cached_scorer.get().batch_assess(students)
+            with stage('serialize'):
+                response = results_response(results)
+        else:
+            # Nothing to cache: workers score and encode in one step
+            wire_format = response_format()
+            with stage('score'):
+                results = await run_blocking(sharded_scorer.get().batch_encode, students, wire_format)
+            with stage('serialize'):
+                response = encoded_response(wire_format.join(results), wire_format)
+
+        logger.info(f'Batch risk scoring completed for {len(results)} students')
+
+        return response, 200
+
+    except RequestError as e:
+        return request_error(e)
+    except Exception as e:
+        logger.error(f'Batch risk scoring error: {e}')
+        return jsonify({'error': str(e)}), 500
+
+# Streaming batch risk scoring endpoint
+@app.route('/ai/score-risk/batch/stream', methods=['POST'])
+async def score_risk_batch_stream():
+    """
+    Calculate risk scores for a stream of students
+    Expected body: newline-delimited JSON, one features object per line
+    Query params: chunkSize (students scored per chunk, default 500, at most 10,000)
+    Returns: newline-delimited risk assessments in input order
+    """
+    try:
+        chunk_size = stream_args(request.args)
+    except RequestError as e:
+        return request_error(e)
+
+    records = aiter_ndjson(request.body)
+    lines = ascore_ndjson(records, cached_scorer.get().batch_calculate, dumps=app.json.dumps, chunk_size=chunk_size)
+
+    return Response(lines, mimetype='application/x-ndjson')
+
+# Top-K risk scoring endpoint
+@app.route('/ai/score-risk/top-k', methods=['POST'])
+async def score_risk_top_k():
+    """
+    Score a stream of students and return only the highest-risk ones
+    Expected body: newline-delimited JSON, one features object per line
+    Query params: k (students returned, default 50), chunkSize (students scored per chunk, default 500, at most 10,000)
+    Returns: { k, scored, errors, results } with results sorted by risk score, highest first
+    """
+    try:
+        k, chunk_size = top_k_args(request.args)
+    except RequestError as e:
+        return request_error(e)
+
+    try:
+        records = aiter_ndjson(request.body)
+        # Reading, parsing and scoring are interleaved chunk by chunk
+        with stage('score'):
+            top = await aselect_top_k(records, cached_scorer.get().batch_assess, k=k, chunk_size=chunk_size)
+        record_batch_size(top.scored + top.errors)
+
+        with stage('serialize'):
+            response = results_response(top.results(), **top.summary())
+        return response, 200
+
+    except Exception as e:
+        logger.error(f'Top-K risk scoring error: {e}')
+        return jsonify({'error': str(e)}), 500
+
+# School risk scoring endpoint
+@app.route('/ai/score-risk/school/<school_id>', methods=['GET'])
+async def score_risk_school(school_id):
+    """
+    Extract features from MongoDB and score every active student in a school
+    Query params: includeFeatures (true to include extracted features)
+    Returns: list of risk assessments
+    """
+    try:
+        extractor = require(feature_extractor.get(), 'MongoDB')
+        with stage('extract'):
+            features_list = await extractor.extract_school_features(school_id)
+    except RequestError as e:
+        return request_error(e)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f'Feature extraction error: {e}')
+        return jsonify({'error': str(e)}), 500
+
+    try:
+        record_batch_size(len(features_list))
+        with stage('score'):
+            results = await cached_scorer.get().batch_assess(features_list)
+        with stage('rollup'):
+            await school_rollups.get().update(results, school_id=school_id, replace=True)
+
+        logger.info(f'School risk scoring completed for {len(results)} students in {school_id}')
+
+        with stage('serialize'):
+            response = results_response(
+                results,
+                features_list if include_features_arg(request.args) else None,
+                schoolId=school_id
+            )
+        return response, 200
+
+    except Exception as e:
+        logger.error(f'School risk scoring error: {e}')
+        return jsonify({'error': str(e)}), 500
+
+# Incremental scoring: student registration endpoint
+@app.route('/ai/score-risk/incremental/students', methods=['POST'])
+async def register_incremental_students():
+    """
+    Register students for incremental scoring (or update their features)
+    Expected body (JSON or MessagePack): { students: [{studentId, ...features}, ...] }
+    Attendance features come from /ai/score-risk/incremental/events
+    Returns: current risk assessment for each student
+    """
+    try:
+        with stage('parse'):
+            data = await request_data() or {}
+        students = students_request(data)
+
+        record_batch_size(len(students))
+        with stage('score'):
+            results = await run_blocking(incremental_scorer.get().register, students)
+        with stage('rollup'):
+            await school_rollups.get().update(results, schools=student_schools(students))
+
+        logger.info(f'Registered {len(results)} students for incremental scoring')
+
+        with stage('serialize'):
+            response = results_response(results)
+        return response, 200
+
+    except RequestError as e:
+        return request_error(e)
+    except Exception as e:
+        logger.error(f'Incremental registration error: {e}')
+        return jsonify({'error': str(e)}), 500
+
+# Incremental scoring: attendance events endpoint
+@app.route('/ai/score-risk/incremental/events', methods=['POST'])
+async def apply_attendance_events():
+    """
+    Apply attendance as it is marked and rescore only the affected students
+    Expected body (JSON or MessagePack): { events: [{student, date, status}, ...], asOf: 'YYYY-MM-DD' (optional) }
+    Returns: assessments of students whose risk changed, with per-event errors
+    """
+    try:
+        with stage('parse'):
+            data = await request_data() or {}
+        events, as_of = events_request(data)
+
+        record_batch_size(len(events))
+        with stage('score'):
+            results, summary = await run_blocking(incremental_scorer.get().apply_events, events, as_of)
+        with stage('rollup'):
+            await school_rollups.get().update(results)
+
+        logger.info(f'Applied {summary["applied"]} attendance events, {len(results)} risk changes')
+
+        with stage('serialize'):
+            response = results_response(results, **summary)
+        return response, 200
+
+    except RequestError as e:
+        return request_error(e)
+    except Exception as e:
+        logger.error(f'Attendance events error: {e}')
+        return jsonify({'error': str(e)}), 500
+
+# School risk summaries endpoint
+@app.route('/ai/schools/summary', methods=['GET'])
+async def get_school_summaries():
+    """
+    Risk summaries for many schools from the precomputed rollups
+    Query params: schoolIds (comma-separated, default every school), top (issues per school, default 5)
+    Returns: { count, schools: [{ schoolId, totalStudents, riskLevels, highRiskStudents, highRiskRate,
+               factorCounts, topIssues }, ...], missing: [schoolIds without a rollup] }
+    """
+    try:
+        school_ids, top = school_summary_args(request.args)
+    except RequestError as e:
+        return request_error(e)
+
+    try:
+        with stage('read'):
+            summaries = await school_rollups.get().summaries(school_ids, top)
+
+        with stage('serialize'):
+            response = payload_response(school_summary_payload(summaries, school_ids))
+        return response, 200
+
+    except Exception as e:
+        logger.error(f'School summary error: {e}')
+        return jsonify({'error': str(e)}), 500
+
+# Columnar export endpoint
+@app.route('/ai/export', methods=['GET'])
+async def export_columnar():
+    """
+    Stream school features and risk assessments as Parquet or an Arrow stream
+    Query params: schoolIds (comma-separated, required), include (features,assessments; default both),
+                  format (parquet or arrow, default parquet), rowGroupSize (rows per row group, default 10000)
+    Returns: one row per active student (schoolId, studentId, features, assessment), sent a row group at a time
+    """
+    try:
+        options = parse_export_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if not columnar_available():
+        return jsonify({'error': 'pyarrow is not installed'}), 503
+    try:
+        extractor = require(feature_extractor.get(), 'MongoDB')
+        export_school_ids(options)
+    except RequestError as e:
+        return request_error(e)
+
+    include = options['include']
+
+    @stream_with_context
+    async def chunks():
+        # Headers are already sent, so a failure can only cut the file short
+        try:
+            writer = BatchWriter(export_schema(include), options['format'], options['rowGroupSize'])
+            for school_id in options['schoolIds']:
+                with stage('extract'):
+                    features_list = await extractor.extract_school_features(school_id)
+                record_batch_size(len(features_list))
+                assessments = None
+                if 'assessments' in include:
+                    with stage('score'):
+                        assessments = await cached_scorer.get().batch_assess(features_list)
+                chunk = await run_blocking(
+                    lambda: writer.write(export_columns(school_id, features_list, assessments))
+                )
+                if chunk:
+                    yield chunk
+            yield await run_blocking(writer.close)
+        except Exception as e:
+            logger.error(f'Export error: {e}')
+            raise
+        logger.info(f'Exported {len(options["schoolIds"])} schools as {options["format"]}')
+
+    media_type, extension = FORMATS[options['format']]
+    return Response(
+        chunks(),
+        mimetype=media_type,
+        headers={'Content-Disposition': f'attachment; filename=edulink-export.{extension}'}
+    )
+
+# Scoring job endpoints
+def require_job_queue():
+    """The job queue, starting this process's workers on first use (503 without Redis)"""
+    queue = require(job_queue.get(), 'Redis')
+    job_workers.get()
+    return queue
+
+@app.route('/ai/jobs', methods=['POST'])
+async def submit_job():
+    """
+    Queue a large batch for the job workers and return at once
+    Expected body (JSON or MessagePack): { kind: 'score-risk|recommendations', students: [...],
+                     budget: 'low|medium|high', chunkSize: 500 }
+    students are the items /ai/score-risk/batch or /ai/recommendations/batch take
+    Returns: 202 with the job status ({ jobId, status, total, processed, errors, ... })
+    """
+    try:
+        with stage('parse'):
+            data = await request_data() or {}
+        kind, students, options, chunk_size = job_request(data)
+        queue = require_job_queue()
+
+        record_batch_size(len(students))
+        with stage('enqueue'):
+            status = await queue.submit(kind, students, options, chunk_size)
+
+        return jsonify(status), 202
+
+    except RequestError as e:
+        return request_error(e)
+    except Exception as e:
+        logger.error(f'Job submission error: {e}')
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/ai/jobs/<job_id>', methods=['GET'])
+async def get_job(job_id):
+    """
+    Progress of a job
+    Returns: { jobId, kind, status (queued|running|completed), total, processed, errors, chunks,
+               chunkSize, completedChunks, createdAt }
+    """
+    try:
+        status = await require_job_queue().status(job_id)
+        if status is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(status), 200
+
+    except RequestError as e:
+        return request_error(e)
+    except Exception as e:
+        logger.error(f'Job status error: {e}')
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/ai/jobs/<job_id>/results', methods=['GET'])
+async def get_job_results(job_id):
+    """
+    Results finished so far, in input order
+    Query params: offset (first result wanted, default 0; pass the previous response's next)
+    Returns: job status plus { offset, next, results }; results stop at the first chunk still pending
+    """
+    try:
+        offset = offset_arg(request.args)
+        queue = require_job_queue()
+
+        with stage('read'):
+            page = await queue.results(job_id, offset)
+        if page is None:
+            return jsonify({'error': 'Job not found'}), 404
+
+        with stage('serialize'):
+            response = payload_response(page)
+        return response, 200
+
+    except RequestError as e:
+        return request_error(e)
+    except Exception as e:
+        logger.error(f'Job results error: {e}')
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/ai/jobs/<job_id>/stream', methods=['GET'])
+async def stream_job(job_id):
+    """
+    Follow a job until it completes
+    Returns: newline-delimited events: { event: 'progress', ...status }, { event: 'results', offset, results }
+             in input order, and finally { event: 'completed', ...status } (or { event: 'error' })
+    """
+    try:
+        queue = require_job_queue()
+    except RequestError as e:
+        return request_error(e)
+
+    async def lines():
+        async for event in queue.events(job_id):
+            yield app.json.dumps(event) + '\n'
+
+    return Response(lines(), mimetype='application/x-ndjson')
+
+@app.route('/ai/jobs/<job_id>', methods=['DELETE'])
+async def cancel_job(job_id):
+    """
+    Cancel a job and delete its results
+    Returns: { jobId, cancelled: true }
+    """
+    try:
+        if not await require_job_queue().cancel(job_id):
+            return jsonify({'error': 'Job not found'}), 404
+
+        logger.info(f'Job {job_id} cancelled')
+        return jsonify(job_cancelled_payload(job_id)), 200
+
+    except RequestError as e:
+        return request_error(e)
+    except Exception as e:
+        logger.error(f'Job cancel error: {e}')
+        return jsonify({'error': str(e)}), 500
+
+# Recommendations endpoint
+@app.route('/ai/recommendations', methods=['POST'])
+async def get_recommendations():
+    """
+    Get personalized recommendations for a student
+    Expected JSON: { studentData: {...}, riskAssessment: {...}, budget: 'low|medium|high' }
+    Returns: personalized intervention recommendations
+    """
+    try:
+        student_data, risk_assessment, budget = recommendation_request(await request_json() or {})
+
+        recommender = get_recommender()
+        result = recommender.recommend_for_student(student_data, risk_assessment, budget)
+
+        logger.info(f'Recommendations generated for student {student_data.get("_id")}')
+
+        return jsonify(result), 200
+
+    except RequestError as e:
+        return request_error(e)
+    except Exception as e:
+        logger.error(f'Recommendations error: {e}')
+        return jsonify({'error': str(e)}), 500
+
+# Batch recommendations endpoint
+@app.route('/ai/recommendations/batch', methods=['POST'])
+async def get_batch_recommendations():
+    """
+    Get personalized recommendations for many students
+    Expected body (JSON or MessagePack): { students: [{ studentData, riskAssessment } or { studentData, features }, ...],
+                     budget: 'low|medium|high' }
+    Returns: recommendations in the same order; students sent with features are scored first
+    """
+    try:
+        with stage('parse'):
+            data = await request_data() or {}
+        students, budget = batch_recommendation_request(data)
+
+        record_batch_size(len(students))
+        with stage('recommend'):
+            results = await arecommend_batch(
+                students, get_recommender(), cached_scorer.get().batch_assess, budget, run_sync=run_blocking
+            )
+
+        logger.info(f'Batch recommendations generated for {len(results)} students')
+
+        with stage('serialize'):
+            response = payload_response({'results': results})
+        return response, 200
+
+    except RequestError as e:
+        return request_error(e)
+    except Exception as e:
+        logger.error(f'Batch recommendations error: {e}')
+        return jsonify({'error': str(e)}), 500
+
+# School recommendations endpoint
+@app.route('/ai/recommendations/school', methods=['POST'])
+async def get_school_recommendations():
+    """
+    Get school-level recommendations
+    Expected body (JSON or MessagePack): { schoolData: {...}, studentRisks: [...], budget: 10000, unitCosts: {...} }
+    Returns: school-level intervention recommendations and a budgeted intervention plan
+    """
+    try:
+        school_data, student_risks, budget, unit_costs = school_recommendation_request(
+            await request_data() or {}
+        )
+
+        recommender = get_recommender()
+        result = await run_blocking(
+            recommender.recommend_for_school, school_data, student_risks, budget, unit_costs
+        )
+
+        logger.info(f'School recommendations generated for {school_data.get("name")}')
+
+        return payload_response(result), 200
+
+    except RequestError as e:
+        return request_error(e)
+    except Exception as e:
+        logger.error(f'School recommendations error: {e}')
+        return jsonify({'error': str(e)}), 500
+
+# Error handlers
+@app.errorhandler(404)
+async def not_found(error):
+    return jsonify({'error': 'Endpoint not found'}), 404
+
+@app.errorhandler(500)
+async def internal_error(error):
+    logger.error(f'Internal server error: {error}')
+    return jsonify({'error': 'Internal server error'}), 500
+
+if __name__ == '__main__':
+    import uvicorn
+
+    port = int(os.getenv('PORT', 5001))
+    logger.info(f'🚀 EduLink AI Service (async) starting on port {port}')
+    uvicorn.run(app, host='0.0.0.0', port=port)
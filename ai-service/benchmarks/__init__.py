@@ -0,0 +1,4 @@
+"""
+AI Service Benchmarks
+Run from the ai-service directory, e.g. python -m benchmarks.bench_vectorized_scoring
+"""
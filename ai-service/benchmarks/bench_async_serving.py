@@ -0,0 +1,243 @@
+"""
+Async Serving Benchmark
+Checks that app.py and asgi.py return identical responses, then runs both
+under gunicorn and measures how they cope with many slow clients
+"""
+
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import time
+
+import app as sync_app
+import asgi as async_app
+from benchmarks.synthetic import generate_student_features
+
+SLOW_CLIENTS = [0, 10, 1_000]
+CONCURRENT_REQUESTS = 1_000
+PROBE_TIMEOUT = 5.0
+
+SERVERS = {
+    'sync': ['gunicorn', 'app:app', '--workers', '1'],
+    'async': ['gunicorn', 'asgi:app', '--workers', '1', '-k', 'uvicorn.workers.UvicornWorker'],
+}
+
+
+def contract_cases():
+    """(method, path, body, content type) requests covering every route"""
+    features = generate_student_features(50)
+    ndjson = ''.join(json.dumps(item) + '\n' for item in features[:7]) + 'not json\n'
+    json_cases = [
+        ('GET', '/health', None),
+        ('GET', '/', None),
+        ('GET', '/missing', None),
+        ('POST', '/ai/detect-language', {'text': 'maakye me ka'}),
+        ('POST', '/ai/detect-language', {}),
+        ('POST', '/ai/detect-language/batch', {'records': [{'phone': '0241234567'}, {'text': 'akpe'}, 5]}),
+        ('POST', '/ai/detect-language/phones', {'phones': ['0241234567', '+233302111222']}),
+        ('POST', '/ai/detect-language/phones', {'phones': ['0241234567', 3]}),
+        ('POST', '/ai/score-risk', {'features': features[0]}),
+        ('POST', '/ai/score-risk', {'features': {'avgLearningScore': 'n/a'}}),
+        ('POST', '/ai/score-risk/batch', {'students': features}),
+        ('POST', '/ai/score-risk/batch', {}),
+        ('GET', '/ai/score-risk/school/not-an-id', None),
+        ('POST', '/ai/score-risk/incremental/students', {'students': [{'studentId': 'a'}]}),
+        ('POST', '/ai/score-risk/incremental/events', {
+            'events': [{'student': 'a', 'date': '2025-03-03', 'status': 'absent'}, {'student': 'a'}],
+            'asOf': '2025-03-04',
+        }),
+        ('POST', '/ai/score-risk/incremental/students', {'students': [
+            {**features[2], 'studentId': 'r1', 'schoolId': 'school-1'},
+            {**features[3], 'studentId': 'r2', 'schoolId': 'school-1'},
+            {**features[4], 'studentId': 'r3', 'schoolId': 'school-2'},
+        ]}),
+        ('POST', '/ai/score-risk/incremental/events', {
+            'events': [{'student': 'r1', 'date': '2025-03-05', 'status': 'absent'}],
+            'asOf': '2025-03-05',
+        }),
+        ('GET', '/ai/schools/summary?schoolIds=school-1,school-2,nope&top=2', None),
+        ('GET', '/ai/schools/summary', None),
+        ('GET', '/ai/schools/summary?top=-1', None),
+        ('POST', '/ai/recommendations', {
+            'studentData': {'_id': 'a'},
+            'riskAssessment': {'riskLevel': 'high', 'riskScore': 0.6, 'riskFactors': []},
+        }),
+        ('POST', '/ai/recommendations/batch', {
+            'students': [
+                {'studentData': {'_id': 'a'}, 'riskAssessment': {'riskLevel': 'high', 'recommendations': ['Home Visit']}},
+                {'features': features[1]},
+                {'studentData': {'_id': 'c'}, 'features': {'avgLearningScore': 'n/a'}},
+                {'studentData': 'c'},
+                7,
+            ],
+            'budget': 'low',
+        }),
+        ('POST', '/ai/recommendations/batch', {'students': {}}),
+        ('POST', '/ai/recommendations/school', {
+            'schoolData': {'name': 'Test School'},
+            'studentRisks': [{'riskLevel': 'high'}],
+            'budget': 500,
+        }),
+        ('POST', '/ai/recommendations/school', {
+            'schoolData': {'name': 'Test School'},
+            'studentRisks': [
+                {'studentId': 'a', 'riskLevel': 'high', 'riskScore': 0.7,
+                 'recommendations': ['Home Visit', 'Parent Engagement Call']},
+                {'studentId': 'b', 'riskLevel': 'medium', 'riskScore': 0.4,
+                 'recommendations': ['Learning Support']},
+            ],
+            'budget': 100,
+            'unitCosts': {'Home Visit': 40},
+        }),
+        ('POST', '/ai/recommendations/school', {
+            'schoolData': {'name': 'Test School'},
+            'studentRisks': [{'riskLevel': 'high'}],
+            'budget': 'lots',
+        }),
+        # Without REDIS_URL the job routes validate, then answer 503
+        ('POST', '/ai/jobs', {'students': features[:3], 'chunkSize': 2}),
+        ('POST', '/ai/jobs', {'kind': 'retrain', 'students': features[:3]}),
+        ('POST', '/ai/jobs', {'students': features[:3], 'chunkSize': 0}),
+        ('POST', '/ai/jobs', {'kind': 'recommendations'}),
+        ('GET', '/ai/jobs/abc123', None),
+        ('GET', '/ai/jobs/abc123/results?offset=-1', None),
+        ('DELETE', '/ai/jobs/abc123', None),
+    ]
+    cases = [
+        (method, path, json.dumps(body) if body is not None else None, 'application/json')
+        for method, path, body in json_cases
+    ]
+    cases.append(('POST', '/ai/score-risk/batch/stream?chunkSize=3', ndjson, 'application/x-ndjson'))
+    cases.append(('POST', '/ai/score-risk/top-k?k=3&chunkSize=2', ndjson + '5\n', 'application/x-ndjson'))
+    cases.append(('POST', '/ai/score-risk/top-k?k=0', ndjson, 'application/x-ndjson'))
+    cases.append(('POST', '/ai/score-risk', 'features', 'text/plain'))
+    return cases
+
+
+def check_contracts():
+    """Send every case to both apps through their test clients and compare"""
+    cases = contract_cases()
+
+    sync_client = sync_app.app.test_client()
+    expected = []
+    for method, path, body, content_type in cases:
+        response = sync_client.open(path, method=method, data=body, content_type=content_type)
+        expected.append((response.status_code, response.get_data(as_text=True)))
+
+    async def run_async():
+        client = async_app.app.test_client()
+        actual = []
+        for method, path, body, content_type in cases:
+            response = await client.open(
+                path, method=method, data=body or '', headers={'Content-Type': content_type}
+            )
+            actual.append((response.status_code, await response.get_data(as_text=True)))
+        return actual
+
+    actual = asyncio.run(run_async())
+    for case, sync_result, async_result in zip(cases, expected, actual):
+        assert sync_result == async_result, f'{case[0]} {case[1]}: {sync_result} != {async_result}'
+    print(f'Contract check passed ({len(cases)} requests, identical status and body)')
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(command, port):
+    env = dict(os.environ, LOG_LEVEL='WARNING')
+    process = subprocess.Popen(
+        command + ['--bind', f'127.0.0.1:{port}', '--backlog', '4096', '--log-level', 'warning'],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f'Server did not start: {command}')
+
+
+async def request(port, body: bytes, timeout: float) -> float:
+    """POST /ai/score-risk and return the latency in seconds"""
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(
+            b'POST /ai/score-risk HTTP/1.1\r\nHost: localhost\r\n'
+            b'Content-Type: application/json\r\nConnection: close\r\n'
+            + f'Content-Length: {len(body)}\r\n\r\n'.encode() + body
+        )
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout)
+        assert response.startswith(b'HTTP/1.1 200'), response[:80]
+        return time.perf_counter() - started
+    finally:
+        writer.close()
+
+
+async def slow_client(port):
+    """Connect and send headers promising a body that never arrives"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(
+        b'POST /ai/score-risk HTTP/1.1\r\nHost: localhost\r\n'
+        b'Content-Type: application/json\r\nContent-Length: 1000\r\n\r\n{'
+    )
+    await writer.drain()
+    return writer
+
+
+async def measure(port, slow_count: int, body: bytes):
+    """Probe latency with slow clients attached, then a burst of concurrent requests"""
+    writers = [await slow_client(port) for _ in range(slow_count)]
+    try:
+        try:
+            probe = f'{await request(port, body, PROBE_TIMEOUT) * 1000:.1f} ms'
+        except asyncio.TimeoutError:
+            probe = f'timeout (>{PROBE_TIMEOUT:.0f}s)'
+
+        burst = 'skipped'
+        if slow_count == 0:
+            started = time.perf_counter()
+            latencies = await asyncio.gather(
+                *(request(port, body, 60) for _ in range(CONCURRENT_REQUESTS))
+            )
+            elapsed = time.perf_counter() - started
+            latencies.sort()
+            burst = (f'{CONCURRENT_REQUESTS / elapsed:,.0f} req/s, '
+                     f'p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.0f} ms')
+        return probe, burst
+    finally:
+        for writer in writers:
+            writer.close()
+
+
+def main():
+    check_contracts()
+
+    body = json.dumps({'features': generate_student_features(1)[0]}).encode()
+    print(f'{"mode":>6} {"slow clients":>13} {"probe latency":>16}  burst of {CONCURRENT_REQUESTS:,}')
+    for mode, command in SERVERS.items():
+        port = free_port()
+        process = start_server(command, port)
+        try:
+            asyncio.run(request(port, body, 60))  # Warm up lazily created services
+            for slow_count in SLOW_CLIENTS:
+                probe, burst = asyncio.run(measure(port, slow_count, body))
+                print(f'{mode:>6} {slow_count:>13,} {probe:>16}  {burst}')
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+Attendance Trend Benchmark
+Checks the whole-school trend kernels against a per-student loop, times
+them as the school grows and shows which students the trend rules catch
+"""
+
+import math
+import random
+import time
+from datetime import date, timedelta
+
+from services.attendance_trends import (
+    MIN_TREND_RECORDS, RATE_FEATURES, TREND_FEATURES, AttendanceRows, attendance_trends, trend_columns,
+)
+from services.incremental import HISTORY_DAYS, parse_day
+from services.risk_scorer import RiskScorer
+
+AS_OF = date(2025, 3, 14)
+SIZES = (1_000, 10_000, 50_000)
+
+
+def generate_records(count: int, seed: int = 42, as_of: date = AS_OF):
+    """
+    90 days of school-day attendance, sorted by student then date
+
+    A third of the students slide: their absence rate climbs over the
+    window, ending several times higher than it started.
+    """
+    rng = random.Random(seed)
+    days = [as_of - timedelta(days=age) for age in range(HISTORY_DAYS - 1, -1, -1)]
+    school_days = [day for day in days if day.weekday() < 5]
+    records = []
+    for index in range(count):
+        student_id = f'student-{index:06d}'
+        start = rng.choice([0.02, 0.05, 0.1, 0.2])
+        end = start * rng.choice([1, 1, 4])
+        for position, day in enumerate(school_days):
+            if rng.random() < 0.02:
+                continue  # Not marked that day
+            rate = start + (end - start) * position / len(school_days)
+            roll = rng.random()
+            if roll < rate:
+                status = 'absent'
+            elif roll < rate + 0.03:
+                status = 'excused'
+            elif roll < rate + 0.08:
+                status = 'late'
+            else:
+                status = 'present'
+            records.append({'student': student_id, 'date': day.isoformat(), 'status': status})
+    return records
+
+
+def reference_trends(records, as_of):
+    """Straightforward per-student computation of the same features"""
+    as_of = parse_day(as_of)
+    by_student = {}
+    for record in records:
+        age = (as_of - parse_day(record['date'])).days
+        if 0 <= age < HISTORY_DAYS:
+            by_student.setdefault(str(record['student']), {})[age] = record['status']
+
+    trends = {}
+    for student_id, statuses in by_student.items():
+        ages = sorted(statuses, reverse=True)  # Oldest first
+        features = {}
+        for days, name in RATE_FEATURES.items():
+            inside = [statuses[age] for age in ages if age < days]
+            present = sum(status == 'present' for status in inside)
+            features[name] = present / len(inside) * 100 if inside else 100
+
+        n = len(ages)
+        xs = [-age for age in ages]
+        ys = [1.0 if statuses[age] == 'present' else 0.0 for age in ages]
+        mean_x, mean_y = sum(xs) / n, sum(ys) / n
+        spread = sum((x - mean_x) ** 2 for x in xs)
+        if n >= MIN_TREND_RECORDS and spread > 0:
+            slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread
+            features['attendanceTrend'] = round(slope * 700, 2)
+        else:
+            features['attendanceTrend'] = 0.0
+
+        weekday_records, weekday_absences = [0] * 7, [0] * 7
+        for age in ages:
+            weekday = (as_of - timedelta(days=age)).weekday()
+            weekday_records[weekday] += 1
+            weekday_absences[weekday] += statuses[age] == 'absent'
+        rates = [absences / records if records else 0 for absences, records in zip(weekday_absences, weekday_records)]
+        peak_rate = max(rates)
+        features['peakWeekdayAbsenceRate'] = peak_rate * 100
+        if peak_rate > 0:
+            features['peakAbsenceWeekday'] = rates.index(peak_rate)
+
+        longest = run = 0
+        for age in ages:
+            run = run + 1 if statuses[age] == 'absent' else 0
+            longest = max(longest, run)
+        features['longestAbsenceStreak'] = longest
+        features['daysSinceLastPresent'] = min(
+            (age for age in ages if statuses[age] == 'present'), default=HISTORY_DAYS
+        )
+        trends[student_id] = features
+    return trends
+
+
+def same(actual, expected) -> bool:
+    if actual.keys() != expected.keys():
+        return False
+    # The slope is rounded, so sums added in a different order may land
+    # on either side of a rounding boundary
+    return all(
+        math.isclose(actual[key], expected[key], rel_tol=1e-9, abs_tol=0.011 if key == 'attendanceTrend' else 1e-9)
+        for key in expected
+    )
+
+
+def check_equivalence():
+    records = generate_records(2_000, seed=7)
+    # Shuffled input, a day marked twice, unknown statuses and records
+    # outside the window
+    random.Random(1).shuffle(records)
+    records.append({'student': 'student-000001', 'date': AS_OF.isoformat(), 'status': 'absent'})
+    records.append({'student': 'student-000001', 'date': AS_OF.isoformat(), 'status': 'present'})
+    records.append({'student': 'student-000002', 'date': AS_OF.isoformat(), 'status': 'holiday'})
+    records.append({'student': 'student-000003', 'date': (AS_OF - timedelta(days=HISTORY_DAYS)).isoformat(),
+                    'status': 'absent'})
+    records.append({'student': 'student-000004', 'date': (AS_OF + timedelta(days=1)).isoformat(),
+                    'status': 'absent'})
+    records.extend({'student': 'only-absent', 'date': (AS_OF - timedelta(days=age)).isoformat(), 'status': 'absent'}
+                   for age in range(3))
+
+    actual = attendance_trends(records, AS_OF)
+    expected = reference_trends(records, AS_OF)
+    assert actual.keys() == expected.keys()
+    mismatched = [student_id for student_id in expected if not same(actual[student_id], expected[student_id])]
+    assert not mismatched, (mismatched[:3], actual[mismatched[0]], expected[mismatched[0]])
+    assert actual['only-absent']['daysSinceLastPresent'] == HISTORY_DAYS
+    assert attendance_trends([], AS_OF) == {}
+    print(f'Trend kernels match the per-student loop ({len(expected):,} students, {len(records):,} records)')
+
+
+def best_ms(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def time_kernels():
+    print(f'\n{"students":>9} {"records":>10} {"encode ms":>10} {"kernels ms":>11} {"ns/record":>10} {"loop ms":>9}')
+    for count in SIZES:
+        records = generate_records(count)
+        rows = AttendanceRows.from_records(records, AS_OF)
+        encode_ms = best_ms(lambda: AttendanceRows.from_records(records, AS_OF), 1)
+        kernel_ms = best_ms(lambda: trend_columns(rows))
+        loop_ms = best_ms(lambda: reference_trends(records, AS_OF), 1) if count <= 10_000 else float('nan')
+        print(f'{count:>9,} {len(records):>10,} {encode_ms:>10.0f} {kernel_ms:>11.1f} '
+              f'{kernel_ms * 1e6 / len(records):>10.1f} {loop_ms:>9.0f}')
+
+
+def show_scoring():
+    """How many risk scores the trend rules raise for a school with sliding students"""
+    records = generate_records(5_000, seed=3)
+    trends = attendance_trends(records, AS_OF)
+    base = {'contactVerified': True, 'locationType': 'Rural', 'wealthProxy': 'proxy_only'}
+    with_trends = [{**features, 'studentId': student_id, **base} for student_id, features in trends.items()]
+    without_trends = [
+        {key: value for key, value in features.items() if key not in TREND_FEATURES} for features in with_trends
+    ]
+
+    scorer = RiskScorer()
+    before = scorer.batch_assess(without_trends)
+    after = scorer.batch_assess(with_trends)
+    sliding = sum(features['attendanceTrend'] < -3 for features in trends.values())
+    raised = sum(new.risk_score > old.risk_score for old, new in zip(before, after))
+    print(f'\n{sliding:,} of {len(trends):,} students have a falling trend (< -3 points/week); '
+          f'the trend rules raise {raised:,} risk scores')
+
+
+def main():
+    check_equivalence()
+    time_kernels()
+    show_scoring()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Cold Start Benchmark
+Measures import time and first-request latency of app.py and asgi.py in
+fresh processes, with eager and lazy (AI_LAZY_STARTUP=true) startup
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RUNS = 5
+
+# Runs in a fresh interpreter and prints its timings as JSON
+CHILD = '''
+import asyncio, json, sys, time
+start = time.perf_counter()
+module = __import__(sys.argv[1])
+timings = {'import': time.perf_counter() - start}
+features = {'features': {'absences7Days': 3, 'attendanceRate30Days': 60}}
+
+async def timed(name, call):
+    start = time.perf_counter()
+    response = call()
+    if asyncio.iscoroutine(response):
+        response = await response
+    timings[name] = time.perf_counter() - start
+    assert response.status_code == 200, (name, response.status_code)
+
+async def main():
+    client = module.app.test_client()
+    await timed('health', lambda: client.get('/health'))
+    await timed('scoreRisk', lambda: client.post('/ai/score-risk', json=features))
+
+asyncio.run(main())
+print(json.dumps({name: value * 1000 for name, value in timings.items()}))
+'''
+
+
+def cold_start(module: str, lazy: bool) -> dict:
+    """Timings (ms) of one fresh process, plus its total wall time"""
+    env = dict(os.environ, LOG_LEVEL='CRITICAL', AI_LAZY_STARTUP='true' if lazy else 'false')
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD, module],
+        capture_output=True, text=True, env=env, check=True
+    ).stdout
+    total = (time.perf_counter() - start) * 1000
+    timings = json.loads(output.strip().splitlines()[-1])
+    timings['process'] = total
+    return timings
+
+
+def main():
+    print('Databases as configured in the environment (unset MONGODB_URI/REDIS_URL = offline); '
+          f'median of {RUNS} fresh processes')
+    print(f'\n{"app":>5} {"startup":>8} {"import ms":>10} {"first /health":>14} '
+          f'{"first score":>12} {"import→scored":>14} {"process ms":>11}')
+    for module in ('app', 'asgi'):
+        for lazy in (False, True):
+            runs = [cold_start(module, lazy) for _ in range(RUNS)]
+            median = {name: statistics.median(run[name] for run in runs) for name in runs[0]}
+            ready = median['import'] + median['health'] + median['scoreRisk']
+            print(f'{module:>5} {"lazy" if lazy else "eager":>8} {median["import"]:>10.0f} '
+                  f'{median["health"]:>14.1f} {median["scoreRisk"]:>12.1f} {ready:>14.0f} '
+                  f'{median["process"]:>11.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Columnar Export Benchmark
+Checks that Parquet bulk scoring matches batch_assess, then times scoring a
+Parquet feature file column by column against rebuilding a dict per row
+"""
+
+import io
+import time
+
+from services.columnar import (
+    BatchWriter, assessment_schema, columnar_available, feature_columns, iter_export, score_file,
+)
+from services.records import FEATURE_FIELDS, FeatureColumns, assessment_columns
+from services.risk_scorer import RiskScorer
+from benchmarks.synthetic import generate_student_features
+
+STUDENTS = 200_000
+ROW_GROUP_SIZE = 20_000
+
+
+def features_file(features_list, file_format='parquet', row_group_size=ROW_GROUP_SIZE) -> bytes:
+    return b''.join(iter_export([('school-1', features_list, None)], ('features',), file_format, row_group_size))
+
+
+def check_equivalence():
+    scorer = RiskScorer()
+    features_list = generate_student_features(5_000, 3)
+    features_list[10]['absences30Days'] = float('nan')
+    features_list[11]['avgLearningScore'] = 'high'
+    columns = {key: [features.get(key) for features in features_list] for key in FEATURE_FIELDS}
+    expected = assessment_columns(scorer.batch_assess(features_list))
+    assert scorer.assess_columns(FeatureColumns(columns, len(features_list))) == expected
+
+    # Files hold null for values that don't fit a column (the string
+    # score), and nulls read back as features that were not sent
+    stored = [{key: value for key, value in features.items() if value is not None} for features in features_list]
+    del stored[11]['avgLearningScore']
+    expected = assessment_columns(scorer.batch_assess(stored))
+
+    for input_format in ('parquet', 'arrow'):
+        for output_format in ('parquet', 'arrow'):
+            output = io.BytesIO()
+            data = io.BytesIO(features_file(features_list, input_format, 1_000))
+            summary = score_file(data, output, scorer, input_format, output_format, batch_size=1_500)
+            actual = read_table(output.getvalue(), output_format).to_pydict()
+            assert actual.pop('schoolId') == ['school-1'] * len(features_list)
+            assert actual == expected, (input_format, output_format)
+            assert summary['rows'] == len(features_list)
+    print('Columnar scoring matches batch_assess (Parquet and Arrow, in and out)')
+
+
+def read_table(data: bytes, file_format: str):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    if file_format == 'parquet':
+        return pq.read_table(io.BytesIO(data))
+    return pa.ipc.open_stream(data).read_all()
+
+
+def score_with_dicts(data: bytes, scorer) -> bytes:
+    """Reference: one dict per row through batch_assess, then back to columns"""
+    import pyarrow.parquet as pq
+    writer = BatchWriter(assessment_schema(), 'parquet', ROW_GROUP_SIZE)
+    chunks = []
+    for batch in pq.ParquetFile(io.BytesIO(data)).iter_batches(batch_size=ROW_GROUP_SIZE):
+        rows = [{key: value for key, value in row.items() if value is not None} for row in batch.to_pylist()]
+        chunks.append(writer.write(assessment_columns(scorer.batch_assess(rows))))
+    chunks.append(writer.close())
+    return b''.join(chunks)
+
+
+def best_ms(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    if not columnar_available():
+        print('pyarrow is not installed (pip install -r requirements.txt); skipping')
+        return
+
+    check_equivalence()
+
+    scorer = RiskScorer()
+    features_list = generate_student_features(STUDENTS)
+    start = time.perf_counter()
+    data = features_file(features_list)
+    print(f'\nWrote {STUDENTS:,} feature rows as Parquet ({len(data) / 1e6:.1f} MB) in '
+          f'{(time.perf_counter() - start) * 1000:.0f} ms')
+
+    dicts_ms = best_ms(lambda: score_with_dicts(data, scorer))
+    columns_ms = best_ms(lambda: score_file(io.BytesIO(data), io.BytesIO(), scorer, batch_size=ROW_GROUP_SIZE))
+    print(f'Scoring Parquet -> Parquet ({ROW_GROUP_SIZE:,} rows per row group)')
+    print(f'{"dict per row":>16}: {dicts_ms:7.0f} ms ({dicts_ms * 1000 / STUDENTS:.2f} us/student)')
+    print(f'{"columns":>16}: {columns_ms:7.0f} ms ({columns_ms * 1000 / STUDENTS:.2f} us/student, '
+          f'{dicts_ms / columns_ms:.1f}x)')
+
+    export_ms = best_ms(lambda: feature_columns(features_list))
+    print(f'\nfeature_columns for {STUDENTS:,} students: {export_ms:.0f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Incremental Scoring Benchmark
+Compares attendance updates through IncrementalRiskScorer with recounting
+every enrolled student's windows and rescoring them all
+"""
+
+import time
+from datetime import date, timedelta
+
+from services.attendance_trends import EMPTY_TRENDS, attendance_trends
+from services.incremental import ATTENDANCE_FEATURES, IncrementalRiskScorer, parse_day
+from services.risk_scorer import RiskScorer
+from benchmarks.synthetic import generate_attendance_events, generate_student_features
+
+ENROLLED = 20_000
+HISTORY_DAYS = 60
+CHANGED_SIZES = [100, 1_000, 10_000]
+START = date(2025, 1, 6)
+
+
+def recount(history, as_of):
+    """Attendance features from scratch, as the feature extractor computes them"""
+    trends = attendance_trends(
+        ({'student': student_id, 'date': day, 'status': status}
+         for student_id, records in history.items() for day, status in records.items()),
+        as_of
+    )
+    features = {}
+    for student_id, records in history.items():
+        days = sorted((day for day in records if (as_of - day).days < 90), reverse=True)
+        last_30 = [records[day] for day in days if (as_of - day).days < 30]
+        run = 0
+        for day in days[:30]:
+            if records[day] != 'absent':
+                break
+            run += 1
+        trend = trends.get(student_id, EMPTY_TRENDS)
+        features[student_id] = {
+            'absences7Days': sum(
+                1 for day in days if (as_of - day).days < 7 and records[day] == 'absent'
+            ),
+            'absences30Days': last_30.count('absent'),
+            'absences90Days': sum(1 for day in days if records[day] == 'absent'),
+            'attendanceRate30Days': (
+                last_30.count('present') / len(last_30) * 100 if last_30 else 100
+            ),
+            'consecutiveAbsences': run,
+            'attendanceTrend': trend['attendanceTrend'],
+            'longestAbsenceStreak': trend['longestAbsenceStreak'],
+        }
+    return features
+
+
+def full_rescore(scorer, students, history, as_of):
+    """Baseline: recount every student's windows and rescore everyone"""
+    attendance = recount(history, as_of)
+    features_list = [
+        {**student, **attendance[student['studentId']]} for student in students
+    ]
+    return scorer.batch_assess(features_list)
+
+
+def record(history, events):
+    for event in events:
+        history.setdefault(event['student'], {})[parse_day(event['date'])] = event['status']
+
+
+def check_equivalence(scorer, incremental, students, history):
+    expected = full_rescore(scorer, students, history, incremental.as_of)
+    for assessment in expected:
+        actual = incremental.assessment(assessment.student_id)
+        assert actual.to_dict() == assessment.to_dict(), assessment.student_id
+
+
+def main():
+    scorer = RiskScorer()
+    students = generate_student_features(ENROLLED)
+    for student in students:
+        for key in ATTENDANCE_FEATURES:
+            student.pop(key, None)
+    student_ids = [student['studentId'] for student in students]
+
+    incremental = IncrementalRiskScorer(scorer)
+    history = {}
+    events = generate_attendance_events(student_ids, START, HISTORY_DAYS)
+    record(history, events)
+    as_of = START + timedelta(days=HISTORY_DAYS - 1)
+
+    started = time.perf_counter()
+    incremental.apply_events(events, as_of=as_of)
+    incremental.register(students)
+    print(f'Loaded {len(events):,} events for {ENROLLED:,} students in {time.perf_counter() - started:.2f}s')
+    check_equivalence(scorer, incremental, students, history)
+
+    # Moving to the next day expires the records leaving each window
+    day = as_of + timedelta(days=1)
+    started = time.perf_counter()
+    updated, _ = incremental.apply_events([], as_of=day)
+    rollover_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    full_rescore(scorer, students, history, day)
+    full_ms = (time.perf_counter() - started) * 1000
+    check_equivalence(scorer, incremental, students, history)
+    print(f'Day rollover: {rollover_ms:.1f} ms ({len(updated):,} risk changes), '
+          f'full rescore: {full_ms:.1f} ms')
+
+    # Attendance marked during the day for a growing number of students
+    print(f'{"changed":>8} {"incremental ms":>15} {"full rescore ms":>16} {"speedup":>8}')
+    for seed, changed in enumerate(CHANGED_SIZES, start=1):
+        updates = generate_attendance_events(student_ids[:changed], day, 1, seed=seed)
+        record(history, updates)
+
+        started = time.perf_counter()
+        updated, _ = incremental.apply_events(updates, as_of=day)
+        incremental_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        full_rescore(scorer, students, history, day)
+        full_ms = (time.perf_counter() - started) * 1000
+
+        check_equivalence(scorer, incremental, students, history)
+        print(f'{changed:>8,} {incremental_ms:>15.1f} {full_ms:>16.1f} {full_ms / incremental_ms:>7.1f}x'
+              f'  ({len(updated):,} risk changes)')
+
+    print('Equivalence check passed after every update')
+
+
+if __name__ == '__main__':
+    main()
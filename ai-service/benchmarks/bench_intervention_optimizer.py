@@ -0,0 +1,161 @@
+"""
+Intervention Optimizer Benchmark
+Times the budgeted intervention plan, checks it against exhaustive search
+on small instances and compares it with the school heuristic's budget split
+"""
+
+import itertools
+import random
+import time
+
+from services.intervention_optimizer import plan_interventions, residual_risk
+from services.recommender import INTERVENTION_IMPACT, Recommender
+from services.risk_scorer import RiskScorer
+from benchmarks.synthetic import generate_student_features
+
+TIMING_SIZES = [1_000, 5_000, 10_000, 50_000]
+BUDGET_PER_STUDENT = 40
+SMALL_INSTANCES = 300
+SCHOOL_SIZE = 800
+SCHOOL_BUDGETS = [500, 2_000, 10_000, 50_000]
+
+
+def catalog(recommender):
+    names = list(recommender.interventions)
+    costs = [recommender.interventions[name]['unit_cost'] for name in names]
+    effects = [recommender.interventions[name]['effectiveness'] * INTERVENTION_IMPACT for name in names]
+    return names, costs, effects
+
+
+def total_reduction(risks, chosen, effects) -> float:
+    """Expected reduction of a set of (student, intervention) assignments"""
+    by_student = {}
+    for student, intervention in chosen:
+        by_student.setdefault(student, []).append(effects[intervention])
+    return sum(risks[student] - residual_risk(risks[student], student_effects)
+               for student, student_effects in by_student.items())
+
+
+def check_small_instances(seed=7):
+    """Greedy vs exhaustive optimum on instances small enough to enumerate"""
+    rng = random.Random(seed)
+    ratios = []
+    for _ in range(SMALL_INSTANCES):
+        students = rng.randint(2, 5)
+        costs = [rng.randint(1, 20) for _ in range(4)]
+        effects = [rng.uniform(0.2, 0.45) for _ in range(4)]
+        risks = [rng.random() for _ in range(students)]
+        options = [rng.sample(range(4), rng.randint(1, 3)) for _ in range(students)]
+        budget = rng.randint(5, 40)
+
+        candidates = [(s, i) for s in range(students) for i in options[s]]
+        optimum = 0.0
+        for size in range(len(candidates) + 1):
+            for subset in itertools.combinations(candidates, size):
+                if sum(costs[i] for _, i in subset) <= budget:
+                    optimum = max(optimum, total_reduction(risks, subset, effects))
+
+        assignments, total_cost, bound = plan_interventions(risks, options, costs, effects, budget)
+        greedy = total_reduction(risks, [(s, i) for s, i, _ in assignments], effects)
+        assert total_cost <= budget
+        assert abs(greedy - sum(gain for _, _, gain in assignments)) < 1e-9
+        assert bound >= optimum - 1e-9
+        ratios.append(greedy / optimum if optimum else 1.0)
+
+    ratios.sort()
+    print(f'Exhaustive check ({SMALL_INSTANCES} instances): greedy/optimum '
+          f'min {ratios[0]:.3f}, p10 {ratios[len(ratios) // 10]:.3f}, '
+          f'mean {sum(ratios) / len(ratios):.3f}, optimal in '
+          f'{sum(1 for ratio in ratios if ratio > 1 - 1e-9) / len(ratios):.0%}')
+
+
+def time_plans(recommender):
+    names, costs, effects = catalog(recommender)
+    rng = random.Random(11)
+    print(f'\nTiming (every student eligible for all {len(names)} interventions, '
+          f'budget {BUDGET_PER_STUDENT} GHS per student)')
+    print(f'{"students":>9} {"candidates":>11} {"ms":>7} {"assigned":>9} {"gap":>6}')
+    for size in TIMING_SIZES:
+        risks = [rng.random() for _ in range(size)]
+        options = [range(len(names))] * size
+        budget = size * BUDGET_PER_STUDENT
+        best = float('inf')
+        for _ in range(3):
+            started = time.perf_counter()
+            assignments, _, bound = plan_interventions(risks, options, costs, effects, budget)
+            best = min(best, time.perf_counter() - started)
+        reduction = sum(gain for _, _, gain in assignments)
+        print(f'{size:>9,} {size * len(names):>11,} {best * 1000:>7.0f} '
+              f'{len(assignments):>9,} {(bound - reduction) / bound:>6.1%}')
+
+
+def heuristic_assignments(student_risks, budget, names):
+    """
+    Per-student reading of recommend_for_school's budget split
+
+    30% buys Home Visits for high/critical students when they are over 30%
+    of the school, 25% buys Learning Support for students with a learning
+    factor and 20% buys Parent Engagement Calls for students with a contact
+    factor, highest risk first, whenever those issues are among the top five.
+    """
+    recommender = Recommender()
+    summary = recommender.recommend_for_school({'name': 'Benchmark'}, student_risks, budget)
+    programs = {recommendation['intervention'] for recommendation in summary['recommendations']}
+    slices = [
+        ('School-wide Attendance Campaign', 0.3, 'Home Visit',
+         lambda risk: risk['riskLevel'] in ('high', 'critical')),
+        ('Teacher Training Program', 0.25, 'Learning Support',
+         lambda risk: any('learning' in factor['factor'].lower() for factor in risk['riskFactors'])),
+        ('Parent Engagement Initiative', 0.2, 'Parent Engagement Call',
+         lambda risk: any('contact' in factor['factor'].lower() for factor in risk['riskFactors'])),
+    ]
+    order = sorted(range(len(student_risks)), key=lambda s: student_risks[s]['riskScore'], reverse=True)
+    chosen = []
+    spent = 0.0
+    for program, share, name, targeted in slices:
+        if program not in programs:
+            continue
+        intervention = names.index(name)
+        cost = recommender.interventions[name]['unit_cost']
+        remaining = budget * share
+        for student in order:
+            if cost > remaining:
+                break
+            if targeted(student_risks[student]):
+                chosen.append((student, intervention))
+                remaining -= cost
+                spent += cost
+    return chosen, spent
+
+
+def compare_with_heuristic(recommender):
+    names, _, effects = catalog(recommender)
+    student_risks = RiskScorer().batch_calculate(generate_student_features(SCHOOL_SIZE))
+    risks = [risk['riskScore'] for risk in student_risks]
+
+    print(f'\nQuality vs the budget-split heuristic ({SCHOOL_SIZE} students, '
+          f'expected reduction in summed risk score)')
+    print(f'{"budget":>7} {"heuristic":>10} {"spent":>7} {"optimizer":>10} {"spent":>7} '
+          f'{"bound":>7} {"gain":>6} {"ms":>5}')
+    for budget in SCHOOL_BUDGETS:
+        chosen, spent = heuristic_assignments(student_risks, budget, names)
+        baseline = total_reduction(risks, chosen, effects)
+
+        started = time.perf_counter()
+        plan = recommender.optimize_interventions(student_risks, budget)
+        elapsed = (time.perf_counter() - started) * 1000
+        optimized = plan['expectedRiskReduction']
+        gain = f'{optimized / baseline:>5.1f}x' if baseline else '    -'
+        print(f'{budget:>7,} {baseline:>10.2f} {spent:>7,.0f} {optimized:>10.2f} '
+              f'{plan["totalCost"]:>7,.0f} {plan["upperBound"]:>7.2f} {gain} {elapsed:>5.0f}')
+
+
+def main():
+    recommender = Recommender()
+    check_small_instances()
+    time_plans(recommender)
+    compare_with_heuristic(recommender)
+
+
+if __name__ == '__main__':
+    main()
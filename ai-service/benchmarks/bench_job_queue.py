@@ -0,0 +1,67 @@
+"""
+Scoring Job Queue Benchmark
+Times a job through a fake Redis worker: submission, first results and all
+results, against scoring the batch in the request (correctness, recovery
+and the job routes are covered by tests/test_job_queue.py)
+"""
+
+import os
+import time
+
+os.environ.setdefault('LOG_LEVEL', 'CRITICAL')
+
+import fakeredis  # noqa: E402
+
+from services.job_queue import JobQueue, JobWorker, job_handlers  # noqa: E402
+from services.recommender import get_recommender  # noqa: E402
+from services.risk_scorer import RiskScorer  # noqa: E402
+from benchmarks.synthetic import generate_student_features  # noqa: E402
+
+TIMED_STUDENTS = 20_000
+CLAIM_TIMEOUT = 0.01
+
+
+def expected_assessments(scorer, students):
+    return [assessment.to_dict() for assessment in scorer.batch_assess(students)]
+
+
+def time_job(scorer, handlers):
+    students = generate_student_features(TIMED_STUDENTS)
+    start = time.perf_counter()
+    expected = expected_assessments(scorer, students)
+    direct_ms = (time.perf_counter() - start) * 1000
+
+    queue = JobQueue(fakeredis.FakeRedis())
+    worker = JobWorker(queue, handlers, claim_timeout=CLAIM_TIMEOUT)
+    start = time.perf_counter()
+    job = queue.submit('score-risk', students, chunk_size=500)
+    submit_ms = (time.perf_counter() - start) * 1000
+
+    first_ms = None
+    results = []
+    thread = worker.start()
+    for event in queue.events(job['jobId'], poll_seconds=0.001):
+        if event['event'] == 'results':
+            if first_ms is None:
+                first_ms = (time.perf_counter() - start) * 1000
+            results.extend(event['results'])
+    total_ms = (time.perf_counter() - start) * 1000
+    worker.stop()
+    thread.join()
+    assert results == expected
+
+    print(f'\n{TIMED_STUDENTS:,} students, 500 per chunk, one worker (fake Redis, in process)')
+    print(f'{"batch_assess in the request":>30}: {direct_ms:7.0f} ms before any response')
+    print(f'{"job submitted (202)":>30}: {submit_ms:7.0f} ms')
+    print(f'{"first results streamed":>30}: {first_ms:7.0f} ms')
+    print(f'{"all results streamed":>30}: {total_ms:7.0f} ms')
+
+
+def main():
+    scorer = RiskScorer()
+    handlers = job_handlers(scorer.batch_assess, get_recommender())
+    time_job(scorer, handlers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Language Detection Benchmark
+Checks the indexed detector against the original per-pattern scan, then
+times detect_from_text on short and long call transcripts
+"""
+
+import re
+import time
+
+from services.language_detector import DEFAULT_LANGUAGE, LANGUAGE_PATTERNS, LanguageDetector
+from benchmarks.synthetic import generate_transcripts
+
+
+def reference_detect_from_text(text: str):
+    """Original implementation: one substring check per keyword, one findall per pattern"""
+    if not text or len(text.strip()) < 3:
+        return DEFAULT_LANGUAGE, 0.5
+
+    text_lower = text.lower()
+    scores = {}
+    for language, patterns in LANGUAGE_PATTERNS.items():
+        score = 0
+        for keyword in patterns['keywords']:
+            if keyword.lower() in text_lower:
+                score += 1
+        for pattern in patterns['patterns']:
+            score += len(re.findall(pattern, text_lower)) * 2
+        scores[language] = score
+
+    if scores and max(scores.values()) > 0:
+        detected_language = max(scores, key=scores.get)
+        max_score = scores[detected_language]
+        total_score = sum(scores.values())
+        confidence = max_score / total_score if total_score > 0 else 0.5
+        if max_score >= 5:
+            confidence = min(confidence + 0.2, 1.0)
+        return detected_language, round(confidence, 2)
+
+    return DEFAULT_LANGUAGE, 0.5
+
+
+def time_per_call(func, texts) -> float:
+    start = time.perf_counter()
+    for text in texts:
+        func(text)
+    return (time.perf_counter() - start) / len(texts) * 1e6
+
+
+def main():
+    detector = LanguageDetector()
+
+    samples = generate_transcripts(5_000, words=12, seed=1) + generate_transcripts(500, words=400, seed=2)
+    samples += ['', 'ok', 'Hello, is this the school?', 'wowo meme', 'Wò le afi?']
+    for text in samples:
+        expected = reference_detect_from_text(text)
+        actual = detector.detect_from_text(text)
+        assert actual == expected, f'Mismatch for {text!r}: {actual} != {expected}'
+    print(f'Equivalence check passed ({len(samples):,} transcripts)')
+
+    print(f'{"transcripts":>12} {"words":>6} {"original us/call":>17} {"indexed us/call":>16} {"speedup":>8}')
+    for count, words in [(10_000, 12), (1_000, 400)]:
+        texts = generate_transcripts(count, words=words)
+        original = time_per_call(reference_detect_from_text, texts)
+        indexed = time_per_call(detector.detect_from_text, texts)
+        print(f'{count:>12,} {words:>6} {original:>17.2f} {indexed:>16.2f} {original / indexed:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Model Scorer Benchmark
+Trains the dropout model from a synthetic CSV export, checks the batch and
+single-student paths agree, and times a 10,000-student batch against the
+latency budget
+"""
+
+import csv
+import logging
+import os
+import tempfile
+import time
+
+from services.model_scorer import BATCH_LATENCY_BUDGET_MS, ModelRiskScorer
+from services.risk_scorer import RiskScorer, create_scorer
+from benchmarks.synthetic import generate_dropout_outcomes, generate_student_features
+
+TRAINING_STUDENTS = 20_000
+BATCH_SIZE = 10_000
+
+
+def write_export(path: str, students, outcomes) -> None:
+    """CSV in the shape scripts.train_risk_model reads"""
+    columns = sorted({name for features in students for name in features}) + ['droppedOut']
+    with open(path, 'w', newline='') as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=columns)
+        writer.writeheader()
+        for features, outcome in zip(students, outcomes):
+            writer.writerow({**features, 'droppedOut': outcome})
+
+
+def best_ms(func, *args, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def check_fallback(directory: str) -> None:
+    """No model file, or an unreadable one, means rule-based scoring"""
+    broken = os.path.join(directory, 'broken.joblib')
+    with open(broken, 'wb') as model_file:
+        model_file.write(b'not a model')
+    for path in (os.path.join(directory, 'missing.joblib'), broken):
+        os.environ['RISK_MODEL_PATH'] = path
+        assert type(create_scorer()) is RiskScorer, path
+    del os.environ['RISK_MODEL_PATH']
+
+
+def main():
+    try:
+        import joblib  # noqa: F401
+        import sklearn  # noqa: F401
+    except ImportError:
+        raise SystemExit('scikit-learn and joblib are required (pip install -r requirements.txt)')
+
+    from scripts.train_risk_model import read_training_csv, save_model, train_model
+    from sklearn.metrics import roc_auc_score
+
+    logging.getLogger('services.risk_scorer').setLevel(logging.CRITICAL)
+    students = generate_student_features(TRAINING_STUDENTS)
+    outcomes = generate_dropout_outcomes(students)
+
+    with tempfile.TemporaryDirectory() as directory:
+        export = os.path.join(directory, 'features.csv')
+        model_path = os.path.join(directory, 'risk_model.joblib')
+        write_export(export, students, outcomes)
+
+        start = time.perf_counter()
+        bundle = train_model(*read_training_csv(export))
+        save_model(bundle, model_path)
+        print(f'Trained {bundle["metrics"]["estimator"]} on {TRAINING_STUDENTS:,} rows '
+              f'in {time.perf_counter() - start:.1f}s: {bundle["metrics"]}')
+
+        scorer = ModelRiskScorer(model_path)
+        rules = RiskScorer()
+        rule_auc = roc_auc_score(outcomes, [result['riskScore'] for result in rules.batch_calculate(students)])
+        print(f'ROC AUC on the training export: model {roc_auc_score(outcomes, scorer.predict(students)):.3f} '
+              f'(holdout {bundle["metrics"]["holdoutRocAuc"]:.3f}), rules {rule_auc:.3f}')
+
+        sample = students[:2_000] + [{'studentId': 'bad', 'absences7Days': None}]
+        for features, result in zip(sample, scorer.batch_calculate(sample)):
+            expected = scorer.calculate_risk_score(features) if features['studentId'] != 'bad' else None
+            if expected is None:
+                assert 'error' in result
+                continue
+            expected['studentId'] = features.get('studentId')
+            assert result == expected, f'Mismatch for {features}: {result} != {expected}'
+        print('Batch and single-student paths agree')
+
+        check_fallback(directory)
+        print('Falls back to rules when the model is missing or unreadable')
+
+        batch = students[:BATCH_SIZE]
+        model_ms = best_ms(scorer.batch_assess, batch)
+        rules_ms = best_ms(rules.batch_assess, batch)
+        predict_ms = best_ms(scorer.predict, batch)
+        print(f'\n{BATCH_SIZE:,}-student batch_assess: model {model_ms:.0f} ms '
+              f'(predict_proba + features {predict_ms:.0f} ms), rules {rules_ms:.0f} ms; '
+              f'budget {BATCH_LATENCY_BUDGET_MS} ms')
+        assert model_ms <= BATCH_LATENCY_BUDGET_MS, 'over the latency budget'
+
+
+if __name__ == '__main__':
+    main()
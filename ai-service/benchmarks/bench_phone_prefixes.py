@@ -0,0 +1,60 @@
+"""
+Phone Prefix Benchmark
+Compares the original per-language prefix scan with the prefix index,
+one number at a time and in bulk over a contact list
+"""
+
+import re
+import time
+
+from services.language_detector import DEFAULT_LANGUAGE, LANGUAGE_PATTERNS, LanguageDetector
+from benchmarks.synthetic import generate_phone_numbers
+
+SIZES = [1_000, 10_000, 100_000]
+
+
+def reference_detect_from_phone(phone: str):
+    """Original per-language prefix scan (with the national-format prefix fix)"""
+    phone_clean = re.sub(r'[^\d]', '', phone)
+    if phone_clean.startswith('233'):
+        prefix = '0' + phone_clean[3:5]
+    elif phone_clean.startswith('0'):
+        prefix = phone_clean[:3]
+    else:
+        return DEFAULT_LANGUAGE, 0.3
+
+    for language, patterns in LANGUAGE_PATTERNS.items():
+        if prefix in patterns.get('phone_prefixes', []):
+            return language, 0.6
+
+    return DEFAULT_LANGUAGE, 0.3
+
+
+def time_per_number(func, count: int) -> float:
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def main():
+    detector = LanguageDetector()
+
+    phones = generate_phone_numbers(20_000, seed=3)
+    bulk = detector.detect_from_phones(phones)
+    assert bulk == [detector.resolve_phone(phone) for phone in phones]
+    assert [(result['language'], result['confidence']) for result in bulk] == [
+        reference_detect_from_phone(phone) for phone in phones
+    ]
+    print('Bulk, single and list scan lookups agree (20,000 numbers)')
+
+    print(f'{"numbers":>10} {"list scan us":>13} {"indexed us":>11} {"bulk us":>8}')
+    for size in SIZES:
+        phones = generate_phone_numbers(size)
+        scan = time_per_number(lambda: [reference_detect_from_phone(phone) for phone in phones], size)
+        indexed = time_per_number(lambda: [detector.resolve_phone(phone) for phone in phones], size)
+        bulk = time_per_number(lambda: detector.detect_from_phones(phones), size)
+        print(f'{size:>10,} {scan:>13.2f} {indexed:>11.2f} {bulk:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Recommendation Benchmark
+Compares the precomputed recommendation tables with the original
+per-call computation, and per-student requests with the batch endpoint
+"""
+
+import logging
+import time
+
+import app as sync_app
+from services.recommender import Recommender
+from services.risk_scorer import RiskScorer
+from benchmarks.synthetic import generate_student_features
+
+SCHOOL_SIZE = 10_000
+BUDGETS = ['low', 'medium', 'high', 'unknown']
+ENDPOINT_SIZE = 2_000
+
+
+def reference_recommend(recommender, student_data, risk_assessment, budget='medium'):
+    """The original recommend_for_student: priorities and dicts rebuilt per call"""
+    recommendations = []
+    risk_level = risk_assessment.get('riskLevel', 'low')
+    risk_factors = risk_assessment.get('riskFactors', [])
+
+    for intervention_name in risk_assessment.get('recommendations', []):
+        if intervention_name in recommender.interventions:
+            intervention = recommender.interventions[intervention_name]
+            priority_score = recommender._calculate_priority(
+                intervention, risk_level, risk_factors, student_data
+            )
+            if recommender._fits_budget(intervention['cost'], budget):
+                recommendations.append({
+                    'intervention': intervention_name,
+                    'type': intervention['type'],
+                    'priority': priority_score,
+                    'cost': intervention['cost'],
+                    'expectedEffectiveness': intervention['effectiveness'],
+                    'estimatedDuration': intervention['duration_days'],
+                    'reasoning': recommender._get_reasoning(intervention_name, risk_factors, student_data),
+                })
+
+    recommendations.sort(key=lambda x: x['priority'], reverse=True)
+    top_recommendations = recommendations[:3]
+    for rec in top_recommendations:
+        rec['implementationSteps'] = recommender._get_implementation_steps(rec['intervention'])
+
+    return {
+        'studentId': student_data.get('_id'),
+        'studentName': student_data.get('fullName'),
+        'riskLevel': risk_level,
+        'recommendations': recommendations,
+        'topRecommendations': top_recommendations,
+        'estimatedImpact': recommender._estimate_impact(top_recommendations),
+    }
+
+
+def school_pairs(count):
+    """(student data, risk assessment) pairs, with every catalog intervention in play"""
+    risks = RiskScorer().batch_calculate(generate_student_features(count))
+    catalog = list(Recommender().interventions)
+    pairs = []
+    for index, risk in enumerate(risks):
+        if index % 7 == 0:
+            risk = dict(risk, recommendations=catalog[index % 10:] + ['Attendance Monitoring'])
+        if index % 50 == 0:
+            risk = dict(risk, riskLevel='unknown')
+        pairs.append(({'_id': risk['studentId'], 'fullName': f'Student {index}'}, risk))
+    return pairs
+
+
+def timed(func, repeat=3) -> float:
+    """Best wall time in ms"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    recommender = Recommender()
+    pairs = school_pairs(SCHOOL_SIZE)
+
+    for budget in BUDGETS:
+        expected = [reference_recommend(recommender, data, risk, budget) for data, risk in pairs]
+        assert [recommender.recommend_for_student(data, risk, budget) for data, risk in pairs] == expected
+        assert recommender.recommend_for_students(pairs, budget) == expected
+    print(f'Equivalence check passed ({SCHOOL_SIZE:,} students x {len(BUDGETS)} budgets)')
+
+    reference_ms = timed(lambda: [reference_recommend(recommender, data, risk) for data, risk in pairs])
+    single_ms = timed(lambda: [recommender.recommend_for_student(data, risk) for data, risk in pairs])
+    batch_ms = timed(lambda: recommender.recommend_for_students(pairs))
+
+    print(f'\n{"path":>28} {"ms":>7} {"us/student":>11} {"speedup":>8}')
+    for name, elapsed in [
+        ('per-call computation', reference_ms),
+        ('recommend_for_student', single_ms),
+        ('recommend_for_students', batch_ms),
+    ]:
+        print(f'{name:>28} {elapsed:>7.0f} {elapsed * 1000 / SCHOOL_SIZE:>11.1f} '
+              f'{reference_ms / elapsed:>7.2f}x')
+
+    compare_endpoints()
+
+
+def compare_endpoints():
+    """One POST per student vs one batch POST vs the fused features-in batch"""
+    logging.getLogger('app').setLevel(logging.WARNING)
+    client = sync_app.app.test_client()
+    features = generate_student_features(ENDPOINT_SIZE)
+    pairs = school_pairs(ENDPOINT_SIZE)
+
+    def per_student():
+        for student_data, risk in pairs:
+            response = client.post('/ai/recommendations', json={'studentData': student_data, 'riskAssessment': risk})
+            assert response.status_code == 200
+
+    def batch():
+        students = [{'studentData': data, 'riskAssessment': risk} for data, risk in pairs]
+        response = client.post('/ai/recommendations/batch', json={'students': students})
+        assert response.status_code == 200
+
+    def score_then_batch():
+        scored = client.post('/ai/score-risk/batch', json={'students': features}).get_json()['results']
+        students = [{'studentData': {'_id': risk['studentId']}, 'riskAssessment': risk} for risk in scored]
+        response = client.post('/ai/recommendations/batch', json={'students': students})
+        assert response.status_code == 200
+
+    def fused():
+        students = [{'features': item} for item in features]
+        response = client.post('/ai/recommendations/batch', json={'students': students})
+        assert response.status_code == 200
+
+    scored = client.post('/ai/score-risk/batch', json={'students': features}).get_json()['results']
+    expected = client.post('/ai/recommendations/batch', json={'students': [
+        {'studentData': {'_id': risk['studentId']}, 'riskAssessment': risk} for risk in scored
+    ]}).get_json()['results']
+    actual = client.post('/ai/recommendations/batch', json={
+        'students': [{'features': item} for item in features]
+    }).get_json()['results']
+    assert [{key: value for key, value in plan.items() if key != 'riskScore'} for plan in actual] == expected
+    assert [plan['riskScore'] for plan in actual] == [risk['riskScore'] for risk in scored]
+    print(f'\nFused check passed ({ENDPOINT_SIZE:,} students, same plans as scoring then recommending)')
+
+    print(f'{"endpoint path":>32} {"ms":>7} {"speedup":>8}')
+    baseline = timed(per_student, repeat=1)
+    for name, elapsed in [
+        ('POST /ai/recommendations x N', baseline),
+        ('POST /ai/recommendations/batch', timed(batch)),
+        ('score batch, then recommend', timed(score_then_batch)),
+        ('fused (features in)', timed(fused)),
+    ]:
+        print(f'{name:>32} {elapsed:>7.0f} {baseline / elapsed:>7.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Record Memory Benchmark
+Compares per-student memory of dict features/results with the
+__slots__ StudentFeatures and RiskAssessment records
+"""
+
+import gc
+import tracemalloc
+
+from services.records import StudentFeatures
+from services.risk_scorer import RiskScorer
+from benchmarks.synthetic import generate_student_features
+
+STUDENTS = 50_000
+
+
+def bytes_per_student(build) -> float:
+    """Memory retained by the object build() returns, per student"""
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    retained = build()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(retained)
+    del retained
+    return (after - before) / count
+
+
+def main():
+    scorer = RiskScorer()
+    scorer.batch_assess(generate_student_features(10))  # Warm up the engine caches
+
+    features = generate_student_features(STUDENTS)
+    records = [StudentFeatures.from_dict(item) for item in features]
+    assert scorer.batch_calculate(records) == scorer.batch_calculate(features)
+
+    rows = [
+        ('features', lambda: [dict(item) for item in features],
+         lambda: [StudentFeatures.from_dict(item) for item in features]),
+        ('assessments', lambda: scorer.batch_calculate(features),
+         lambda: scorer.batch_assess(features)),
+    ]
+
+    print(f'{"":>12} {"dict bytes/student":>19} {"slots bytes/student":>20} {"saving":>7}')
+    for name, as_dicts, as_records in rows:
+        dict_bytes = bytes_per_student(as_dicts)
+        record_bytes = bytes_per_student(as_records)
+        print(f'{name:>12} {dict_bytes:>19,.0f} {record_bytes:>20,.0f} {1 - record_bytes / dict_bytes:>6.0%}')
+
+
+if __name__ == '__main__':
+    main()
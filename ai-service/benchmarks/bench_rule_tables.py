@@ -0,0 +1,354 @@
+"""
+Rule Table Benchmark
+Checks the compiled rule table against the previous hard-coded rules,
+times both, and shows a retuned table being picked up without a restart
+"""
+
+import copy
+import json
+import logging
+import math
+import os
+import tempfile
+import time
+
+from services.records import RiskAssessment, RiskFactor
+from services.risk_rules import DEFAULT_RULES_PATH, RuleSet, RuleStore, load_rules
+from services.risk_scorer import MODEL_VERSION, RiskScorer
+from benchmarks.synthetic import generate_student_features
+
+STUDENTS = 50_000
+
+# Timing noise allowed before the scalar check fails (best of several runs)
+TIMING_TOLERANCE = 1.05
+
+
+# Rules as they were hard-coded in RiskScorer before the rule table
+def legacy_attendance_risk(features):
+    risk = 0.0
+    absences_7 = features.get('absences7Days', 0)
+    if absences_7 >= 3:
+        risk += 0.4
+    elif absences_7 >= 2:
+        risk += 0.2
+    elif absences_7 >= 1:
+        risk += 0.1
+    absences_30 = features.get('absences30Days', 0)
+    if absences_30 >= 10:
+        risk += 0.3
+    elif absences_30 >= 6:
+        risk += 0.2
+    elif absences_30 >= 3:
+        risk += 0.1
+    attendance_rate = features.get('attendanceRate30Days', 100)
+    if attendance_rate < 50:
+        risk += 0.3
+    elif attendance_rate < 70:
+        risk += 0.2
+    elif attendance_rate < 85:
+        risk += 0.1
+    consecutive = features.get('consecutiveAbsences', 0)
+    if consecutive >= 5:
+        risk += 0.3
+    elif consecutive >= 3:
+        risk += 0.2
+    return min(risk, 1.0)
+
+
+def legacy_learning_risk(features):
+    risk = 0.0
+    literacy_level = features.get('literacyLevel')
+    numeracy_level = features.get('numeracyLevel')
+    avg_score = features.get('avgLearningScore', 50)
+    if literacy_level == 'below_benchmark':
+        risk += 0.3
+    elif literacy_level == 'not_assessed':
+        risk += 0.1
+    if numeracy_level == 'below_benchmark':
+        risk += 0.3
+    elif numeracy_level == 'not_assessed':
+        risk += 0.1
+    if avg_score < 40:
+        risk += 0.3
+    elif avg_score < 60:
+        risk += 0.2
+    return min(risk, 1.0)
+
+
+def legacy_contact_risk(features):
+    risk = 0.0
+    contact_verified = features.get('contactVerified', False)
+    response_rate = features.get('contactResponseRate', 0)
+    if not contact_verified:
+        risk += 0.5
+    if response_rate < 30:
+        risk += 0.3
+    elif response_rate < 60:
+        risk += 0.2
+    return min(risk, 1.0)
+
+
+def legacy_demographic_risk(features):
+    risk = 0.0
+    has_disability = features.get('hasDisability', False)
+    location_type = features.get('locationType', 'Urban')
+    wealth_proxy = features.get('wealthProxy', 'phone_verified')
+    if has_disability:
+        risk += 0.3
+    if location_type == 'Remote':
+        risk += 0.3
+    elif location_type == 'Rural':
+        risk += 0.2
+    if wealth_proxy == 'no_contact':
+        risk += 0.3
+    elif wealth_proxy == 'proxy_only':
+        risk += 0.2
+    return min(risk, 1.0)
+
+
+def legacy_historical_risk(features):
+    risk = 0.0
+    if features.get('previousDropoutAttempt', False):
+        risk += 0.6
+    if features.get('seasonalMigrationRisk', False):
+        risk += 0.3
+    return min(risk, 1.0)
+
+
+def legacy_risk_level(risk_score):
+    if risk_score >= 0.75:
+        return 'critical'
+    elif risk_score >= 0.50:
+        return 'high'
+    elif risk_score >= 0.25:
+        return 'medium'
+    return 'low'
+
+
+def legacy_recommendations(risk_level, features):
+    recommendations = []
+    if risk_level in ['critical', 'high']:
+        recommendations.append('Parent Engagement Call')
+        recommendations.append('Home Visit')
+    if features.get('absences30Days', 0) > 10:
+        recommendations.append('Attendance Monitoring')
+    if features.get('literacyLevel') == 'below_benchmark' or \
+       features.get('numeracyLevel') == 'below_benchmark':
+        recommendations.append('Learning Support')
+        recommendations.append('Peer Tutoring')
+    if not features.get('contactVerified', False):
+        recommendations.append('Contact Verification')
+    if features.get('hasDisability', False):
+        recommendations.append('Special Education')
+    if features.get('wealthProxy') == 'no_contact':
+        recommendations.append('Financial Support')
+        recommendations.append('Feeding Program')
+    if features.get('locationType') == 'Remote':
+        recommendations.append('Transportation Assistance')
+    return list(dict.fromkeys(recommendations))[:5]
+
+
+LEGACY_WEIGHTS = {
+    'attendance': 0.30,
+    'learning': 0.25,
+    'contact': 0.15,
+    'demographics': 0.15,
+    'historical': 0.15,
+}
+
+
+def legacy_evaluate(features):
+    components = (
+        legacy_attendance_risk(features),
+        legacy_learning_risk(features),
+        legacy_contact_risk(features),
+        legacy_demographic_risk(features),
+        legacy_historical_risk(features),
+    )
+    weights = LEGACY_WEIGHTS
+    score = (
+        components[0] * weights['attendance'] + components[1] * weights['learning'] +
+        components[2] * weights['contact'] + components[3] * weights['demographics'] +
+        components[4] * weights['historical']
+    )
+    level = legacy_risk_level(score)
+    return components, score, level, legacy_recommendations(level, features)
+
+
+def legacy_factor_description(factor, features):
+    descriptions = {
+        'High absence rate': f"{features.get('absences30Days', 0)} absences in last 30 days",
+        'Poor learning outcomes': "Below benchmark in literacy or numeracy",
+        'Limited parent contact': f"Contact response rate: {features.get('contactResponseRate', 0)}%",
+        'Demographic challenges': f"Location: {features.get('locationType', 'Unknown')}",
+        'Historical patterns': "Previous dropout attempt or seasonal migration",
+    }
+    return descriptions.get(factor, '')
+
+
+def legacy_assess(features):
+    """RiskScorer.assess as it was before the rule table (the scalar baseline)"""
+    (attendance_risk, learning_risk, contact_risk, demographic_risk, historical_risk), risk_score, risk_level, \
+        recommendations = legacy_evaluate(features)
+    factor_scores = {
+        'High absence rate': attendance_risk,
+        'Poor learning outcomes': learning_risk,
+        'Limited parent contact': contact_risk,
+        'Demographic challenges': demographic_risk,
+        'Historical patterns': historical_risk,
+    }
+    risk_factors = []
+    for factor, score in sorted(factor_scores.items(), key=lambda x: x[1], reverse=True)[:3]:
+        if score > 0.2:
+            risk_factors.append(RiskFactor(factor, round(score, 2), legacy_factor_description(factor, features)))
+    return RiskAssessment(
+        risk_score=round(risk_score, 2),
+        risk_level=risk_level,
+        components=(
+            round(attendance_risk, 2),
+            round(learning_risk, 2),
+            round(contact_risk, 2),
+            round(demographic_risk, 2),
+            round(historical_risk, 2),
+        ),
+        risk_factors=tuple(risk_factors),
+        recommendations=tuple(recommendations),
+        model_version=MODEL_VERSION,
+    )
+
+
+def compiled_evaluate(rules: RuleSet, features):
+    components = rules.component_risks(features)
+    weights = rules.weights
+    score = (
+        components[0] * weights['attendance'] + components[1] * weights['learning'] +
+        components[2] * weights['contact'] + components[3] * weights['demographics'] +
+        components[4] * weights['historical']
+    )
+    level = rules.risk_level(score)
+    return components, score, level, rules.recommendations(level, features)
+
+
+def outcome(func, *args):
+    """Result, or the exception type and message"""
+    try:
+        return func(*args)
+    except Exception as e:
+        return type(e).__name__, str(e)
+
+
+def edge_cases():
+    """Inputs the synthetic generator never produces"""
+    cases = [{}]
+    for value in (None, '3', math.nan, True, False, -1, 2.5, 10**20):
+        for name in ('absences7Days', 'absences30Days', 'attendanceRate30Days', 'avgLearningScore', 'contactResponseRate'):
+            cases.append({name: value})
+    for value in (None, 1, '', 'Remote', 'below_benchmark', 'no_contact', 'unknown'):
+        for name in ('literacyLevel', 'locationType', 'wealthProxy', 'contactVerified', 'hasDisability'):
+            cases.append({name: value})
+    return cases
+
+
+def check_equivalence(rules: RuleSet, students) -> None:
+    for features in students + edge_cases():
+        expected = outcome(legacy_evaluate, features)
+        actual = outcome(compiled_evaluate, rules, features)
+        if expected != actual:
+            # NaN never equals itself, so compare NaN scores by text
+            assert repr(expected) == repr(actual), f'Mismatch for {features}: {actual} != {expected}'
+
+
+def retuned(source):
+    """Rule table with other weights, a stricter absence ladder and one more trigger"""
+    source = copy.deepcopy(source)
+    source['weights'].update({'attendance': 0.4, 'learning': 0.2, 'demographics': 0.1})
+    source['components']['attendance'][0]['cutoffs'] = [[2, 0.5], [1, 0.25]]
+    source['recommendations']['rules'].append({
+        'when': {'feature': 'consecutiveAbsences', 'default': 0, 'above': 4},
+        'add': ['Home Visit'],
+    })
+    return source
+
+
+def time_per_student(func, students, repeat: int = 3) -> float:
+    """Best of a few runs, in microseconds per student"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for features in students:
+            func(features)
+        best = min(best, time.perf_counter() - start)
+    return best / len(students) * 1e6
+
+
+def hot_reload_demo(source) -> None:
+    print('\nHot reload:')
+    student = {'studentId': 'demo', 'absences7Days': 2, 'consecutiveAbsences': 5, 'contactVerified': True}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'rules.json')
+        with open(path, 'w') as rules_file:
+            json.dump(source, rules_file)
+        scorer = RiskScorer(RuleStore(path, reload_seconds=0.05))
+        before = scorer.assess(student)
+        print(f'  {before.model_version}: score {before.risk_score}, {list(before.recommendations)}')
+
+        with open(path, 'w') as rules_file:
+            json.dump(retuned(source), rules_file, indent=2)
+        time.sleep(0.1)
+        after = scorer.assess(student)
+        print(f'  {after.model_version}: score {after.risk_score}, {list(after.recommendations)}')
+        assert after.model_version != before.model_version
+
+        with open(path, 'w') as rules_file:
+            rules_file.write('{"weights": ')
+        time.sleep(0.1)
+        kept = scorer.assess(student)
+        print(f'  after a broken edit: still {kept.model_version}')
+        assert kept.model_version == after.model_version
+
+
+def main():
+    logging.getLogger('services.risk_scorer').setLevel(logging.CRITICAL)
+    rules = load_rules(DEFAULT_RULES_PATH)
+    students = generate_student_features(STUDENTS)
+
+    check_equivalence(rules, students)
+    print(f'Equivalence check passed ({STUDENTS:,} students + {len(edge_cases())} edge cases, '
+          f'including error messages)')
+
+    retuned_rules = RuleSet(retuned(rules.source))
+    scorer = RiskScorer(RuleStore(rules=retuned_rules))
+    batch = scorer.batch_calculate(students[:5_000])
+    for features, result in zip(students, batch):
+        expected = scorer.calculate_risk_score(features)
+        expected['studentId'] = features.get('studentId')
+        assert result == expected, f'Mismatch for {features}: {result} != {expected}'
+    print(f'Retuned table {retuned_rules.version}: vectorized and scalar paths agree')
+
+    legacy = time_per_student(legacy_evaluate, students)
+    compiled = time_per_student(lambda features: compiled_evaluate(rules, features), students)
+    print(f'\n{"rules only":>20} {"us/student":>11}')
+    print(f'{"hard-coded":>20} {legacy:>11.2f}')
+    print(f'{"rule table":>20} {compiled:>11.2f}')
+
+    # The scalar path (/ai/score-risk, incremental rescoring, batch fallback
+    # rows) scores a whole assessment; it must not be slower than before
+    scorer = RiskScorer(RuleStore(rules=rules))
+    for features in students[:5_000]:
+        expected = legacy_assess(features)
+        actual = scorer.assess(features)
+        assert actual.to_dict() == {**expected.to_dict(), 'modelVersion': actual.model_version}, features
+    legacy = time_per_student(legacy_assess, students, repeat=5)
+    compiled = time_per_student(scorer.assess, students, repeat=5)
+    print(f'\n{"full assessment":>20} {"us/student":>11}')
+    print(f'{"hard-coded":>20} {legacy:>11.2f}')
+    print(f'{"rule table":>20} {compiled:>11.2f}')
+    if compiled > legacy * TIMING_TOLERANCE:
+        raise SystemExit(f'Scalar scoring is slower than the hard-coded rules ({compiled:.2f} vs {legacy:.2f} us/student)')
+    print('Scalar check passed (no slower than the hard-coded rules)')
+
+    hot_reload_demo(rules.source)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""
+School Rollup Benchmark
+Checks incrementally maintained school rollups against aggregating every
+student from scratch, then times district-wide summaries both ways
+"""
+
+import asyncio
+import json
+import random
+import time
+
+import fakeredis
+import fakeredis.aioredis
+
+from services.risk_scorer import RiskScorer
+from services.school_rollups import AsyncSchoolRollupStore, SchoolRollup, SchoolRollupStore
+from benchmarks.synthetic import generate_student_features
+
+SCHOOLS = 300
+STUDENTS_PER_SCHOOL = 500
+CHECK_STEPS = 40
+
+
+def expected_summaries(latest, top=5):
+    """Summaries aggregated from each student's latest assessment"""
+    by_school = {}
+    for school_id, risk in latest.values():
+        by_school.setdefault(school_id, []).append(risk)
+    return {
+        school_id: SchoolRollup.from_risks(risks, school_id).summary(top)
+        for school_id, risks in by_school.items()
+    }
+
+
+def comparable(summary):
+    """Summary with top issue ties made order-independent"""
+    return dict(summary, topIssues=sorted(item['count'] for item in summary['topIssues']))
+
+
+def check(store_summaries, latest):
+    expected = expected_summaries(latest)
+    actual = {summary['schoolId']: summary for summary in store_summaries if summary['totalStudents']}
+    assert actual.keys() == expected.keys(), (sorted(actual), sorted(expected))
+    for school_id, summary in expected.items():
+        assert comparable(actual[school_id]) == comparable(summary), school_id
+
+
+def random_steps(scorer, seed=7):
+    """
+    (kind, assessments, school_id, schools) updates: registrations, rescores,
+    school moves, failed scores and full roster replacements
+    """
+    rng = random.Random(seed)
+    features = generate_student_features(400, seed)
+    schools = [f'school-{index}' for index in range(6)]
+    home = {item['studentId']: rng.choice(schools) for item in features}
+    for _ in range(CHECK_STEPS):
+        kind = rng.choice(['register', 'rescore', 'move', 'replace', 'failed'])
+        sample = rng.sample(features, rng.randint(1, 60))
+        if kind == 'replace':
+            school_id = rng.choice(schools)
+            sample = [item for item in features if home[item['studentId']] == school_id and rng.random() < 0.8]
+        for item in sample:
+            item['absences30Days'] = rng.randint(0, 15)
+            if kind == 'move':
+                home[item['studentId']] = rng.choice(schools)
+        assessments = [assessment.to_dict() for assessment in scorer.batch_assess(sample)]
+        if kind == 'failed':
+            assessments = [{'studentId': item['studentId'], 'error': 'bad input'} for item in sample]
+        if kind == 'replace':
+            yield kind, assessments, school_id, None
+        elif kind == 'rescore':
+            yield kind, assessments, None, None  # Students keep their last known school
+        else:
+            yield kind, assessments, None, {item['studentId']: home[item['studentId']] for item in sample}
+
+
+def apply_expected(latest, kind, assessments, school_id, schools):
+    """Reference semantics for one update"""
+    if kind == 'replace':
+        keep = {item['studentId'] for item in assessments}
+        for student_id in [sid for sid, (school, _) in latest.items() if school == school_id and sid not in keep]:
+            del latest[student_id]
+    for assessment in assessments:
+        student_id = assessment['studentId']
+        school = school_id or (schools or {}).get(student_id) or latest.get(student_id, (None,))[0]
+        if school is None or 'error' in assessment:
+            continue
+        latest[student_id] = (school, assessment)
+
+
+def check_equivalence():
+    scorer = RiskScorer()
+    stores = {
+        'memory': SchoolRollupStore(),
+        'redis': SchoolRollupStore(fakeredis.FakeRedis()),
+    }
+    async_store = AsyncSchoolRollupStore(fakeredis.aioredis.FakeRedis())
+    latest = {}
+
+    async def run_async(step):
+        await async_store.update(step[1], school_id=step[2], schools=step[3], replace=step[0] == 'replace')
+        return await async_store.summaries()
+
+    loop = asyncio.new_event_loop()
+    for step in random_steps(scorer):
+        kind, assessments, school_id, schools = step
+        apply_expected(latest, kind, assessments, school_id, schools)
+        for store in stores.values():
+            store.update(assessments, school_id=school_id, schools=schools, replace=kind == 'replace')
+            check(store.summaries(), latest)
+        check(loop.run_until_complete(run_async(step)), latest)
+    loop.close()
+    print(f'Rollups match full aggregation after {CHECK_STEPS} random updates (memory, Redis, async Redis)')
+
+
+def best_ms(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def time_district():
+    """Every school's summary from rollups vs from every student's risk record"""
+    scorer = RiskScorer()
+    features = generate_student_features(SCHOOLS * STUDENTS_PER_SCHOOL)
+    risks = [assessment.to_dict() for assessment in scorer.batch_assess(features)]
+    school_risks = {
+        f'school-{index:03d}': risks[index * STUDENTS_PER_SCHOOL:(index + 1) * STUDENTS_PER_SCHOOL]
+        for index in range(SCHOOLS)
+    }
+
+    stores = {'memory': SchoolRollupStore(), 'redis': SchoolRollupStore(fakeredis.FakeRedis())}
+    for store in stores.values():
+        start = time.perf_counter()
+        for school_id, items in school_risks.items():
+            store.update(items, school_id=school_id, replace=True)
+        print(f'Seeded {store.backend} rollups for {SCHOOLS} schools in {(time.perf_counter() - start) * 1000:.0f} ms')
+
+    payload_mb = len(json.dumps(risks)) / 1e6
+    full_ms = best_ms(lambda: [
+        SchoolRollup.from_risks(items, school_id).summary() for school_id, items in school_risks.items()
+    ])
+    print(f'\n{SCHOOLS} schools x {STUDENTS_PER_SCHOOL} students ({payload_mb:.0f} MB of risk records to ship)')
+    print(f'{"aggregate every student":>28}: {full_ms:7.1f} ms (plus parsing the records)')
+    for name, store in stores.items():
+        print(f'{"rollups (" + name + ")":>28}: {best_ms(store.summaries):7.1f} ms')
+
+    # One attendance day: 2% of students change
+    changed = random.Random(1).sample(risks, len(risks) // 50)
+    rescored = [dict(risk, riskLevel='high' if risk['riskLevel'] != 'high' else 'medium') for risk in changed]
+    for name, store in stores.items():
+        start = time.perf_counter()
+        summary = store.update(rescored)
+        print(f'{"update " + name:>28}: {(time.perf_counter() - start) * 1000:7.1f} ms for '
+              f'{len(rescored):,} changed students ({summary["schools"]} schools touched)')
+
+
+def main():
+    check_equivalence()
+    time_district()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Sharded Scoring Benchmark
+Finds the batch size where the worker pool starts to pay off and how
+scoring scales with the number of worker processes
+"""
+
+import os
+import time
+
+from services.parallel import get_executor, shutdown_executor
+from services.risk_scorer import RiskScorer
+from services.sharded_scorer import ShardedRiskScorer, encode_result, shard_chunk_size
+from benchmarks.synthetic import generate_student_features
+
+CROSSOVER_SIZES = [5_000, 10_000, 20_000, 50_000, 100_000]
+SCALING_SIZE = 100_000
+CHUNK_SIZES = [1_000, 5_000, 25_000]
+
+
+def in_process(scorer, mode, features):
+    if mode == 'encode':
+        return [encode_result(assessment) for assessment in scorer.batch_assess(features)]
+    return scorer.batch_assess(features)
+
+
+def sharded(scorer, mode, features, workers, chunk_size=None):
+    engine = ShardedRiskScorer(scorer, min_students=0, workers=workers, chunk_size=chunk_size)
+    if mode == 'encode':
+        return engine.batch_encode(features)
+    return engine.batch_assess(features)
+
+
+def timed(func, repeat=2) -> float:
+    """Best wall time in ms"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def warm_pool(workers):
+    """Start the worker processes before timing"""
+    list(get_executor(workers).map(abs, range(workers * 4)))
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    workers = max(2, cpus)
+    scorer = RiskScorer()
+    features = generate_student_features(SCALING_SIZE)
+    scorer.batch_assess(features[:10])  # Warm up the engine caches
+
+    sample = features[:5_000]
+    warm_pool(2)
+    assert [result.to_dict() for result in sharded(scorer, 'assess', sample, 2, 1_000)] == \
+        scorer.batch_calculate(sample)
+    assert sharded(scorer, 'encode', sample, 2, 1_000) == in_process(scorer, 'encode', sample)
+    print(f'Equivalence check passed ({len(sample):,} students); {cpus} CPU(s) available')
+
+    # Crossover: in-process vs the pool at growing batch sizes
+    warm_pool(workers)
+    print(f'\nCrossover ({workers} workers, automatic chunk size)')
+    print(f'{"mode":>7} {"students":>9} {"in-process ms":>14} {"sharded ms":>11} {"speedup":>8}')
+    for mode in ('assess', 'encode'):
+        for size in CROSSOVER_SIZES:
+            batch = features[:size]
+            local_ms = timed(lambda: in_process(scorer, mode, batch))
+            sharded_ms = timed(lambda: sharded(scorer, mode, batch, workers))
+            print(f'{mode:>7} {size:>9,} {local_ms:>14.0f} {sharded_ms:>11.0f} {local_ms / sharded_ms:>7.2f}x')
+
+    # Scaling with worker count
+    print(f'\nScaling ({SCALING_SIZE:,} students, encode mode)')
+    print(f'{"workers":>8} {"chunk":>7} {"ms":>7} {"speedup":>8}')
+    baseline = timed(lambda: in_process(scorer, 'encode', features))
+    print(f'{"in-proc":>8} {"-":>7} {baseline:>7.0f} {1:>7.2f}x')
+    for count in sorted({2, 4, cpus}):
+        warm_pool(count)
+        elapsed = timed(lambda: sharded(scorer, 'encode', features, count))
+        chunk = shard_chunk_size(SCALING_SIZE, count)
+        print(f'{count:>8} {chunk:>7,} {elapsed:>7.0f} {baseline / elapsed:>7.2f}x')
+
+    # Chunk size tuning
+    warm_pool(workers)
+    print(f'\nChunk size ({SCALING_SIZE:,} students, {workers} workers, encode mode)')
+    print(f'{"chunk":>7} {"ms":>7}')
+    for chunk in CHUNK_SIZES + [shard_chunk_size(SCALING_SIZE, workers)]:
+        elapsed = timed(lambda: sharded(scorer, 'encode', features, workers, chunk))
+        print(f'{chunk:>7,} {elapsed:>7.0f}')
+
+    shutdown_executor()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Streaming Scoring Benchmark
+Compares peak memory of /ai/score-risk/batch and /ai/score-risk/batch/stream
+"""
+
+import json
+import tracemalloc
+
+from app import app
+from benchmarks.synthetic import generate_student_features
+
+SIZES = [5_000, 20_000]
+
+
+def peak_memory(func) -> float:
+    """Peak traced memory in MB while running func"""
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def main():
+    client = app.test_client()
+
+    print(f'{"students":>10} {"batch peak MB":>14} {"stream peak MB":>15}')
+    for size in SIZES:
+        students = generate_student_features(size)
+        json_body = json.dumps({'students': students}).encode()
+        ndjson_body = ''.join(json.dumps(features) + '\n' for features in students).encode()
+        del students
+
+        def run_batch():
+            response = client.post('/ai/score-risk/batch', data=json_body, content_type='application/json')
+            assert response.status_code == 200
+
+        def run_stream():
+            response = client.post(
+                '/ai/score-risk/batch/stream',
+                data=ndjson_body,
+                content_type='application/x-ndjson',
+                buffered=False
+            )
+            for _ in response.response:
+                pass
+            response.close()
+
+        print(f'{size:>10,} {peak_memory(run_batch):>14.1f} {peak_memory(run_stream):>15.1f}')
+
+
+if __name__ == '__main__':
+    main()
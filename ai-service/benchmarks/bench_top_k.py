@@ -0,0 +1,75 @@
+"""
+Top-K Selection Benchmark
+Compares returning only the K highest-risk students with streaming every
+assessment back and sorting the full list
+"""
+
+import json
+import logging
+import time
+import tracemalloc
+
+import app as sync_app
+from benchmarks.synthetic import generate_student_features
+
+SCHOOL_SIZES = [1_000, 10_000, 100_000]
+K = 50
+
+
+def ndjson_body(features) -> bytes:
+    return ''.join(json.dumps(item) + '\n' for item in features).encode()
+
+
+def full_then_sort(client, body: bytes, k: int):
+    """Current flow: stream every assessment back, then sort client-side"""
+    response = client.post('/ai/score-risk/batch/stream', data=body, content_type='application/x-ndjson')
+    data = response.get_data()
+    results = [json.loads(line) for line in data.splitlines()]
+    ranked = sorted(
+        (result for result in results if 'error' not in result),
+        key=lambda result: result['riskScore'],
+        reverse=True
+    )
+    return ranked[:k], len(data)
+
+
+def top_k(client, body: bytes, k: int):
+    response = client.post(f'/ai/score-risk/top-k?k={k}', data=body, content_type='application/x-ndjson')
+    data = response.get_data()
+    return json.loads(data)['results'], len(data)
+
+
+def measure(func, *args):
+    """(result, wall ms, peak traced MB) of one call"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func(*args)
+    elapsed = (time.perf_counter() - started) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+
+def main():
+    logging.getLogger('app').setLevel(logging.WARNING)
+    logging.getLogger('services.streaming').setLevel(logging.WARNING)
+    client = sync_app.app.test_client()
+
+    body = ndjson_body(generate_student_features(5_000))
+    for k in (1, K, 5_000):
+        expected, _ = full_then_sort(client, body, k)
+        actual, _ = top_k(client, body, k)
+        assert actual == expected, f'k={k}'
+    print('Equivalence check passed (same students, order and assessments as sorting the full list)')
+
+    print(f'\n{"students":>9} {"path":>15} {"ms":>7} {"response KB":>12} {"peak MB":>8}')
+    for size in SCHOOL_SIZES:
+        body = ndjson_body(generate_student_features(size))
+        for name, func in (('full + sort', full_then_sort), (f'top-{K}', top_k)):
+            func(client, body, K)  # Warm up
+            (_, response_bytes), elapsed, peak = measure(func, client, body, K)
+            print(f'{size:>9,} {name:>15} {elapsed:>7.0f} {response_bytes / 1024:>12,.1f} {peak:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
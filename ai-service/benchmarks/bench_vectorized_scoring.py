@@ -0,0 +1,63 @@
+"""
+Vectorized Scoring Benchmark
+Checks the columnar engine against calculate_risk_score, then compares
+per-student cost of the scalar loop and batch_calculate at several sizes
+"""
+
+import time
+
+from services.risk_scorer import RiskScorer
+from services.vectorized_scorer import VectorizedRiskScorer
+from benchmarks.synthetic import generate_student_features
+
+SIZES = [1_000, 10_000, 100_000]
+
+
+def check_equivalence(scorer: RiskScorer, students) -> None:
+    """Fail loudly if the batch path differs from the scalar path"""
+    batch = scorer.batch_calculate(students)
+    for features, result in zip(students, batch):
+        expected = scorer.calculate_risk_score(features)
+        expected['studentId'] = features.get('studentId')
+        assert result == expected, f'Mismatch for {features}: {result} != {expected}'
+
+    # Malformed rows must still be reported per student
+    malformed = [{'studentId': 'bad', 'absences7Days': None}, {'absences30Days': '3'}]
+    results = scorer.batch_calculate(students[:2] + malformed)
+    assert 'error' in results[2] and results[2]['studentId'] == 'bad'
+    assert 'error' in results[3]
+
+
+def scalar_loop(scorer: RiskScorer, students):
+    results = []
+    for features in students:
+        result = scorer.calculate_risk_score(features)
+        result['studentId'] = features.get('studentId')
+        results.append(result)
+    return results
+
+
+def time_per_student(func, students) -> float:
+    start = time.perf_counter()
+    func(students)
+    return (time.perf_counter() - start) / len(students) * 1e6
+
+
+def main():
+    scorer = RiskScorer()
+    check_equivalence(scorer, generate_student_features(20_000, seed=7))
+    print('Equivalence check passed (20,000 students)')
+
+    engine = VectorizedRiskScorer(scorer)
+    print(f'{"students":>10} {"scalar us/student":>18} {"batch us/student":>17} '
+          f'{"columns-only us/student":>24} {"speedup":>8}')
+    for size in SIZES:
+        students = generate_student_features(size)
+        scalar = time_per_student(lambda rows: scalar_loop(scorer, rows), students)
+        batch = time_per_student(scorer.batch_calculate, students)
+        columns = time_per_student(engine.score_columns, students)
+        print(f'{size:>10,} {scalar:>18.2f} {batch:>17.2f} {columns:>24.2f} {scalar / batch:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
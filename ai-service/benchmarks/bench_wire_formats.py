@@ -0,0 +1,110 @@
+"""
+Wire Format Benchmark
+Compares stdlib JSON, orjson and MessagePack for batch risk scoring:
+serialize and parse time and payload size, directly and through the app
+"""
+
+import json
+import os
+import time
+
+os.environ.setdefault('LOG_LEVEL', 'CRITICAL')
+
+from services.encoding import MSGPACK, JsonFormat, encode_results, msgpack_available  # noqa: E402
+from services.risk_scorer import RiskScorer  # noqa: E402
+from benchmarks.synthetic import generate_student_features  # noqa: E402
+
+STUDENTS = 10_000
+ROUTE_STUDENTS = 10_000
+
+
+def best_ms(func, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def formats():
+    """(name, wire format, parse) for every format installed here"""
+    available = [('json (stdlib)', JsonFormat(), json.loads)]
+    try:
+        import orjson
+        available.append(('json (orjson)', JsonFormat(fast=True), orjson.loads))
+    except ImportError:
+        print('orjson is not installed; skipping it')
+    if msgpack_available():
+        import msgpack
+        available.append(('msgpack', MSGPACK, msgpack.unpackb))
+    else:
+        print('msgpack is not installed; skipping it')
+    return available
+
+
+def compare_responses():
+    """Encode the same assessments in each format, check they decode alike, time both ends"""
+    assessments = RiskScorer().batch_assess(generate_student_features(STUDENTS))
+    expected = {'results': [assessment.to_dict() for assessment in assessments]}
+
+    print(f'Response for {STUDENTS:,} assessments')
+    print(f'{"format":>16} {"serialize":>10} {"parse":>10} {"size":>9}')
+    for name, wire_format, parse in formats():
+        body = encode_results(assessments, wire_format)
+        assert parse(body) == expected, name
+        serialize_ms = best_ms(lambda: encode_results(assessments, wire_format))
+        parse_ms = best_ms(lambda: parse(body))
+        print(f'{name:>16} {serialize_ms:8.1f}ms {parse_ms:8.1f}ms {len(body) / 1e6:7.2f}MB')
+
+
+def compare_requests():
+    """Parse time and size of the request body for each format"""
+    body = {'students': generate_student_features(STUDENTS)}
+    print(f'\nRequest with {STUDENTS:,} students')
+    print(f'{"format":>16} {"parse":>10} {"size":>9}')
+    for name, wire_format, parse in formats():
+        encoded = wire_format.encode(body)
+        assert parse(encoded) == body, name
+        print(f'{name:>16} {best_ms(lambda: parse(encoded)):8.1f}ms {len(encoded) / 1e6:7.2f}MB')
+
+
+def compare_route():
+    """POST /ai/score-risk/batch end to end, JSON in/out vs MessagePack in/out"""
+    if not msgpack_available():
+        return
+    import msgpack
+    import app
+
+    client = app.app.test_client()
+    body = {'students': generate_student_features(ROUTE_STUDENTS)}
+    json_body = json.dumps(body)
+    packed_body = msgpack.packb(body)
+
+    def post_json():
+        response = client.post('/ai/score-risk/batch', data=json_body, content_type='application/json')
+        return json.loads(response.get_data())
+
+    def post_msgpack():
+        response = client.post('/ai/score-risk/batch', data=packed_body, headers={
+            'Content-Type': 'application/msgpack', 'Accept': 'application/msgpack',
+        })
+        return msgpack.unpackb(response.get_data())
+
+    assert post_json() == post_msgpack()
+    json_ms = best_ms(post_json, 3)
+    msgpack_ms = best_ms(post_msgpack, 3)
+    print(f'\nPOST /ai/score-risk/batch with {ROUTE_STUDENTS:,} students, including client encode/parse '
+          f'(json responses via {"orjson" if app.json_format.fast else "stdlib json"})')
+    print(f'{"json":>16} {json_ms:8.1f}ms')
+    print(f'{"msgpack":>16} {msgpack_ms:8.1f}ms ({json_ms / msgpack_ms:.2f}x)')
+
+
+def main():
+    compare_responses()
+    compare_requests()
+    compare_route()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+"""
+Benchmark Suite
+Times every AI service hot path at several data sizes on synthetic data and
+writes the results to JSON, so runs can be compared across commits
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from datetime import datetime, timezone
+
+# Offline by design: empty URLs keep .env values out, so the app runs
+# without MongoDB and scores directly instead of through the Redis cache
+os.environ['MONGODB_URI'] = ''
+os.environ['REDIS_URL'] = ''
+os.environ.setdefault('LOG_LEVEL', 'CRITICAL')
+
+from benchmarks.synthetic import (  # noqa: E402
+    generate_contact_records, generate_school, generate_student_features, generate_student_records,
+)
+
+SEED = 42
+REPEATS = 5
+MIN_SAMPLE_SECONDS = 0.2
+DEFAULT_THRESHOLD = 0.10
+
+# (name, sizes, quick sizes, setup) - setup(size) returns the call to time
+Case = Tuple[str, Sequence[int], Sequence[int], Callable[[int], Callable[[], object]]]
+
+
+def risk_scorer():
+    from services.risk_scorer import get_scorer
+    return get_scorer()
+
+
+def test_client():
+    import app
+    logging.getLogger('app').setLevel(logging.CRITICAL)
+    return app.app.test_client()
+
+
+def post(client, path: str, body: Dict) -> Callable[[], object]:
+    def call():
+        response = client.post(path, json=body)
+        assert response.status_code == 200, (path, response.status_code)
+    return call
+
+
+def risk_pairs(size: int) -> List[Tuple[Dict, Dict]]:
+    """(studentData, riskAssessment) pairs for the recommender"""
+    risks = risk_scorer().batch_calculate(generate_student_features(size, SEED))
+    return list(zip(generate_student_records(size, SEED), risks))
+
+
+def setup_calculate_risk_score(size):
+    scorer = risk_scorer()
+    students = generate_student_features(size, SEED)
+    return lambda: [scorer.calculate_risk_score(features) for features in students]
+
+
+def setup_batch_calculate(size):
+    scorer = risk_scorer()
+    students = generate_student_features(size, SEED)
+    return lambda: scorer.batch_calculate(students)
+
+
+def setup_detect_combined(size):
+    from services.language_detector import get_detector
+    detector = get_detector()
+    records = generate_contact_records(size, SEED)
+    return lambda: [detector.detect_combined(**record) for record in records]
+
+
+def setup_recommend_for_student(size):
+    from services.recommender import get_recommender
+    recommender = get_recommender()
+    pairs = risk_pairs(size)
+    return lambda: [recommender.recommend_for_student(data, risk) for data, risk in pairs]
+
+
+def setup_recommend_for_school(size):
+    from services.recommender import get_recommender
+    recommender = get_recommender()
+    risks = [risk for _, risk in risk_pairs(size)]
+    school = generate_school(SEED)
+    return lambda: recommender.recommend_for_school(school, risks, budget=size * 20)
+
+
+def setup_route_score_risk(size):
+    client = test_client()
+    calls = [post(client, '/ai/score-risk', {'features': features})
+             for features in generate_student_features(size, SEED)]
+    return lambda: [call() for call in calls]
+
+
+def setup_route_score_risk_batch(size):
+    return post(test_client(), '/ai/score-risk/batch', {'students': generate_student_features(size, SEED)})
+
+
+def setup_route_detect_language_batch(size):
+    return post(test_client(), '/ai/detect-language/batch', {'records': generate_contact_records(size, SEED)})
+
+
+def setup_route_recommendations_batch(size):
+    students = [{'studentData': data, 'features': features} for data, features in zip(
+        generate_student_records(size, SEED), generate_student_features(size, SEED)
+    )]
+    return post(test_client(), '/ai/recommendations/batch', {'students': students})
+
+
+def setup_route_recommendations_school(size):
+    risks = [risk for _, risk in risk_pairs(size)]
+    body = {'schoolData': generate_school(SEED), 'studentRisks': risks, 'budget': size * 20}
+    return post(test_client(), '/ai/recommendations/school', body)
+
+
+CASES: List[Case] = [
+    ('RiskScorer.calculate_risk_score', [100, 1_000, 10_000], [100, 1_000], setup_calculate_risk_score),
+    ('RiskScorer.batch_calculate', [100, 1_000, 10_000, 50_000], [100, 1_000], setup_batch_calculate),
+    ('LanguageDetector.detect_combined', [100, 1_000, 10_000], [100, 1_000], setup_detect_combined),
+    ('Recommender.recommend_for_student', [100, 1_000, 10_000], [100, 1_000], setup_recommend_for_student),
+    ('Recommender.recommend_for_school', [100, 1_000, 10_000], [100, 1_000], setup_recommend_for_school),
+    ('POST /ai/score-risk', [100, 1_000], [100], setup_route_score_risk),
+    ('POST /ai/score-risk/batch', [100, 1_000, 10_000], [100, 1_000], setup_route_score_risk_batch),
+    ('POST /ai/detect-language/batch', [100, 1_000, 10_000], [100, 1_000], setup_route_detect_language_batch),
+    ('POST /ai/recommendations/batch', [100, 1_000, 10_000], [100, 1_000], setup_route_recommendations_batch),
+    ('POST /ai/recommendations/school', [100, 1_000, 10_000], [100, 1_000], setup_route_recommendations_school),
+]
+
+
+def measure(call: Callable[[], object], size: int, repeats: int = REPEATS) -> Dict:
+    """
+    Time one call at one size
+
+    Runs enough loops per sample to last MIN_SAMPLE_SECONDS (at least one),
+    after a warm-up call, and keeps the best and median of the samples.
+
+    Returns:
+        { bestMs, medianMs, perItemUs, loops, repeats }
+    """
+    call()
+    timer = timeit.Timer(call)
+    loops = 1
+    while loops * timer.timeit(1) < MIN_SAMPLE_SECONDS and loops < 1_000:
+        loops *= 2
+    samples = [elapsed / loops * 1000 for elapsed in timer.repeat(repeat=repeats, number=loops)]
+    best = min(samples)
+    return {
+        'bestMs': round(best, 4),
+        'medianMs': round(statistics.median(samples), 4),
+        'perItemUs': round(best * 1000 / size, 3),
+        'loops': loops,
+        'repeats': repeats,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> Dict:
+    import numpy
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'seed': SEED,
+        'riskScorer': risk_scorer().status(),
+    }
+
+
+def run(quick: bool = False, only: Optional[str] = None, repeats: int = REPEATS) -> Dict:
+    """Run every case (or those whose name contains only) and collect the results"""
+    results = []
+    for name, sizes, quick_sizes, setup in CASES:
+        if only and only.lower() not in name.lower():
+            continue
+        for size in (quick_sizes if quick else sizes):
+            result = {'name': name, 'size': size, **measure(setup(size), size, repeats)}
+            results.append(result)
+            print(f'{name:>36} {size:>7,} {result["bestMs"]:>10.2f} ms {result["perItemUs"]:>9.2f} us/item',
+                  flush=True)
+    return {'environment': environment(), 'results': results}
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """
+    Compare best times with a baseline run
+
+    Args:
+        current: Output of run()
+        baseline: Earlier output of run() (e.g. from the previous commit)
+        threshold: Relative slowdown reported as a regression (0.10 = 10%)
+
+    Returns:
+        One row per case and size present in both runs, slowest change first
+    """
+    previous = {(item['name'], item['size']): item['bestMs'] for item in baseline['results']}
+    rows = []
+    for item in current['results']:
+        before = previous.get((item['name'], item['size']))
+        if before:
+            change = item['bestMs'] / before - 1
+            rows.append({
+                'name': item['name'],
+                'size': item['size'],
+                'baselineMs': before,
+                'currentMs': item['bestMs'],
+                'change': round(change, 4),
+                'regression': change > threshold,
+            })
+    rows.sort(key=lambda row: row['change'], reverse=True)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the AI service benchmark suite')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--compare', help='Baseline JSON from an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Slowdown counted as a regression (default 0.10 = 10%%)')
+    parser.add_argument('--quick', action='store_true', help='Smaller sizes only')
+    parser.add_argument('--only', help='Run cases whose name contains this text')
+    parser.add_argument('--repeats', type=int, default=REPEATS, help='Samples per case and size')
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    started = time.perf_counter()
+    report = run(args.quick, args.only, args.repeats)
+    print(f'\n{len(report["results"])} measurements in {time.perf_counter() - started:.0f}s')
+
+    if baseline is not None:
+        rows = compare(report, baseline, args.threshold)
+        report['comparison'] = {'baseline': baseline['environment'], 'threshold': args.threshold, 'rows': rows}
+        print(f'\nAgainst {baseline["environment"].get("commit") or args.compare}:')
+        for row in rows:
+            marker = '  REGRESSION' if row['regression'] else ''
+            print(f'{row["name"]:>36} {row["size"]:>7,} {row["baselineMs"]:>10.2f} -> '
+                  f'{row["currentMs"]:>10.2f} ms {row["change"]:>+8.1%}{marker}')
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f'\nWrote {args.output}')
+
+    if baseline is not None and any(row['regression'] for row in report['comparison']['rows']):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,312 @@
+"""
+Synthetic Data Generators
+Reproducible student features for benchmarks (no database required)
+"""
+
+import math
+import random
+from datetime import date, timedelta
+from typing import Dict, List
+
+ASSESSMENT_LEVELS = ['below_benchmark', 'meeting_benchmark', 'exceeding_benchmark', 'not_assessed', None]
+LOCATION_TYPES = ['Urban', 'Rural', 'Remote']
+WEALTH_PROXIES = ['phone_verified', 'proxy_only', 'no_contact']
+
+# Words heard on IVR calls: local-language greetings and function words
+# mixed with the English that parents often switch into
+TRANSCRIPT_WORDS = [
+    'maakye', 'akye', 'me', 'wo', 'yɛ', 'ɔ', 'ne', 'na', 'sɛ', 'meda', 'ase',
+    'ojekoo', 'ni', 'mi', 'ko', 'le', 'he', 'oyiwaladonɔ',
+    'akpe', 'nye', 'wò', 'ɖe', 'ŋdi',
+    'desiba', 'ka', 'ti', 'sannu', 'ya', 'ta', 'mu', 'ku', 'su',
+    'edziban', 'dɔ', 'ye',
+    'my', 'child', 'was', 'sick', 'today', 'school', 'teacher', 'yes', 'no',
+    'market', 'farm', 'tomorrow', 'thank', 'you', 'please', 'call', 'later',
+]
+PUNCTUATION = ['', '', '', ',', '.', '?']
+
+# Ghana mobile network codes and landline area codes
+PHONE_PREFIXES = [
+    '020', '023', '024', '025', '026', '027', '028', '050', '054', '055', '056', '057', '059',
+    '0302', '0312', '0322', '0332', '0342', '0352', '0362', '0372', '0382', '0392',
+]
+
+# Ghana's 16 regions (Brong Ahafo is the pre-2019 name still found in old records)
+REGIONS = [
+    'Ashanti', 'Greater Accra', 'Central', 'Eastern', 'Western', 'Western North', 'Volta', 'Oti',
+    'Northern', 'Savannah', 'North East', 'Upper East', 'Upper West', 'Bono', 'Bono East', 'Ahafo',
+    'Brong Ahafo',
+]
+
+# Akan day names and common Ghanaian, Ewe and northern family names
+GIVEN_NAMES = [
+    'Kwame', 'Kofi', 'Kwaku', 'Yaw', 'Kwabena', 'Kojo', 'Kwesi',
+    'Ama', 'Akua', 'Abena', 'Adwoa', 'Afua', 'Yaa', 'Esi', 'Efua',
+    'Selorm', 'Edem', 'Fuseini', 'Abdul', 'Amina', 'Zainab', 'Naa', 'Nii',
+]
+FAMILY_NAMES = [
+    'Mensah', 'Owusu', 'Boateng', 'Asante', 'Osei', 'Agyeman', 'Addo', 'Darko', 'Amoah', 'Adjei',
+    'Tetteh', 'Quaye', 'Lamptey', 'Agbeko', 'Kpodo', 'Dzifa', 'Abubakar', 'Iddrisu', 'Mahama', 'Alhassan',
+]
+
+
+def generate_student_features(count: int, seed: int = 42) -> List[Dict]:
+    """
+    Generate student feature dicts covering every scoring branch
+
+    Args:
+        count: Number of students
+        seed: Random seed so runs are comparable across commits
+
+    Returns:
+        List of feature dicts in the /ai/score-risk shape
+    """
+    rng = random.Random(seed)
+    students = []
+
+    for index in range(count):
+        absences_30 = rng.randint(0, 15)
+        features = {
+            'studentId': f'student-{index:06d}',
+            'absences7Days': min(rng.randint(0, 5), absences_30),
+            'absences30Days': absences_30,
+            'absences90Days': absences_30 + rng.randint(0, 20),
+            'attendanceRate30Days': round(rng.uniform(30, 100), 1),
+            'consecutiveAbsences': rng.randint(0, 7),
+            'contactVerified': rng.random() < 0.7,
+            'contactResponseRate': rng.randint(0, 100),
+            'literacyLevel': rng.choice(ASSESSMENT_LEVELS),
+            'numeracyLevel': rng.choice(ASSESSMENT_LEVELS),
+            'avgLearningScore': rng.randint(10, 95),
+            'hasDisability': rng.random() < 0.08,
+            'locationType': rng.choice(LOCATION_TYPES),
+            'wealthProxy': rng.choice(WEALTH_PROXIES),
+            'seasonalMigrationRisk': rng.random() < 0.1,
+            'previousDropoutAttempt': rng.random() < 0.05,
+        }
+
+        # Leave some features out so defaults are exercised too
+        for name in ('avgLearningScore', 'contactResponseRate', 'attendanceRate30Days'):
+            if rng.random() < 0.1:
+                del features[name]
+
+        students.append(features)
+
+    return students
+
+
+def generate_dropout_outcomes(students: List[Dict], seed: int = 42) -> List[int]:
+    """
+    Draw a dropout outcome (1 = dropped out) for each student
+
+    The odds rise with absences, weak learning levels, an unverified
+    contact, remoteness and past dropout attempts, with interactions the
+    additive rule score cannot express (absence runs matter more for
+    remote students), so a trained model has something to find.
+
+    Args:
+        students: Output of generate_student_features
+        seed: Random seed
+
+    Returns:
+        List of 0/1 outcomes, one per student
+    """
+    rng = random.Random(seed)
+    outcomes = []
+
+    for features in students:
+        remote = features.get('locationType') == 'Remote'
+        logit = (
+            -4.0
+            + 0.15 * features.get('absences30Days', 0)
+            + (0.25 if remote else 0.08) * features.get('consecutiveAbsences', 0)
+            + 0.6 * (features.get('literacyLevel') == 'below_benchmark')
+            + 0.4 * (features.get('numeracyLevel') == 'below_benchmark')
+            + 0.7 * (not features.get('contactVerified', False))
+            + 0.5 * (features.get('wealthProxy') == 'no_contact')
+            + 1.5 * features.get('previousDropoutAttempt', False)
+            + 0.8 * (features.get('seasonalMigrationRisk', False) and remote)
+            - 0.02 * (features.get('avgLearningScore', 50) - 50)
+        )
+        outcomes.append(int(rng.random() < 1 / (1 + math.exp(-logit))))
+
+    return outcomes
+
+
+def generate_transcripts(count: int, words: int = 12, seed: int = 42) -> List[str]:
+    """
+    Generate mixed-language call transcripts
+
+    Args:
+        count: Number of transcripts
+        words: Approximate number of words per transcript
+        seed: Random seed
+
+    Returns:
+        List of transcript strings
+    """
+    rng = random.Random(seed)
+    transcripts = []
+
+    for _ in range(count):
+        length = max(1, rng.randint(words // 2, words * 3 // 2))
+        tokens = [rng.choice(TRANSCRIPT_WORDS) + rng.choice(PUNCTUATION) for _ in range(length)]
+        if rng.random() < 0.3:
+            tokens[0] = tokens[0].capitalize()
+        transcripts.append(' '.join(tokens))
+
+    return transcripts
+
+
+def generate_phone_numbers(count: int, seed: int = 42) -> List[str]:
+    """
+    Generate Ghanaian phone numbers in the formats parents give teachers
+
+    Args:
+        count: Number of phone numbers
+        seed: Random seed
+
+    Returns:
+        List of phone number strings (+233, 233, 0 and spaced formats)
+    """
+    rng = random.Random(seed)
+    numbers = []
+
+    for _ in range(count):
+        prefix = rng.choice(PHONE_PREFIXES)
+        national = prefix + ''.join(rng.choice('0123456789') for _ in range(10 - len(prefix)))
+        style = rng.random()
+        if style < 0.4:
+            numbers.append('+233' + national[1:])
+        elif style < 0.5:
+            numbers.append('233' + national[1:])
+        elif style < 0.6:
+            numbers.append(f'+233 {national[1:3]} {national[3:6]} {national[6:]}')
+        else:
+            numbers.append(national)
+
+    return numbers
+
+
+def generate_attendance_events(
+    student_ids: List[str],
+    start: date,
+    days: int,
+    seed: int = 42
+) -> List[Dict]:
+    """
+    Generate school-day attendance events for a set of students
+
+    Each student gets a fixed absence tendency so some build up long
+    absence runs; weekends are skipped like the school calendar.
+
+    Args:
+        student_ids: Students to mark
+        start: First day
+        days: Number of calendar days from start
+        seed: Random seed
+
+    Returns:
+        List of { student, date, status } events in date order
+    """
+    rng = random.Random(seed)
+    absence_rates = {student_id: rng.choice([0.02, 0.05, 0.1, 0.3, 0.6]) for student_id in student_ids}
+    events = []
+
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        if day.weekday() >= 5:
+            continue
+        for student_id in student_ids:
+            roll = rng.random()
+            rate = absence_rates[student_id]
+            if roll < rate:
+                status = 'absent'
+            elif roll < rate + 0.03:
+                status = 'excused'
+            elif roll < rate + 0.08:
+                status = 'late'
+            else:
+                status = 'present'
+            events.append({'student': student_id, 'date': day.isoformat(), 'status': status})
+
+    return events
+
+
+def generate_student_records(count: int, seed: int = 42) -> List[Dict]:
+    """
+    Generate studentData records (as stored by the backend) for recommendations
+
+    Args:
+        count: Number of students
+        seed: Random seed
+
+    Returns:
+        List of { _id, fullName, region, phone } dicts; ids match
+        generate_student_features(count)
+    """
+    rng = random.Random(seed)
+    phones = generate_phone_numbers(count, seed)
+
+    return [
+        {
+            '_id': f'student-{index:06d}',
+            'fullName': f'{rng.choice(GIVEN_NAMES)} {rng.choice(FAMILY_NAMES)}',
+            'region': rng.choice(REGIONS),
+            'phone': phones[index],
+        }
+        for index in range(count)
+    ]
+
+
+def generate_school(seed: int = 42) -> Dict:
+    """
+    Generate a schoolData record for school recommendations
+
+    Args:
+        seed: Random seed
+
+    Returns:
+        { _id, name, region, locationType } dict
+    """
+    rng = random.Random(seed)
+    town = rng.choice(['Kumasi', 'Tamale', 'Ho', 'Cape Coast', 'Sunyani', 'Bolgatanga', 'Wa', 'Koforidua'])
+
+    return {
+        '_id': f'school-{rng.randint(0, 9999):04d}',
+        'name': f'{town} {rng.choice(["M/A", "D/A", "R/C", "Presby"])} Basic School',
+        'region': rng.choice(REGIONS),
+        'locationType': rng.choice(LOCATION_TYPES),
+    }
+
+
+def generate_contact_records(count: int, seed: int = 42) -> List[Dict]:
+    """
+    Generate { text, phone, region } records for language detection
+
+    Most records carry a phone number; transcripts and regions are present
+    only some of the time, as with real guardian contacts.
+
+    Args:
+        count: Number of records
+        seed: Random seed
+
+    Returns:
+        List of dicts with at least one of text, phone and region
+    """
+    rng = random.Random(seed)
+    transcripts = generate_transcripts(count, seed=seed)
+    phones = generate_phone_numbers(count, seed=seed)
+    records = []
+
+    for index in range(count):
+        record = {}
+        if rng.random() < 0.4:
+            record['text'] = transcripts[index]
+        if rng.random() < 0.8:
+            record['phone'] = phones[index]
+        if not record or rng.random() < 0.5:
+            record['region'] = rng.choice(REGIONS)
+        records.append(record)
+
+    return records
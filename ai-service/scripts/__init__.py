@@ -0,0 +1,4 @@
+"""
+AI Service Scripts
+Run from the ai-service directory, e.g. python -m scripts.train_risk_model features.csv
+"""
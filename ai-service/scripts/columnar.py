@@ -0,0 +1,101 @@
+"""
+Columnar Export and Bulk Scoring
+Writes school feature matrices and risk assessments from MongoDB to Parquet
+or Arrow, and scores Parquet or Arrow feature files offline
+"""
+
+from typing import Iterator, List, Optional, Sequence, Tuple
+import argparse
+import logging
+import os
+import sys
+
+from services.columnar import (
+    DEFAULT_ROW_GROUP_SIZE, EXPORT_PARTS, FORMATS, columnar_available, iter_export, score_file,
+)
+from services.risk_scorer import get_scorer
+
+logger = logging.getLogger(__name__)
+
+
+def school_ids(db) -> List[str]:
+    """Every school with active students"""
+    from services.feature_extractor import STUDENTS_COLLECTION
+    return sorted(str(school) for school in db[STUDENTS_COLLECTION].distinct('school', {'active': {'$ne': False}}))
+
+
+def iter_schools(extractor, schools: Sequence[str], include: Sequence[str]) -> Iterator[Tuple[str, List, Optional[List]]]:
+    """(school_id, features, assessments) per school, extracted and scored one school at a time"""
+    scorer = get_scorer()
+    for school_id in schools:
+        features_list = extractor.extract_school_features(school_id)
+        assessments = scorer.batch_assess(features_list) if 'assessments' in include else None
+        yield school_id, features_list, assessments
+
+
+def export(args) -> None:
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+    from services.feature_extractor import FeatureExtractor
+
+    load_dotenv()
+    db = MongoClient(args.mongodb_uri or os.getenv('MONGODB_URI')).edulink
+    schools = args.school or school_ids(db)
+    include = tuple(args.include.split(','))
+    if any(item not in EXPORT_PARTS for item in include):
+        raise ValueError(f'--include must list {" and/or ".join(EXPORT_PARTS)}')
+
+    chunks = iter_export(iter_schools(FeatureExtractor(db), schools, include), include, args.format, args.row_group_size)
+    with open(args.output, 'wb') as output_file:
+        for chunk in chunks:
+            output_file.write(chunk)
+    logger.info(f'Exported {len(schools)} schools to {args.output}')
+
+
+def score(args) -> None:
+    summary = score_file(
+        args.input,
+        args.output,
+        get_scorer(),
+        args.input_format,
+        args.output_format,
+        args.batch_size,
+    )
+    logger.info(f'Wrote {args.output}: {summary}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Columnar (Parquet/Arrow) export and bulk risk scoring')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = commands.add_parser('export', help='Export school features and risk assessments from MongoDB')
+    export_parser.add_argument('output', help='File to write')
+    export_parser.add_argument('--school', action='append', help='School id (repeatable; default every school)')
+    export_parser.add_argument('--include', default=','.join(EXPORT_PARTS), help='features, assessments or both')
+    export_parser.add_argument('--format', choices=FORMATS, default='parquet')
+    export_parser.add_argument('--row-group-size', type=int, default=DEFAULT_ROW_GROUP_SIZE)
+    export_parser.add_argument('--mongodb-uri', help='Defaults to MONGODB_URI')
+    export_parser.set_defaults(handler=export)
+
+    score_parser = commands.add_parser('score', help='Score a file of student features')
+    score_parser.add_argument('input', help='Features, e.g. from export --include features')
+    score_parser.add_argument('output', help='Risk assessments file to write')
+    score_parser.add_argument('--input-format', choices=FORMATS, default='parquet')
+    score_parser.add_argument('--output-format', choices=FORMATS, default='parquet')
+    score_parser.add_argument('--batch-size', type=int, default=DEFAULT_ROW_GROUP_SIZE,
+                              help='Rows read, scored and written at a time')
+    score_parser.set_defaults(handler=score)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(name)s: %(message)s')
+
+    if not columnar_available():
+        sys.exit('pyarrow is required: pip install pyarrow')
+    try:
+        args.handler(args)
+    except (OSError, ValueError) as e:
+        sys.exit(f'{args.command.capitalize()} failed: {e}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Scoring Job Worker
+Processes /ai/jobs chunks from the Redis queue; run more of these (one per
+core, on as many machines as needed) to work through jobs faster
+"""
+
+import argparse
+import logging
+import os
+import signal
+import sys
+
+from services.job_queue import JobQueue, JobWorker, job_handlers, job_ttl
+from services.recommender import get_recommender
+from services.risk_cache import DEFAULT_TTL_SECONDS, CachedRiskScorer
+from services.risk_scorer import get_scorer
+
+logger = logging.getLogger(__name__)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Process scoring jobs from the Redis queue')
+    parser.add_argument('--redis-url', help='Defaults to REDIS_URL')
+    parser.add_argument('--worker-id', help='Defaults to host:pid:random')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(name)s: %(message)s')
+
+    import redis
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    redis_url = args.redis_url or os.getenv('REDIS_URL')
+    if not redis_url:
+        sys.exit('REDIS_URL is required')
+    redis_client = redis.from_url(redis_url)
+
+    scorer = CachedRiskScorer(
+        get_scorer(),
+        redis_client,
+        ttl=int(os.getenv('RISK_CACHE_TTL_SECONDS', DEFAULT_TTL_SECONDS))
+    )
+    worker = JobWorker(
+        JobQueue(redis_client, ttl=job_ttl()),
+        job_handlers(scorer.batch_assess, get_recommender()),
+        worker_id=args.worker_id
+    )
+
+    # Finish the chunk in hand, then hand back anything still held
+    def stop(signum, frame):
+        logger.info(f'Signal {signum}: stopping after the current chunk')
+        worker.stop()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    worker.run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Risk Model Training
+Fits the gradient-boosted dropout model from an exported CSV of student
+features and outcomes
+"""
+
+from typing import Dict, List, Tuple
+import argparse
+import csv
+import logging
+import os
+import sys
+
+import numpy as np
+
+from services.model_scorer import DEFAULT_MODEL_PATH, bundle_model, feature_matrix
+
+logger = logging.getLogger(__name__)
+
+# Column with the outcome: 1/true if the student dropped out, 0/false if not.
+# Every other column is a feature in the /ai/score-risk shape
+OUTCOME_COLUMN = 'droppedOut'
+OUTCOME_VALUES = {'1': 1, 'true': 1, 'yes': 1, '0': 0, 'false': 0, 'no': 0}
+
+
+def parse_value(text: str):
+    """CSV cell as the JSON value it stands for (None for an empty cell)"""
+    text = text.strip()
+    if not text:
+        return None
+    lowered = text.lower()
+    if lowered in ('true', 'false'):
+        return lowered == 'true'
+    for number_type in (int, float):
+        try:
+            return number_type(text)
+        except ValueError:
+            pass
+    return text
+
+
+def read_training_csv(path: str, outcome_column: str = OUTCOME_COLUMN) -> Tuple[List[Dict], List[int]]:
+    """
+    Read student features and outcomes from an exported CSV
+
+    Args:
+        path: CSV file with a header row
+        outcome_column: Column holding the dropout outcome
+
+    Returns:
+        (feature dicts without empty cells, 0/1 outcomes)
+
+    Raises:
+        ValueError if the outcome column is missing or a row's outcome is invalid
+    """
+    features_list = []
+    outcomes = []
+    with open(path, newline='', encoding='utf-8') as csv_file:
+        reader = csv.DictReader(csv_file)
+        if outcome_column not in (reader.fieldnames or []):
+            raise ValueError(f'{path} has no {outcome_column} column')
+        for line, row in enumerate(reader, start=2):
+            outcome = OUTCOME_VALUES.get((row.pop(outcome_column) or '').strip().lower())
+            if outcome is None:
+                raise ValueError(f'line {line}: {outcome_column} must be 1/0 or true/false')
+            features = {}
+            for name, text in row.items():
+                value = parse_value(text or '')
+                if value is not None:
+                    features[name] = value
+            features_list.append(features)
+            outcomes.append(outcome)
+    return features_list, outcomes
+
+
+def create_estimator(seed: int):
+    """XGBoost when installed, otherwise scikit-learn's histogram gradient boosting"""
+    try:
+        from xgboost import XGBClassifier
+    except ImportError:
+        from sklearn.ensemble import HistGradientBoostingClassifier
+        return HistGradientBoostingClassifier(max_iter=200, learning_rate=0.1, max_leaf_nodes=15, random_state=seed)
+    # One thread: inference runs inside web and worker processes
+    return XGBClassifier(
+        n_estimators=200,
+        max_depth=4,
+        learning_rate=0.1,
+        subsample=0.8,
+        tree_method='hist',
+        eval_metric='logloss',
+        n_jobs=1,
+        random_state=seed,
+    )
+
+
+def train_model(features_list: List[Dict], outcomes: List[int], test_size: float = 0.2, seed: int = 42) -> Dict:
+    """
+    Fit the model, report holdout metrics, then refit on every row
+
+    Args:
+        features_list: Student feature dicts
+        outcomes: 0/1 dropout outcomes
+        test_size: Share of rows held out for the metrics
+        seed: Random seed for the split and the estimator
+
+    Returns:
+        Model bundle for save_model / ModelRiskScorer
+    """
+    from sklearn.metrics import roc_auc_score
+    from sklearn.model_selection import train_test_split
+
+    if len(set(outcomes)) < 2:
+        raise ValueError('outcomes must include both students who dropped out and students who stayed')
+
+    matrix = feature_matrix(features_list)
+    labels = np.asarray(outcomes, dtype=np.int64)
+    train_x, test_x, train_y, test_y = train_test_split(
+        matrix, labels, test_size=test_size, random_state=seed, stratify=labels
+    )
+
+    model = create_estimator(seed).fit(train_x, train_y)
+    metrics = {
+        'estimator': type(model).__name__,
+        'rows': len(labels),
+        'dropoutRate': round(float(labels.mean()), 4),
+        'holdoutRocAuc': round(float(roc_auc_score(test_y, model.predict_proba(test_x)[:, 1])), 4),
+    }
+
+    return bundle_model(create_estimator(seed).fit(matrix, labels), metrics)
+
+
+def save_model(bundle: Dict, path: str) -> None:
+    import joblib
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    joblib.dump(bundle, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Train the dropout risk model from a CSV export')
+    parser.add_argument('csv', help=f'CSV of student features with a {OUTCOME_COLUMN} column')
+    parser.add_argument('--output', default=DEFAULT_MODEL_PATH, help='Model file (default: models/risk_model.joblib)')
+    parser.add_argument('--outcome', default=OUTCOME_COLUMN, help='Outcome column name')
+    parser.add_argument('--test-size', type=float, default=0.2, help='Share of rows held out for metrics')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(name)s: %(message)s')
+
+    try:
+        features_list, outcomes = read_training_csv(args.csv, args.outcome)
+        bundle = train_model(features_list, outcomes, args.test_size, args.seed)
+        save_model(bundle, args.output)
+    except (OSError, ValueError) as e:
+        sys.exit(f'Training failed: {e}')
+
+    logger.info(f'Saved {args.output}: {bundle["metrics"]}')
+
+
+if __name__ == '__main__':
+    main()
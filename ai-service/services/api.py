@@ -0,0 +1,369 @@
+"""
+HTTP API Contracts
+Request validation and response building shared by app.py (Flask) and
+asgi.py (Quart), so both serve exactly the same JSON contracts
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import json
+
+from .encoding import MSGPACK, MSGPACK_TYPES, encode_results, msgpack_available, negotiate
+from .incremental import parse_day
+from .intervention_optimizer import is_amount
+from .job_queue import JOB_KINDS, parse_chunk_size
+from .lazy import startup_status
+from .metrics import NULL_TIMER
+from .school_rollups import DEFAULT_TOP_ISSUES
+from .streaming import DEFAULT_TOP_K, stream_chunk_size
+
+SERVICE_NAME = 'edulink-ai-service'
+SERVICE_VERSION = '1.0.0'
+
+ENDPOINTS = {
+    'health': '/health',
+    'warmup': '/warmup',
+    'metrics': '/metrics',
+    'language_detection': '/ai/detect-language',
+    'language_detection_batch': '/ai/detect-language/batch',
+    'language_detection_phones': '/ai/detect-language/phones',
+    'risk_scoring': '/ai/score-risk',
+    'risk_scoring_batch': '/ai/score-risk/batch',
+    'risk_scoring_stream': '/ai/score-risk/batch/stream',
+    'risk_scoring_top_k': '/ai/score-risk/top-k',
+    'risk_scoring_school': '/ai/score-risk/school/<school_id>',
+    'risk_scoring_incremental_students': '/ai/score-risk/incremental/students',
+    'risk_scoring_incremental_events': '/ai/score-risk/incremental/events',
+    'schools_summary': '/ai/schools/summary',
+    'export': '/ai/export',
+    'jobs': '/ai/jobs',
+    'job_status': '/ai/jobs/<job_id>',
+    'job_results': '/ai/jobs/<job_id>/results',
+    'job_stream': '/ai/jobs/<job_id>/stream',
+    'recommendations': '/ai/recommendations/<student_id>',
+    'recommendations_batch': '/ai/recommendations/batch'
+}
+
+
+class RequestError(Exception):
+    """
+    A request the service refuses, answered with { error: message }
+
+    Raised by the validators below; both apps turn it into a JSON error
+    response with status (400 unless a backend is missing, then 503).
+    """
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def require(resource, name: str):
+    """resource, or a 503 RequestError naming the backend if it is None"""
+    if resource is None:
+        raise RequestError(f'{name} is not connected', 503)
+    return resource
+
+
+class ApiHelpers:
+    """
+    Metrics and response helpers bound to one app
+
+    Flask and Quart expose the same request attributes (url_rule,
+    accept_mimetypes) and Response signature, so both apps share these.
+    """
+
+    def __init__(self, request, response_class, json_format, metrics):
+        self.request = request
+        self.response_class = response_class
+        self.json_format = json_format
+        self.metrics = metrics
+
+    def route_label(self) -> str:
+        """Route template (not the raw path) so labels stay bounded"""
+        rule = self.request.url_rule
+        return rule.rule if rule is not None else 'unmatched'
+
+    def stage(self, name: str):
+        """Time one stage (parse, score, serialize) of the current request"""
+        if not self.metrics.enabled:
+            return NULL_TIMER
+        return self.metrics.stage(self.route_label(), name)
+
+    def record_batch_size(self, size: int) -> None:
+        if self.metrics.enabled:
+            self.metrics.observe_batch(self.route_label(), size)
+
+    def response_format(self):
+        """MessagePack when the Accept header prefers it, JSON otherwise"""
+        return negotiate(self.request.accept_mimetypes, self.json_format)
+
+    def encoded_response(self, body, wire_format):
+        # Vary: Accept so caches keep the JSON and MessagePack bodies apart
+        return self.response_class(body, mimetype=wire_format.media_type, headers={'Vary': 'Accept'})
+
+    def payload_response(self, payload):
+        """Batch endpoint response in the negotiated format (same structure as jsonify)"""
+        wire_format = self.response_format()
+        return self.encoded_response(wire_format.body(payload), wire_format)
+
+    def results_response(self, assessments, features_list=None, **fields):
+        """Response { ...fields, results: [...] } built from RiskAssessment records"""
+        wire_format = self.response_format()
+        return self.encoded_response(encode_results(assessments, wire_format, features_list, **fields), wire_format)
+
+
+# Response bodies
+
+def connection_status(resource) -> str:
+    """connected/disconnected, or pending before the first use"""
+    if not resource.loaded:
+        return 'pending'
+    return 'connected' if resource.peek() is not None else 'disconnected'
+
+
+def health_payload(resources: Dict, lazy_startup: bool) -> Dict:
+    """
+    /health body, built without loading anything (resources not used yet show as null)
+
+    Args:
+        resources: The app's RESOURCES (Lazy resources by name)
+        lazy_startup: Whether AI_LAZY_STARTUP deferred loading
+    """
+    def stats(name):
+        value = resources[name].peek()
+        return value.stats() if value is not None else None
+
+    scorer = resources['scorer'].peek()
+    return {
+        'status': 'ok',
+        'service': SERVICE_NAME,
+        'version': SERVICE_VERSION,
+        'mongodb': connection_status(resources['mongodb']),
+        'redis': connection_status(resources['redis']),
+        'riskCache': stats('riskCache'),
+        'riskModel': scorer.status() if scorer is not None else None,
+        'riskRules': scorer.rule_store.status() if scorer is not None else None,
+        'incremental': stats('incremental'),
+        'schoolRollups': stats('schoolRollups'),
+        'startup': startup_status(resources, lazy_startup)
+    }
+
+
+def root_payload() -> Dict:
+    return {
+        'message': 'EduLink AI Service',
+        'version': SERVICE_VERSION,
+        'endpoints': ENDPOINTS
+    }
+
+
+def school_summary_payload(summaries: List[Dict], school_ids: Optional[List[str]]) -> Dict:
+    """/ai/schools/summary body, listing requested schools without a rollup as missing"""
+    found = {summary['schoolId'] for summary in summaries}
+    return {
+        'count': len(summaries),
+        'schools': summaries,
+        'missing': [school_id for school_id in school_ids or () if school_id not in found]
+    }
+
+
+def job_cancelled_payload(job_id: str) -> Dict:
+    return {'jobId': job_id, 'cancelled': True}
+
+
+# Request validation: each returns the parsed parameters or raises RequestError
+
+def decode_body(data: bytes, mimetype: str, is_json: bool, json_format) -> Any:
+    """
+    Body of a batch request: JSON (orjson when fast), or MessagePack
+    (Content-Type: application/msgpack)
+
+    Raises:
+        RequestError 415 for any other content type (or MessagePack
+        without msgpack installed), 400 for a body that does not decode
+    """
+    if mimetype in MSGPACK_TYPES:
+        if not msgpack_available():
+            raise RequestError('MessagePack is not installed on this server.', 415)
+        try:
+            return MSGPACK.decode(data)
+        except ValueError as e:
+            raise RequestError(str(e))
+    if not is_json:
+        raise RequestError(
+            "Did not attempt to load JSON data because the request Content-Type was not 'application/json'.", 415
+        )
+    if json_format.fast:
+        try:
+            return json_format.decode(data)
+        except ValueError:
+            pass  # orjson rejects some JSON the json module reads (integers beyond 64 bits)
+    try:
+        return json.loads(data)
+    except ValueError as e:
+        raise RequestError(f'Invalid JSON body ({e})')
+
+
+def language_request(data: Dict) -> Tuple[Any, Any, Any]:
+    """/ai/detect-language: (text, phone, region), at least one of them set"""
+    text = data.get('text')
+    phone = data.get('phone')
+    region = data.get('region')
+    if not any([text, phone, region]):
+        raise RequestError('At least one of text, phone, or region is required')
+    return text, phone, region
+
+
+def records_request(data: Dict) -> List:
+    """/ai/detect-language/batch: the records array"""
+    records = data.get('records', [])
+    if not records or not isinstance(records, list):
+        raise RequestError('records array is required')
+    return records
+
+
+def phones_request(data: Dict) -> List[str]:
+    """/ai/detect-language/phones: the phones array (strings only)"""
+    phones = data.get('phones', [])
+    if not phones or not isinstance(phones, list):
+        raise RequestError('phones array is required')
+    if not all(isinstance(phone, str) for phone in phones):
+        raise RequestError('phones must be strings')
+    return phones
+
+
+def features_request(data: Dict) -> Dict:
+    """/ai/score-risk: the features object"""
+    features = data.get('features', {})
+    if not features:
+        raise RequestError('features object is required')
+    return features
+
+
+def students_request(data: Dict, require_list: bool = False) -> List:
+    """students array of the batch endpoints (any non-empty value unless require_list)"""
+    students = data.get('students', [])
+    if not students or (require_list and not isinstance(students, list)):
+        raise RequestError('students array is required')
+    return students
+
+
+def stream_args(args) -> int:
+    """/ai/score-risk/batch/stream query: chunk size"""
+    try:
+        return stream_chunk_size(args.get('chunkSize'))
+    except ValueError:
+        raise RequestError('chunkSize must be a positive integer')
+
+
+def top_k_args(args) -> Tuple[int, int]:
+    """/ai/score-risk/top-k query: (k, chunk size)"""
+    try:
+        k = int(args.get('k', DEFAULT_TOP_K))
+        chunk_size = stream_chunk_size(args.get('chunkSize'))
+        if k < 1:
+            raise ValueError
+    except ValueError:
+        raise RequestError('k and chunkSize must be positive integers')
+    return k, chunk_size
+
+
+def include_features_arg(args) -> bool:
+    return args.get('includeFeatures', 'false').lower() == 'true'
+
+
+def events_request(data: Dict) -> Tuple[List, Any]:
+    """/ai/score-risk/incremental/events: (events, asOf day or None)"""
+    events = data.get('events')
+    if not isinstance(events, list):
+        raise RequestError('events array is required')
+    try:
+        as_of = parse_day(data['asOf']) if data.get('asOf') else None
+    except ValueError as e:
+        raise RequestError(f'Invalid asOf: {e}')
+    return events, as_of
+
+
+def school_summary_args(args) -> Tuple[Optional[List[str]], int]:
+    """/ai/schools/summary query: (school ids or None for every school, top issues)"""
+    try:
+        top = int(args.get('top', DEFAULT_TOP_ISSUES))
+        if top < 0:
+            raise ValueError
+    except ValueError:
+        raise RequestError('top must be a non-negative integer')
+
+    school_ids = args.get('schoolIds')
+    if school_ids is not None:
+        school_ids = list(dict.fromkeys(item.strip() for item in school_ids.split(',') if item.strip()))
+    return school_ids, top
+
+
+def export_school_ids(options: Dict) -> None:
+    """Check /ai/export's school ids before the response starts"""
+    from .feature_extractor import to_object_id
+
+    try:
+        for school_id in options['schoolIds']:
+            to_object_id(school_id)
+    except ValueError as e:
+        raise RequestError(str(e))
+
+
+def job_request(data: Dict) -> Tuple[str, List, Dict, int]:
+    """POST /ai/jobs: (kind, items, options, chunk size)"""
+    kind = data.get('kind', 'score-risk')
+    students = data.get('students', [])
+    if kind not in JOB_KINDS:
+        raise RequestError(f'kind must be one of: {", ".join(JOB_KINDS)}')
+    if not students or not isinstance(students, list):
+        raise RequestError('students array is required')
+    try:
+        chunk_size = parse_chunk_size(data.get('chunkSize'))
+    except ValueError as e:
+        raise RequestError(str(e))
+    options = {'budget': data['budget']} if 'budget' in data else {}
+    return kind, students, options, chunk_size
+
+
+def offset_arg(args) -> int:
+    """/ai/jobs/<job_id>/results query: offset"""
+    try:
+        offset = int(args.get('offset', 0))
+        if offset < 0:
+            raise ValueError
+    except ValueError:
+        raise RequestError('offset must be a non-negative integer')
+    return offset
+
+
+def recommendation_request(data: Dict) -> Tuple[Dict, Dict, Any]:
+    """/ai/recommendations: (studentData, riskAssessment, budget)"""
+    student_data = data.get('studentData', {})
+    risk_assessment = data.get('riskAssessment', {})
+    budget = data.get('budget', 'medium')
+    if not student_data or not risk_assessment:
+        raise RequestError('studentData and riskAssessment are required')
+    return student_data, risk_assessment, budget
+
+
+def batch_recommendation_request(data: Dict) -> Tuple[List, Any]:
+    """/ai/recommendations/batch: (students, budget)"""
+    students = students_request(data, require_list=True)
+    return students, data.get('budget', 'medium')
+
+
+def school_recommendation_request(data: Dict) -> Tuple[Dict, List, Any, Dict]:
+    """/ai/recommendations/school: (schoolData, studentRisks, budget, unitCosts)"""
+    school_data = data.get('schoolData', {})
+    student_risks = data.get('studentRisks', [])
+    budget = data.get('budget', 0)
+    if not school_data or not student_risks:
+        raise RequestError('schoolData and studentRisks are required')
+    if not is_amount(budget):
+        raise RequestError('budget must be a non-negative number')
+    unit_costs = data.get('unitCosts') or {}
+    if not isinstance(unit_costs, dict) or not all(is_amount(cost) for cost in unit_costs.values()):
+        raise RequestError('unitCosts must map interventions to non-negative numbers')
+    return school_data, student_risks, budget, unit_costs
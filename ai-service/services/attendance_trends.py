@@ -0,0 +1,265 @@
+"""
+Attendance Trend Features
+Rolling rates, trend slope, weekday patterns and absence streaks for every
+student in a school, computed from raw daily attendance records at once
+"""
+
+from typing import Dict, Iterable, List, Tuple
+from datetime import date
+
+import numpy as np
+
+from .incremental import ATTENDANCE_STATUSES, HISTORY_DAYS, WINDOW_DAYS, parse_day
+
+# Status -> code; statuses the backend doesn't know get the next code and
+# count as records that are neither present nor absent (like 'excused')
+STATUS_CODES = {status: code for code, status in enumerate(ATTENDANCE_STATUSES)}
+UNKNOWN_STATUS = len(ATTENDANCE_STATUSES)
+PRESENT = STATUS_CODES['present']
+ABSENT = STATUS_CODES['absent']
+
+# Rolling attendance rate per window (the 30-day rate is the existing
+# attendanceRate30Days feature)
+RATE_FEATURES = {days: f'attendanceRate{days}Days' for days in WINDOW_DAYS}
+
+# Features added to StudentFeatures by this module
+TREND_FEATURES = (
+    'attendanceRate7Days',
+    'attendanceRate90Days',
+    'attendanceTrend',
+    'longestAbsenceStreak',
+    'daysSinceLastPresent',
+    'peakAbsenceWeekday',
+    'peakWeekdayAbsenceRate',
+)
+
+# A slope from fewer records is mostly noise, so it is reported as flat
+MIN_TREND_RECORDS = 10
+
+# Trend features for a student without attendance in the last 90 days;
+# daysSinceLastPresent and the weekday pattern are left out (unknown)
+EMPTY_TRENDS = {
+    'attendanceRate7Days': 100,
+    'attendanceRate30Days': 100,
+    'attendanceRate90Days': 100,
+    'attendanceTrend': 0,
+    'longestAbsenceStreak': 0,
+}
+
+
+class AttendanceRows:
+    """
+    Attendance records of one school as parallel arrays
+
+    student holds an index into student_ids, age the number of calendar
+    days before as_of (0 = as_of) and status a STATUS_CODES code. Only
+    records from the last 90 days (0 <= age < 90) are kept.
+    """
+
+    __slots__ = ('student_ids', 'student', 'age', 'status', 'as_of')
+
+    def __init__(self, student_ids: List[str], student: np.ndarray, age: np.ndarray, status: np.ndarray, as_of: date):
+        self.student_ids = student_ids
+        self.student = student
+        self.age = age
+        self.status = status
+        self.as_of = as_of
+
+    def __len__(self) -> int:
+        return len(self.student)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict], as_of) -> 'AttendanceRows':
+        """
+        Encode { student, date, status } records (attendance documents or events)
+
+        Args:
+            records: Records with any student id type and a date parse_day accepts
+            as_of: Reference day (date, datetime or ISO string)
+
+        Raises:
+            ValueError if a record has no valid date
+        """
+        as_of = parse_day(as_of)
+        ordinal = as_of.toordinal()
+        index = {}
+        students, ages, statuses = [], [], []
+
+        for record in records:
+            age = ordinal - parse_day(record['date']).toordinal()
+            if not 0 <= age < HISTORY_DAYS:
+                continue
+            student_id = str(record['student'])
+            position = index.get(student_id)
+            if position is None:
+                position = index[student_id] = len(index)
+            students.append(position)
+            ages.append(age)
+            statuses.append(STATUS_CODES.get(record.get('status'), UNKNOWN_STATUS))
+
+        return cls(
+            list(index),
+            np.array(students, dtype=np.int64),
+            np.array(ages, dtype=np.int64),
+            np.array(statuses, dtype=np.int8),
+            as_of,
+        )
+
+
+def _sorted_days(rows: AttendanceRows) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (student, age, status) ordered by student, oldest day first, one record per day
+
+    Records fetched sorted by student and date are already in this order,
+    and the stable sort (timsort for int64 keys) is then a single linear
+    pass. When a day was marked twice the later record wins.
+    """
+    key = rows.student * HISTORY_DAYS + (HISTORY_DAYS - 1 - rows.age)
+    order = np.argsort(key, kind='stable')
+    key = key[order]
+    last_of_day = np.ones(len(key), dtype=bool)
+    last_of_day[:-1] = key[1:] != key[:-1]
+    order = order[last_of_day]
+    return rows.student[order], rows.age[order], rows.status[order]
+
+
+def trend_columns(rows: AttendanceRows) -> Dict[str, np.ndarray]:
+    """
+    Trend features for every student in rows, one array entry per student
+
+    Every statistic is a per-student sum (np.bincount) or a running sum
+    over the sorted records (np.cumsum), so the cost is linear in the
+    number of records:
+
+    - attendanceRate{7,30,90}Days: present records / records in the window
+      (100 without records), as in the attendance aggregation
+    - attendanceTrend: least-squares slope of present (1) / not present (0)
+      over the day of each record, in percentage points per week; negative
+      when attendance is falling, 0 with fewer than MIN_TREND_RECORDS
+    - longestAbsenceStreak: longest run of consecutive absent records
+    - daysSinceLastPresent: days since the last present record (90 if none)
+    - peakAbsenceWeekday / peakWeekdayAbsenceRate: weekday (0 = Monday)
+      with the highest share of absent records and that share in percent;
+      -1 and 0 for students with no absences
+
+    Args:
+        rows: One school's attendance
+
+    Returns:
+        Feature name -> array of len(rows.student_ids)
+    """
+    count = len(rows.student_ids)
+    student, age, status = _sorted_days(rows)
+    present = status == PRESENT
+    absent = status == ABSENT
+
+    def per_student(weights=None, mask=None) -> np.ndarray:
+        if mask is not None:
+            return np.bincount(student[mask], minlength=count).astype(np.float64)
+        return np.bincount(student, weights, minlength=count)
+
+    columns = {}
+    for days, name in RATE_FEATURES.items():
+        inside = age < days
+        records = per_student(mask=inside)
+        attended = per_student(mask=inside & present)
+        columns[name] = np.where(records > 0, attended / np.maximum(records, 1) * 100, 100.0)
+
+    # Least squares slope of y = present against x = day (as_of = 0)
+    x = -age.astype(np.float64)
+    y = present.astype(np.float64)
+    n = per_student()
+    sum_x, sum_y = per_student(x), per_student(y)
+    sum_xy, sum_xx = per_student(x * y), per_student(x * x)
+    denominator = n * sum_xx - sum_x * sum_x
+    enough = (n >= MIN_TREND_RECORDS) & (denominator > 0)
+    slope = (n * sum_xy - sum_x * sum_y) / np.where(enough, denominator, 1)
+    columns['attendanceTrend'] = np.where(enough, np.round(slope * 100 * 7, 2), 0.0)
+
+    # Absence rate per (student, weekday) cell
+    weekday = (rows.as_of.weekday() - age) % 7
+    cells = student * 7 + weekday
+    cell_records = np.bincount(cells, minlength=count * 7).reshape(count, 7)
+    cell_absences = np.bincount(cells[absent], minlength=count * 7).reshape(count, 7)
+    weekday_rates = cell_absences / np.maximum(cell_records, 1)
+    peak = np.argmax(weekday_rates, axis=1)
+    peak_rate = weekday_rates[np.arange(count), peak] * 100
+    columns['peakAbsenceWeekday'] = np.where(peak_rate > 0, peak, -1)
+    columns['peakWeekdayAbsenceRate'] = peak_rate
+
+    longest = np.zeros(count, dtype=np.int64)
+    last_present = np.full(count, HISTORY_DAYS, dtype=np.int64)
+    if len(student):
+        starts = np.flatnonzero(np.r_[True, student[1:] != student[:-1]])
+        # Absences counted so far; a run's length is the count minus the
+        # count where it began (the last non-absent record or the row
+        # before the student's first record)
+        absences = np.cumsum(absent)
+        run_base = np.where(absent, 0, absences)
+        run_base[starts] = absences[starts] - absent[starts]
+        runs = absences - np.maximum.accumulate(run_base)
+        longest[student[starts]] = np.maximum.reduceat(runs, starts)
+        last_present[student[starts]] = np.minimum.reduceat(np.where(present, age, HISTORY_DAYS), starts)
+    columns['longestAbsenceStreak'] = longest
+    columns['daysSinceLastPresent'] = last_present
+
+    return columns
+
+
+def window_trends(days: Dict[date, str]) -> Tuple[float, int]:
+    """
+    (attendanceTrend, longestAbsenceStreak) of one student, as trend_columns
+    computes them, from their last 90 days of records (day -> status)
+
+    Used by incremental scoring, which keeps each student's days. The sums
+    are exact integers (x counted from the latest day; the slope doesn't
+    depend on the origin), so the trend matches trend_columns exactly.
+    """
+    ordered = sorted(days)
+    n = len(ordered)
+    longest = run = 0
+    sum_x = sum_y = sum_xy = sum_xx = 0
+    if ordered:
+        origin = ordered[-1].toordinal()
+    for day in ordered:
+        status = days[day]
+        x = day.toordinal() - origin
+        y = 1 if status == 'present' else 0
+        sum_x += x
+        sum_y += y
+        sum_xy += x * y
+        sum_xx += x * x
+        run = run + 1 if status == 'absent' else 0
+        longest = max(longest, run)
+
+    denominator = n * sum_xx - sum_x * sum_x
+    if n < MIN_TREND_RECORDS or denominator <= 0:
+        return 0.0, longest
+    slope = (n * sum_xy - sum_x * sum_y) / denominator
+    return float(np.round(slope * 100 * 7, 2)), longest
+
+
+def attendance_trends(records: Iterable[Dict], as_of) -> Dict[str, Dict]:
+    """
+    Trend features per student from raw attendance records
+
+    Args:
+        records: { student, date, status } records, ideally sorted by
+            student then date (as fetched by the feature extractor)
+        as_of: Reference day for the windows
+
+    Returns:
+        Dict of student id -> trend features (students with records only)
+    """
+    rows = AttendanceRows.from_records(records, as_of)
+    columns = trend_columns(rows)
+    names = list(columns)
+    values = [columns[name].tolist() for name in names]
+
+    trends = {}
+    for student_id, row in zip(rows.student_ids, zip(*values)):
+        features = dict(zip(names, row))
+        if features['peakAbsenceWeekday'] < 0:
+            del features['peakAbsenceWeekday']
+        trends[student_id] = features
+    return trends
@@ -0,0 +1,114 @@
+"""
+Batch Recommendations
+Recommendation plans for many students in one call, scoring raw features
+on the way when no risk assessment is given
+"""
+
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+
+from .records import RiskAssessment
+
+ITEM_ERROR = 'Item must be an object with studentData and riskAssessment or features'
+
+
+def split_items(items: List) -> Tuple[List[Optional[Dict]], List[Tuple], List[Tuple]]:
+    """
+    Sort batch items by what they carry
+
+    Returns:
+        (result slots with inline errors filled in, (index, student data,
+        risk assessment) items, (index, student data, features) items)
+    """
+    results = [None] * len(items)
+    assessed = []
+    to_score = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = {'error': ITEM_ERROR}
+            continue
+
+        student_data = item.get('studentData') or {}
+        risk_assessment = item.get('riskAssessment')
+        features = item.get('features')
+        if not isinstance(student_data, dict):
+            results[index] = {'error': 'studentData must be an object'}
+        elif isinstance(risk_assessment, dict):
+            assessed.append((index, student_data, risk_assessment))
+        elif isinstance(features, dict):
+            if '_id' not in student_data:
+                student_data = dict(student_data, _id=features.get('studentId'))
+            to_score.append((index, student_data, features))
+        else:
+            results[index] = {'error': ITEM_ERROR}
+    return results, assessed, to_score
+
+
+def fill_results(
+    results: List[Optional[Dict]],
+    assessed: List[Tuple],
+    to_score: List[Tuple],
+    assessments: List[RiskAssessment],
+    recommender,
+    budget: str
+) -> List[Dict]:
+    """Put each item's recommendations in its result slot"""
+    plans = recommender.recommend_for_students(
+        [(student_data, risk_assessment) for _, student_data, risk_assessment in assessed],
+        budget
+    )
+    for (index, _, _), plan in zip(assessed, plans):
+        results[index] = plan
+
+    plans = recommender.recommend_for_assessments(
+        [(student_data, assessment) for (_, student_data, _), assessment in zip(to_score, assessments)],
+        budget
+    )
+    for (index, _, _), plan in zip(to_score, plans):
+        results[index] = plan
+    return results
+
+
+def recommend_batch(
+    items: List,
+    recommender,
+    batch_assess: Callable[[List[Dict]], List[RiskAssessment]],
+    budget: str = 'medium'
+) -> List[Dict]:
+    """
+    Recommendations for a batch of students
+
+    Items with a riskAssessment are recommended from it; items with only
+    features are scored together with batch_assess first, and their plans
+    are built from the RiskAssessment records directly.
+
+    Args:
+        items: { studentData, riskAssessment } or { studentData, features }
+        recommender: Recommender instance
+        batch_assess: Scores a list of feature dicts
+        budget: Budget level shared by every student
+
+    Returns:
+        Recommendations in input order ({ error } for invalid items)
+    """
+    results, assessed, to_score = split_items(items)
+    assessments = batch_assess([features for _, _, features in to_score]) if to_score else []
+    return fill_results(results, assessed, to_score, assessments, recommender, budget)
+
+
+async def arecommend_batch(
+    items: List,
+    recommender,
+    batch_assess: Callable[[List[Dict]], Awaitable[List[RiskAssessment]]],
+    budget: str = 'medium',
+    run_sync: Callable[..., Awaitable] = asyncio.to_thread
+) -> List[Dict]:
+    """
+    Async recommend_batch for the ASGI app
+
+    Scoring is awaited from batch_assess; building the plans runs through
+    run_sync so the event loop stays free.
+    """
+    results, assessed, to_score = split_items(items)
+    assessments = await batch_assess([features for _, _, features in to_score]) if to_score else []
+    return await run_sync(fill_results, results, assessed, to_score, assessments, recommender, budget)
@@ -0,0 +1,388 @@
+"""
+Columnar Export
+Writes feature matrices and risk assessments as Parquet or Arrow in row
+groups, and scores Parquet or Arrow files of features batch by batch
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import importlib.util
+import io
+import itertools
+import logging
+
+from .attendance_trends import TREND_FEATURES
+from .model_scorer import CATEGORY_FEATURES, FLAG_FEATURES, NUMERIC_FEATURES
+from .records import ASSESSMENT_COLUMNS, COMPONENT_NAMES, MISSING, FeatureColumns, assessment_columns
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROW_GROUP_SIZE = 10_000
+
+# Format -> (media type, file extension)
+FORMATS = {
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+# What /ai/export can include in each row
+EXPORT_PARTS = ('features', 'assessments')
+
+# Columns copied from the input to the output of score_file when present
+DEFAULT_KEEP_COLUMNS = ('schoolId',)
+
+NUMBER_TYPES = {int, float, bool}
+
+
+def columnar_available() -> bool:
+    """pyarrow is only needed for columnar export and bulk scoring"""
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def _arrow():
+    import pyarrow
+    return pyarrow
+
+
+def feature_schema():
+    """Feature matrix layout: studentId, one column per model feature, then the trend features"""
+    pa = _arrow()
+    return pa.schema(
+        [('studentId', pa.string())] +
+        [(name, pa.float64()) for name in NUMERIC_FEATURES] +
+        [(name, pa.bool_()) for name in FLAG_FEATURES] +
+        [(name, pa.string()) for name in CATEGORY_FEATURES] +
+        [(name, pa.float64()) for name in TREND_FEATURES]
+    )
+
+
+def assessment_schema():
+    """ASSESSMENT_COLUMNS layout (failed rows have only studentId and error)"""
+    pa = _arrow()
+    types = {
+        'studentId': pa.string(),
+        'riskScore': pa.float64(),
+        'riskLevel': pa.string(),
+        'riskFactors': pa.list_(pa.string()),
+        'recommendations': pa.list_(pa.string()),
+        'modelVersion': pa.string(),
+        'error': pa.string(),
+        **{name: pa.float64() for name in COMPONENT_NAMES},
+    }
+    return pa.schema([(name, types[name]) for name in ASSESSMENT_COLUMNS])
+
+
+def export_schema(include: Sequence[str]):
+    """/ai/export layout: schoolId and studentId, then the included parts"""
+    pa = _arrow()
+    fields = [pa.field('schoolId', pa.string()), pa.field('studentId', pa.string())]
+    if 'features' in include:
+        fields.extend(field for field in feature_schema() if field.name != 'studentId')
+    if 'assessments' in include:
+        fields.extend(field for field in assessment_schema() if field.name != 'studentId')
+    return pa.schema(fields)
+
+
+def _text(value) -> Optional[str]:
+    if value is None or value is MISSING:
+        return None
+    return value if type(value) is str else str(value)
+
+
+def feature_columns(features_list: List) -> Dict[str, List]:
+    """
+    Feature matrix columns for a batch of students
+
+    Values that don't fit a column's type are written as null, which
+    reads back as a feature that was not sent.
+
+    Args:
+        features_list: Feature dicts or StudentFeatures
+
+    Returns:
+        Column name -> one value per student, in feature_schema() order
+    """
+    columns = {'studentId': [_text(features.get('studentId')) for features in features_list]}
+    for name in NUMERIC_FEATURES:
+        values = [features.get(name) for features in features_list]
+        columns[name] = [value if type(value) in NUMBER_TYPES else None for value in values]
+    for name in FLAG_FEATURES:
+        values = [features.get(name) for features in features_list]
+        columns[name] = [None if value is None else bool(value) for value in values]
+    for name in CATEGORY_FEATURES:
+        values = [features.get(name) for features in features_list]
+        columns[name] = [value if type(value) is str else None for value in values]
+    for name in TREND_FEATURES:
+        values = [features.get(name) for features in features_list]
+        columns[name] = [value if type(value) in NUMBER_TYPES else None for value in values]
+    return columns
+
+
+def export_columns(school_id: str, features_list: List, assessments: Optional[List] = None) -> Dict[str, List]:
+    """
+    One school's rows for /ai/export
+
+    Args:
+        school_id: School the students belong to
+        features_list: Extracted features (included unless assessments only)
+        assessments: Risk assessments in the same order, if included
+
+    Returns:
+        Column name -> values, covering export_schema() for what was given
+    """
+    columns = feature_columns(features_list)
+    if assessments is not None:
+        scored = assessment_columns(assessments)
+        del scored['studentId']
+        columns.update(scored)
+    columns['schoolId'] = [school_id] * len(features_list)
+    return columns
+
+
+def record_batch(columns: Dict[str, List], schema):
+    """Arrow record batch with schema's columns taken from columns"""
+    pa = _arrow()
+    arrays = []
+    for field in schema:
+        values = columns[field.name]
+        arrays.append(values if isinstance(values, pa.Array) else pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class ChunkSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain()"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class BatchWriter:
+    """
+    Streams rows as a Parquet file or an Arrow IPC stream
+
+    Rows are buffered until a full row group is ready; each write()
+    returns the bytes of the row groups (Parquet) or record batches (Arrow)
+    it completed, so a response or file goes out in pieces while at most
+    one row group is held in memory.
+    """
+
+    def __init__(self, schema, file_format: str = 'parquet', row_group_size: int = DEFAULT_ROW_GROUP_SIZE):
+        if file_format not in FORMATS:
+            raise ValueError(f'format must be one of {", ".join(FORMATS)}')
+        pa = _arrow()
+        self.schema = schema
+        self.format = file_format
+        self.row_group_size = row_group_size
+        self.rows = 0
+        self.row_groups = 0
+        self._pending = []
+        self._pending_rows = 0
+        self._sink = ChunkSink()
+        if file_format == 'parquet':
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(self._sink, schema)
+        else:
+            self._writer = pa.ipc.new_stream(self._sink, schema)
+
+    def write(self, columns: Dict[str, List]) -> bytes:
+        """Add rows given as columns; returns the bytes of completed row groups"""
+        batch = record_batch(columns, self.schema)
+        if batch.num_rows:
+            self._pending.append(batch)
+            self._pending_rows += batch.num_rows
+        while self._pending_rows >= self.row_group_size:
+            self._write_group(self.row_group_size)
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        """Write the last (partial) row group and finish the file"""
+        if self._pending_rows:
+            self._write_group(self._pending_rows)
+        self._writer.close()
+        return self._sink.drain()
+
+    def _write_group(self, rows: int) -> None:
+        table = _arrow().Table.from_batches(self._pending, self.schema)
+        group = table.slice(0, rows).combine_chunks()
+        if self.format == 'parquet':
+            self._writer.write_table(group, row_group_size=rows)
+        else:
+            self._writer.write_table(group)
+        rest = table.slice(rows)
+        self._pending = rest.to_batches()
+        self._pending_rows = rest.num_rows
+        self.rows += rows
+        self.row_groups += 1
+
+
+def iter_feature_batches(
+    source,
+    file_format: str = 'parquet',
+    batch_size: int = DEFAULT_ROW_GROUP_SIZE,
+    keep: Sequence[str] = DEFAULT_KEEP_COLUMNS
+) -> Iterator[Tuple[FeatureColumns, Dict]]:
+    """
+    Read a feature file batch by batch
+
+    Only feature columns (and keep columns) are read. Missing feature
+    columns and null values read as features that were not sent.
+
+    Args:
+        source: Path or binary file
+        file_format: 'parquet' or 'arrow' (IPC stream)
+        batch_size: Rows per batch for Parquet (Arrow keeps the file's batches)
+        keep: Extra columns returned as Arrow arrays alongside the features
+
+    Returns:
+        Iterator of (features, {keep column: Arrow array})
+    """
+    if file_format == 'parquet':
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(source)
+        names = parquet_file.schema_arrow.names
+        selected = [name for name in names if name in feature_schema().names or name in keep]
+        batches = parquet_file.iter_batches(batch_size=batch_size, columns=selected)
+    elif file_format == 'arrow':
+        batches = _arrow().ipc.open_stream(source)
+    else:
+        raise ValueError(f'format must be one of {", ".join(FORMATS)}')
+
+    feature_names = set(feature_schema().names)
+    for batch in batches:
+        columns = {}
+        kept = {}
+        for name, array in zip(batch.schema.names, batch.columns):
+            if name in keep:
+                kept[name] = array
+            elif name in feature_names:
+                columns[name] = array.to_pylist()
+        yield FeatureColumns(columns, batch.num_rows), kept
+
+
+def score_file(
+    source,
+    destination,
+    scorer,
+    input_format: str = 'parquet',
+    output_format: str = 'parquet',
+    batch_size: int = DEFAULT_ROW_GROUP_SIZE,
+    keep: Sequence[str] = DEFAULT_KEEP_COLUMNS
+) -> Dict:
+    """
+    Score a feature file into a file of risk assessments, one batch at a time
+
+    Args:
+        source: Path or binary file with feature_schema() columns
+        destination: Path or binary file for assessment_schema() rows
+        scorer: RiskScorer (rule- or model-based)
+        input_format, output_format: 'parquet' or 'arrow'
+        batch_size: Rows read, scored and written per row group
+        keep: Input columns copied in front of the assessment columns
+
+    Returns:
+        { rows, errors, rowGroups }
+    """
+    pa = _arrow()
+    batches = iter_feature_batches(source, input_format, batch_size, keep)
+    # Read the first batch before creating the output, so a bad input leaves no file behind
+    first = next(batches, None)
+    schema = assessment_schema()
+    if first is not None:
+        for index, name in enumerate(name for name in keep if name in first[1]):
+            schema = schema.insert(index, pa.field(name, first[1][name].type))
+    writer = BatchWriter(schema, output_format, batch_size)
+    errors = 0
+
+    output = open(destination, 'wb') if isinstance(destination, str) else destination
+    try:
+        if first is not None:
+            for features, kept in itertools.chain([first], batches):
+                columns = scorer.assess_columns(features)
+                errors += len(columns['error']) - columns['error'].count(None)
+                columns.update(kept)
+                output.write(writer.write(columns))
+        output.write(writer.close())
+    finally:
+        if output is not destination:
+            output.close()
+
+    logger.info(f'Scored {writer.rows} students ({errors} errors) in {writer.row_groups} row groups')
+    return {'rows': writer.rows, 'errors': errors, 'rowGroups': writer.row_groups}
+
+
+def iter_export(
+    schools: Iterable[Tuple[str, List, Optional[List]]],
+    include: Sequence[str] = EXPORT_PARTS,
+    file_format: str = 'parquet',
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE
+) -> Iterator[bytes]:
+    """
+    Encode schools' features and assessments as they are produced
+
+    Args:
+        schools: (school_id, features_list, assessments or None) per school
+        include: Parts of each row to write (see EXPORT_PARTS)
+        file_format: 'parquet' or 'arrow'
+        row_group_size: Rows per row group (small schools share one)
+
+    Returns:
+        Iterator of encoded chunks; together they form one file
+    """
+    writer = BatchWriter(export_schema(include), file_format, row_group_size)
+    for school_id, features_list, assessments in schools:
+        chunk = writer.write(export_columns(school_id, features_list, assessments))
+        if chunk:
+            yield chunk
+    yield writer.close()
+
+
+def parse_export_args(args) -> Dict:
+    """
+    Query parameters of /ai/export
+
+    Returns:
+        { schoolIds, include, format, rowGroupSize }
+
+    Raises:
+        ValueError with the message for a 400 response
+    """
+    school_ids = list(dict.fromkeys(
+        item.strip() for item in (args.get('schoolIds') or '').split(',') if item.strip()
+    ))
+    if not school_ids:
+        raise ValueError('schoolIds is required')
+
+    include = tuple(item.strip() for item in args.get('include', ','.join(EXPORT_PARTS)).split(',') if item.strip())
+    if not include or any(item not in EXPORT_PARTS for item in include):
+        raise ValueError(f'include must list {" and/or ".join(EXPORT_PARTS)}')
+
+    file_format = args.get('format', 'parquet')
+    if file_format not in FORMATS:
+        raise ValueError(f'format must be one of {", ".join(FORMATS)}')
+
+    try:
+        row_group_size = int(args.get('rowGroupSize', DEFAULT_ROW_GROUP_SIZE))
+        if row_group_size < 1:
+            raise ValueError
+    except ValueError:
+        raise ValueError('rowGroupSize must be a positive integer')
+
+    return {'schoolIds': school_ids, 'include': include, 'format': file_format, 'rowGroupSize': row_group_size}
@@ -0,0 +1,178 @@
+"""
+Response Encoding
+Encodes batches of risk assessments into JSON or MessagePack response bodies
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional
+import importlib.util
+import json
+import os
+
+from .records import RiskAssessment
+
+JSON_TYPE = 'application/json'
+MSGPACK_TYPE = 'application/msgpack'
+
+# Accepted spellings of the MessagePack media type (requests and Accept)
+MSGPACK_TYPES = (MSGPACK_TYPE, 'application/x-msgpack', 'application/vnd.msgpack')
+
+
+def fast_json_enabled() -> bool:
+    """orjson encodes JSON responses when installed, unless AI_FAST_JSON=false"""
+    enabled = os.getenv('AI_FAST_JSON', 'true').strip().lower() in ('1', 'true', 'yes')
+    return enabled and importlib.util.find_spec('orjson') is not None
+
+
+def msgpack_available() -> bool:
+    return importlib.util.find_spec('msgpack') is not None
+
+
+class JsonFormat:
+    """
+    Compact JSON with sorted keys, as jsonify writes it
+
+    With fast=True orjson does the encoding: the same values and keys, but
+    non-ASCII text is sent as UTF-8 instead of \\u escapes and floats use
+    the shortest notation (0.00001 rather than 1e-05). Values orjson can't
+    encode (integers beyond 64 bits) fall back to the json module.
+    """
+
+    media_type = JSON_TYPE
+
+    def __init__(self, fast: bool = False, default: Optional[Callable] = None):
+        self.fast = fast
+        self.default = default
+
+    def encode(self, value) -> bytes:
+        """One value, compact"""
+        if self.fast:
+            import orjson
+            try:
+                return orjson.dumps(value, default=self.default, option=orjson.OPT_SORT_KEYS)
+            except TypeError:
+                pass
+        return json.dumps(value, default=self.default, sort_keys=True, separators=(',', ':')).encode()
+
+    def decode(self, data: bytes):
+        """
+        Request body as Python values
+
+        Raises:
+            ValueError if the body is not JSON orjson (or json) accepts
+        """
+        if self.fast:
+            import orjson
+            return orjson.loads(data)
+        return json.loads(data)
+
+    def body(self, value) -> bytes:
+        """Whole response body, newline-terminated like jsonify"""
+        return self.encode(value) + b'\n'
+
+    def join(self, encoded: Iterable[bytes], **fields) -> bytes:
+        """
+        Body { ...fields, results: [...] } from already encoded results
+
+        Args:
+            encoded: One encoded result per student
+            **fields: Extra top-level fields
+
+        Returns:
+            Encoded body, newline-terminated like jsonify
+        """
+        head = self.encode(fields)[:-1]
+        prefix = head + (b',' if fields else b'') + b'"results":['
+        return prefix + b','.join(encoded) + b']}\n'
+
+
+class MsgpackFormat:
+    """MessagePack bodies with the same structure as the JSON ones"""
+
+    media_type = MSGPACK_TYPE
+
+    def encode(self, value) -> bytes:
+        import msgpack
+        return msgpack.packb(value)
+
+    def body(self, value) -> bytes:
+        return self.encode(value)
+
+    def join(self, encoded: Iterable[bytes], **fields) -> bytes:
+        """Map { ...fields, results: [...] } from already packed results"""
+        import msgpack
+        encoded = list(encoded)
+        packer = msgpack.Packer()
+        parts = [packer.pack_map_header(len(fields) + 1)]
+        for key, value in fields.items():
+            parts.append(packer.pack(key))
+            parts.append(packer.pack(value))
+        parts.append(packer.pack('results'))
+        parts.append(packer.pack_array_header(len(encoded)))
+        parts.extend(encoded)
+        return b''.join(parts)
+
+    def decode(self, data: bytes):
+        """
+        Request body as Python values
+
+        Raises:
+            ValueError if the body is not valid MessagePack
+        """
+        import msgpack
+        try:
+            return msgpack.unpackb(data, raw=False)
+        except ValueError as e:
+            raise ValueError(f'Invalid MessagePack body ({str(e) or type(e).__name__})') from e
+
+
+MSGPACK = MsgpackFormat()
+
+
+def negotiate(accept, json_format: JsonFormat):
+    """
+    Response format for a request's Accept header
+
+    Args:
+        accept: The request's accept_mimetypes
+        json_format: Format used unless MessagePack is preferred
+
+    Returns:
+        MSGPACK when the client prefers it (and msgpack is installed), else json_format
+    """
+    best = accept.best_match((JSON_TYPE,) + MSGPACK_TYPES, default=JSON_TYPE)
+    if best in MSGPACK_TYPES and msgpack_available():
+        return MSGPACK
+    return json_format
+
+
+def encode_results(
+    assessments: Iterable[RiskAssessment],
+    wire_format,
+    features_list: Optional[List] = None,
+    **fields
+) -> bytes:
+    """
+    Body { ...fields, results: [...] } built from RiskAssessment records
+
+    Each record is converted to its dict shape and encoded one at a time,
+    so a large batch is never held as nested dicts all at once.
+
+    Args:
+        assessments: Risk assessment records
+        wire_format: JsonFormat or MSGPACK
+        features_list: Features to include with each result (optional)
+        **fields: Extra top-level fields
+
+    Returns:
+        Encoded body
+    """
+    def encode(index: int, assessment: RiskAssessment) -> bytes:
+        result: Dict = assessment.to_dict()
+        if features_list is not None:
+            result['features'] = features_list[index].to_dict()
+        return wire_format.encode(result)
+
+    return wire_format.join(
+        (encode(index, assessment) for index, assessment in enumerate(assessments)),
+        **fields
+    )
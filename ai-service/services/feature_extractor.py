@@ -0,0 +1,324 @@
+"""
+Feature Extraction Service
+Builds risk scoring features for a whole school directly from MongoDB
+"""
+
+from typing import Dict, List, Optional
+import logging
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from .attendance_trends import EMPTY_TRENDS, attendance_trends
+from .incremental import HISTORY_DAYS
+from .records import StudentFeatures
+
+logger = logging.getLogger(__name__)
+
+# Mongoose pluralizes model names: Attendance -> attendances, Student -> students
+ATTENDANCE_COLLECTION = 'attendances'
+STUDENTS_COLLECTION = 'students'
+
+# Number of most recent records checked for a consecutive absence run
+# (same limit as riskController in the backend)
+CONSECUTIVE_LOOKBACK = 30
+
+# Defaults for students with no attendance in the window
+EMPTY_ATTENDANCE = {
+    'absences7Days': 0,
+    'absences30Days': 0,
+    'absences90Days': 0,
+    'attendanceRate30Days': 100,
+    'consecutiveAbsences': 0,
+}
+
+NO_DISABILITY = ('None', 'none', None)
+
+# Student fields needed for the non-attendance features
+STUDENT_PROJECTION = {
+    'disabilityStatus': 1,
+    'locationType': 1,
+    'wealthProxy': 1,
+    'parentContacts.verified': 1,
+}
+
+# Attendance fields read for the trend features
+TREND_PROJECTION = {'_id': 0, 'student': 1, 'date': 1, 'status': 1}
+
+# Each student's records together, oldest first, as the trend kernels expect
+TREND_SORT = [('student', 1), ('date', 1)]
+
+
+def to_object_id(value: str) -> ObjectId:
+    """Convert a hex string to an ObjectId, raising ValueError if malformed"""
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError) as e:
+        raise ValueError(f'Invalid id: {value}') from e
+
+
+def _absent_since(start: datetime) -> Dict:
+    """$sum expression counting absences on or after start"""
+    return {
+        '$sum': {
+            '$cond': [
+                {'$and': [{'$gte': ['$date', start]}, {'$eq': ['$status', 'absent']}]},
+                1,
+                0,
+            ]
+        }
+    }
+
+
+def build_attendance_pipeline(school_id: ObjectId, now: datetime) -> List[Dict]:
+    """
+    Aggregation computing attendance features for every student in a school
+
+    One $group pass over the last 90 days of attendance produces the 7/30/90
+    day absence counts and the 30-day attendance rate; the current run of
+    consecutive absences is the position of the first non-absent status in
+    the most recent records (newest first).
+    """
+    last_7 = now - timedelta(days=7)
+    last_30 = now - timedelta(days=30)
+    last_90 = now - timedelta(days=90)
+
+    return [
+        {'$match': {'school': school_id, 'date': {'$gte': last_90}}},
+        {'$sort': {'student': 1, 'date': -1}},
+        {
+            '$group': {
+                '_id': '$student',
+                'absences7Days': _absent_since(last_7),
+                'absences30Days': _absent_since(last_30),
+                'absences90Days': {'$sum': {'$cond': [{'$eq': ['$status', 'absent']}, 1, 0]}},
+                'records30Days': {'$sum': {'$cond': [{'$gte': ['$date', last_30]}, 1, 0]}},
+                'present30Days': {
+                    '$sum': {
+                        '$cond': [
+                            {'$and': [{'$gte': ['$date', last_30]}, {'$eq': ['$status', 'present']}]},
+                            1,
+                            0,
+                        ]
+                    }
+                },
+                'recentStatuses': {'$push': '$status'},
+            }
+        },
+        {
+            '$addFields': {
+                'recentAbsent': {
+                    '$map': {
+                        'input': {'$slice': ['$recentStatuses', CONSECUTIVE_LOOKBACK]},
+                        'as': 'status',
+                        'in': {'$eq': ['$$status', 'absent']},
+                    }
+                }
+            }
+        },
+        {
+            '$project': {
+                'absences7Days': 1,
+                'absences30Days': 1,
+                'absences90Days': 1,
+                'attendanceRate30Days': {
+                    '$cond': [
+                        {'$gt': ['$records30Days', 0]},
+                        {'$multiply': [{'$divide': ['$present30Days', '$records30Days']}, 100]},
+                        100,
+                    ]
+                },
+                'consecutiveAbsences': {
+                    '$cond': [
+                        {'$eq': [{'$indexOfArray': ['$recentAbsent', False]}, -1]},
+                        {'$size': '$recentAbsent'},
+                        {'$indexOfArray': ['$recentAbsent', False]},
+                    ]
+                },
+            }
+        },
+    ]
+
+
+def build_trend_query(school_id: ObjectId, now: datetime) -> Dict:
+    """Attendance records the trend features are computed from (last 90 days)"""
+    return {'school': school_id, 'date': {'$gte': now - timedelta(days=HISTORY_DAYS)}}
+
+
+def build_student_features(
+    student: Dict,
+    attendance: Dict[str, Dict],
+    trends: Optional[Dict[str, Dict]] = None
+) -> StudentFeatures:
+    """
+    Scoring features for a student document
+
+    Args:
+        student: Student document (STUDENT_PROJECTION fields)
+        attendance: Student id -> attendance features from the aggregation
+        trends: Student id -> trend features (optional); the aggregation's
+            values win for features both provide
+
+    Returns:
+        StudentFeatures with studentId set
+    """
+    student_id = str(student['_id'])
+    features = {'studentId': student_id}
+    if trends is not None:
+        features.update(trends.get(student_id, EMPTY_TRENDS))
+    features.update(attendance.get(student_id, EMPTY_ATTENDANCE))
+    features.update({
+        'contactVerified': any(
+            contact.get('verified') for contact in student.get('parentContacts') or []
+        ),
+        'hasDisability': student.get('disabilityStatus') not in NO_DISABILITY,
+        'locationType': student.get('locationType') or 'Urban',
+        'wealthProxy': student.get('wealthProxy') or 'phone_verified',
+    })
+    return StudentFeatures.from_dict(features)
+
+
+class FeatureExtractor:
+    """Extract student risk features from the EduLink database"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def extract_attendance_features(
+        self,
+        school_id: str,
+        now: Optional[datetime] = None
+    ) -> Dict[str, Dict]:
+        """
+        Compute attendance features for every student in a school
+
+        Args:
+            school_id: School ObjectId (hex string)
+            now: Reference time for the windows (defaults to current UTC time)
+
+        Returns:
+            Dict of student id -> attendance features
+        """
+        now = now or datetime.now(timezone.utc)
+        pipeline = build_attendance_pipeline(to_object_id(school_id), now)
+
+        features = {}
+        for row in self.db[ATTENDANCE_COLLECTION].aggregate(pipeline, allowDiskUse=True):
+            student_id = str(row.pop('_id'))
+            features[student_id] = row
+        return features
+
+    def extract_attendance_trends(
+        self,
+        school_id: str,
+        now: Optional[datetime] = None
+    ) -> Dict[str, Dict]:
+        """
+        Compute attendance trend features for every student in a school
+
+        Reads the last 90 days of daily records once, sorted by student
+        and date, and runs the trend kernels over the whole school.
+
+        Args:
+            school_id: School ObjectId (hex string)
+            now: Reference time for the windows (defaults to current UTC time)
+
+        Returns:
+            Dict of student id -> trend features
+        """
+        now = now or datetime.now(timezone.utc)
+        records = self.db[ATTENDANCE_COLLECTION].find(
+            build_trend_query(to_object_id(school_id), now),
+            TREND_PROJECTION
+        ).sort(TREND_SORT)
+        return attendance_trends(records, now)
+
+    def extract_school_features(
+        self,
+        school_id: str,
+        now: Optional[datetime] = None
+    ) -> List[StudentFeatures]:
+        """
+        Build full scoring features for all active students in a school
+
+        Uses one attendance aggregation, one read of the daily records for
+        the trend features and one students query, instead of four
+        attendance queries per student.
+
+        Args:
+            school_id: School ObjectId (hex string)
+            now: Reference time for the windows (defaults to current UTC time)
+
+        Returns:
+            List of StudentFeatures (with studentId) ready for batch_assess
+        """
+        now = now or datetime.now(timezone.utc)
+        attendance = self.extract_attendance_features(school_id, now)
+        trends = self.extract_attendance_trends(school_id, now)
+
+        students = self.db[STUDENTS_COLLECTION].find(
+            {'school': to_object_id(school_id), 'active': {'$ne': False}},
+            STUDENT_PROJECTION
+        )
+        features_list = [build_student_features(student, attendance, trends) for student in students]
+
+        logger.info(f'Extracted features for {len(features_list)} students in school {school_id}')
+
+        return features_list
+
+
+class AsyncFeatureExtractor:
+    """FeatureExtractor for the async app, using a Motor database"""
+
+    def __init__(self, db):
+        self.db = db
+
+    async def extract_attendance_features(
+        self,
+        school_id: str,
+        now: Optional[datetime] = None
+    ) -> Dict[str, Dict]:
+        """Async equivalent of FeatureExtractor.extract_attendance_features"""
+        now = now or datetime.now(timezone.utc)
+        pipeline = build_attendance_pipeline(to_object_id(school_id), now)
+
+        features = {}
+        async for row in self.db[ATTENDANCE_COLLECTION].aggregate(pipeline, allowDiskUse=True):
+            student_id = str(row.pop('_id'))
+            features[student_id] = row
+        return features
+
+    async def extract_attendance_trends(
+        self,
+        school_id: str,
+        now: Optional[datetime] = None
+    ) -> Dict[str, Dict]:
+        """Async equivalent of FeatureExtractor.extract_attendance_trends"""
+        now = now or datetime.now(timezone.utc)
+        cursor = self.db[ATTENDANCE_COLLECTION].find(
+            build_trend_query(to_object_id(school_id), now),
+            TREND_PROJECTION
+        ).sort(TREND_SORT)
+        records = [record async for record in cursor]
+        return attendance_trends(records, now)
+
+    async def extract_school_features(
+        self,
+        school_id: str,
+        now: Optional[datetime] = None
+    ) -> List[StudentFeatures]:
+        """Async equivalent of FeatureExtractor.extract_school_features"""
+        now = now or datetime.now(timezone.utc)
+        attendance = await self.extract_attendance_features(school_id, now)
+        trends = await self.extract_attendance_trends(school_id, now)
+
+        students = self.db[STUDENTS_COLLECTION].find(
+            {'school': to_object_id(school_id), 'active': {'$ne': False}},
+            STUDENT_PROJECTION
+        )
+        features_list = [build_student_features(student, attendance, trends) async for student in students]
+
+        logger.info(f'Extracted features for {len(features_list)} students in school {school_id}')
+
+        return features_list
@@ -0,0 +1,438 @@
+"""
+Incremental Risk Scoring
+Keeps rolling attendance windows per student and rescores only the
+students whose attendance changed
+"""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import logging
+import threading
+from datetime import date, datetime, timedelta, timezone
+
+from .records import RiskAssessment, StudentFeatures
+from .risk_rules import RuleSet
+
+logger = logging.getLogger(__name__)
+
+# Attendance statuses accepted by the backend Attendance model
+ATTENDANCE_STATUSES = ('present', 'absent', 'excused', 'late')
+
+# Rolling windows in days; a record on day d is inside the N-day window
+# while (as_of - d) < N, i.e. the last N calendar days including as_of
+WINDOW_DAYS = (7, 30, 90)
+HISTORY_DAYS = WINDOW_DAYS[-1]
+
+# Number of most recent records checked for a consecutive absence run
+# (same limit as the feature extractor and riskController)
+CONSECUTIVE_LOOKBACK = 30
+
+# Features recomputed from the rolling windows on every rescore
+ATTENDANCE_FEATURES = (
+    'absences7Days',
+    'absences30Days',
+    'absences90Days',
+    'attendanceRate30Days',
+    'consecutiveAbsences',
+    'attendanceTrend',
+    'longestAbsenceStreak',
+)
+
+
+def parse_day(value) -> date:
+    """
+    Calendar day (UTC) of an attendance date
+
+    Accepts date/datetime objects and ISO strings ('2025-03-14' or
+    '2025-03-14T00:00:00.000Z' as sent by the backend).
+    Raises ValueError if the value is not a date.
+    """
+    if isinstance(value, datetime):
+        moment = value
+    elif isinstance(value, date):
+        return value
+    elif isinstance(value, str):
+        moment = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    else:
+        raise ValueError(f'Invalid date: {value}')
+
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.date()
+
+
+class AttendanceWindow:
+    """
+    Rolling attendance state for one student
+
+    Holds the last 90 days of records (one status per day) and running
+    counts for each window, so marking a day or moving the reference day
+    forward only touches the records involved. The absence run and the
+    trend features are recomputed from the records when they change.
+    """
+
+    __slots__ = (
+        'records', 'absences_7', 'absences_30', 'absences_90', 'records_30', 'present_30', 'run', 'trends',
+    )
+
+    def __init__(self):
+        self.records = {}
+        self.absences_7 = 0
+        self.absences_30 = 0
+        self.absences_90 = 0
+        self.records_30 = 0
+        self.present_30 = 0
+        self.run = 0
+        self.trends = (0.0, 0)
+
+    def _count(self, status: str, sign: int, windows: Iterable[int]):
+        """Add (sign=1) or remove (sign=-1) one record from the given windows"""
+        absent = status == 'absent'
+        for days in windows:
+            if days == 7:
+                if absent:
+                    self.absences_7 += sign
+            elif days == 30:
+                self.records_30 += sign
+                if absent:
+                    self.absences_30 += sign
+                elif status == 'present':
+                    self.present_30 += sign
+            elif absent:
+                self.absences_90 += sign
+
+    def mark(self, day: date, status: str, age: int) -> bool:
+        """
+        Record the status for a day that is `age` days before as_of
+
+        Returns:
+            True if the window changed (new day or different status)
+        """
+        previous = self.records.get(day)
+        if previous == status:
+            return False
+
+        windows = [days for days in WINDOW_DAYS if age < days]
+        if previous is not None:
+            self._count(previous, -1, windows)
+        self._count(status, 1, windows)
+        self.records[day] = status
+        self.run = None
+        self.trends = None
+        return True
+
+    def leave(self, day: date, days: int):
+        """Drop a record from the N-day window (and the history after 90 days)"""
+        status = self.records.get(day)
+        if status is None:
+            return
+        self._count(status, -1, (days,))
+        if days == HISTORY_DAYS:
+            del self.records[day]
+            self.run = None
+            self.trends = None
+
+    def consecutive_absences(self) -> int:
+        """Current run of absences among the most recent records"""
+        if self.run is None:
+            run = 0
+            for day in sorted(self.records, reverse=True)[:CONSECUTIVE_LOOKBACK]:
+                if self.records[day] != 'absent':
+                    break
+                run += 1
+            self.run = run
+        return self.run
+
+    def trend_features(self) -> Tuple[float, int]:
+        """(attendanceTrend, longestAbsenceStreak) over the 90-day history"""
+        if self.trends is None:
+            from .attendance_trends import window_trends
+            self.trends = window_trends(self.records)
+        return self.trends
+
+
+class StudentState:
+    """Registered features, cached component risks and latest assessment"""
+
+    __slots__ = ('features', 'static_risks', 'rules_version', 'attendance_risk', 'window', 'assessment')
+
+    def __init__(self, window: AttendanceWindow):
+        self.features = None
+        self.static_risks = None
+        # Scorer model version the cached risks were computed with
+        self.rules_version = None
+        self.attendance_risk = None
+        self.window = window
+        self.assessment = None
+
+
+class IncrementalRiskScorer:
+    """
+    Maintain risk assessments as attendance is marked
+
+    Students are registered once with their non-attendance features; their
+    learning, contact, demographic and historical risks are computed then
+    and reused. Each batch of attendance events updates the rolling windows
+    and recomputes only the attendance component (and overall score) of the
+    students it touched, plus students whose old records left a window
+    because the reference day moved forward. When the scoring rule table
+    changes, a student's cached risks are recomputed the next time they
+    are rescored or read.
+
+    State is kept in process memory.
+    """
+
+    def __init__(self, scorer):
+        self.scorer = scorer
+        self.as_of = None
+        self._students: Dict[str, StudentState] = {}
+        # Day -> students with a record on that day, used to find the
+        # students affected when that day leaves a window
+        self._students_by_day: Dict[date, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, student_id: str) -> StudentState:
+        state = self._students.get(student_id)
+        if state is None:
+            state = StudentState(AttendanceWindow())
+            self._students[student_id] = state
+        return state
+
+    def _score_static(self, state: StudentState, features: StudentFeatures, rules: RuleSet) -> None:
+        """Cache the non-attendance component risks computed with a rule set"""
+        state.static_risks = (
+            rules.component_risk('learning', features),
+            rules.component_risk('contact', features),
+            rules.component_risk('demographics', features),
+            rules.component_risk('historical', features),
+        )
+        state.rules_version = self.scorer.model_version_for(rules)
+
+    def _advance(self, as_of: date) -> Set[str]:
+        """
+        Move the reference day forward, expiring records that leave a window
+
+        Returns:
+            Ids of students whose window counts changed
+        """
+        if self.as_of is None:
+            self.as_of = as_of
+            return set()
+        if as_of <= self.as_of:
+            return set()
+
+        changed = set()
+        if (as_of - self.as_of).days >= HISTORY_DAYS:
+            # Every record is now outside the history
+            for student_ids in self._students_by_day.values():
+                changed |= student_ids
+            for student_id in changed:
+                self._students[student_id].window = AttendanceWindow()
+            self._students_by_day.clear()
+            self.as_of = as_of
+            return changed
+
+        day = self.as_of
+        while day < as_of:
+            day += timedelta(days=1)
+            for days in WINDOW_DAYS:
+                leaving = day - timedelta(days=days)
+                student_ids = self._students_by_day.get(leaving)
+                if not student_ids:
+                    continue
+                for student_id in student_ids:
+                    self._students[student_id].window.leave(leaving, days)
+                changed |= student_ids
+                if days == HISTORY_DAYS:
+                    del self._students_by_day[leaving]
+
+        self.as_of = as_of
+        return changed
+
+    def _rescore(self, student_ids: Iterable[str], force: bool = False) -> List[RiskAssessment]:
+        """
+        Recompute attendance risk and overall score for registered students
+
+        With rule-based scoring the assessment only depends on attendance
+        through the attendance risk and the attendance features that
+        recommendation rules and factor descriptions read, so when none of
+        them changed the previous assessment is kept (unless force is set
+        or the rules changed since it was built). A model-backed scorer
+        sees every attendance feature, so its students are always rebuilt.
+
+        Returns:
+            Assessments that were rebuilt
+        """
+        # One rule set for the whole pass, so a reload mid-batch can't mix tables
+        rules = self.scorer.rules
+        version = self.scorer.model_version_for(rules)
+        read = {feature for trigger, _ in rules.recommendation_rules for feature in trigger.features()}
+        read.update(self.scorer.description_features)
+        watched = [name for name in ATTENDANCE_FEATURES if name in read]
+        results = []
+        for student_id in student_ids:
+            state = self._students[student_id]
+            if state.features is None:
+                continue  # Attendance is tracked until the student is registered
+
+            features = state.features
+            window = state.window
+            previous = [features.get(name) for name in watched]
+            features.absences_7_days = window.absences_7
+            features.absences_30_days = window.absences_30
+            features.absences_90_days = window.absences_90
+            features.attendance_rate_30_days = (
+                window.present_30 / window.records_30 * 100 if window.records_30 else 100
+            )
+            features.consecutive_absences = window.consecutive_absences()
+            features.attendance_trend, features.longest_absence_streak = window.trend_features()
+
+            try:
+                rebuild = force
+                if state.rules_version != version:
+                    # Rule table was reloaded: cached risks are out of date
+                    self._score_static(state, features, rules)
+                    rebuild = True
+                attendance_risk = rules.component_risk('attendance', features)
+                if (
+                    not rebuild
+                    and self.scorer.scores_from_components
+                    and attendance_risk == state.attendance_risk
+                    and [features.get(name) for name in watched] == previous
+                ):
+                    continue
+                assessment = self.scorer.build_assessment(features, attendance_risk, *state.static_risks, rules=rules)
+                assessment.student_id = student_id
+            except Exception as e:
+                logger.error(f'Error updating risk for student {student_id}: {e}')
+                attendance_risk = None
+                assessment = RiskAssessment.failed(student_id, str(e))
+
+            state.attendance_risk = attendance_risk
+            state.assessment = assessment
+            results.append(assessment)
+        return results
+
+    def register(self, students_features: List) -> List[RiskAssessment]:
+        """
+        Register (or update) students' non-attendance features and score them
+
+        Attendance features in the input are ignored; they come from the
+        events applied with apply_events.
+
+        Args:
+            students_features: Feature dicts or StudentFeatures with studentId
+
+        Returns:
+            List of risk assessments, one per student
+        """
+        results = []
+        with self._lock:
+            for features in students_features:
+                student_id = features.get('studentId')
+                if student_id is None:
+                    results.append(RiskAssessment.failed(None, 'studentId is required'))
+                    continue
+
+                student_id = str(student_id)
+                if not isinstance(features, StudentFeatures):
+                    features = StudentFeatures.from_dict(features)
+                features.student_id = student_id
+
+                state = self._state(student_id)
+                try:
+                    self._score_static(state, features, self.scorer.rules)
+                except Exception as e:
+                    logger.error(f'Error registering student {student_id}: {e}')
+                    state.features = None
+                    results.append(RiskAssessment.failed(student_id, str(e)))
+                    continue
+
+                state.features = features
+                results.extend(self._rescore((student_id,), force=True))
+
+        return results
+
+    def apply_events(
+        self,
+        events: List[Dict],
+        as_of: Optional[date] = None
+    ) -> Tuple[List[RiskAssessment], Dict]:
+        """
+        Apply attendance events and rescore the affected students
+
+        Args:
+            events: Attendance events { student, date, status }
+            as_of: Reference day for the windows (defaults to today in UTC,
+                or the latest event day if later); it never moves backwards
+
+        Returns:
+            (assessments of registered students whose risk changed, summary
+            with asOf, applied, ignored and errors)
+        """
+        parsed = []
+        errors = []
+        for index, event in enumerate(events):
+            try:
+                if not isinstance(event, dict):
+                    raise ValueError('event must be an object')
+                student_id = event.get('student')
+                if not student_id:
+                    raise ValueError('student is required')
+                status = event.get('status')
+                if status not in ATTENDANCE_STATUSES:
+                    raise ValueError(f'Invalid status: {status}')
+                parsed.append((str(student_id), parse_day(event.get('date')), status))
+            except (ValueError, TypeError) as e:
+                errors.append({'index': index, 'error': str(e)})
+
+        as_of = as_of or datetime.now(timezone.utc).date()
+        if parsed:
+            as_of = max(as_of, max(day for _, day, _ in parsed))
+
+        applied = 0
+        ignored = 0
+        with self._lock:
+            changed = self._advance(as_of)
+
+            for student_id, day, status in parsed:
+                age = (self.as_of - day).days
+                if age >= HISTORY_DAYS:
+                    ignored += 1
+                    continue
+
+                state = self._state(student_id)
+                if state.window.mark(day, status, age):
+                    self._students_by_day.setdefault(day, set()).add(student_id)
+                    changed.add(student_id)
+                    applied += 1
+                else:
+                    ignored += 1
+
+            results = self._rescore(changed)
+
+        summary = {
+            'asOf': self.as_of.isoformat(),
+            'applied': applied,
+            'ignored': ignored,
+            'errors': errors,
+        }
+        return results, summary
+
+    def assessment(self, student_id: str) -> Optional[RiskAssessment]:
+        """Latest assessment for a registered student"""
+        with self._lock:
+            state = self._students.get(student_id)
+            if state is None:
+                return None
+            if state.features is not None and state.rules_version != self.scorer.model_version:
+                self._rescore((student_id,))
+            return state.assessment
+
+    def stats(self) -> Dict:
+        """Tracked student counts and reference day"""
+        return {
+            'students': len(self._students),
+            'registered': sum(1 for state in self._students.values() if state.features is not None),
+            'asOf': self.as_of.isoformat() if self.as_of else None,
+        }
+
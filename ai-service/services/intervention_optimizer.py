@@ -0,0 +1,142 @@
+"""
+Intervention Budget Optimizer
+Chooses (student, intervention) assignments that maximize expected risk
+reduction within a school budget
+"""
+
+from typing import List, Sequence, Tuple
+import heapq
+import math
+
+
+def is_amount(value) -> bool:
+    """Whether a budget or cost value is a finite non-negative number"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value) and value >= 0
+
+
+def residual_risk(risk: float, effects: Sequence[float]) -> float:
+    """
+    Risk left after a set of interventions
+
+    Each intervention removes its effect share of the risk that remains,
+    so a second intervention for the same student adds less than the first.
+    """
+    for effect in effects:
+        risk *= 1.0 - effect
+    return risk
+
+
+def plan_interventions(
+    risks: Sequence[float],
+    options: Sequence[Sequence[int]],
+    costs: Sequence[float],
+    effects: Sequence[float],
+    budget: float
+) -> Tuple[List[Tuple[int, int, float]], float, float]:
+    """
+    Budgeted greedy assignment with lazy re-evaluation
+
+    Candidates are taken in order of expected risk reduction per unit of
+    cost; when a student receives an intervention, the gains of that
+    student's other candidates shrink and are re-evaluated only when they
+    reach the top of the heap. The best single affordable assignment is
+    kept instead if it beats the greedy plan, which bounds the worst case.
+
+    Args:
+        risks: Current risk score per student
+        options: Eligible intervention indices per student
+        costs: Cost per intervention index
+        effects: Share of remaining risk removed, per intervention index
+        budget: Total budget
+
+    Returns:
+        (assignments as (student, intervention, reduction) in the order
+        chosen, total cost, upper bound on the achievable reduction)
+    """
+    heap = []
+    standalone = []
+    caps = []
+    best_single = None
+    for student, risk in enumerate(risks):
+        remaining_risk = risk
+        for intervention in options[student]:
+            cost = costs[intervention]
+            if cost > budget:
+                continue
+            gain = risk * effects[intervention]
+            if gain <= 0:
+                continue
+            ratio = gain / cost if cost > 0 else math.inf
+            heap.append((-ratio, student, intervention, 0))
+            standalone.append((ratio, gain, cost, student))
+            remaining_risk *= 1.0 - effects[intervention]
+            if best_single is None or gain > best_single[2]:
+                best_single = (student, intervention, gain)
+        caps.append(risk - remaining_risk)
+    heapq.heapify(heap)
+
+    residual = list(risks)
+    version = [0] * len(risks)
+    remaining = budget
+    assignments = []
+    total_gain = 0.0
+
+    # Zero-cost candidates stay affordable with nothing left, so the cost
+    # check (not the remaining budget) decides
+    while heap:
+        _, student, intervention, seen = heapq.heappop(heap)
+        cost = costs[intervention]
+        if cost > remaining:
+            continue
+        if seen != version[student]:
+            gain = residual[student] * effects[intervention]
+            if gain > 0:
+                ratio = gain / cost if cost > 0 else math.inf
+                heapq.heappush(heap, (-ratio, student, intervention, version[student]))
+            continue
+
+        gain = residual[student] * effects[intervention]
+        residual[student] -= gain
+        version[student] += 1
+        remaining -= cost
+        total_gain += gain
+        assignments.append((student, intervention, gain))
+
+    if best_single is not None and best_single[2] > total_gain:
+        assignments = [best_single]
+
+    total_cost = sum(costs[intervention] for _, intervention, _ in assignments)
+    return assignments, total_cost, _fractional_bound(standalone, caps, budget)
+
+
+def _fractional_bound(
+    candidates: List[Tuple[float, float, float, int]],
+    caps: List[float],
+    budget: float
+) -> float:
+    """
+    Upper bound on the best achievable reduction
+
+    Diminishing returns make a student's reduction at most the sum of the
+    standalone gains of their interventions, and at most the reduction from
+    all of their eligible interventions together (the cap). Filling the
+    budget fractionally in order of standalone gain per cost, with each
+    student's total truncated at the cap, solves that relaxation exactly.
+    """
+    bound = 0.0
+    remaining = budget
+    for ratio, gain, cost, student in sorted(candidates, key=lambda item: item[0], reverse=True):
+        if caps[student] <= 0:
+            continue
+        if gain > caps[student]:
+            # Only the capped share of the item adds to the bound
+            cost *= caps[student] / gain
+            gain = caps[student]
+        if cost <= remaining:
+            bound += gain
+            caps[student] -= gain
+            remaining -= cost
+        else:
+            bound += ratio * remaining
+            break
+    return bound
@@ -0,0 +1,565 @@
+"""
+Scoring Job Queue
+Large scoring and recommendation batches split into chunks on a Redis list,
+processed by any number of workers and collected chunk by chunk
+"""
+
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+import asyncio
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from .batch_recommendations import recommend_batch
+from .encoding import JsonFormat, fast_json_enabled
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'edulink:jobs'
+QUEUE_KEY = f'{KEY_PREFIX}:queue'      # pending tasks "<jobId>:<chunk>", taken from the right
+WORKERS_KEY = f'{KEY_PREFIX}:workers'  # ids of workers that may hold tasks
+
+JOB_KINDS = ('score-risk', 'recommendations')
+DEFAULT_CHUNK_SIZE = 500
+MAX_CHUNK_SIZE = 10_000
+
+# Job keys (input, results) expire this long after submission
+DEFAULT_JOB_TTL_SECONDS = 24 * 60 * 60
+
+# A worker whose heartbeat is older than this is presumed dead and the
+# tasks it held go back on the queue
+HEARTBEAT_TTL_SECONDS = 30
+RECOVERY_INTERVAL_SECONDS = 15
+CLAIM_TIMEOUT_SECONDS = 1.0
+
+# Server-side polling interval for /ai/jobs/<id>/stream
+DEFAULT_POLL_SECONDS = 0.5
+
+
+def job_key(job_id: str) -> str:
+    return f'{KEY_PREFIX}:{job_id}'
+
+
+def inputs_key(job_id: str) -> str:
+    return f'{KEY_PREFIX}:{job_id}:inputs'
+
+
+def results_key(job_id: str) -> str:
+    return f'{KEY_PREFIX}:{job_id}:results'
+
+
+def errors_key(job_id: str) -> str:
+    return f'{KEY_PREFIX}:{job_id}:errors'
+
+
+def processing_key(worker_id: str) -> str:
+    return f'{KEY_PREFIX}:processing:{worker_id}'
+
+
+def heartbeat_key(worker_id: str) -> str:
+    return f'{KEY_PREFIX}:heartbeat:{worker_id}'
+
+
+def _text(value) -> str:
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def parse_chunk_size(value) -> int:
+    """chunkSize request field (default DEFAULT_CHUNK_SIZE), raising ValueError if out of range"""
+    if value is None:
+        return DEFAULT_CHUNK_SIZE
+    if type(value) is not int or not 1 <= value <= MAX_CHUNK_SIZE:
+        raise ValueError(f'chunkSize must be an integer from 1 to {MAX_CHUNK_SIZE}')
+    return value
+
+
+def job_handlers(batch_assess: Callable, recommender) -> Dict[str, Callable[[List, Dict], List[Dict]]]:
+    """
+    Chunk handlers for each job kind, matching the batch endpoints
+
+    Args:
+        batch_assess: Scorer batch_assess (e.g. CachedRiskScorer.batch_assess)
+        recommender: Recommender instance
+
+    Returns:
+        Kind -> handler(items, options) returning one result dict per item
+    """
+    def score_risk(students: List, options: Dict) -> List[Dict]:
+        return [assessment.to_dict() for assessment in batch_assess(students)]
+
+    def recommendations(students: List, options: Dict) -> List[Dict]:
+        return recommend_batch(students, recommender, batch_assess, options.get('budget', 'medium'))
+
+    return {'score-risk': score_risk, 'recommendations': recommendations}
+
+
+def _failed_chunk(items: List, message: str) -> List[Dict]:
+    """Error result per item when a whole chunk could not be processed"""
+    results = []
+    for item in items:
+        result = {'error': message}
+        if isinstance(item, dict) and item.get('studentId') is not None:
+            result['studentId'] = item['studentId']
+        results.append(result)
+    return results
+
+
+def _chunk_length(index: int, chunk_size: int, total: int) -> int:
+    return min(chunk_size, total - index * chunk_size)
+
+
+def _split(items: List, chunk_size: int) -> List[List]:
+    return [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+
+
+def _queue_submit(pipe, job_id: str, fields: Dict, encoded_chunks: List[bytes], ttl: int) -> None:
+    """Queue the writes that create a job and put its chunks on the queue (one MULTI/EXEC)"""
+    pipe.hset(job_key(job_id), mapping=fields)
+    pipe.hset(inputs_key(job_id), mapping={str(index): chunk for index, chunk in enumerate(encoded_chunks)})
+    pipe.expire(job_key(job_id), ttl)
+    pipe.expire(inputs_key(job_id), ttl)
+    pipe.lpush(QUEUE_KEY, *(f'{job_id}:{index}' for index in range(len(encoded_chunks))))
+
+
+def _queue_status_reads(pipe, job_id: str) -> None:
+    pipe.hgetall(job_key(job_id))
+    pipe.hkeys(results_key(job_id))
+    pipe.hvals(errors_key(job_id))
+
+
+def _decode_status(job_id: str, values: List) -> Optional[Tuple[Dict, Set[int]]]:
+    """(status, completed chunk indices) from _queue_status_reads results, None if the job is unknown"""
+    fields, completed, errors = values
+    if not fields:
+        return None
+    fields = {_text(key): _text(value) for key, value in fields.items()}
+    completed = {int(index) for index in completed}
+    total = int(fields['total'])
+    chunk_size = int(fields['chunkSize'])
+    chunks = int(fields['chunks'])
+
+    if len(completed) == chunks:
+        state = 'completed'
+    elif completed:
+        state = 'running'
+    else:
+        state = 'queued'
+    status = {
+        'jobId': job_id,
+        'kind': fields['kind'],
+        'status': state,
+        'total': total,
+        'processed': sum(_chunk_length(index, chunk_size, total) for index in completed),
+        'errors': sum(int(count) for count in errors),
+        'chunks': chunks,
+        'chunkSize': chunk_size,
+        'completedChunks': len(completed),
+        'createdAt': fields['createdAt'],
+    }
+    return status, completed
+
+
+def _page_chunks(status: Dict, completed: Set[int], offset: int) -> List[int]:
+    """Completed chunks that continue the results from offset without a gap"""
+    indices = []
+    index = offset // status['chunkSize']
+    while index < status['chunks'] and index in completed and offset < status['total']:
+        indices.append(index)
+        index += 1
+    return indices
+
+
+def _page(status: Dict, offset: int, indices: List[int], values: List[bytes], decode: Callable) -> Dict:
+    results = []
+    for value in values:
+        results.extend(decode(value))
+    results = results[offset % status['chunkSize']:] if indices else []
+    next_offset = min((indices[-1] + 1) * status['chunkSize'], status['total']) if indices else offset
+    return {**status, 'offset': offset, 'next': next_offset, 'results': results}
+
+
+def _stream_step(page: Optional[Dict], offset: int, last: Optional[Dict]) -> Tuple[List[Dict], int, Optional[Dict], bool]:
+    """
+    Events for one poll of a job's results
+
+    Returns:
+        (events, new offset, last progress sent, finished)
+    """
+    if page is None:
+        return [{'event': 'error', 'error': 'Job not found'}], offset, last, True
+
+    results = page.pop('results')
+    next_offset = page.pop('next')
+    page.pop('offset')
+    events = []
+    if results:
+        events.append({'event': 'results', 'offset': offset, 'results': results})
+    if page['status'] == 'completed' and next_offset >= page['total']:
+        events.append({'event': 'completed', **page})
+        return events, next_offset, page, True
+    if page != last:
+        events.append({'event': 'progress', **page})
+    return events, next_offset, page, False
+
+
+class JobQueue:
+    """
+    Chunked scoring jobs in Redis
+
+    A job's items are split into chunks stored in a hash, and one task per
+    chunk ("<jobId>:<index>") is pushed on a shared list. Workers move a
+    task to their own processing list while they work on it (so a crashed
+    worker's tasks can be found and requeued) and write each chunk's
+    results under its index, which makes repeating a chunk harmless:
+    results already present are not recomputed, and a rerun writes the
+    same values. Progress is derived from the results written so far.
+    """
+
+    def __init__(self, redis_client, wire_format: Optional[JsonFormat] = None, ttl: int = DEFAULT_JOB_TTL_SECONDS):
+        self.redis = redis_client
+        self.wire_format = wire_format or JsonFormat(fast_json_enabled())
+        self.ttl = ttl
+
+    # Client side: submit, progress, results
+
+    def _new_job(self, kind: str, items: List, options: Optional[Dict], chunk_size: int) -> Tuple[str, Dict, List[bytes]]:
+        if kind not in JOB_KINDS:
+            raise ValueError(f'kind must be one of: {", ".join(JOB_KINDS)}')
+        if not items:
+            raise ValueError('A job needs at least one item')
+        job_id = uuid.uuid4().hex
+        chunks = _split(items, chunk_size)
+        fields = {
+            'kind': kind,
+            'total': len(items),
+            'chunks': len(chunks),
+            'chunkSize': chunk_size,
+            'options': self.wire_format.encode(options or {}),
+            'createdAt': _now(),
+        }
+        return job_id, fields, [self.wire_format.encode(chunk) for chunk in chunks]
+
+    def submit(self, kind: str, items: List, options: Optional[Dict] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict:
+        """
+        Store a job and queue its chunks
+
+        Args:
+            kind: One of JOB_KINDS
+            items: Students, as sent to the matching batch endpoint (non-empty)
+            options: Kind-specific options (budget for recommendations)
+            chunk_size: Items per chunk
+
+        Returns:
+            Job status (status 'queued')
+        """
+        job_id, fields, chunks = self._new_job(kind, items, options, chunk_size)
+        pipe = self.redis.pipeline(transaction=True)
+        _queue_submit(pipe, job_id, fields, chunks, self.ttl)
+        pipe.execute()
+        logger.info(f'Queued {kind} job {job_id}: {len(items)} items in {len(chunks)} chunks')
+        return self.status(job_id)
+
+    def _read_status(self, job_id: str) -> Optional[Tuple[Dict, Set[int]]]:
+        pipe = self.redis.pipeline(transaction=False)
+        _queue_status_reads(pipe, job_id)
+        return _decode_status(job_id, pipe.execute())
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        """Progress of a job (None if unknown or expired)"""
+        found = self._read_status(job_id)
+        return found[0] if found is not None else None
+
+    def results(self, job_id: str, offset: int = 0) -> Optional[Dict]:
+        """
+        Results available from offset on, in input order
+
+        Returns:
+            Job status plus offset, next (offset to ask for next) and
+            results (completed chunks up to the first one still pending),
+            or None if the job is unknown
+        """
+        found = self._read_status(job_id)
+        if found is None:
+            return None
+        status, completed = found
+        indices = _page_chunks(status, completed, offset)
+        values = self.redis.hmget(results_key(job_id), [str(index) for index in indices]) if indices else []
+        return _page(status, offset, indices, values, self.wire_format.decode)
+
+    def events(self, job_id: str, poll_seconds: float = DEFAULT_POLL_SECONDS, sleep=time.sleep) -> Iterator[Dict]:
+        """
+        Progress and results events until the job completes
+
+        Yields:
+            {event: 'progress', ...status} when progress changes,
+            {event: 'results', offset, results} as results become available
+            in order, then {event: 'completed', ...status}; or a single
+            {event: 'error'} if the job is unknown
+        """
+        offset, last = 0, None
+        while True:
+            events, offset, last, finished = _stream_step(self.results(job_id, offset), offset, last)
+            yield from events
+            if finished:
+                return
+            sleep(poll_seconds)
+
+    def cancel(self, job_id: str) -> bool:
+        """Delete a job; queued tasks for it are dropped by the workers"""
+        deleted = self.redis.delete(job_key(job_id), inputs_key(job_id), results_key(job_id), errors_key(job_id))
+        return bool(deleted)
+
+    def pending(self) -> int:
+        """Tasks waiting on the queue (all jobs)"""
+        return self.redis.llen(QUEUE_KEY)
+
+    # Worker side: claim, work, recover
+
+    def heartbeat(self, worker_id: str) -> None:
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.sadd(WORKERS_KEY, worker_id)
+        pipe.set(heartbeat_key(worker_id), _now(), ex=HEARTBEAT_TTL_SECONDS)
+        pipe.execute()
+
+    def claim(self, worker_id: str, timeout: float = CLAIM_TIMEOUT_SECONDS) -> Optional[str]:
+        """Move the oldest task to the worker's processing list, waiting up to timeout seconds"""
+        self.heartbeat(worker_id)
+        task = self.redis.blmove(QUEUE_KEY, processing_key(worker_id), timeout, 'RIGHT', 'LEFT')
+        return _text(task) if task is not None else None
+
+    def work(self, worker_id: str, task: str, handlers: Dict[str, Callable]) -> bool:
+        """
+        Process a claimed task and acknowledge it
+
+        Results and the acknowledgement are written in one MULTI/EXEC, so
+        a task is either done or still held (and requeued if the worker
+        dies). Tasks of cancelled or expired jobs and chunks that already
+        have results are acknowledged without work. A chunk that fails,
+        including one whose stored input no longer decodes, gets an error
+        result per item instead of being retried.
+
+        Returns:
+            True if the chunk was processed
+        """
+        job_id, index = task.rsplit(':', 1)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hmget(job_key(job_id), ['kind', 'options', 'chunks', 'chunkSize', 'total'])
+        pipe.hexists(results_key(job_id), index)
+        pipe.hget(inputs_key(job_id), index)
+        (kind, options, chunks, chunk_size, total), done, data = pipe.execute()
+
+        if kind is None or done or data is None:
+            if kind is not None and not done:
+                logger.warning(f'Job {job_id} chunk {index} has no input; dropping it')
+            self.redis.lrem(processing_key(worker_id), 1, task)
+            return False
+
+        kind = _text(kind)
+        items = None
+        try:
+            items = self.wire_format.decode(data)
+            results = handlers[kind](items, self.wire_format.decode(options))
+        except Exception as e:
+            logger.error(f'Job {job_id} chunk {index} failed: {e}')
+            if not isinstance(items, list):
+                # Unreadable input: one error per item the chunk held, so paging stays aligned
+                items = [None] * _chunk_length(int(index), int(chunk_size), int(total))
+            results = _failed_chunk(items, str(e))
+        errors = sum(1 for result in results if isinstance(result, dict) and 'error' in result)
+
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hset(results_key(job_id), index, self.wire_format.encode(results))
+        pipe.hset(errors_key(job_id), index, errors)
+        pipe.expire(results_key(job_id), self.ttl)
+        pipe.expire(errors_key(job_id), self.ttl)
+        pipe.lrem(processing_key(worker_id), 1, task)
+        pipe.hlen(results_key(job_id))
+        completed = pipe.execute()[-1]
+
+        if completed >= int(chunks):
+            # Inputs are no longer needed once every chunk has results
+            self.redis.delete(inputs_key(job_id))
+            logger.info(f'Job {job_id} completed')
+        return True
+
+    def requeue_orphans(self) -> int:
+        """
+        Put tasks held by workers without a heartbeat back on the queue
+
+        Safe to run from every worker at once: each task is moved
+        atomically, so it is requeued exactly once.
+
+        Returns:
+            Number of tasks requeued
+        """
+        requeued = 0
+        for worker_id in map(_text, self.redis.smembers(WORKERS_KEY)):
+            if self.redis.exists(heartbeat_key(worker_id)):
+                continue
+            requeued += self._requeue(worker_id)
+            self.redis.srem(WORKERS_KEY, worker_id)
+        if requeued:
+            logger.warning(f'Requeued {requeued} tasks from stopped workers')
+        return requeued
+
+    def retire(self, worker_id: str) -> None:
+        """Hand back the worker's tasks and forget it (on a clean shutdown)"""
+        self._requeue(worker_id)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.delete(heartbeat_key(worker_id))
+        pipe.srem(WORKERS_KEY, worker_id)
+        pipe.execute()
+
+    def _requeue(self, worker_id: str) -> int:
+        # Pushed on the right, so recovered tasks are taken next
+        moved = 0
+        while self.redis.lmove(processing_key(worker_id), QUEUE_KEY, 'RIGHT', 'RIGHT') is not None:
+            moved += 1
+        return moved
+
+
+class AsyncJobQueue(JobQueue):
+    """Client side of JobQueue for the async app, with a redis.asyncio client"""
+
+    async def submit(self, kind: str, items: List, options: Optional[Dict] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict:
+        """Async equivalent of JobQueue.submit"""
+        job_id, fields, chunks = self._new_job(kind, items, options, chunk_size)
+        pipe = self.redis.pipeline(transaction=True)
+        _queue_submit(pipe, job_id, fields, chunks, self.ttl)
+        await pipe.execute()
+        logger.info(f'Queued {kind} job {job_id}: {len(items)} items in {len(chunks)} chunks')
+        return await self.status(job_id)
+
+    async def _read_status(self, job_id: str) -> Optional[Tuple[Dict, Set[int]]]:
+        pipe = self.redis.pipeline(transaction=False)
+        _queue_status_reads(pipe, job_id)
+        return _decode_status(job_id, await pipe.execute())
+
+    async def status(self, job_id: str) -> Optional[Dict]:
+        """Async equivalent of JobQueue.status"""
+        found = await self._read_status(job_id)
+        return found[0] if found is not None else None
+
+    async def results(self, job_id: str, offset: int = 0) -> Optional[Dict]:
+        """Async equivalent of JobQueue.results"""
+        found = await self._read_status(job_id)
+        if found is None:
+            return None
+        status, completed = found
+        indices = _page_chunks(status, completed, offset)
+        values = await self.redis.hmget(results_key(job_id), [str(index) for index in indices]) if indices else []
+        return _page(status, offset, indices, values, self.wire_format.decode)
+
+    async def events(self, job_id: str, poll_seconds: float = DEFAULT_POLL_SECONDS, sleep=asyncio.sleep):
+        """Async equivalent of JobQueue.events"""
+        offset, last = 0, None
+        while True:
+            events, offset, last, finished = _stream_step(await self.results(job_id, offset), offset, last)
+            for event in events:
+                yield event
+            if finished:
+                return
+            await sleep(poll_seconds)
+
+    async def cancel(self, job_id: str) -> bool:
+        """Async equivalent of JobQueue.cancel"""
+        deleted = await self.redis.delete(job_key(job_id), inputs_key(job_id), results_key(job_id), errors_key(job_id))
+        return bool(deleted)
+
+    async def pending(self) -> int:
+        return await self.redis.llen(QUEUE_KEY)
+
+
+def default_worker_id() -> str:
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+class JobWorker:
+    """
+    Takes tasks off the queue and processes them until stopped
+
+    Run as many as needed, in any number of processes or machines; each
+    also requeues the tasks of workers that stopped sending heartbeats.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handlers: Dict[str, Callable],
+        worker_id: Optional[str] = None,
+        claim_timeout: float = CLAIM_TIMEOUT_SECONDS
+    ):
+        self.queue = queue
+        self.handlers = handlers
+        self.worker_id = worker_id or default_worker_id()
+        self.claim_timeout = claim_timeout
+        self.processed = 0
+        self._stop = threading.Event()
+        self._next_recovery = 0.0
+
+    def run_once(self) -> bool:
+        """Claim and process one task; False if the queue stayed empty"""
+        now = time.monotonic()
+        if now >= self._next_recovery:
+            self.queue.requeue_orphans()
+            self._next_recovery = now + RECOVERY_INTERVAL_SECONDS
+
+        started = time.monotonic()
+        task = self.queue.claim(self.worker_id, self.claim_timeout)
+        if task is None:
+            # Clients without blocking pops (e.g. fakeredis) return at once
+            self._stop.wait(max(0.0, self.claim_timeout - (time.monotonic() - started)))
+            return False
+        if self.queue.work(self.worker_id, task, self.handlers):
+            self.processed += 1
+        return True
+
+    def run(self) -> None:
+        logger.info(f'Job worker {self.worker_id} started')
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                # Redis unavailable: held tasks stay on the processing list
+                logger.error(f'Job worker {self.worker_id} error: {e}')
+                self._stop.wait(self.claim_timeout)
+        try:
+            self.queue.retire(self.worker_id)
+        except Exception as e:
+            logger.error(f'Job worker {self.worker_id} could not retire: {e}')
+        logger.info(f'Job worker {self.worker_id} stopped after {self.processed} chunks')
+
+    def start(self) -> threading.Thread:
+        """Run in a daemon thread"""
+        thread = threading.Thread(target=self.run, name=f'job-worker-{self.worker_id}', daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self) -> None:
+        """Finish the current chunk, then exit"""
+        self._stop.set()
+
+
+def start_workers(queue: JobQueue, handlers: Dict[str, Callable], count: int) -> List[JobWorker]:
+    """Start count worker threads on the queue"""
+    workers = [JobWorker(queue, handlers) for _ in range(count)]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def job_workers_count() -> int:
+    """In-process worker threads per app process (AI_JOB_WORKERS, default 1)"""
+    return max(0, int(os.getenv('AI_JOB_WORKERS', '1')))
+
+
+def job_ttl() -> int:
+    return int(os.getenv('AI_JOB_TTL_SECONDS', DEFAULT_JOB_TTL_SECONDS))
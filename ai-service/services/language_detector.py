@@ -4,12 +4,18 @@ Detects Ghanaian languages from text and audio
 """
 
 import re
-from typing import Dict, Optional, Tuple
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
 import logging
 
+import numpy as np
+
+from .parallel import map_chunks
+
 logger = logging.getLogger(__name__)
 
-# Language patterns and keywords
+# Language patterns and keywords. Phone prefixes are national-format mobile
+# network codes (024); longer prefixes may be added and are matched first
 LANGUAGE_PATTERNS = {
     'Twi': {
         'keywords': ['wo', 'me', 'yɛ', 'ɔ', 'ne', 'na', 'sɛ', 'akye', 'maakye', 'meda', 'ase'],
@@ -46,12 +52,81 @@ LANGUAGE_PATTERNS = {
 # Default to English if no match
 DEFAULT_LANGUAGE = 'English'
 
+# Phone prefix detection confidence of the top candidate (the share of each
+# candidate of a shared prefix is reported separately as its probability)
+PHONE_PREFIX_CONFIDENCE = 0.6
+PHONE_DEFAULT_CONFIDENCE = 0.3
+NON_DIGITS = re.compile(r'[^\d]')
+
+# Batch detection: records per worker task, and smallest batch sent to the pool
+BATCH_CHUNK_SIZE = 1000
+PARALLEL_MIN_RECORDS = 5000
+
+# Text is tokenized into maximal runs of word characters, so a token equals
+# "wo" exactly where the pattern \bwo\b matches
+TOKEN_PATTERN = re.compile(r'\w+')
+WORD_PATTERN = re.compile(r'\\b(\w+)\\b')
+
 
 class LanguageDetector:
     """Language detection for Ghanaian languages"""
     
     def __init__(self):
         self.languages = LANGUAGE_PATTERNS
+        self._build_indexes()
+    
+    def _build_indexes(self):
+        """
+        Precompile LANGUAGE_PATTERNS into lookup tables for detect_from_text
+        
+        Each distinct keyword is checked once for all languages that use it,
+        and whole-word patterns become a token -> languages index so one
+        tokenization pass counts every pattern. Any pattern that is not a
+        plain \\bword\\b is compiled once and matched separately.
+        """
+        keyword_index: Dict[str, Dict[str, int]] = {}
+        pattern_index: Dict[str, Dict[str, int]] = {}
+        self._extra_patterns: List[Tuple[str, re.Pattern]] = []
+        
+        for language, patterns in self.languages.items():
+            for keyword in patterns['keywords']:
+                languages = keyword_index.setdefault(keyword.lower(), {})
+                languages[language] = languages.get(language, 0) + 1
+            
+            for pattern in patterns['patterns']:
+                word = WORD_PATTERN.fullmatch(pattern)
+                if word:
+                    languages = pattern_index.setdefault(word.group(1), {})
+                    languages[language] = languages.get(language, 0) + 2
+                else:
+                    self._extra_patterns.append((language, re.compile(pattern)))
+        
+        self._keyword_index = {
+            keyword: tuple(languages.items()) for keyword, languages in keyword_index.items()
+        }
+        self._pattern_index = {
+            token: tuple(languages.items()) for token, languages in pattern_index.items()
+        }
+        
+        # Phone prefix -> every language using it, with equal probability; the
+        # first listed keeps the usual prefix confidence
+        prefix_languages: Dict[str, List[str]] = {}
+        for language, patterns in self.languages.items():
+            for prefix in patterns.get('phone_prefixes', []):
+                prefix_languages.setdefault(prefix, []).append(language)
+        
+        self._prefix_index = {}
+        for prefix, languages in prefix_languages.items():
+            probability = round(1 / len(languages), 2)
+            self._prefix_index[prefix] = {
+                'language': languages[0],
+                'confidence': PHONE_PREFIX_CONFIDENCE,
+                'prefix': prefix,
+                'candidates': tuple(
+                    {'language': language, 'probability': probability} for language in languages
+                ),
+            }
+        self._prefix_lengths = sorted({len(prefix) for prefix in self._prefix_index}, reverse=True)
         
     def detect_from_text(self, text: str) -> Tuple[str, float]:
         """
@@ -67,22 +142,24 @@ class LanguageDetector:
             return DEFAULT_LANGUAGE, 0.5
         
         text_lower = text.lower()
-        scores = {}
+        scores = dict.fromkeys(self.languages, 0)
         
-        for language, patterns in self.languages.items():
-            score = 0
-            
-            # Check keywords
-            for keyword in patterns['keywords']:
-                if keyword.lower() in text_lower:
-                    score += 1
-            
-            # Check regex patterns
-            for pattern in patterns['patterns']:
-                matches = re.findall(pattern, text_lower)
-                score += len(matches) * 2  # Patterns weighted higher
-            
-            scores[language] = score
+        # Check keywords (substring match, each distinct keyword once)
+        for keyword, languages in self._keyword_index.items():
+            if keyword in text_lower:
+                for language, weight in languages:
+                    scores[language] += weight
+        
+        # Count whole-word patterns from a single tokenization pass
+        token_counts = Counter(TOKEN_PATTERN.findall(text_lower))
+        for token, languages in self._pattern_index.items():
+            count = token_counts.get(token)
+            if count:
+                for language, weight in languages:
+                    scores[language] += count * weight  # Patterns weighted higher
+        
+        for language, pattern in self._extra_patterns:
+            scores[language] += len(pattern.findall(text_lower)) * 2
         
         # Get language with highest score
         if scores and max(scores.values()) > 0:
@@ -111,22 +188,95 @@ class LanguageDetector:
         Returns:
             Tuple of (language, confidence)
         """
-        # Extract prefix (e.g., 024 from +233241234567)
-        phone_clean = re.sub(r'[^\d]', '', phone)
+        result = self.resolve_phone(phone)
+        return result['language'], result['confidence']
+    
+    def resolve_phone(self, phone: str) -> Dict[str, Any]:
+        """
+        Resolve every candidate language for a phone number
         
-        if phone_clean.startswith('233'):
-            prefix = phone_clean[3:6]
-        elif phone_clean.startswith('0'):
-            prefix = phone_clean[1:4]
-        else:
-            return DEFAULT_LANGUAGE, 0.3
+        The longest matching prefix wins. Prefixes shared by several
+        languages (026 for Dagbani and Hausa) return all of them as
+        candidates with their probability; language and confidence are
+        those of the first candidate, as with an unshared prefix.
         
-        # Check which language uses this prefix
-        for language, patterns in self.languages.items():
-            if prefix in patterns.get('phone_prefixes', []):
-                return language, 0.6  # Medium confidence
+        Args:
+            phone: Phone number
+            
+        Returns:
+            Dict with language, confidence, matched prefix and candidates
+        """
+        national = self._national_number(phone)
+        for length in self._prefix_lengths:
+            match = self._prefix_index.get(national[:length])
+            if match:
+                return self._phone_result(match)
+        return self._phone_result(None)
+    
+    def detect_from_phones(self, phones: List[str]) -> List[Dict[str, Any]]:
+        """
+        Resolve candidate languages for a whole contact list at once
+        
+        Numbers are truncated to each prefix length as NumPy string arrays
+        and each distinct prefix is looked up only once. Numbers with the
+        same prefix share one result dict, so copy a result before
+        modifying it.
+        
+        Args:
+            phones: Phone numbers
+            
+        Returns:
+            One resolve_phone result per number, in the same order
+        """
+        if not phones:
+            return []
         
-        return DEFAULT_LANGUAGE, 0.3
+        nationals = np.array([self._national_number(phone) for phone in phones])
+        default = self._phone_result(None)
+        results = [default] * len(phones)
+        unresolved = np.ones(len(phones), dtype=bool)
+        
+        for length in self._prefix_lengths:
+            prefixes, inverse = np.unique(nationals.astype(f'U{length}'), return_inverse=True)
+            lookup = [self._prefix_index.get(prefix) for prefix in prefixes.tolist()]
+            shared = [self._phone_result(match) if match else None for match in lookup]
+            found = np.array([match is not None for match in lookup])[inverse] & unresolved
+            for index in np.flatnonzero(found).tolist():
+                results[index] = shared[inverse[index]]
+            unresolved &= ~found
+            if not unresolved.any():
+                break
+        
+        return results
+    
+    def _national_number(self, phone: str) -> str:
+        """Digits of a Ghana number in national format (0XXXXXXXXX), or ''"""
+        # Extract digits (e.g. 0241234567 from +233 24 123 4567)
+        phone_clean = NON_DIGITS.sub('', phone)
+        
+        if phone_clean.startswith('00233'):
+            return '0' + phone_clean[5:]
+        if phone_clean.startswith('233'):
+            return '0' + phone_clean[3:]
+        if phone_clean.startswith('0'):
+            return phone_clean
+        return ''
+    
+    def _phone_result(self, match: Optional[Dict]) -> Dict[str, Any]:
+        """Build a fresh phone detection result from a prefix index entry"""
+        if match is None:
+            return {
+                'language': DEFAULT_LANGUAGE,
+                'confidence': PHONE_DEFAULT_CONFIDENCE,
+                'prefix': None,
+                'candidates': [],
+            }
+        return {
+            'language': match['language'],
+            'confidence': match['confidence'],
+            'prefix': match['prefix'],
+            'candidates': [dict(candidate) for candidate in match['candidates']],
+        }
     
     def detect_from_location(self, region: str) -> Tuple[str, float]:
         """
@@ -167,7 +317,7 @@ class LanguageDetector:
         text: Optional[str] = None,
         phone: Optional[str] = None,
         region: Optional[str] = None
-    ) -> Dict[str, any]:
+    ) -> Dict[str, Any]:
         """
         Detect language using multiple signals
         
@@ -252,11 +402,61 @@ class LanguageDetector:
             'alternatives': alternatives
         }
     
+    def detect_combined_batch(
+        self,
+        records: List[Dict],
+        workers: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Detect language for many records at once
+        
+        Large batches are split across the worker pool. A record that
+        cannot be processed gets {'error': ...} in its slot instead of
+        failing the whole batch.
+        
+        Args:
+            records: List of {text, phone, region} dicts
+            workers: Worker processes to use (defaults to AI_WORKER_PROCESSES)
+            
+        Returns:
+            Detection results in the same order as records
+        """
+        return map_chunks(
+            _detect_chunk,
+            records,
+            chunk_size=BATCH_CHUNK_SIZE,
+            min_parallel=PARALLEL_MIN_RECORDS,
+            workers=workers
+        )
+    
+    def _detect_record(self, record: Dict) -> Dict:
+        """Detect language for one batch record, reporting errors inline"""
+        if not isinstance(record, dict):
+            return {'error': 'Record must be an object with text, phone, or region'}
+        
+        text = record.get('text')
+        phone = record.get('phone')
+        region = record.get('region')
+        
+        if not any([text, phone, region]):
+            return {'error': 'At least one of text, phone, or region is required'}
+        
+        try:
+            return self.detect_combined(text=text, phone=phone, region=region)
+        except Exception as e:
+            return {'error': str(e)}
+    
     def get_supported_languages(self) -> list:
         """Get list of supported languages"""
         return list(self.languages.keys()) + [DEFAULT_LANGUAGE]
 
 
+def _detect_chunk(records: List[Dict]) -> List[Dict]:
+    """Worker entry point for detect_combined_batch"""
+    detector = get_detector()
+    return [detector._detect_record(record) for record in records]
+
+
 # Singleton instance
 _detector = None
 
@@ -0,0 +1,88 @@
+"""
+Lazy Resources
+Database connections, scorers and models created on first use, so a cold
+instance can answer requests before everything is loaded
+"""
+
+from typing import Callable, Dict, Generic, Optional, TypeVar
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+def lazy_startup_enabled() -> bool:
+    """AI_LAZY_STARTUP=true defers resources until first use (or /warmup)"""
+    return os.getenv('AI_LAZY_STARTUP', 'false').strip().lower() in ('1', 'true', 'yes')
+
+
+class Lazy(Generic[T]):
+    """
+    Value built by factory the first time get() is called
+
+    Thread-safe: concurrent first requests wait for a single build. The
+    factory handles its own failures (e.g. returns None when a database is
+    unreachable), so the result is built at most once.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._value: Optional[T] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.load_ms: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def get(self) -> T:
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                start = time.perf_counter()
+                self._value = self._factory()
+                self.load_ms = round((time.perf_counter() - start) * 1000, 1)
+                self._loaded = True
+        return self._value
+
+    def peek(self) -> Optional[T]:
+        """Value if already built, without building it"""
+        return self._value if self._loaded else None
+
+    def set(self, value: T) -> None:
+        """Replace the value (e.g. None once a connection turns out to be down)"""
+        with self._lock:
+            self._value = value
+            self._loaded = True
+
+
+def warm_up(resources: Dict[str, Lazy]) -> Dict[str, float]:
+    """
+    Build every resource that is not loaded yet
+
+    Args:
+        resources: Lazy resources by name, built in order
+
+    Returns:
+        Milliseconds each resource took to build (0 if already loaded)
+    """
+    timings = {}
+    for name, resource in resources.items():
+        was_loaded = resource.loaded
+        resource.get()
+        timings[name] = 0.0 if was_loaded else resource.load_ms
+    return timings
+
+
+def startup_status(resources: Dict[str, Lazy], lazy: bool) -> Dict:
+    """Startup mode and which resources are loaded, for /health"""
+    return {
+        'mode': 'lazy' if lazy else 'eager',
+        'loaded': {name: resource.loaded for name, resource in resources.items()},
+    }
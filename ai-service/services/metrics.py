@@ -0,0 +1,200 @@
+"""
+Service Metrics
+In-process latency histograms and counters, exposed in Prometheus text format
+"""
+
+from bisect import bisect_left
+from contextlib import nullcontext
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import os
+import threading
+
+# Upper bounds (seconds) of the latency buckets: sub-millisecond single
+# scores up to multi-second school batches
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Upper bounds of the batch size buckets (students or records per request)
+BATCH_SIZE_BUCKETS = (1, 10, 50, 100, 500, 1000, 5000, 10000, 20000, 50000, 100000)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Returned by stage() when metrics are off, so timed blocks cost one call
+NULL_TIMER = nullcontext()
+
+# A collector returns (name, type, help, [(labels, value), ...]) families,
+# read from existing counters at scrape time
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def metrics_enabled() -> bool:
+    """AI_METRICS_ENABLED=false turns off request hooks and timers"""
+    return os.getenv('AI_METRICS_ENABLED', 'true').strip().lower() in ('1', 'true', 'yes')
+
+
+def _format_labels(names: Sequence[str], values: Sequence) -> str:
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+class Histogram:
+    """
+    Prometheus histogram with one series per combination of label values
+
+    Each observation is a bisect into the bucket bounds and two additions
+    under a lock; buckets are made cumulative only when rendered.
+    """
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket..., count above the last bucket, sum]
+        self._series: Dict[Tuple, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Tuple = ()) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def snapshot(self) -> Dict[Tuple, Dict]:
+        """Cumulative bucket counts, count and sum per series"""
+        with self._lock:
+            series_list = [(labels, list(series)) for labels, series in self._series.items()]
+        snapshot = {}
+        for labels, series in series_list:
+            cumulative = []
+            total = 0
+            for count in series[:-1]:
+                total += count
+                cumulative.append(total)
+            snapshot[labels] = {'buckets': cumulative, 'count': total, 'sum': series[-1]}
+        return snapshot
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        bounds = [_format_value(bound) for bound in self.buckets] + ['+Inf']
+        for labels, series in sorted(self.snapshot().items()):
+            for bound, count in zip(bounds, series['buckets']):
+                label_text = _format_labels(self.labels + ('le',), labels + (bound,))
+                lines.append(f'{self.name}_bucket{label_text} {count}')
+            label_text = _format_labels(self.labels, labels)
+            lines.append(f'{self.name}_sum{label_text} {_format_value(series["sum"])}')
+            lines.append(f'{self.name}_count{label_text} {series["count"]}')
+        return lines
+
+
+class Timer:
+    """Context manager recording the seconds spent inside it"""
+
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram: Histogram, labels: Tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> 'Timer':
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        self.histogram.observe(perf_counter() - self.start, self.labels)
+        return False
+
+
+class ServiceMetrics:
+    """
+    Request, stage and batch size histograms for the AI service
+
+    With enabled=False the apps register no request hooks and stage()
+    returns a shared no-op timer, so the hot path does no metric work.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.requests = Histogram(
+            'ai_request_duration_seconds',
+            'Request latency by route, method and status',
+            ('route', 'method', 'status'),
+            LATENCY_BUCKETS,
+        )
+        self.stages = Histogram(
+            'ai_stage_duration_seconds',
+            'Time spent per request stage (parse, score, serialize, ...)',
+            ('route', 'stage'),
+            LATENCY_BUCKETS,
+        )
+        self.batch_sizes = Histogram(
+            'ai_batch_size',
+            'Students or records per batch request',
+            ('route',),
+            BATCH_SIZE_BUCKETS,
+        )
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def stage(self, route: str, stage: str):
+        """Timer for one stage of a request (no-op when disabled)"""
+        if not self.enabled:
+            return NULL_TIMER
+        return Timer(self.stages, (route, stage))
+
+    def observe_request(self, route: str, method: str, status: int, seconds: float) -> None:
+        self.requests.observe(seconds, (route, method, str(status)))
+
+    def observe_batch(self, route: str, size: int) -> None:
+        if self.enabled:
+            self.batch_sizes.observe(size, (route,))
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]) -> None:
+        """Register a function reporting counters kept elsewhere (read on each scrape)"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """All metrics in Prometheus text exposition format"""
+        lines = []
+        for histogram in (self.requests, self.stages, self.batch_sizes):
+            lines.extend(histogram.render())
+        for collector in self._collectors:
+            for name, metric_type, help_text, samples in collector():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {metric_type}')
+                for labels, value in samples:
+                    label_text = _format_labels(tuple(labels), tuple(labels.values()))
+                    lines.append(f'{name}{label_text} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def risk_cache_families(stats: Optional[Dict]) -> List[Family]:
+    """Risk cache hit/miss/error counters from CachedRiskScorer.stats()"""
+    if stats is None:
+        return []
+    return [
+        (f'ai_risk_cache_{name}_total', 'counter', f'Risk cache {name} since startup', [({}, stats[name])])
+        for name in ('hits', 'misses', 'errors')
+    ]
+
+
+# Singleton instance
+_metrics = None
+
+def get_metrics() -> ServiceMetrics:
+    """Get or create the metrics registry (AI_METRICS_ENABLED decides if it records)"""
+    global _metrics
+    if _metrics is None:
+        _metrics = ServiceMetrics(metrics_enabled())
+    return _metrics
@@ -0,0 +1,261 @@
+"""
+Model-Backed Risk Scoring
+Scores dropout risk with a trained gradient-boosted model, keeping the rule
+table for component breakdowns, risk factors and recommendations
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import hashlib
+import logging
+import os
+import threading
+
+import numpy as np
+
+from .records import FeatureColumns, RiskAssessment, StudentFeatures
+from .risk_rules import RuleSet, RuleStore
+from .risk_scorer import RiskScorer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'models', 'risk_model.joblib')
+
+# Version tag for model-backed assessments, followed by the model file hash
+# and the rule table hash
+MODEL_VERSION = '1.0-gbm'
+
+# batch_assess for 10,000 students (feature matrix, one predict_proba call
+# and assembling the assessments) must finish within this budget;
+# checked by benchmarks/bench_model_scorer.py (measured 98 ms on one CPU
+# with HistGradientBoostingClassifier trained on 20,000 synthetic students)
+BATCH_LATENCY_BUDGET_MS = 250
+
+# Model inputs, in column order. Missing or non-numeric values are NaN,
+# which gradient-boosted trees route down a learned default branch
+NUMERIC_FEATURES = (
+    'absences7Days',
+    'absences30Days',
+    'absences90Days',
+    'attendanceRate30Days',
+    'consecutiveAbsences',
+    'contactResponseRate',
+    'avgLearningScore',
+)
+FLAG_FEATURES = (
+    'contactVerified',
+    'hasDisability',
+    'seasonalMigrationRisk',
+    'previousDropoutAttempt',
+)
+CATEGORY_FEATURES = {
+    'literacyLevel': ('below_benchmark', 'meeting_benchmark', 'exceeding_benchmark', 'not_assessed'),
+    'numeracyLevel': ('below_benchmark', 'meeting_benchmark', 'exceeding_benchmark', 'not_assessed'),
+    'locationType': ('Urban', 'Rural', 'Remote'),
+    'wealthProxy': ('phone_verified', 'proxy_only', 'no_contact'),
+}
+MODEL_FEATURES = (
+    NUMERIC_FEATURES +
+    FLAG_FEATURES +
+    tuple(f'{name}={value}' for name, values in CATEGORY_FEATURES.items() for value in values)
+)
+
+NUMBER_TYPES = {int, float, bool}
+
+
+def feature_matrix(features_list: List) -> np.ndarray:
+    """
+    Model input matrix (one row per student, MODEL_FEATURES columns)
+
+    Args:
+        features_list: Feature dicts or StudentFeatures, or FeatureColumns
+
+    Returns:
+        float64 array of shape (len(features_list), len(MODEL_FEATURES))
+    """
+    count = len(features_list)
+    matrix = np.empty((count, len(MODEL_FEATURES)), dtype=np.float64)
+    column = 0
+
+    def values_of(name):
+        if isinstance(features_list, FeatureColumns):
+            return features_list.column(name)
+        return [features.get(name) for features in features_list]
+
+    for name in NUMERIC_FEATURES:
+        values = values_of(name)
+        matrix[:, column] = np.fromiter(
+            (value if type(value) in NUMBER_TYPES else np.nan for value in values),
+            dtype=np.float64,
+            count=count
+        )
+        column += 1
+
+    for name in FLAG_FEATURES:
+        matrix[:, column] = np.fromiter(
+            (bool(value) for value in values_of(name)),
+            dtype=np.float64,
+            count=count
+        )
+        column += 1
+
+    for name, categories in CATEGORY_FEATURES.items():
+        values = values_of(name)
+        for category in categories:
+            matrix[:, column] = np.fromiter(
+                (value == category for value in values),
+                dtype=np.float64,
+                count=count
+            )
+            column += 1
+
+    return matrix
+
+
+# Loaded models by absolute path, so each worker process reads a file once
+_models: Dict[str, Dict] = {}
+_models_lock = threading.Lock()
+
+
+def load_model(path: str) -> Dict:
+    """
+    Load a model bundle written by scripts/train_risk_model.py
+
+    Args:
+        path: joblib file holding {model, features, trainedAt, metrics}
+
+    Returns:
+        The bundle, with 'version' set to a hash of the file
+
+    Raises:
+        ImportError if joblib is not installed, OSError if the file cannot
+        be read, ValueError if it is not a compatible model bundle
+    """
+    key = os.path.abspath(path)
+    with _models_lock:
+        bundle = _models.get(key)
+        if bundle is not None:
+            return bundle
+
+        import joblib  # Only needed when a model is deployed
+
+        with open(key, 'rb') as model_file:
+            version = hashlib.sha256(model_file.read()).hexdigest()[:12]
+        bundle = joblib.load(key)
+        if not isinstance(bundle, dict) or not hasattr(bundle.get('model'), 'predict_proba'):
+            raise ValueError('not a risk model bundle (expected a dict with a predict_proba model)')
+        if tuple(bundle.get('features', ())) != MODEL_FEATURES:
+            raise ValueError('model was trained on different features; retrain it with scripts.train_risk_model')
+
+        bundle['version'] = version
+        _models[key] = bundle
+        logger.info(f'Risk model {version} loaded from {key}')
+        return bundle
+
+
+class ModelRiskScorer(RiskScorer):
+    """
+    Risk scorer whose overall score is the model's dropout probability
+
+    Component risks, risk factors and recommendations still come from the
+    rule table, and the probability is mapped to a risk level with the
+    rule table's thresholds. Same interface as RiskScorer.
+    """
+
+    scores_from_components = False
+    input_features = NUMERIC_FEATURES + FLAG_FEATURES + tuple(CATEGORY_FEATURES)
+
+    def __init__(self, model_path: str, rule_store: Optional[RuleStore] = None):
+        super().__init__(rule_store)
+        self.model_path = model_path
+        self._bundle = load_model(model_path)
+
+    def __getstate__(self) -> Dict:
+        # Worker processes load the model from disk once instead of
+        # receiving a pickled copy with every chunk
+        state = super().__getstate__()
+        state['_bundle'] = None
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self._bundle = load_model(self.model_path)
+
+    @property
+    def model_id(self) -> str:
+        """Hash of the loaded model file"""
+        return self._bundle['version']
+
+    def model_version_for(self, rules: RuleSet) -> str:
+        return f'{MODEL_VERSION}-{self.model_id}+{rules.version}'
+
+    def status(self) -> Dict:
+        return {
+            'type': 'model',
+            'modelVersion': self.model_version,
+            'path': self.model_path,
+            'trainedAt': self._bundle.get('trainedAt'),
+            'metrics': self._bundle.get('metrics'),
+        }
+
+    def predict(self, features_list: List) -> np.ndarray:
+        """
+        Dropout probability for each student, from one predict_proba call
+
+        Args:
+            features_list: Feature dicts or StudentFeatures
+
+        Returns:
+            float64 array of probabilities
+        """
+        if not features_list:
+            return np.empty(0, dtype=np.float64)
+        return self._bundle['model'].predict_proba(feature_matrix(features_list))[:, 1].astype(np.float64)
+
+    def _assess(self, rules: RuleSet, features: Dict) -> RiskAssessment:
+        # Component risks first, so malformed features fail exactly as with rules
+        components = rules.component_risks(features)
+        return self._build(rules, features, *components, risk_score=float(self.predict([features])[0]))
+
+    def build_assessment(
+        self,
+        features: Dict,
+        attendance_risk: float,
+        learning_risk: float,
+        contact_risk: float,
+        demographic_risk: float,
+        historical_risk: float,
+        rules: Optional[RuleSet] = None
+    ) -> RiskAssessment:
+        return self._build(
+            rules if rules is not None else self.rules,
+            features,
+            attendance_risk,
+            learning_risk,
+            contact_risk,
+            demographic_risk,
+            historical_risk,
+            risk_score=float(self.predict([features])[0])
+        )
+
+    def _batch_scores(self, students_features: List) -> List[float]:
+        if isinstance(students_features, FeatureColumns):
+            return self.predict(students_features)
+        scores = np.full(len(students_features), np.nan)
+        indices = [
+            index for index, features in enumerate(students_features)
+            if type(features) is dict or type(features) is StudentFeatures
+        ]
+        if indices:
+            scores[indices] = self.predict([students_features[index] for index in indices])
+        return scores
+
+
+def bundle_model(model, metrics: Dict) -> Dict:
+    """Bundle a fitted model with what load_model checks and /health reports"""
+    return {
+        'model': model,
+        'features': list(MODEL_FEATURES),
+        'trainedAt': datetime.now(timezone.utc).isoformat(),
+        'metrics': metrics,
+    }
@@ -0,0 +1,137 @@
+"""
+Parallel Execution Helpers
+Splits large batches across a shared pool of worker processes
+"""
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Callable, List, Optional, Sequence
+import asyncio
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Shared pool, created on first use in each server process (the lock
+# guards creating, swapping and submitting to it across request threads)
+_executor = None
+_executor_workers = 0
+_executor_lock = threading.RLock()
+
+# Threads used by the async app for blocking calls (scoring, detection)
+_thread_executor = None
+_thread_executor_lock = threading.Lock()
+
+
+def worker_count() -> int:
+    """Number of worker processes (AI_WORKER_PROCESSES, default: CPU count)"""
+    return max(1, int(os.getenv('AI_WORKER_PROCESSES', os.cpu_count() or 1)))
+
+
+def get_executor(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Get the shared process pool, recreating it if the size changes
+
+    A replaced pool is retired, not cancelled: tasks other requests
+    already submitted to it still finish, then its workers exit.
+    """
+    global _executor, _executor_workers
+    workers = workers or worker_count()
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ProcessPoolExecutor(max_workers=workers)
+            _executor_workers = workers
+        return _executor
+
+
+def shutdown_executor(executor: Optional[ProcessPoolExecutor] = None) -> None:
+    """
+    Stop the shared pool (it is recreated on next use)
+
+    Args:
+        executor: Only stop the pool if it is still this one (a broken pool
+                  another request has already replaced is left alone)
+    """
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None or (executor is not None and _executor is not executor):
+            return
+        _executor.shutdown(wait=False)
+        _executor = None
+        _executor_workers = 0
+
+
+def get_thread_executor() -> ThreadPoolExecutor:
+    """Get the shared thread pool for blocking calls (AI_BLOCKING_THREADS, default 4)"""
+    global _thread_executor
+    with _thread_executor_lock:
+        if _thread_executor is None:
+            _thread_executor = ThreadPoolExecutor(
+                max_workers=max(1, int(os.getenv('AI_BLOCKING_THREADS', 4))),
+                thread_name_prefix='ai-blocking'
+            )
+        return _thread_executor
+
+
+async def run_blocking(func: Callable, *args, **kwargs):
+    """
+    Run a blocking (CPU-bound) call on the shared thread pool
+
+    Keeps the event loop free to accept and serve other connections
+    while a batch is being scored.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_thread_executor(), partial(func, *args, **kwargs))
+
+
+def chunked(items: Sequence, size: int) -> List[Sequence]:
+    """Split a sequence into consecutive chunks of at most size items"""
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def map_chunks(
+    func: Callable[[Sequence], List],
+    items: Sequence,
+    chunk_size: int,
+    min_parallel: int,
+    workers: Optional[int] = None
+) -> List:
+    """
+    Apply a chunk function to items, in parallel when the batch is large
+
+    Small batches (fewer than min_parallel items) or a single worker run
+    in-process so pool overhead is only paid when it helps. Results are
+    concatenated in input order.
+
+    Args:
+        func: Top-level (picklable) function taking a chunk, returning a list
+        items: Items to process
+        chunk_size: Items per task sent to a worker
+        min_parallel: Smallest batch worth sending to the pool
+        workers: Pool size (defaults to worker_count())
+
+    Returns:
+        Concatenated results, one per item
+    """
+    workers = workers or worker_count()
+    if len(items) < min_parallel or workers <= 1:
+        return func(items)
+
+    executor = None
+    try:
+        # Submitted under the lock so a resize can't retire the pool in between
+        with _executor_lock:
+            executor = get_executor(workers)
+            pending = executor.map(func, chunked(items, chunk_size))
+        results = []
+        for chunk_results in pending:
+            results.extend(chunk_results)
+        return results
+    except (BrokenProcessPool, OSError) as e:
+        logger.warning(f'Worker pool unavailable, processing in-process: {e}')
+        shutdown_executor(executor)
+        return func(items)
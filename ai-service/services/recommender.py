@@ -3,79 +3,149 @@ Recommendation Service
 Generates personalized recommendations for students and schools
 """
 
-from typing import Dict, List
+from operator import itemgetter
+from types import MappingProxyType
+from typing import Dict, List, Optional, Tuple
 import logging
 
+from .intervention_optimizer import plan_interventions
+from .records import RiskAssessment
+from .school_rollups import SchoolRollup
+
 logger = logging.getLogger(__name__)
 
+# Share of a student's risk removed by an intervention at full effectiveness
+INTERVENTION_IMPACT = 0.5
+
+# Priority base by risk level (unknown levels use the default)
+RISK_LEVEL_SCORES = {'low': 0.2, 'medium': 0.5, 'high': 0.7, 'critical': 1.0}
+DEFAULT_RISK_LEVEL_SCORE = 0.5
+
+# Cost/budget levels (unknown values count as medium)
+COST_LEVELS = {'low': 1, 'medium': 2, 'high': 3}
+DEFAULT_COST_LEVEL = 2
+
+REASONS = {
+    'Parent Engagement Call': 'High absence rate requires immediate parent contact',
+    'Home Visit': 'Critical risk level requires in-person intervention',
+    'Learning Support': 'Below benchmark performance in literacy or numeracy',
+    'Peer Tutoring': 'Cost-effective academic support for struggling students',
+    'Feeding Program': 'Poverty indicators suggest need for nutritional support',
+    'Transportation Assistance': 'Remote location creates access barriers',
+    'Special Education': 'Disability status requires specialized support',
+    'Financial Support': 'Economic barriers preventing regular attendance',
+    'Counseling': 'Psychosocial factors affecting school engagement',
+    'Health Referral': 'Health-related absences require medical attention',
+}
+DEFAULT_REASON = 'Recommended based on risk assessment'
+
+IMPLEMENTATION_STEPS = {
+    'Parent Engagement Call': [
+        'Verify parent contact information',
+        'Schedule call within 24 hours',
+        'Use preferred language',
+        'Document conversation',
+        'Schedule follow-up if needed',
+    ],
+    'Home Visit': [
+        'Coordinate with district officer',
+        'Schedule visit with family',
+        'Prepare assessment checklist',
+        'Conduct visit with teacher',
+        'Document findings and action plan',
+    ],
+    'Learning Support': [
+        'Assess specific learning gaps',
+        'Create individualized learning plan',
+        'Assign support teacher',
+        'Schedule regular sessions',
+        'Monitor progress weekly',
+    ],
+}
+DEFAULT_IMPLEMENTATION_STEPS = ['Plan intervention', 'Implement', 'Monitor', 'Evaluate']
+
+# Number of recommendations that get implementation steps
+TOP_RECOMMENDATIONS = 3
+
 
 class Recommender:
     """Generate personalized recommendations"""
     
     def __init__(self):
-        # Intervention catalog
+        # Intervention catalog (unit_cost: planning estimate in GHS per student)
         self.interventions = {
             'Parent Engagement Call': {
                 'type': 'communication',
                 'cost': 'low',
                 'effectiveness': 0.7,
                 'duration_days': 1,
+                'unit_cost': 5,
             },
             'Home Visit': {
                 'type': 'outreach',
                 'cost': 'medium',
                 'effectiveness': 0.8,
                 'duration_days': 7,
+                'unit_cost': 60,
             },
             'Learning Support': {
                 'type': 'academic',
                 'cost': 'medium',
                 'effectiveness': 0.75,
                 'duration_days': 30,
+                'unit_cost': 80,
             },
             'Peer Tutoring': {
                 'type': 'academic',
                 'cost': 'low',
                 'effectiveness': 0.65,
                 'duration_days': 30,
+                'unit_cost': 15,
             },
             'Feeding Program': {
                 'type': 'welfare',
                 'cost': 'high',
                 'effectiveness': 0.8,
                 'duration_days': 90,
+                'unit_cost': 250,
             },
             'Transportation Assistance': {
                 'type': 'logistics',
                 'cost': 'high',
                 'effectiveness': 0.85,
                 'duration_days': 90,
+                'unit_cost': 300,
             },
             'Special Education': {
                 'type': 'academic',
                 'cost': 'high',
                 'effectiveness': 0.9,
                 'duration_days': 180,
+                'unit_cost': 400,
             },
             'Financial Support': {
                 'type': 'welfare',
                 'cost': 'high',
                 'effectiveness': 0.85,
                 'duration_days': 90,
+                'unit_cost': 350,
             },
             'Counseling': {
                 'type': 'psychosocial',
                 'cost': 'medium',
                 'effectiveness': 0.7,
                 'duration_days': 30,
+                'unit_cost': 70,
             },
             'Health Referral': {
                 'type': 'health',
                 'cost': 'medium',
                 'effectiveness': 0.75,
                 'duration_days': 14,
+                'unit_cost': 50,
             },
         }
+        self._build_tables()
     
     def recommend_for_student(
         self,
@@ -94,51 +164,91 @@ class Recommender:
         Returns:
             Recommendations with priorities
         """
-        recommendations = []
-        risk_level = risk_assessment.get('riskLevel', 'low')
-        risk_factors = risk_assessment.get('riskFactors', [])
+        return self._recommend(
+            student_data,
+            risk_assessment.get('riskLevel', 'low'),
+            risk_assessment.get('recommendations', []),
+            self._budget_table(budget)
+        )
+    
+    def recommend_for_students(
+        self,
+        students: List[Tuple[Dict, Dict]],
+        budget: str = 'medium'
+    ) -> List[Dict]:
+        """
+        Generate recommendations for many students with one budget
+        
+        Args:
+            students: (student data, risk assessment) pairs
+            budget: Budget level (low/medium/high)
+            
+        Returns:
+            Recommendations per student, in input order
+        """
+        by_level = self._budget_table(budget)
+        return [
+            self._recommend(
+                student_data,
+                risk_assessment.get('riskLevel', 'low'),
+                risk_assessment.get('recommendations', []),
+                by_level
+            )
+            for student_data, risk_assessment in students
+        ]
+    
+    def recommend_for_assessments(
+        self,
+        students: List[Tuple[Dict, RiskAssessment]],
+        budget: str = 'medium'
+    ) -> List[Dict]:
+        """
+        Generate recommendations straight from scorer output
         
-        # Get base recommendations from risk assessment
-        base_recommendations = risk_assessment.get('recommendations', [])
+        Reads risk level and interventions from RiskAssessment records, so
+        scoring and recommending need no JSON risk assessment in between.
         
-        # Score and prioritize each intervention
-        for intervention_name in base_recommendations:
-            if intervention_name in self.interventions:
-                intervention = self.interventions[intervention_name]
-                
-                # Calculate priority score
-                priority_score = self._calculate_priority(
-                    intervention,
-                    risk_level,
-                    risk_factors,
-                    student_data
-                )
-                
-                # Check budget constraint
-                if self._fits_budget(intervention['cost'], budget):
-                    recommendations.append({
-                        'intervention': intervention_name,
-                        'type': intervention['type'],
-                        'priority': priority_score,
-                        'cost': intervention['cost'],
-                        'expectedEffectiveness': intervention['effectiveness'],
-                        'estimatedDuration': intervention['duration_days'],
-                        'reasoning': self._get_reasoning(
-                            intervention_name,
-                            risk_factors,
-                            student_data
-                        ),
-                    })
+        Args:
+            students: (student data, risk assessment record) pairs
+            budget: Budget level (low/medium/high)
+            
+        Returns:
+            Recommendations per student with riskScore added, or
+            { studentId, error } for students that could not be scored
+        """
+        by_level = self._budget_table(budget)
+        results = []
+        for student_data, assessment in students:
+            if assessment.error is not None:
+                results.append({'studentId': student_data.get('_id'), 'error': assessment.error})
+                continue
+            result = self._recommend(
+                student_data, assessment.risk_level, assessment.recommendations, by_level
+            )
+            result['riskScore'] = assessment.risk_score
+            results.append(result)
+        return results
+    
+    def _recommend(
+        self,
+        student_data: Dict,
+        risk_level: str,
+        interventions: List[str],
+        by_level: MappingProxyType
+    ) -> Dict:
+        """Recommendations for one student from a budget's table"""
+        entries = by_level.get(risk_level)
+        if entries is None:
+            entries = by_level[None]
         
-        # Sort by priority
-        recommendations.sort(key=lambda x: x['priority'], reverse=True)
+        # Eligible interventions from the risk assessment, prioritized
+        recommendations = [dict(entries[name]) for name in interventions if name in entries]
+        recommendations.sort(key=itemgetter('priority'), reverse=True)
         
         # Add implementation plan for top recommendations
-        top_recommendations = recommendations[:3]
+        top_recommendations = recommendations[:TOP_RECOMMENDATIONS]
         for rec in top_recommendations:
-            rec['implementationSteps'] = self._get_implementation_steps(
-                rec['intervention']
-            )
+            rec['implementationSteps'] = list(self._steps[rec['intervention']])
         
         return {
             'studentId': student_data.get('_id'),
@@ -149,11 +259,53 @@ class Recommender:
             'estimatedImpact': self._estimate_impact(top_recommendations),
         }
     
+    def _budget_table(self, budget: str) -> MappingProxyType:
+        """Risk level -> recommendation table for a budget level"""
+        table = self._table.get(budget)
+        return table if table is not None else self._table['medium']
+    
+    def _build_tables(self):
+        """
+        Precompute every recommendation the catalog can produce
+        
+        Priority depends only on the intervention and risk level, budget
+        eligibility only on the intervention cost, and reasoning and steps
+        only on the intervention, so each (budget, risk level, intervention)
+        recommendation is built once here and copied per request.
+        The None risk level holds the entries for unknown levels.
+        """
+        risk_levels = list(RISK_LEVEL_SCORES) + [None]
+        table = {}
+        for budget in COST_LEVELS:
+            by_level = {}
+            for risk_level in risk_levels:
+                entries = {}
+                for name, intervention in self.interventions.items():
+                    if not self._fits_budget(intervention['cost'], budget):
+                        continue
+                    entries[name] = (
+                        ('intervention', name),
+                        ('type', intervention['type']),
+                        ('priority', self._calculate_priority(intervention, risk_level, [], {})),
+                        ('cost', intervention['cost']),
+                        ('expectedEffectiveness', intervention['effectiveness']),
+                        ('estimatedDuration', intervention['duration_days']),
+                        ('reasoning', self._get_reasoning(name, [], {})),
+                    )
+                by_level[risk_level] = MappingProxyType(entries)
+            table[budget] = MappingProxyType(by_level)
+        
+        self._table = MappingProxyType(table)
+        self._steps = MappingProxyType({
+            name: tuple(self._get_implementation_steps(name)) for name in self.interventions
+        })
+    
     def recommend_for_school(
         self,
         school_data: Dict,
         student_risks: List[Dict],
-        budget: float
+        budget: float,
+        unit_costs: Optional[Dict[str, float]] = None
     ) -> Dict:
         """
         Generate school-level recommendations
@@ -162,28 +314,19 @@ class Recommender:
             school_data: School information
             student_risks: List of student risk assessments
             budget: Available budget
+            unit_costs: Per-student cost overrides by intervention name
             
         Returns:
             School-level recommendations
         """
-        # Analyze school-wide patterns
-        high_risk_count = sum(1 for r in student_risks if r.get('riskLevel') in ['high', 'critical'])
-        total_students = len(student_risks)
+        # Analyze school-wide patterns (risk levels and factor counts)
+        rollup = SchoolRollup.from_risks(student_risks, school_data.get('_id'))
+        high_risk_count = rollup.high_risk_students
+        total_students = rollup.students
         high_risk_rate = high_risk_count / total_students if total_students > 0 else 0
         
-        # Aggregate risk factors
-        factor_counts = {}
-        for risk in student_risks:
-            for factor in risk.get('riskFactors', []):
-                factor_name = factor.get('factor')
-                factor_counts[factor_name] = factor_counts.get(factor_name, 0) + 1
-        
         # Get top school-wide issues
-        top_issues = sorted(
-            factor_counts.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:5]
+        top_issues = rollup.top_issues(5)
         
         # Generate school-level interventions
         recommendations = []
@@ -223,9 +366,72 @@ class Recommender:
             'highRiskRate': round(high_risk_rate * 100, 1),
             'topIssues': [{'issue': issue, 'count': count} for issue, count in top_issues],
             'recommendations': recommendations,
+            'interventionPlan': self.optimize_interventions(student_risks, budget, unit_costs),
             'totalBudget': budget,
         }
     
+    def optimize_interventions(
+        self,
+        student_risks: List[Dict],
+        budget: float,
+        unit_costs: Optional[Dict[str, float]] = None
+    ) -> Dict:
+        """
+        Assign interventions to students to maximize expected risk reduction
+        
+        Each student is eligible for the catalog interventions listed in
+        their assessment's recommendations. An intervention removes
+        effectiveness * INTERVENTION_IMPACT of the student's remaining risk,
+        so stacking interventions on one student has diminishing returns.
+        
+        Args:
+            student_risks: List of student risk assessments
+            budget: Available budget in the unit_cost currency
+            unit_costs: Per-student cost overrides by intervention name
+            
+        Returns:
+            Assignments in funding order with cost, expected reduction in
+            summed risk score, and an upper bound on the best possible plan
+        """
+        unit_costs = unit_costs or {}
+        names = list(self.interventions)
+        index = {name: i for i, name in enumerate(names)}
+        costs = [float(unit_costs.get(name, self.interventions[name]['unit_cost'])) for name in names]
+        effects = [self.interventions[name]['effectiveness'] * INTERVENTION_IMPACT for name in names]
+        
+        risks = []
+        options = []
+        for risk in student_risks:
+            score = risk.get('riskScore')
+            risks.append(float(score) if isinstance(score, (int, float)) else 0.0)
+            options.append(sorted({
+                index[name] for name in risk.get('recommendations', []) if name in index
+            }))
+        
+        assignments, total_cost, upper_bound = plan_interventions(
+            risks, options, costs, effects, budget
+        )
+        reduction = sum(gain for _, _, gain in assignments)
+        gap = (upper_bound - reduction) / upper_bound if upper_bound > 0 else 0
+        
+        return {
+            'assignments': [
+                {
+                    'studentId': student_risks[student].get('studentId'),
+                    'intervention': names[intervention],
+                    'cost': costs[intervention],
+                    'expectedReduction': round(gain, 4),
+                }
+                for student, intervention, gain in assignments
+            ],
+            'studentsCovered': len({student for student, _, _ in assignments}),
+            'totalCost': round(total_cost, 2),
+            'remainingBudget': round(budget - total_cost, 2),
+            'expectedRiskReduction': round(reduction, 4),
+            'upperBound': round(upper_bound, 4),
+            'optimalityGap': round(gap * 100, 1),
+        }
+    
     def _calculate_priority(
         self,
         intervention: Dict,
@@ -237,8 +443,7 @@ class Recommender:
         score = 0.0
         
         # Base score from risk level
-        risk_scores = {'low': 0.2, 'medium': 0.5, 'high': 0.7, 'critical': 1.0}
-        score += risk_scores.get(risk_level, 0.5)
+        score += RISK_LEVEL_SCORES.get(risk_level, DEFAULT_RISK_LEVEL_SCORE)
         
         # Boost for effectiveness
         score += intervention['effectiveness'] * 0.5
@@ -255,8 +460,7 @@ class Recommender:
     
     def _fits_budget(self, cost: str, budget: str) -> bool:
         """Check if intervention fits budget"""
-        cost_levels = {'low': 1, 'medium': 2, 'high': 3}
-        return cost_levels.get(cost, 2) <= cost_levels.get(budget, 2)
+        return COST_LEVELS.get(cost, DEFAULT_COST_LEVEL) <= COST_LEVELS.get(budget, DEFAULT_COST_LEVEL)
     
     def _get_reasoning(
         self,
@@ -265,46 +469,11 @@ class Recommender:
         student_data: Dict
     ) -> str:
         """Get reasoning for recommendation"""
-        reasons = {
-            'Parent Engagement Call': 'High absence rate requires immediate parent contact',
-            'Home Visit': 'Critical risk level requires in-person intervention',
-            'Learning Support': 'Below benchmark performance in literacy or numeracy',
-            'Peer Tutoring': 'Cost-effective academic support for struggling students',
-            'Feeding Program': 'Poverty indicators suggest need for nutritional support',
-            'Transportation Assistance': 'Remote location creates access barriers',
-            'Special Education': 'Disability status requires specialized support',
-            'Financial Support': 'Economic barriers preventing regular attendance',
-            'Counseling': 'Psychosocial factors affecting school engagement',
-            'Health Referral': 'Health-related absences require medical attention',
-        }
-        return reasons.get(intervention, 'Recommended based on risk assessment')
+        return REASONS.get(intervention, DEFAULT_REASON)
     
     def _get_implementation_steps(self, intervention: str) -> List[str]:
         """Get implementation steps for intervention"""
-        steps = {
-            'Parent Engagement Call': [
-                'Verify parent contact information',
-                'Schedule call within 24 hours',
-                'Use preferred language',
-                'Document conversation',
-                'Schedule follow-up if needed',
-            ],
-            'Home Visit': [
-                'Coordinate with district officer',
-                'Schedule visit with family',
-                'Prepare assessment checklist',
-                'Conduct visit with teacher',
-                'Document findings and action plan',
-            ],
-            'Learning Support': [
-                'Assess specific learning gaps',
-                'Create individualized learning plan',
-                'Assign support teacher',
-                'Schedule regular sessions',
-                'Monitor progress weekly',
-            ],
-        }
-        return steps.get(intervention, ['Plan intervention', 'Implement', 'Monitor', 'Evaluate'])
+        return list(IMPLEMENTATION_STEPS.get(intervention, DEFAULT_IMPLEMENTATION_STEPS))
     
     def _estimate_impact(self, recommendations: List[Dict]) -> Dict:
         """Estimate combined impact of recommendations"""
@@ -316,7 +485,7 @@ class Recommender:
         avg_effectiveness = total_effectiveness / len(recommendations)
         
         # Estimate risk reduction
-        expected_reduction = min(avg_effectiveness * 0.5, 0.8)  # Cap at 80%
+        expected_reduction = min(avg_effectiveness * INTERVENTION_IMPACT, 0.8)  # Cap at 80%
         
         confidence = 'high' if len(recommendations) >= 3 else 'medium'
         
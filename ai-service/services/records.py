@@ -0,0 +1,311 @@
+"""
+Scoring Records
+Compact __slots__ types for student features and risk assessments
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+
+class _Missing:
+    """Type of the MISSING sentinel; unpickles to the same object"""
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'MISSING'
+
+    def __reduce__(self):
+        return 'MISSING'
+
+
+# Marks a feature the student did not send (distinct from an explicit None),
+# so scoring defaults and factor descriptions behave exactly as with dicts
+MISSING = _Missing()
+
+# Feature key -> attribute name
+FEATURE_FIELDS = {
+    'studentId': 'student_id',
+    'absences7Days': 'absences_7_days',
+    'absences30Days': 'absences_30_days',
+    'absences90Days': 'absences_90_days',
+    'attendanceRate30Days': 'attendance_rate_30_days',
+    'consecutiveAbsences': 'consecutive_absences',
+    'attendanceRate7Days': 'attendance_rate_7_days',
+    'attendanceRate90Days': 'attendance_rate_90_days',
+    'attendanceTrend': 'attendance_trend',
+    'longestAbsenceStreak': 'longest_absence_streak',
+    'daysSinceLastPresent': 'days_since_last_present',
+    'peakAbsenceWeekday': 'peak_absence_weekday',
+    'peakWeekdayAbsenceRate': 'peak_weekday_absence_rate',
+    'literacyLevel': 'literacy_level',
+    'numeracyLevel': 'numeracy_level',
+    'avgLearningScore': 'avg_learning_score',
+    'contactVerified': 'contact_verified',
+    'contactResponseRate': 'contact_response_rate',
+    'hasDisability': 'has_disability',
+    'locationType': 'location_type',
+    'wealthProxy': 'wealth_proxy',
+    'seasonalMigrationRisk': 'seasonal_migration_risk',
+    'previousDropoutAttempt': 'previous_dropout_attempt',
+}
+
+COMPONENT_NAMES = ('attendance', 'learning', 'contact', 'demographics', 'historical')
+
+# Risk factor reported for each component, in COMPONENT_NAMES order
+FACTOR_NAMES = (
+    'High absence rate',
+    'Poor learning outcomes',
+    'Limited parent contact',
+    'Demographic challenges',
+    'Historical patterns',
+)
+
+
+class StudentFeatures:
+    """
+    Scoring features for one student
+
+    Supports features.get(key, default) with the camelCase feature keys,
+    so it can be passed anywhere a feature dict is accepted. Keys outside
+    FEATURE_FIELDS are dropped.
+    """
+
+    __slots__ = tuple(FEATURE_FIELDS.values())
+
+    def __init__(self, **fields):
+        for attribute in self.__slots__:
+            setattr(self, attribute, fields.get(attribute, MISSING))
+
+    @classmethod
+    def from_dict(cls, features: Dict) -> 'StudentFeatures':
+        """Build from a feature dict in the /ai/score-risk shape"""
+        record = cls.__new__(cls)
+        for key, attribute in FEATURE_FIELDS.items():
+            setattr(record, attribute, features.get(key, MISSING))
+        return record
+
+    def get(self, key: str, default=None):
+        """Dict-style access by feature key"""
+        attribute = FEATURE_FIELDS.get(key)
+        if attribute is None:
+            return default
+        value = getattr(self, attribute)
+        return default if value is MISSING else value
+
+    def to_dict(self) -> Dict:
+        """Feature dict with only the features that were set"""
+        features = {}
+        for key, attribute in FEATURE_FIELDS.items():
+            value = getattr(self, attribute)
+            if value is not MISSING:
+                features[key] = value
+        return features
+
+
+class FeatureColumns:
+    """
+    Scoring features for a batch of students, held as columns
+
+    Accepted by the vectorized scorer in place of a list of feature dicts,
+    so columnar sources (Parquet, Arrow) are scored without building a
+    dict per student. A None value reads as a feature that was not sent.
+    """
+
+    __slots__ = ('columns', 'length')
+
+    def __init__(self, columns: Dict[str, List], length: int):
+        self.columns = columns
+        self.length = length
+
+    def __len__(self) -> int:
+        return self.length
+
+    def column(self, key: str, default=None) -> List:
+        """Values of one feature, with default where it is missing"""
+        values = self.columns.get(key)
+        if values is None:
+            return [default] * self.length
+        if default is None or None not in values:
+            return values
+        return [default if value is None else value for value in values]
+
+    def row(self, index: int) -> Dict:
+        """Feature dict for one student (for the per-student fallback path)"""
+        return {
+            key: values[index] for key, values in self.columns.items()
+            if values[index] is not None
+        }
+
+
+class RiskFactor:
+    """One of the top contributing risk factors in an assessment"""
+
+    __slots__ = ('factor', 'weight', 'description')
+
+    def __init__(self, factor: str, weight: float, description: str):
+        self.factor = factor
+        self.weight = weight
+        self.description = description
+
+    def __reduce__(self):
+        return (RiskFactor, (self.factor, self.weight, self.description))
+
+    def to_dict(self) -> Dict:
+        return {'factor': self.factor, 'weight': self.weight, 'description': self.description}
+
+
+class RiskAssessment:
+    """
+    Risk assessment for one student
+
+    Components and scores are stored already rounded. Converted to the
+    JSON response shape with to_dict() at the API boundary.
+    """
+
+    __slots__ = (
+        'risk_score',
+        'risk_level',
+        'attendance',
+        'learning',
+        'contact',
+        'demographics',
+        'historical',
+        'risk_factors',
+        'recommendations',
+        'model_version',
+        'student_id',
+        'error',
+    )
+
+    def __init__(
+        self,
+        risk_score: float = 0.0,
+        risk_level: str = 'low',
+        components: Tuple[float, ...] = (0.0, 0.0, 0.0, 0.0, 0.0),
+        risk_factors: Tuple[RiskFactor, ...] = (),
+        recommendations: Tuple[str, ...] = (),
+        model_version: Optional[str] = None,
+        student_id=MISSING,
+        error: Optional[str] = None
+    ):
+        self.risk_score = risk_score
+        self.risk_level = risk_level
+        (self.attendance, self.learning, self.contact,
+         self.demographics, self.historical) = components
+        self.risk_factors = risk_factors
+        self.recommendations = recommendations
+        self.model_version = model_version
+        self.student_id = student_id
+        self.error = error
+
+    def __reduce__(self):
+        # Positional arguments pickle much faster than per-slot state when
+        # results are sent back from worker processes
+        return (RiskAssessment, (
+            self.risk_score,
+            self.risk_level,
+            (self.attendance, self.learning, self.contact, self.demographics, self.historical),
+            self.risk_factors,
+            self.recommendations,
+            self.model_version,
+            self.student_id,
+            self.error,
+        ))
+
+    @classmethod
+    def failed(cls, student_id, error: str) -> 'RiskAssessment':
+        """Assessment recording a per-student scoring error"""
+        return cls(student_id=student_id, error=error)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'RiskAssessment':
+        """Rebuild from the JSON shape produced by to_dict()"""
+        if 'error' in data:
+            return cls.failed(data.get('studentId'), data['error'])
+
+        components = data.get('components', {})
+        return cls(
+            risk_score=data['riskScore'],
+            risk_level=data['riskLevel'],
+            components=tuple(components.get(name, 0.0) for name in COMPONENT_NAMES),
+            risk_factors=tuple(
+                RiskFactor(factor['factor'], factor['weight'], factor['description'])
+                for factor in data.get('riskFactors', [])
+            ),
+            recommendations=tuple(data.get('recommendations', [])),
+            model_version=data.get('modelVersion'),
+            student_id=data.get('studentId', MISSING),
+        )
+
+    @property
+    def components(self) -> Dict[str, float]:
+        return {
+            'attendance': self.attendance,
+            'learning': self.learning,
+            'contact': self.contact,
+            'demographics': self.demographics,
+            'historical': self.historical,
+        }
+
+    def to_dict(self) -> Dict:
+        """Risk assessment in the /ai/score-risk response shape"""
+        if self.error is not None:
+            return {'studentId': self.student_id, 'error': self.error}
+
+        result = {
+            'riskScore': self.risk_score,
+            'riskLevel': self.risk_level,
+            'components': {
+                'attendance': self.attendance,
+                'learning': self.learning,
+                'contact': self.contact,
+                'demographics': self.demographics,
+                'historical': self.historical,
+            },
+            'riskFactors': [
+                {'factor': factor.factor, 'weight': factor.weight, 'description': factor.description}
+                for factor in self.risk_factors
+            ],
+            'recommendations': list(self.recommendations),
+            'modelVersion': self.model_version,
+        }
+        if self.student_id is not MISSING:
+            result['studentId'] = self.student_id
+        return result
+
+
+# Risk assessments as columns (bulk scoring and /ai/export). Factor weights
+# are the component columns, so factors are listed by name
+ASSESSMENT_COLUMNS = (
+    ('studentId', 'riskScore', 'riskLevel') +
+    COMPONENT_NAMES +
+    ('riskFactors', 'recommendations', 'modelVersion', 'error')
+)
+
+
+def set_assessment_row(columns: Dict[str, List], index: int, assessment: RiskAssessment) -> None:
+    """Write one assessment into row index of ASSESSMENT_COLUMNS lists"""
+    student_id = assessment.student_id
+    columns['studentId'][index] = None if student_id is MISSING else student_id
+    if assessment.error is not None:
+        for name in ASSESSMENT_COLUMNS[1:-1]:
+            columns[name][index] = None
+        columns['error'][index] = assessment.error
+        return
+
+    columns['riskScore'][index] = assessment.risk_score
+    columns['riskLevel'][index] = assessment.risk_level
+    for name in COMPONENT_NAMES:
+        columns[name][index] = getattr(assessment, name)
+    columns['riskFactors'][index] = [factor.factor for factor in assessment.risk_factors]
+    columns['recommendations'][index] = list(assessment.recommendations)
+    columns['modelVersion'][index] = assessment.model_version
+    columns['error'][index] = None
+
+
+def assessment_columns(assessments: List[RiskAssessment]) -> Dict[str, List]:
+    """ASSESSMENT_COLUMNS -> one value per assessment"""
+    columns = {name: [None] * len(assessments) for name in ASSESSMENT_COLUMNS}
+    for index, assessment in enumerate(assessments):
+        set_assessment_row(columns, index, assessment)
+    return columns
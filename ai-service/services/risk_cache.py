@@ -0,0 +1,309 @@
+"""
+Risk Assessment Cache
+Memoizes risk assessments in Redis, keyed by a hash of the features
+"""
+
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import logging
+import time
+
+from .records import MISSING, RiskAssessment, StudentFeatures
+from .risk_rules import RuleSet
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 2 * 24 * 60 * 60  # Survives until the next nightly rescore
+KEY_PREFIX = 'edulink:risk'
+# Bumped whenever the hashed fields change, so entries hashed from fewer
+# features are never read again (they expire with their TTL)
+KEY_VERSION = 'v3'
+RETRY_AFTER_SECONDS = 30  # Back off from Redis after a failure instead of retrying per request
+
+
+def scoring_features(scorer, rules) -> Tuple[str, ...]:
+    """
+    Features a scorer's assessments depend on
+
+    Every feature the rule table reads, the factor descriptions' features
+    and (for a model-backed scorer) the model inputs. Anything else
+    (studentId, ids, timestamps) is left out of the hash so unchanged
+    students hit the cache.
+    """
+    return tuple(dict.fromkeys(
+        rules.features + tuple(scorer.description_features) + tuple(scorer.input_features)
+    ))
+
+
+def feature_hash(features: Dict, names: Tuple[str, ...]) -> str:
+    """
+    Stable hash of the scoring-relevant part of a feature dict
+
+    Keys are sorted and missing features are left out, so the same
+    features always produce the same hash regardless of key order.
+
+    Args:
+        features: Feature dict (or StudentFeatures)
+        names: Features to hash (see scoring_features)
+    """
+    normalized = {}
+    for name in names:
+        value = features.get(name, MISSING)
+        if value is not MISSING:
+            normalized[name] = value
+    payload = json.dumps(normalized, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _decode(values: List[Optional[bytes]]) -> List[Optional[Dict]]:
+    """Cached assessments from MGET values (None for misses)"""
+    return [json.loads(value) if value is not None else None for value in values]
+
+
+def _encode(results: Dict[str, Dict]) -> Dict[str, str]:
+    """Cache values for assessments, without the per-student id"""
+    return {
+        key: json.dumps(
+            {name: item for name, item in result.items() if name != 'studentId'},
+            separators=(',', ':')
+        )
+        for key, result in results.items()
+    }
+
+
+class CachedRiskScorer:
+    """RiskScorer wrapper that skips scoring for previously seen features"""
+
+    def __init__(self, scorer, redis_client=None, ttl: int = DEFAULT_TTL_SECONDS):
+        self.scorer = scorer
+        self.redis = redis_client
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._retry_at = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.redis is not None and time.monotonic() >= self._retry_at
+
+    def cache_key(self, features: Dict, rules: Optional[RuleSet] = None) -> str:
+        """Redis key for a feature dict under a rule set's model version (default: current)"""
+        prefix, names = self._key_parts(rules if rules is not None else self.scorer.rules)
+        return f'{prefix}:{feature_hash(features, names)}'
+
+    def _key_parts(self, rules: RuleSet) -> Tuple[str, Tuple[str, ...]]:
+        """Key prefix and hashed features, both from one rule set"""
+        prefix = f'{KEY_PREFIX}:{KEY_VERSION}:{self.scorer.model_version_for(rules)}'
+        return prefix, scoring_features(self.scorer, rules)
+
+    def calculate_risk_score(self, features: Dict) -> Dict:
+        """Cached equivalent of RiskScorer.calculate_risk_score"""
+        if not self.enabled:
+            return self.scorer.calculate_risk_score(features)
+
+        # One rule set for the key and the scoring, so a reload in between
+        # can't store an assessment under the other table's key
+        rules = self.scorer.rules
+        key = self.cache_key(features, rules)
+        cached = self._get_many([key])[0]
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        result = self.scorer.assess(features, rules).to_dict()
+        self._set_many({key: result})
+        return result
+
+    def batch_calculate(self, students_features: List[Dict]) -> List[Dict]:
+        """Cached equivalent of RiskScorer.batch_calculate"""
+        return [assessment.to_dict() for assessment in self.batch_assess(students_features)]
+
+    def batch_assess(self, students_features: List[Dict]) -> List[RiskAssessment]:
+        """
+        Cached equivalent of RiskScorer.batch_assess
+
+        Looks up every student with one MGET, scores only the misses in a
+        single batch and writes them back with one pipelined round trip.
+        """
+        if not self.enabled:
+            return self.scorer.batch_assess(students_features)
+
+        rules = self.scorer.rules
+        keys = self._keys(students_features, rules)
+        cached = self._get_many([key for key in keys if key is not None])
+        results, missing = self._collect(students_features, keys, cached)
+
+        if missing:
+            scored = self.scorer.batch_assess([students_features[index] for index in missing], rules)
+            self._set_many(self._fill(results, missing, keys, scored))
+
+        return results
+
+    def _keys(self, students_features: List[Dict], rules: RuleSet) -> List[Optional[str]]:
+        """Cache key per student (None for malformed input, which is never cached)"""
+        prefix, names = self._key_parts(rules)
+        return [
+            f'{prefix}:{feature_hash(features, names)}' if isinstance(features, (dict, StudentFeatures)) else None
+            for features in students_features
+        ]
+
+    def _collect(
+        self,
+        students_features: List[Dict],
+        keys: List[Optional[str]],
+        cached: List[Optional[Dict]]
+    ) -> Tuple[List[Optional[RiskAssessment]], List[int]]:
+        """Rebuild cache hits, returning results (None for misses) and miss indices"""
+        cached_iter = iter(cached)
+
+        results = [None] * len(students_features)
+        missing = []
+        for index, (features, key) in enumerate(zip(students_features, keys)):
+            result = next(cached_iter) if key is not None else None
+            if result is None:
+                missing.append(index)
+            else:
+                assessment = RiskAssessment.from_dict(result)
+                assessment.student_id = features.get('studentId')
+                results[index] = assessment
+
+        self.hits += len(students_features) - len(missing)
+        self.misses += len(missing)
+        return results, missing
+
+    def _fill(
+        self,
+        results: List[Optional[RiskAssessment]],
+        missing: List[int],
+        keys: List[Optional[str]],
+        scored: List[RiskAssessment]
+    ) -> Dict[str, Dict]:
+        """Place newly scored misses into results, returning the ones to cache"""
+        to_cache = {}
+        for index, assessment in zip(missing, scored):
+            results[index] = assessment
+            if keys[index] is not None and assessment.error is None:
+                to_cache[keys[index]] = assessment.to_dict()
+        return to_cache
+
+    def stats(self) -> Dict:
+        """Hit/miss counters since startup"""
+        lookups = self.hits + self.misses
+        return {
+            'enabled': self.redis is not None,
+            'available': self.enabled,
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors,
+            'hitRate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _get_many(self, keys: List[str]) -> List[Optional[Dict]]:
+        """MGET cached assessments, treating Redis failures as misses"""
+        if not keys:
+            return []
+        try:
+            values = self.redis.mget(keys)
+        except Exception as e:
+            self._record_error(f'Risk cache lookup failed: {e}')
+            return [None] * len(keys)
+        return _decode(values)
+
+    def _set_many(self, results: Dict[str, Dict]) -> None:
+        """Store assessments with the TTL in one pipelined round trip"""
+        if not results or not self.enabled:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for key, value in _encode(results).items():
+                pipe.set(key, value, ex=self.ttl)
+            pipe.execute()
+        except Exception as e:
+            self._record_error(f'Risk cache store failed: {e}')
+
+    def _record_error(self, message: str) -> None:
+        """Count a Redis failure and bypass the cache for a while"""
+        self.errors += 1
+        self._retry_at = time.monotonic() + RETRY_AFTER_SECONDS
+        logger.warning(message)
+
+
+class AsyncCachedRiskScorer(CachedRiskScorer):
+    """
+    CachedRiskScorer for the async app
+
+    Uses a redis.asyncio client and runs scoring through run_sync (a
+    coroutine function that executes a blocking call off the event loop).
+    """
+
+    def __init__(self, scorer, redis_client=None, ttl: int = DEFAULT_TTL_SECONDS, run_sync=None):
+        super().__init__(scorer, redis_client, ttl)
+        self.run_sync = run_sync or asyncio.to_thread
+
+    async def calculate_risk_score(self, features: Dict) -> Dict:
+        """Cached equivalent of RiskScorer.calculate_risk_score"""
+        if not self.enabled:
+            return await self.run_sync(self.scorer.calculate_risk_score, features)
+
+        rules = self.scorer.rules
+        key = self.cache_key(features, rules)
+        cached = (await self._get_many([key]))[0]
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        result = (await self.run_sync(self.scorer.assess, features, rules)).to_dict()
+        await self._set_many({key: result})
+        return result
+
+    async def batch_calculate(self, students_features: List[Dict]) -> List[Dict]:
+        """Cached equivalent of RiskScorer.batch_calculate"""
+        return [assessment.to_dict() for assessment in await self.batch_assess(students_features)]
+
+    async def batch_assess(self, students_features: List[Dict]) -> List[RiskAssessment]:
+        """Cached equivalent of RiskScorer.batch_assess"""
+        if not self.enabled:
+            return await self.run_sync(self.scorer.batch_assess, students_features)
+
+        rules = self.scorer.rules
+        keys = self._keys(students_features, rules)
+        cached = await self._get_many([key for key in keys if key is not None])
+        results, missing = self._collect(students_features, keys, cached)
+
+        if missing:
+            scored = await self.run_sync(
+                self.scorer.batch_assess,
+                [students_features[index] for index in missing],
+                rules
+            )
+            await self._set_many(self._fill(results, missing, keys, scored))
+
+        return results
+
+    async def _get_many(self, keys: List[str]) -> List[Optional[Dict]]:
+        """MGET cached assessments, treating Redis failures as misses"""
+        if not keys:
+            return []
+        try:
+            values = await self.redis.mget(keys)
+        except Exception as e:
+            self._record_error(f'Risk cache lookup failed: {e}')
+            return [None] * len(keys)
+        return _decode(values)
+
+    async def _set_many(self, results: Dict[str, Dict]) -> None:
+        """Store assessments with the TTL in one pipelined round trip"""
+        if not results or not self.enabled:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for key, value in _encode(results).items():
+                pipe.set(key, value, ex=self.ttl)
+            await pipe.execute()
+        except Exception as e:
+            self._record_error(f'Risk cache store failed: {e}')
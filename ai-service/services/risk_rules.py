@@ -0,0 +1,586 @@
+"""
+Risk Scoring Rules
+Loads the declarative scoring rule table and compiles it into threshold
+lookups shared by the scalar and vectorized paths
+"""
+
+from bisect import bisect_right
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+import weakref
+
+from .records import FEATURE_FIELDS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), 'risk_rules.json')
+DEFAULT_RELOAD_SECONDS = 5.0
+
+COMPONENTS = ('attendance', 'learning', 'contact', 'demographics', 'historical')
+RISK_LEVELS = ('low', 'medium', 'high', 'critical')
+
+# Comparison for a cutoff ladder: (side of the breakpoints an equal value
+# falls on for np.searchsorted, whether cutoffs are listed ascending)
+COMPARISONS = {
+    '>=': ('right', False),
+    '>': ('left', False),
+    '<': ('right', True),
+    '<=': ('left', True),
+}
+
+# Features a rule may read (studentId identifies, it is never scored)
+RULE_FEATURES = frozenset(FEATURE_FIELDS) - {'studentId'}
+
+# Recommendation masks are int64 bitmasks in the vectorized engine
+MAX_RECOMMENDATION_RULES = 62
+
+
+def _number(value, where: str) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f'{where} must be a finite number')
+    return value
+
+
+def _scalar(value, where: str):
+    """Feature defaults and targets must be JSON scalars"""
+    if value is not None and not isinstance(value, (str, int, float)):
+        raise ValueError(f'{where} must be a string, number, boolean or null')
+    if isinstance(value, float) and not math.isfinite(value):
+        raise ValueError(f'{where} must be finite')
+    return value
+
+
+def _feature(spec: Dict, where: str) -> str:
+    feature = spec.get('feature')
+    if not isinstance(feature, str) or not feature:
+        raise ValueError(f'{where}.feature must be a feature name')
+    if feature not in RULE_FEATURES:
+        raise ValueError(f'{where}.feature {feature!r} is not a known feature')
+    return feature
+
+
+class LadderRule:
+    """
+    Numeric feature scored by the first cutoff it passes
+
+    Cutoffs are listed like an if/elif chain ("x >= 3 -> 0.4, x >= 2 -> 0.2")
+    and compiled two ways: the scalar path walks the (threshold, risk)
+    tuples with the comparison itself, like the if/elif chain, and the
+    vectorized one looks up values[searchsorted(breakpoints, x)] in
+    ascending breakpoints.
+    """
+
+    __slots__ = ('feature', 'default', 'when', 'cutoffs', 'otherwise', 'breakpoints', 'values', 'side', 'risk')
+
+    def __init__(self, spec: Dict, where: str):
+        self.feature = _feature(spec, where)
+        self.default = _number(spec.get('default', 0), f'{where}.default')
+        self.when = spec.get('when')
+        if self.when not in COMPARISONS:
+            raise ValueError(f'{where}.when must be one of {", ".join(COMPARISONS)}')
+        self.side, ascending = COMPARISONS[self.when]
+
+        cutoffs = spec.get('cutoffs')
+        if not isinstance(cutoffs, list) or not cutoffs:
+            raise ValueError(f'{where}.cutoffs must be a non-empty list of [threshold, risk] pairs')
+        pairs = []
+        for index, pair in enumerate(cutoffs):
+            if not isinstance(pair, list) or len(pair) != 2:
+                raise ValueError(f'{where}.cutoffs[{index}] must be a [threshold, risk] pair')
+            pairs.append((_number(pair[0], f'{where}.cutoffs[{index}][0]'),
+                          _number(pair[1], f'{where}.cutoffs[{index}][1]')))
+        thresholds = [threshold for threshold, _ in pairs]
+        if thresholds != sorted(set(thresholds), reverse=not ascending):
+            order = 'increasing' if ascending else 'decreasing'
+            raise ValueError(f'{where}.cutoffs must have strictly {order} thresholds for "{self.when}"')
+
+        self.cutoffs = tuple(pairs)
+        self.otherwise = _number(spec.get('otherwise', 0.0), f'{where}.otherwise')
+        if ascending:
+            self.breakpoints = tuple(thresholds)
+            self.values = tuple(risk for _, risk in pairs) + (self.otherwise,)
+        else:
+            self.breakpoints = tuple(reversed(thresholds))
+            self.values = (self.otherwise,) + tuple(risk for _, risk in reversed(pairs))
+        self.risk = LADDERS[self.when](self.feature, self.default, self.cutoffs, self.otherwise)
+
+
+# risk(features) for a ladder, one per comparison: a closure over the cutoff
+# tuples with the operator written out, so a student costs a dict lookup and
+# the same comparisons as the hand-written chain (NaN, None and strings
+# included, error messages too)
+
+def _at_least(feature: str, default, cutoffs: Tuple, otherwise: float):
+    def risk(features) -> float:
+        value = features.get(feature, default)
+        for threshold, value_risk in cutoffs:
+            if value >= threshold:
+                return value_risk
+        return otherwise
+    return risk
+
+
+def _above(feature: str, default, cutoffs: Tuple, otherwise: float):
+    def risk(features) -> float:
+        value = features.get(feature, default)
+        for threshold, value_risk in cutoffs:
+            if value > threshold:
+                return value_risk
+        return otherwise
+    return risk
+
+
+def _below(feature: str, default, cutoffs: Tuple, otherwise: float):
+    def risk(features) -> float:
+        value = features.get(feature, default)
+        for threshold, value_risk in cutoffs:
+            if value < threshold:
+                return value_risk
+        return otherwise
+    return risk
+
+
+def _at_most(feature: str, default, cutoffs: Tuple, otherwise: float):
+    def risk(features) -> float:
+        value = features.get(feature, default)
+        for threshold, value_risk in cutoffs:
+            if value <= threshold:
+                return value_risk
+        return otherwise
+    return risk
+
+
+LADDERS = {'>=': _at_least, '>': _above, '<': _below, '<=': _at_most}
+
+
+class CategoryRule:
+    """String feature scored by lookup (unlisted values score 0)"""
+
+    __slots__ = ('feature', 'default', 'categories', 'risk')
+
+    def __init__(self, spec: Dict, where: str):
+        self.feature = _feature(spec, where)
+        self.default = _scalar(spec.get('default'), f'{where}.default')
+        categories = spec.get('categories')
+        if not isinstance(categories, dict):
+            raise ValueError(f'{where}.categories must be an object')
+        self.categories = MappingProxyType({
+            name: _number(risk, f'{where}.categories.{name}') for name, risk in categories.items()
+        })
+
+        feature, default, lookup = self.feature, self.default, dict(self.categories).get
+
+        def risk(features) -> float:
+            value = features.get(feature, default)
+            return lookup(value, 0.0) if isinstance(value, str) else 0.0
+        self.risk = risk
+
+
+class FlagRule:
+    """Boolean feature scored by truthiness"""
+
+    __slots__ = ('feature', 'default', 'if_true', 'if_false', 'risk')
+
+    def __init__(self, spec: Dict, where: str):
+        self.feature = _feature(spec, where)
+        self.default = _scalar(spec.get('default', False), f'{where}.default')
+        self.if_true = _number(spec.get('ifTrue', 0.0), f'{where}.ifTrue')
+        self.if_false = _number(spec.get('ifFalse', 0.0), f'{where}.ifFalse')
+
+        feature, default, if_true, if_false = self.feature, self.default, self.if_true, self.if_false
+
+        def risk(features) -> float:
+            return if_true if features.get(feature, default) else if_false
+        self.risk = risk
+
+
+def _component_rule(spec, where: str):
+    if not isinstance(spec, dict):
+        raise ValueError(f'{where} must be an object')
+    if 'cutoffs' in spec:
+        return LadderRule(spec, where)
+    if 'categories' in spec:
+        return CategoryRule(spec, where)
+    if 'ifTrue' in spec or 'ifFalse' in spec:
+        return FlagRule(spec, where)
+    raise ValueError(f'{where} needs cutoffs, categories or ifTrue/ifFalse')
+
+
+class Trigger:
+    """
+    Condition that adds recommendations
+
+    kind is one of 'levels' (risk level in a set), 'above'/'below' (numeric
+    comparison), 'equals', 'truthy' or 'anyOf' (nested triggers).
+    """
+
+    __slots__ = ('kind', 'feature', 'default', 'target', 'children', 'matches')
+
+    def __init__(self, spec, where: str):
+        if not isinstance(spec, dict):
+            raise ValueError(f'{where} must be an object')
+        self.feature = None
+        self.default = None
+        self.children = ()
+
+        if 'riskLevels' in spec:
+            levels = spec['riskLevels']
+            if not isinstance(levels, list) or not all(level in RISK_LEVELS for level in levels):
+                raise ValueError(f'{where}.riskLevels must list levels from {", ".join(RISK_LEVELS)}')
+            self.kind = 'levels'
+            self.target = frozenset(levels)
+        elif 'anyOf' in spec:
+            children = spec['anyOf']
+            if not isinstance(children, list) or not children:
+                raise ValueError(f'{where}.anyOf must be a non-empty list')
+            self.kind = 'anyOf'
+            self.target = None
+            self.children = tuple(Trigger(child, f'{where}.anyOf[{index}]') for index, child in enumerate(children))
+        else:
+            self.feature = _feature(spec, where)
+            for kind in ('above', 'below', 'equals', 'truthy'):
+                if kind in spec:
+                    break
+            else:
+                raise ValueError(f'{where} needs riskLevels, anyOf, or a feature with above, below, equals or truthy')
+            self.kind = kind
+            if kind in ('above', 'below'):
+                self.default = _number(spec.get('default', 0), f'{where}.default')
+                self.target = _number(spec[kind], f'{where}.{kind}')
+            elif kind == 'truthy':
+                self.default = _scalar(spec.get('default', False), f'{where}.default')
+                self.target = bool(spec[kind])
+            else:
+                self.default = _scalar(spec.get('default'), f'{where}.default')
+                self.target = _scalar(spec[kind], f'{where}.{kind}')
+        self.matches = _trigger_matcher(self)
+
+    def numeric_inputs(self) -> List[Tuple[str, float]]:
+        """(feature, default) pairs compared against numbers"""
+        if self.kind in ('above', 'below'):
+            return [(self.feature, self.default)]
+        return [pair for child in self.children for pair in child.numeric_inputs()]
+
+    def features(self) -> List[str]:
+        """Every feature the trigger reads (anyOf children included)"""
+        if self.feature is not None:
+            return [self.feature]
+        return [feature for child in self.children for feature in child.features()]
+
+
+def _trigger_matcher(trigger: Trigger):
+    """matches(risk_level, features) for a trigger (a closure, like _ladder_risk)"""
+    kind, feature, default, target = trigger.kind, trigger.feature, trigger.default, trigger.target
+    if kind == 'levels':
+        return lambda risk_level, features: risk_level in target
+    if kind == 'anyOf':
+        children = tuple(child.matches for child in trigger.children)
+
+        def any_of(risk_level, features):
+            for matches in children:
+                if matches(risk_level, features):
+                    return True
+            return False
+        return any_of
+    if kind == 'above':
+        return lambda risk_level, features: features.get(feature, default) > target
+    if kind == 'below':
+        return lambda risk_level, features: features.get(feature, default) < target
+    if kind == 'equals':
+        return lambda risk_level, features: features.get(feature, default) == target
+    if target:
+        return lambda risk_level, features: bool(features.get(feature, default))
+    return lambda risk_level, features: not features.get(feature, default)
+
+
+class RuleSet:
+    """
+    Compiled scoring rules
+
+    Immutable once built. version is a hash of the rule content (not the
+    file formatting), reported with every assessment. Rule features must be
+    FEATURE_FIELDS names, so a typo is rejected when the table loads instead
+    of silently scoring the default.
+    """
+
+    def __init__(self, source: Dict):
+        if not isinstance(source, dict):
+            raise ValueError('Risk rules must be a JSON object')
+        self.source = source
+        canonical = json.dumps(source, sort_keys=True, separators=(',', ':'))
+        self.version = hashlib.sha256(canonical.encode()).hexdigest()[:12]
+
+        weights = source.get('weights')
+        if not isinstance(weights, dict) or set(weights) != set(COMPONENTS):
+            raise ValueError(f'weights must have exactly {", ".join(COMPONENTS)}')
+        self.weights = MappingProxyType({
+            name: _number(weights[name], f'weights.{name}') for name in COMPONENTS
+        })
+
+        levels = source.get('levels')
+        if not isinstance(levels, dict) or set(levels) != set(RISK_LEVELS[:-1]):
+            raise ValueError(f'levels must have exactly {", ".join(RISK_LEVELS[:-1])}')
+        self.thresholds = MappingProxyType({
+            name: _number(levels[name], f'levels.{name}') for name in RISK_LEVELS[:-1]
+        })
+        self.level_breakpoints = tuple(self.thresholds[name] for name in RISK_LEVELS[:-1])
+        if list(self.level_breakpoints) != sorted(self.level_breakpoints):
+            raise ValueError('levels must be in increasing order (low <= medium <= high)')
+
+        components = source.get('components')
+        if not isinstance(components, dict) or set(components) != set(COMPONENTS):
+            raise ValueError(f'components must have exactly {", ".join(COMPONENTS)}')
+        compiled = {}
+        for name in COMPONENTS:
+            rules = components[name]
+            if not isinstance(rules, list):
+                raise ValueError(f'components.{name} must be a list of rules')
+            compiled[name] = tuple(
+                _component_rule(spec, f'components.{name}[{index}]') for index, spec in enumerate(rules)
+            )
+        self.components = MappingProxyType(compiled)
+
+        factors = source.get('factors', {})
+        self.factor_min_score = _number(factors.get('minScore', 0.2), 'factors.minScore')
+        self.max_factors = _number(factors.get('max', 3), 'factors.max')
+        if not isinstance(self.max_factors, int) or self.max_factors < 0:
+            raise ValueError('factors.max must be a non-negative integer')
+
+        recommendations = source.get('recommendations', {})
+        self.max_recommendations = _number(recommendations.get('max', 5), 'recommendations.max')
+        if not isinstance(self.max_recommendations, int) or self.max_recommendations < 0:
+            raise ValueError('recommendations.max must be a non-negative integer')
+        rules = recommendations.get('rules', [])
+        if not isinstance(rules, list) or len(rules) > MAX_RECOMMENDATION_RULES:
+            raise ValueError(f'recommendations.rules must be a list of at most {MAX_RECOMMENDATION_RULES} rules')
+        compiled_rules = []
+        for index, rule in enumerate(rules):
+            where = f'recommendations.rules[{index}]'
+            names = rule.get('add') if isinstance(rule, dict) else None
+            if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+                raise ValueError(f'{where}.add must be a list of intervention names')
+            compiled_rules.append((Trigger(rule.get('when'), f'{where}.when'), tuple(names)))
+        self.recommendation_rules = tuple(compiled_rules)
+
+        # Numeric inputs, validated together by the vectorized engine
+        numeric = [
+            (rule.feature, rule.default)
+            for name in COMPONENTS for rule in self.components[name] if isinstance(rule, LadderRule)
+        ]
+        for trigger, _ in self.recommendation_rules:
+            numeric.extend(trigger.numeric_inputs())
+        self.numeric_inputs = tuple(dict.fromkeys(numeric))
+        # Every feature an assessment depends on (the risk cache hashes these)
+        features = [rule.feature for name in COMPONENTS for rule in self.components[name]]
+        for trigger, _ in self.recommendation_rules:
+            features.extend(trigger.features())
+        self.features = tuple(dict.fromkeys(features))
+        # Scalar path: each rule is a closure over its cutoffs, so a
+        # student costs a dict lookup and a few comparisons per rule
+        self._component_functions = tuple(
+            tuple(rule.risk for rule in self.components[name]) for name in COMPONENTS
+        )
+        self._recommendation_functions = tuple(
+            (trigger.matches, names) for trigger, names in self.recommendation_rules
+        )
+
+        # Built once per distinct set of matching recommendation rules by the
+        # vectorized engine (bitmask -> names); it belongs to these rules, so
+        # a reload starts a new one
+        self.recommendation_cache = {}
+
+    def __reduce__(self):
+        # Compiled rules are rebuilt from the source when sent to worker processes
+        return (RuleSet, (self.source,))
+
+    def component_risks(self, features) -> Tuple[float, ...]:
+        """The five component risks (0-1) in COMPONENTS order"""
+        # One loop per component, written out (this is the per-student hot path)
+        attendance, learning, contact, demographics, historical = self._component_functions
+        attendance_risk = 0.0
+        for rule_risk in attendance:
+            attendance_risk += rule_risk(features)
+        learning_risk = 0.0
+        for rule_risk in learning:
+            learning_risk += rule_risk(features)
+        contact_risk = 0.0
+        for rule_risk in contact:
+            contact_risk += rule_risk(features)
+        demographic_risk = 0.0
+        for rule_risk in demographics:
+            demographic_risk += rule_risk(features)
+        historical_risk = 0.0
+        for rule_risk in historical:
+            historical_risk += rule_risk(features)
+        return (
+            attendance_risk if attendance_risk < 1.0 else 1.0,
+            learning_risk if learning_risk < 1.0 else 1.0,
+            contact_risk if contact_risk < 1.0 else 1.0,
+            demographic_risk if demographic_risk < 1.0 else 1.0,
+            historical_risk if historical_risk < 1.0 else 1.0,
+        )
+
+    def component_risk(self, component: str, features) -> float:
+        """Risk (0-1) for one component"""
+        risk = 0.0
+        for rule in self.components[component]:
+            risk += rule.risk(features)
+        return min(risk, 1.0)
+
+    def recommendations(self, risk_level: str, features) -> List[str]:
+        """Interventions of every matching rule, without duplicates"""
+        selected = []
+        for matches, names in self._recommendation_functions:
+            if matches(risk_level, features):
+                selected += names
+        return list(dict.fromkeys(selected))[:self.max_recommendations]
+
+    def risk_level(self, risk_score: float) -> str:
+        return RISK_LEVELS[bisect_right(self.level_breakpoints, risk_score)]
+
+
+def load_rules(path: str) -> RuleSet:
+    """
+    Read and compile a rules file
+
+    Raises:
+        OSError if the file cannot be read, ValueError if it is not a
+        valid rule table
+    """
+    with open(path, encoding='utf-8') as rules_file:
+        return RuleSet(json.load(rules_file))
+
+
+class RuleStore:
+    """
+    Current rule set for a rules file, reloaded when the file changes
+
+    The file's modification time is checked every reload_seconds by a
+    background thread (restarted in forked worker processes), so an edited
+    file takes effect in every worker without a restart and reading the
+    rules costs nothing per student. A file that fails to load is logged
+    and the previous rules stay in use. Pickled copies (sent to worker
+    processes) are pinned to the rules current at the time.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        reload_seconds: float = 0.0,
+        rules: Optional[RuleSet] = None
+    ):
+        self.path = path
+        self.reload_seconds = reload_seconds
+        self.loaded_at = None
+        self._rules = rules
+        self._signature = None
+        self._lock = threading.Lock()
+        self._watcher = None
+        if rules is None:
+            self.refresh(force=True)
+        if path is not None and reload_seconds > 0:
+            _watched_stores.add(self)
+            self._watch()
+
+    def __reduce__(self):
+        return (RuleStore, (None, 0.0, self.current()))
+
+    def current(self) -> RuleSet:
+        return self._rules
+
+    def _watch(self) -> None:
+        """Start the thread that checks the file (replacing any previous one)"""
+        self._watcher = threading.Thread(
+            target=_watch_rules,
+            args=(weakref.ref(self), self.reload_seconds),
+            name='risk-rules-reload',
+            daemon=True
+        )
+        self._watcher.start()
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Reload the file if it changed (or unconditionally with force)
+
+        Returns:
+            True if a different rule set is now in use
+        """
+        if self.path is None:
+            return False
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+                signature = (stat.st_mtime_ns, stat.st_size)
+                if not force and signature == self._signature:
+                    return False
+                # A broken edit is reported once, not on every check
+                self._signature = signature
+                rules = load_rules(self.path)
+            except (OSError, ValueError) as e:
+                if self._rules is None:
+                    raise
+                logger.error(f'Risk rules reload failed, keeping version {self._rules.version}: {e}')
+                return False
+
+            previous = self._rules
+            self._rules = rules
+            self.loaded_at = datetime.now(timezone.utc)
+            changed = previous is None or previous.version != rules.version
+            if changed and previous is not None:
+                logger.info(f'Risk rules reloaded from {self.path}: version {rules.version}')
+            return changed
+
+    def status(self) -> Dict:
+        """Rule version and source for /health"""
+        return {
+            'version': self.current().version,
+            'path': self.path,
+            'loadedAt': self.loaded_at.isoformat() if self.loaded_at else None,
+        }
+
+
+# Stores with a reload thread; threads do not survive fork(), so worker
+# processes forked from a preloaded app start their own
+_watched_stores = weakref.WeakSet()
+
+
+def _watch_rules(store_ref, interval: float) -> None:
+    """Reload loop; ends once the store is gone or has a newer thread"""
+    while True:
+        time.sleep(interval)
+        store = store_ref()
+        if store is None or store._watcher is not threading.current_thread():
+            return
+        store.refresh()
+        del store  # Only the weak reference is held while sleeping
+
+
+def _restart_watchers() -> None:
+    for store in list(_watched_stores):
+        store._watch()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_watchers)
+
+
+# Singleton instance
+_rule_store = None
+
+def get_rule_store() -> RuleStore:
+    """Get the rule store for RISK_RULES_PATH"""
+    global _rule_store
+    if _rule_store is None:
+        _rule_store = RuleStore(
+            os.getenv('RISK_RULES_PATH') or DEFAULT_RULES_PATH,
+            float(os.getenv('RISK_RULES_RELOAD_SECONDS') or DEFAULT_RELOAD_SECONDS)
+        )
+    return _rule_store
@@ -3,32 +3,92 @@ Risk Scoring Service
 Calculates dropout risk for students using rule-based and ML approaches
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import logging
-from datetime import datetime, timedelta
+import os
+
+from .records import FACTOR_NAMES, FeatureColumns, RiskAssessment, RiskFactor, set_assessment_row
+from .risk_rules import RuleSet, RuleStore, get_rule_store
 
 logger = logging.getLogger(__name__)
 
+# Version tag reported with every assessment (and used to key cached
+# results), followed by the hash of the rule table in use
+MODEL_VERSION = '1.0-rule-based'
+
+# round(risk, 2) of component risks seen so far. A rule table only sums to a
+# handful of distinct component values, and a dict lookup costs a fraction
+# of round() on the per-student path; capped so unusual inputs can't grow it
+_ROUNDED_RISKS = {}
+MAX_ROUNDED_RISKS = 4096
+
+
+def round_risks(risks: Tuple[float, ...]) -> Tuple[float, ...]:
+    """round(risk, 2) for each component risk (floats)"""
+    rounded = tuple(map(_ROUNDED_RISKS.get, risks))
+    if None in rounded:
+        rounded = tuple(round(risk, 2) for risk in risks)
+        if len(_ROUNDED_RISKS) < MAX_ROUNDED_RISKS:
+            _ROUNDED_RISKS.update(zip(risks, rounded))
+    return rounded
+
 
 class RiskScorer:
     """Calculate student dropout risk"""
     
-    def __init__(self):
-        # Risk factor weights
-        self.weights = {
-            'attendance': 0.30,
-            'learning': 0.25,
-            'contact': 0.15,
-            'demographics': 0.15,
-            'historical': 0.15,
-        }
+    # The overall score is the weighted sum of the component risks (so an
+    # unchanged set of components means an unchanged assessment)
+    scores_from_components = True
+    
+    # Features the overall score reads besides the rule table (model inputs);
+    # the risk cache hashes them into its keys
+    input_features = ()
+    
+    # Features read by the risk factor descriptions (_get_factor_description)
+    description_features = ('absences30Days', 'contactResponseRate', 'locationType')
+    
+    def __init__(self, rule_store: Optional[RuleStore] = None):
+        # Weights, thresholds and cutoffs come from the rule table
+        # (services/risk_rules.json or RISK_RULES_PATH), reloaded when it changes
+        self.rule_store = rule_store if rule_store is not None else get_rule_store()
         
-        # Thresholds
-        self.thresholds = {
-            'low': 0.25,
-            'medium': 0.50,
-            'high': 0.75,
-        }
+        # Columnar engine used by batch_calculate (created on first batch)
+        self._vectorized = None
+    
+    def __getstate__(self) -> Dict:
+        # Sent to worker processes with each chunk; the engine is rebuilt there
+        state = self.__dict__.copy()
+        state['_vectorized'] = None
+        return state
+    
+    @property
+    def rules(self) -> RuleSet:
+        """Rule set currently in use"""
+        return self.rule_store.current()
+    
+    @property
+    def model_version(self) -> str:
+        """Version reported with assessments made now"""
+        return self.model_version_for(self.rules)
+    
+    @staticmethod
+    def model_version_for(rules: RuleSet) -> str:
+        """Model version reported for assessments made with a rule set"""
+        return f'{MODEL_VERSION}+{rules.version}'
+    
+    def status(self) -> Dict:
+        """Scoring backend for /health"""
+        return {'type': 'rules', 'modelVersion': self.model_version}
+    
+    @property
+    def weights(self) -> Dict[str, float]:
+        """Component weights"""
+        return self.rules.weights
+    
+    @property
+    def thresholds(self) -> Dict[str, float]:
+        """Lower bounds of the medium, high and critical levels (keyed low/medium/high)"""
+        return self.rules.thresholds
     
     def calculate_attendance_risk(self, features: Dict) -> float:
         """
@@ -40,43 +100,7 @@ class RiskScorer:
         Returns:
             Risk score (0-1)
         """
-        risk = 0.0
-        
-        # Recent absences (last 7 days)
-        absences_7 = features.get('absences7Days', 0)
-        if absences_7 >= 3:
-            risk += 0.4
-        elif absences_7 >= 2:
-            risk += 0.2
-        elif absences_7 >= 1:
-            risk += 0.1
-        
-        # Monthly absences (last 30 days)
-        absences_30 = features.get('absences30Days', 0)
-        if absences_30 >= 10:
-            risk += 0.3
-        elif absences_30 >= 6:
-            risk += 0.2
-        elif absences_30 >= 3:
-            risk += 0.1
-        
-        # Attendance rate
-        attendance_rate = features.get('attendanceRate30Days', 100)
-        if attendance_rate < 50:
-            risk += 0.3
-        elif attendance_rate < 70:
-            risk += 0.2
-        elif attendance_rate < 85:
-            risk += 0.1
-        
-        # Consecutive absences
-        consecutive = features.get('consecutiveAbsences', 0)
-        if consecutive >= 5:
-            risk += 0.3
-        elif consecutive >= 3:
-            risk += 0.2
-        
-        return min(risk, 1.0)
+        return self.rules.component_risk('attendance', features)
     
     def calculate_learning_risk(self, features: Dict) -> float:
         """
@@ -88,31 +112,7 @@ class RiskScorer:
         Returns:
             Risk score (0-1)
         """
-        risk = 0.0
-        
-        literacy_level = features.get('literacyLevel')
-        numeracy_level = features.get('numeracyLevel')
-        avg_score = features.get('avgLearningScore', 50)
-        
-        # Literacy risk
-        if literacy_level == 'below_benchmark':
-            risk += 0.3
-        elif literacy_level == 'not_assessed':
-            risk += 0.1
-        
-        # Numeracy risk
-        if numeracy_level == 'below_benchmark':
-            risk += 0.3
-        elif numeracy_level == 'not_assessed':
-            risk += 0.1
-        
-        # Average score
-        if avg_score < 40:
-            risk += 0.3
-        elif avg_score < 60:
-            risk += 0.2
-        
-        return min(risk, 1.0)
+        return self.rules.component_risk('learning', features)
     
     def calculate_contact_risk(self, features: Dict) -> float:
         """
@@ -124,20 +124,7 @@ class RiskScorer:
         Returns:
             Risk score (0-1)
         """
-        risk = 0.0
-        
-        contact_verified = features.get('contactVerified', False)
-        response_rate = features.get('contactResponseRate', 0)
-        
-        if not contact_verified:
-            risk += 0.5
-        
-        if response_rate < 30:
-            risk += 0.3
-        elif response_rate < 60:
-            risk += 0.2
-        
-        return min(risk, 1.0)
+        return self.rules.component_risk('contact', features)
     
     def calculate_demographic_risk(self, features: Dict) -> float:
         """
@@ -149,26 +136,7 @@ class RiskScorer:
         Returns:
             Risk score (0-1)
         """
-        risk = 0.0
-        
-        has_disability = features.get('hasDisability', False)
-        location_type = features.get('locationType', 'Urban')
-        wealth_proxy = features.get('wealthProxy', 'phone_verified')
-        
-        if has_disability:
-            risk += 0.3
-        
-        if location_type == 'Remote':
-            risk += 0.3
-        elif location_type == 'Rural':
-            risk += 0.2
-        
-        if wealth_proxy == 'no_contact':
-            risk += 0.3
-        elif wealth_proxy == 'proxy_only':
-            risk += 0.2
-        
-        return min(risk, 1.0)
+        return self.rules.component_risk('demographics', features)
     
     def calculate_historical_risk(self, features: Dict) -> float:
         """
@@ -180,18 +148,7 @@ class RiskScorer:
         Returns:
             Risk score (0-1)
         """
-        risk = 0.0
-        
-        seasonal_migration = features.get('seasonalMigrationRisk', False)
-        previous_dropout = features.get('previousDropoutAttempt', False)
-        
-        if previous_dropout:
-            risk += 0.6
-        
-        if seasonal_migration:
-            risk += 0.3
-        
-        return min(risk, 1.0)
+        return self.rules.component_risk('historical', features)
     
     def calculate_risk_score(self, features: Dict) -> Dict:
         """
@@ -203,156 +160,235 @@ class RiskScorer:
         Returns:
             Risk assessment with score, level, and factors
         """
+        return self.assess(features).to_dict()
+    
+    def assess(self, features: Dict, rules: Optional[RuleSet] = None) -> RiskAssessment:
+        """
+        Calculate overall risk score as a RiskAssessment record
+        
+        Args:
+            features: All student features (dict or StudentFeatures)
+            rules: Rule set to score with (default: current)
+            
+        Returns:
+            Risk assessment record (see calculate_risk_score for the JSON shape)
+        """
+        return self._assess(rules if rules is not None else self.rules, features)
+    
+    def _assess(self, rules: RuleSet, features: Dict) -> RiskAssessment:
+        """assess() with one rule set for every component"""
         # Calculate component risks
-        attendance_risk = self.calculate_attendance_risk(features)
-        learning_risk = self.calculate_learning_risk(features)
-        contact_risk = self.calculate_contact_risk(features)
-        demographic_risk = self.calculate_demographic_risk(features)
-        historical_risk = self.calculate_historical_risk(features)
+        return self._build(rules, features, *rules.component_risks(features))
+    
+    def build_assessment(
+        self,
+        features: Dict,
+        attendance_risk: float,
+        learning_risk: float,
+        contact_risk: float,
+        demographic_risk: float,
+        historical_risk: float,
+        rules: Optional[RuleSet] = None
+    ) -> RiskAssessment:
+        """
+        Combine already computed component risks into an assessment
         
-        # Weighted average
-        risk_score = (
-            attendance_risk * self.weights['attendance'] +
-            learning_risk * self.weights['learning'] +
-            contact_risk * self.weights['contact'] +
-            demographic_risk * self.weights['demographics'] +
-            historical_risk * self.weights['historical']
+        Lets callers that only recompute some components (e.g. attendance
+        after new attendance is marked) reuse the others.
+        
+        Args:
+            features: All student features
+            attendance_risk: Output of calculate_attendance_risk
+            learning_risk: Output of calculate_learning_risk
+            contact_risk: Output of calculate_contact_risk
+            demographic_risk: Output of calculate_demographic_risk
+            historical_risk: Output of calculate_historical_risk
+            rules: Rule set the risks were computed with (default: current)
+            
+        Returns:
+            Risk assessment record
+        """
+        return self._build(
+            rules if rules is not None else self.rules,
+            features,
+            attendance_risk,
+            learning_risk,
+            contact_risk,
+            demographic_risk,
+            historical_risk
         )
+    
+    def _build(
+        self,
+        rules: RuleSet,
+        features: Dict,
+        attendance_risk: float,
+        learning_risk: float,
+        contact_risk: float,
+        demographic_risk: float,
+        historical_risk: float,
+        risk_score: Optional[float] = None
+    ) -> RiskAssessment:
+        """build_assessment() with the given rule set (and optionally a score from elsewhere)"""
+        # Weighted average
+        if risk_score is None:
+            weights = rules.weights
+            risk_score = (
+                attendance_risk * weights['attendance'] +
+                learning_risk * weights['learning'] +
+                contact_risk * weights['contact'] +
+                demographic_risk * weights['demographics'] +
+                historical_risk * weights['historical']
+            )
         
         # Determine risk level
-        if risk_score >= self.thresholds['high']:
-            risk_level = 'critical'
-        elif risk_score >= self.thresholds['medium']:
-            risk_level = 'high'
-        elif risk_score >= self.thresholds['low']:
-            risk_level = 'medium'
-        else:
-            risk_level = 'low'
-        
-        # Identify top risk factors
-        risk_factors = []
-        factor_scores = {
-            'High absence rate': attendance_risk,
-            'Poor learning outcomes': learning_risk,
-            'Limited parent contact': contact_risk,
-            'Demographic challenges': demographic_risk,
-            'Historical patterns': historical_risk,
-        }
+        risk_level = rules.risk_level(risk_score)
         
-        # Get top 3 factors
-        sorted_factors = sorted(
-            factor_scores.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )
+        components = (attendance_risk, learning_risk, contact_risk, demographic_risk, historical_risk)
+        rounded = round_risks(components)
         
-        for factor, score in sorted_factors[:3]:
-            if score > 0.2:  # Only include significant factors
-                risk_factors.append({
-                    'factor': factor,
-                    'weight': round(score, 2),
-                    'description': self._get_factor_description(factor, features)
-                })
+        # Identify top risk factors (highest first, ties in FACTOR_NAMES order)
+        risk_factors = []
+        ranked = sorted(range(len(components)), key=components.__getitem__, reverse=True)
+        for index in ranked[:rules.max_factors]:
+            if components[index] > rules.factor_min_score:  # Only include significant factors
+                factor = FACTOR_NAMES[index]
+                risk_factors.append(RiskFactor(
+                    factor,
+                    rounded[index],
+                    self._get_factor_description(factor, features)
+                ))
         
         # Generate recommendations
-        recommendations = self._generate_recommendations(
-            risk_level,
-            risk_factors,
-            features
+        recommendations = rules.recommendations(risk_level, features)
+        
+        return RiskAssessment(
+            risk_score=round(risk_score, 2),
+            risk_level=risk_level,
+            components=rounded,
+            risk_factors=tuple(risk_factors),
+            recommendations=tuple(recommendations),
+            model_version=self.model_version_for(rules),
         )
-        
-        return {
-            'riskScore': round(risk_score, 2),
-            'riskLevel': risk_level,
-            'components': {
-                'attendance': round(attendance_risk, 2),
-                'learning': round(learning_risk, 2),
-                'contact': round(contact_risk, 2),
-                'demographics': round(demographic_risk, 2),
-                'historical': round(historical_risk, 2),
-            },
-            'riskFactors': risk_factors,
-            'recommendations': recommendations,
-            'modelVersion': '1.0-rule-based',
-        }
     
     def _get_factor_description(self, factor: str, features: Dict) -> str:
         """Get description for risk factor"""
-        descriptions = {
-            'High absence rate': f"{features.get('absences30Days', 0)} absences in last 30 days",
-            'Poor learning outcomes': f"Below benchmark in literacy or numeracy",
-            'Limited parent contact': f"Contact response rate: {features.get('contactResponseRate', 0)}%",
-            'Demographic challenges': f"Location: {features.get('locationType', 'Unknown')}",
-            'Historical patterns': f"Previous dropout attempt or seasonal migration",
-        }
-        return descriptions.get(factor, '')
+        # Only the requested description is formatted
+        if factor == 'High absence rate':
+            return f"{features.get('absences30Days', 0)} absences in last 30 days"
+        if factor == 'Poor learning outcomes':
+            return "Below benchmark in literacy or numeracy"
+        if factor == 'Limited parent contact':
+            return f"Contact response rate: {features.get('contactResponseRate', 0)}%"
+        if factor == 'Demographic challenges':
+            return f"Location: {features.get('locationType', 'Unknown')}"
+        if factor == 'Historical patterns':
+            return "Previous dropout attempt or seasonal migration"
+        return ''
     
-    def _generate_recommendations(
-        self,
-        risk_level: str,
-        risk_factors: List[Dict],
-        features: Dict
-    ) -> List[str]:
-        """Generate intervention recommendations"""
-        recommendations = []
-        
-        # Based on risk level
-        if risk_level in ['critical', 'high']:
-            recommendations.append('Parent Engagement Call')
-            recommendations.append('Home Visit')
-        
-        # Based on specific factors
-        if features.get('absences30Days', 0) > 10:
-            recommendations.append('Attendance Monitoring')
-        
-        if features.get('literacyLevel') == 'below_benchmark' or \
-           features.get('numeracyLevel') == 'below_benchmark':
-            recommendations.append('Learning Support')
-            recommendations.append('Peer Tutoring')
-        
-        if not features.get('contactVerified', False):
-            recommendations.append('Contact Verification')
+    def batch_calculate(self, students_features: List[Dict]) -> List[Dict]:
+        """
+        Calculate risk scores for multiple students
         
-        if features.get('hasDisability', False):
-            recommendations.append('Special Education')
+        Args:
+            students_features: List of student feature dicts
+            
+        Returns:
+            List of risk assessments
+        """
+        return [assessment.to_dict() for assessment in self.batch_assess(students_features)]
+    
+    def batch_assess(self, students_features: List[Dict], rules: Optional[RuleSet] = None) -> List[RiskAssessment]:
+        """
+        Calculate risk assessment records for multiple students
         
-        if features.get('wealthProxy') == 'no_contact':
-            recommendations.append('Financial Support')
-            recommendations.append('Feeding Program')
+        Well-formed features are scored together by the vectorized engine;
+        anything else goes through assess() one by one so errors are
+        reported per student exactly as before.
         
-        if features.get('locationType') == 'Remote':
-            recommendations.append('Transportation Assistance')
+        Args:
+            students_features: List of feature dicts or StudentFeatures
+            rules: Rule set for the whole batch (default: current)
+            
+        Returns:
+            List of risk assessment records, with studentId set
+        """
+        if rules is None:
+            rules = self.rules
+        results = self._vectorized_scorer().calculate(students_features, rules, self._batch_scores(students_features))
         
-        # Remove duplicates and limit to top 5
-        recommendations = list(dict.fromkeys(recommendations))[:5]
+        for index, features in enumerate(students_features):
+            if results[index] is not None:
+                continue
+            try:
+                result = self._assess(rules, features)
+                result.student_id = features.get('studentId')
+                results[index] = result
+            except Exception as e:
+                logger.error(f"Error calculating risk for student: {e}")
+                results[index] = RiskAssessment.failed(features.get('studentId'), str(e))
         
-        return recommendations
+        return results
     
-    def batch_calculate(self, students_features: List[Dict]) -> List[Dict]:
+    def assess_columns(self, features: FeatureColumns) -> Dict[str, List]:
         """
-        Calculate risk scores for multiple students
+        Calculate risk assessments for a columnar batch (e.g. read from Parquet)
+        
+        Same results as batch_assess on the equivalent feature dicts, but
+        kept as columns: no dict or record is built per student, except
+        for the malformed ones that go through assess() one by one.
         
         Args:
-            students_features: List of student feature dicts
+            features: Student features as columns
             
         Returns:
-            List of risk assessments
+            ASSESSMENT_COLUMNS -> one value per student
         """
-        results = []
+        rules = self.rules
+        columns, rejected = self._vectorized_scorer().assess_columns(features, rules, self._batch_scores(features))
         
-        for features in students_features:
+        for index in rejected:
+            row = features.row(index)
             try:
-                result = self.calculate_risk_score(features)
-                result['studentId'] = features.get('studentId')
-                results.append(result)
+                result = self._assess(rules, row)
+                result.student_id = row.get('studentId')
             except Exception as e:
                 logger.error(f"Error calculating risk for student: {e}")
-                results.append({
-                    'studentId': features.get('studentId'),
-                    'error': str(e)
-                })
+                result = RiskAssessment.failed(row.get('studentId'), str(e))
+            set_assessment_row(columns, index, result)
         
-        return results
+        return columns
+    
+    def _vectorized_scorer(self):
+        from .vectorized_scorer import VectorizedRiskScorer
+        
+        if self._vectorized is None:
+            self._vectorized = VectorizedRiskScorer(self)
+        return self._vectorized
+    
+    def _batch_scores(self, students_features: List) -> Optional[List[float]]:
+        """Overall scores for a batch when they don't come from the rules (None here)"""
+        return None
+
+
+def create_scorer() -> RiskScorer:
+    """
+    Model-backed scorer when a trained model is present, rule-based otherwise
+    
+    The model is read from RISK_MODEL_PATH (default models/risk_model.joblib);
+    a model that cannot be loaded is logged and the rules are used instead.
+    """
+    from .model_scorer import DEFAULT_MODEL_PATH, ModelRiskScorer
+    
+    model_path = os.getenv('RISK_MODEL_PATH') or DEFAULT_MODEL_PATH
+    if os.path.exists(model_path):
+        try:
+            return ModelRiskScorer(model_path)
+        except Exception as e:
+            logger.error(f'Risk model {model_path} could not be loaded, using rule-based scoring: {e}')
+    else:
+        logger.info(f'No risk model at {model_path}, using rule-based scoring')
+    return RiskScorer()
 
 
 # Singleton instance
@@ -362,5 +398,5 @@ def get_scorer() -> RiskScorer:
     """Get risk scorer instance"""
     global _scorer
     if _scorer is None:
-        _scorer = RiskScorer()
+        _scorer = create_scorer()
     return _scorer
@@ -0,0 +1,458 @@
+"""
+School Risk Rollups
+Per-school risk level and risk factor counts, kept up to date from each
+student's latest assessment so school summaries never rescan every student
+"""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import asyncio
+import logging
+import threading
+
+from .records import MISSING, RiskAssessment
+from .risk_rules import RISK_LEVELS
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'edulink:school-rollup'
+MEMBERS_KEY = f'{KEY_PREFIX}:students'  # studentId -> contribution (school, level, factors)
+SEPARATOR = '\t'
+SCHOOLS_KEY = f'{KEY_PREFIX}:schools'   # every school with a rollup
+DEFAULT_TOP_ISSUES = 5
+HIGH_RISK_LEVELS = ('high', 'critical')
+
+
+class SchoolRollup:
+    """Risk level histogram and factor counts for one school"""
+
+    __slots__ = ('school_id', 'students', 'levels', 'factors')
+
+    def __init__(self, school_id=None, students: int = 0, levels: Dict = None, factors: Dict = None):
+        self.school_id = school_id
+        self.students = students
+        self.levels = levels if levels is not None else {}
+        self.factors = factors if factors is not None else {}
+
+    @classmethod
+    def from_risks(cls, student_risks: Iterable[Dict], school_id=None) -> 'SchoolRollup':
+        """Aggregate a list of risk assessments (JSON shape) from scratch"""
+        rollup = cls(school_id)
+        for risk in student_risks:
+            rollup.students += 1
+            level = risk.get('riskLevel')
+            rollup.levels[level] = rollup.levels.get(level, 0) + 1
+            for factor in risk.get('riskFactors', []):
+                name = factor.get('factor')
+                rollup.factors[name] = rollup.factors.get(name, 0) + 1
+        return rollup
+
+    @classmethod
+    def from_counts(cls, school_id, counts: Dict[str, int]) -> 'SchoolRollup':
+        """Rebuild from stored counter fields (students, level:<level>, factor:<name>)"""
+        rollup = cls(school_id, int(counts.get('students', 0)))
+        for field, count in sorted(counts.items()):
+            count = int(count)
+            if count <= 0:
+                continue
+            kind, _, name = field.partition(':')
+            if kind == 'level':
+                rollup.levels[name] = count
+            elif kind == 'factor':
+                rollup.factors[name] = count
+        return rollup
+
+    @property
+    def high_risk_students(self) -> int:
+        return sum(self.levels.get(level, 0) for level in HIGH_RISK_LEVELS)
+
+    def top_issues(self, limit: int = DEFAULT_TOP_ISSUES) -> List[Tuple[str, int]]:
+        """Most common factors, most students first (ties keep factor order)"""
+        return sorted(self.factors.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def summary(self, top: int = DEFAULT_TOP_ISSUES) -> Dict:
+        """School summary in the /ai/schools/summary response shape"""
+        high_risk = self.high_risk_students
+        return {
+            'schoolId': self.school_id,
+            'totalStudents': self.students,
+            'riskLevels': {level: self.levels.get(level, 0) for level in RISK_LEVELS},
+            'highRiskStudents': high_risk,
+            'highRiskRate': round(high_risk / self.students * 100, 1) if self.students else 0,
+            'factorCounts': dict(self.factors),
+            'topIssues': [{'issue': issue, 'count': count} for issue, count in self.top_issues(top)],
+        }
+
+
+def _contribution(school_id: str, assessment) -> Optional[str]:
+    """Stored form of one student's share of a rollup (None if it has none)"""
+    if isinstance(assessment, RiskAssessment):
+        if assessment.error is not None:
+            return None
+        level = assessment.risk_level
+        factors = [factor.factor for factor in assessment.risk_factors]
+    else:
+        if 'error' in assessment:
+            return None
+        level = assessment.get('riskLevel')
+        factors = [factor.get('factor') for factor in assessment.get('riskFactors', [])]
+    return SEPARATOR.join([school_id, str(level)] + [str(name) for name in factors])
+
+
+def _fields(contribution: str) -> Tuple[str, List[str]]:
+    """School and counter fields a stored contribution adds to"""
+    school_id, level, *factors = contribution.split(SEPARATOR)
+    return school_id, ['students', f'level:{level}'] + [f'factor:{name}' for name in factors]
+
+
+def _student_id(assessment):
+    student_id = assessment.student_id if isinstance(assessment, RiskAssessment) else assessment.get('studentId')
+    return None if student_id is None or student_id is MISSING else str(student_id)
+
+
+class RollupChange:
+    """Counter deltas and membership writes for one update"""
+
+    __slots__ = ('counts', 'reset', 'members', 'removed', 'roster_add', 'roster_remove', 'updated', 'unassigned')
+
+    def __init__(self):
+        self.counts: Dict[str, Dict[str, int]] = {}
+        # Schools whose counters are replaced outright (full roster updates)
+        self.reset: Dict[str, Dict[str, int]] = {}
+        self.members: Dict[str, str] = {}
+        self.removed: Set[str] = set()
+        self.roster_add: Dict[str, Set[str]] = {}
+        self.roster_remove: Dict[str, Set[str]] = {}
+        self.updated = 0
+        self.unassigned = 0
+
+    def _count(self, contribution: str, sign: int) -> str:
+        school_id, fields = _fields(contribution)
+        counts = self.counts.setdefault(school_id, {})
+        for field in fields:
+            counts[field] = counts.get(field, 0) + sign
+        return school_id
+
+    def move(self, student_id: str, old: Optional[str], new: Optional[str]) -> None:
+        """Replace a student's old contribution with the new one (None removes it)"""
+        old_school = self._count(old, -1) if old is not None else None
+        new_school = self._count(new, 1) if new is not None else None
+        if new is None:
+            self.removed.add(student_id)
+        else:
+            self.members[student_id] = new
+        if old_school != new_school:
+            if old_school is not None:
+                self.roster_remove.setdefault(old_school, set()).add(student_id)
+            if new_school is not None:
+                self.roster_add.setdefault(new_school, set()).add(student_id)
+        self.updated += 1
+
+    def summary(self) -> Dict:
+        return {
+            'updated': self.updated,
+            'removed': len(self.removed),
+            'unassigned': self.unassigned,
+            'schools': len(self.counts.keys() | self.reset.keys()),
+        }
+
+
+def plan_update(
+    assessments: List,
+    current: Dict[str, Optional[str]],
+    school_id: Optional[str] = None,
+    schools: Optional[Dict[str, str]] = None,
+    roster: Optional[Set[str]] = None
+) -> RollupChange:
+    """
+    Work out what an update changes, without touching storage
+
+    Args:
+        assessments: RiskAssessment records or JSON-shape dicts with studentId
+        current: Stored contribution (or None) of every student involved
+        school_id: School of every student in the batch
+        schools: School per student id, for batches spanning schools
+        roster: Current students of school_id, when the batch is its full
+            roster: students absent from the batch are removed and the
+            school's counters are rebuilt from the batch
+
+    Returns:
+        RollupChange (students whose level and factors are unchanged are skipped)
+    """
+    change = RollupChange()
+    seen = set()
+    final = []
+    for assessment in assessments:
+        student_id = _student_id(assessment)
+        if student_id is None or student_id in seen:
+            continue
+        seen.add(student_id)
+        old = current.get(student_id)
+        school = school_id or (schools or {}).get(student_id) or (old.split(SEPARATOR, 1)[0] if old else None)
+        if school is None:
+            change.unassigned += 1
+            continue
+        new = _contribution(str(school), assessment)
+        if new is None:
+            new = old  # Scoring failed: keep the last known contribution
+        elif new != old:
+            change.move(student_id, old, new)
+        if new is not None:
+            final.append(new)
+
+    if roster is not None and school_id is not None:
+        for student_id in roster - seen:
+            old = current.get(student_id)
+            if old is not None:
+                change.move(student_id, old, None)
+        # Rebuilt from scratch, so counters that drifted are corrected too
+        counts = {}
+        for contribution in final:
+            school, fields = _fields(contribution)
+            if school == school_id:
+                for field in fields:
+                    counts[field] = counts.get(field, 0) + 1
+        change.counts.pop(school_id, None)
+        change.reset[school_id] = counts
+    return change
+
+
+def student_schools(students: List) -> Dict[str, str]:
+    """schoolId per studentId, for feature dicts that carry one"""
+    return {
+        str(student['studentId']): str(student['schoolId'])
+        for student in students
+        if isinstance(student, dict) and student.get('studentId') is not None and student.get('schoolId')
+    }
+
+
+def rollup_key(school_id: str) -> str:
+    return f'{KEY_PREFIX}:{school_id}'
+
+
+def roster_key(school_id: str) -> str:
+    return f'{KEY_PREFIX}:{school_id}:roster'
+
+
+def _text(value) -> str:
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+
+class SchoolRollupStore:
+    """
+    Maintain per-school rollups from student assessments
+
+    Each student's contribution (school, risk level, factors) is stored, so
+    an update only adjusts counters for students whose level or factors
+    changed, and a student's school is remembered for later updates that
+    only carry the student id (e.g. attendance events). Rollups live in
+    Redis when a client is given (shared by every worker) and in process
+    memory otherwise.
+
+    Updates are serialized within a process. Workers updating the same
+    student at once can race; a full roster update (replace=True) rebuilds
+    that school's counters.
+    """
+
+    def __init__(self, redis_client=None):
+        self.redis = redis_client
+        self.errors = 0
+        self._lock = threading.Lock()
+        # Process memory storage when there is no Redis
+        self._members: Dict[str, str] = {}
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._rosters: Dict[str, Set[str]] = {}
+
+    @property
+    def backend(self) -> str:
+        return 'redis' if self.redis is not None else 'memory'
+
+    def update(
+        self,
+        assessments: List,
+        school_id: Optional[str] = None,
+        schools: Optional[Dict[str, str]] = None,
+        replace: bool = False
+    ) -> Dict:
+        """
+        Apply new assessments to the rollups
+
+        Args:
+            assessments: RiskAssessment records or JSON-shape dicts with studentId
+            school_id: School of every student in the batch
+            schools: School per student id (when the batch spans schools);
+                students in neither keep their last known school
+            replace: Batch is school_id's full roster: students missing from
+                it are removed from the rollup
+
+        Returns:
+            Counts of students updated, removed and without a known school
+        """
+        student_ids = [student_id for student_id in map(_student_id, assessments) if student_id is not None]
+        try:
+            with self._lock:
+                roster = self._roster(school_id) if replace and school_id else None
+                current = self._current(student_ids + sorted(roster or ()))
+                change = plan_update(assessments, current, school_id, schools, roster)
+                self._write(change)
+        except Exception as e:
+            self._record_error(f'School rollup update failed: {e}')
+            return {'error': str(e)}
+        return change.summary()
+
+    def summaries(self, school_ids: Optional[List[str]] = None, top: int = DEFAULT_TOP_ISSUES) -> List[Dict]:
+        """
+        Summaries of the given schools (every school with a rollup by default)
+
+        Schools without a rollup are left out.
+        """
+        if school_ids is None:
+            school_ids = self._school_ids()
+        counts = self._read_counts(school_ids)
+        return [
+            SchoolRollup.from_counts(school_id, school_counts).summary(top)
+            for school_id, school_counts in zip(school_ids, counts)
+            if school_counts
+        ]
+
+    def stats(self) -> Dict:
+        """Storage backend and failure count"""
+        return {'backend': self.backend, 'errors': self.errors}
+
+    def _record_error(self, message: str) -> None:
+        self.errors += 1
+        logger.warning(message)
+
+    # Storage: process memory, or Redis when a client is set
+
+    def _roster(self, school_id: str) -> Set[str]:
+        if self.redis is None:
+            return set(self._rosters.get(school_id, ()))
+        return {_text(student_id) for student_id in self.redis.smembers(roster_key(school_id))}
+
+    def _current(self, student_ids: List[str]) -> Dict[str, Optional[str]]:
+        if not student_ids:
+            return {}
+        if self.redis is None:
+            return {student_id: self._members.get(student_id) for student_id in student_ids}
+        values = self.redis.hmget(MEMBERS_KEY, student_ids)
+        return {student_id: _text(value) if value is not None else None for student_id, value in zip(student_ids, values)}
+
+    def _write(self, change: RollupChange) -> None:
+        if self.redis is None:
+            self._write_memory(change)
+            return
+        pipe = self.redis.pipeline(transaction=True)
+        _queue_writes(pipe, change)
+        pipe.execute()
+
+    def _write_memory(self, change: RollupChange) -> None:
+        for school_id, deltas in change.counts.items():
+            counts = self._counts.setdefault(school_id, {})
+            for field, delta in deltas.items():
+                counts[field] = counts.get(field, 0) + delta
+        for school_id, counts in change.reset.items():
+            self._counts[school_id] = dict(counts)
+        self._members.update(change.members)
+        for student_id in change.removed:
+            self._members.pop(student_id, None)
+        for school_id, student_ids in change.roster_remove.items():
+            self._rosters.get(school_id, set()).difference_update(student_ids)
+        for school_id, student_ids in change.roster_add.items():
+            self._rosters.setdefault(school_id, set()).update(student_ids)
+
+    def _school_ids(self) -> List[str]:
+        if self.redis is None:
+            return sorted(self._counts)
+        return sorted(_text(school_id) for school_id in self.redis.smembers(SCHOOLS_KEY))
+
+    def _read_counts(self, school_ids: List[str]) -> List[Dict[str, int]]:
+        if self.redis is None:
+            return [dict(self._counts.get(school_id, {})) for school_id in school_ids]
+        pipe = self.redis.pipeline(transaction=False)
+        for school_id in school_ids:
+            pipe.hgetall(rollup_key(school_id))
+        return [_decode_counts(values) for values in pipe.execute()]
+
+
+def _queue_writes(pipe, change: RollupChange) -> None:
+    """Queue a change's Redis writes on a pipeline (one MULTI/EXEC)"""
+    for school_id, deltas in change.counts.items():
+        for field, delta in deltas.items():
+            if delta:
+                pipe.hincrby(rollup_key(school_id), field, delta)
+    for school_id, counts in change.reset.items():
+        pipe.delete(rollup_key(school_id))
+        if counts:
+            pipe.hset(rollup_key(school_id), mapping=counts)
+    if change.members:
+        pipe.hset(MEMBERS_KEY, mapping=change.members)
+    if change.removed:
+        pipe.hdel(MEMBERS_KEY, *change.removed)
+    for school_id, student_ids in change.roster_remove.items():
+        pipe.srem(roster_key(school_id), *student_ids)
+    for school_id, student_ids in change.roster_add.items():
+        pipe.sadd(roster_key(school_id), *student_ids)
+    schools = change.counts.keys() | change.reset.keys()
+    if schools:
+        pipe.sadd(SCHOOLS_KEY, *schools)
+
+
+def _decode_counts(values: Dict) -> Dict[str, int]:
+    return {_text(field): int(count) for field, count in values.items()}
+
+
+class AsyncSchoolRollupStore(SchoolRollupStore):
+    """SchoolRollupStore for the async app, with a redis.asyncio client"""
+
+    def __init__(self, redis_client=None):
+        super().__init__(redis_client)
+        self._async_lock = asyncio.Lock()
+
+    async def update(
+        self,
+        assessments: List,
+        school_id: Optional[str] = None,
+        schools: Optional[Dict[str, str]] = None,
+        replace: bool = False
+    ) -> Dict:
+        """Async equivalent of SchoolRollupStore.update"""
+        if self.redis is None:
+            return super().update(assessments, school_id, schools, replace)
+
+        student_ids = [student_id for student_id in map(_student_id, assessments) if student_id is not None]
+        try:
+            async with self._async_lock:
+                roster = None
+                if replace and school_id:
+                    roster = {_text(item) for item in await self.redis.smembers(roster_key(school_id))}
+                ids = student_ids + sorted(roster or ())
+                values = await self.redis.hmget(MEMBERS_KEY, ids) if ids else []
+                current = {
+                    student_id: _text(value) if value is not None else None
+                    for student_id, value in zip(ids, values)
+                }
+                change = plan_update(assessments, current, school_id, schools, roster)
+                pipe = self.redis.pipeline(transaction=True)
+                _queue_writes(pipe, change)
+                await pipe.execute()
+        except Exception as e:
+            self._record_error(f'School rollup update failed: {e}')
+            return {'error': str(e)}
+        return change.summary()
+
+    async def summaries(self, school_ids: Optional[List[str]] = None, top: int = DEFAULT_TOP_ISSUES) -> List[Dict]:
+        """Async equivalent of SchoolRollupStore.summaries"""
+        if self.redis is None:
+            return super().summaries(school_ids, top)
+
+        if school_ids is None:
+            school_ids = sorted(_text(school_id) for school_id in await self.redis.smembers(SCHOOLS_KEY))
+        pipe = self.redis.pipeline(transaction=False)
+        for school_id in school_ids:
+            pipe.hgetall(rollup_key(school_id))
+        counts = [_decode_counts(values) for values in await pipe.execute()]
+        return [
+            SchoolRollup.from_counts(school_id, school_counts).summary(top)
+            for school_id, school_counts in zip(school_ids, counts)
+            if school_counts
+        ]
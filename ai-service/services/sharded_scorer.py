@@ -0,0 +1,125 @@
+"""
+Sharded Batch Scoring
+Splits very large scoring jobs across the shared worker process pool
+"""
+
+from functools import partial
+from typing import Dict, List, Optional
+import logging
+
+from .encoding import JsonFormat
+from .parallel import map_chunks, worker_count
+from .records import RiskAssessment
+
+logger = logging.getLogger(__name__)
+
+# Smallest batch sent to the pool; below this, pickling and IPC cost more
+# than the extra cores save (see benchmarks/bench_sharded_scoring.py)
+SHARD_MIN_STUDENTS = 20_000
+
+# Chunks per worker: more than one so a slow chunk doesn't leave the other
+# workers idle, bounded so per-task overhead stays small
+SHARD_CHUNKS_PER_WORKER = 4
+MIN_SHARD_CHUNK = 2_000
+MAX_SHARD_CHUNK = 25_000
+
+
+def shard_chunk_size(count: int, workers: int) -> int:
+    """Students per task for a batch of count students on workers processes"""
+    size = -(-count // (workers * SHARD_CHUNKS_PER_WORKER))
+    return max(MIN_SHARD_CHUNK, min(MAX_SHARD_CHUNK, size))
+
+
+# Stdlib JSON: the same bytes as the app's jsonify
+DEFAULT_WIRE_FORMAT = JsonFormat()
+
+
+def encode_result(assessment: RiskAssessment, wire_format=DEFAULT_WIRE_FORMAT) -> bytes:
+    """One encoded assessment (compact JSON unless another format is given)"""
+    return wire_format.encode(assessment.to_dict())
+
+
+def _assess_chunk(scorer, chunk: List[Dict]) -> List[RiskAssessment]:
+    """Worker entry point for ShardedRiskScorer.batch_assess"""
+    return scorer.batch_assess(chunk)
+
+
+def _encode_chunk(scorer, wire_format, chunk: List[Dict]) -> List[bytes]:
+    """Worker entry point for ShardedRiskScorer.batch_encode"""
+    return [wire_format.encode(assessment.to_dict()) for assessment in scorer.batch_assess(chunk)]
+
+
+class ShardedRiskScorer:
+    """
+    RiskScorer wrapper that scores very large batches in worker processes
+
+    Batches smaller than min_students (or any batch when only one worker
+    is configured) are scored in-process. Results are always returned in
+    input order.
+    """
+
+    def __init__(
+        self,
+        scorer,
+        min_students: int = SHARD_MIN_STUDENTS,
+        workers: Optional[int] = None,
+        chunk_size: Optional[int] = None
+    ):
+        self.scorer = scorer
+        self.min_students = min_students
+        self.workers = workers
+        self.chunk_size = chunk_size
+
+    @property
+    def model_version(self) -> str:
+        return self.scorer.model_version
+
+    def calculate_risk_score(self, features: Dict) -> Dict:
+        """Single students are always scored in-process"""
+        return self.scorer.calculate_risk_score(features)
+
+    def batch_calculate(self, students_features: List[Dict]) -> List[Dict]:
+        """Sharded equivalent of RiskScorer.batch_calculate"""
+        return [assessment.to_dict() for assessment in self.batch_assess(students_features)]
+
+    def batch_assess(self, students_features: List[Dict]) -> List[RiskAssessment]:
+        """
+        Sharded equivalent of RiskScorer.batch_assess
+
+        Assessments are unpickled one by one in this process, which costs
+        about half as much as scoring them, so this only pays off with
+        several workers; use batch_encode when results are sent on encoded.
+        """
+        return self._map(partial(_assess_chunk, self.scorer), students_features)
+
+    def batch_encode(self, students_features: List[Dict], wire_format=DEFAULT_WIRE_FORMAT) -> List[bytes]:
+        """
+        Score and encode a batch, one encoded result per student
+
+        Workers do both the scoring and the encoding, so only bytes are
+        sent back; this is the path that scales with worker count.
+
+        Args:
+            students_features: List of feature dicts or StudentFeatures
+            wire_format: JsonFormat or MSGPACK (see services/encoding.py)
+
+        Returns:
+            Encoded assessments in input order (see encode_result)
+        """
+        return self._map(partial(_encode_chunk, self.scorer, wire_format), students_features)
+
+    def _map(self, func, students_features: List[Dict]) -> List:
+        workers = self.workers or worker_count()
+        chunk_size = self.chunk_size or shard_chunk_size(len(students_features), workers)
+        if len(students_features) >= self.min_students and workers > 1:
+            logger.info(
+                f'Sharding {len(students_features)} students across {workers} workers '
+                f'({chunk_size} per chunk)'
+            )
+        return map_chunks(
+            func,
+            students_features,
+            chunk_size=chunk_size,
+            min_parallel=self.min_students,
+            workers=workers
+        )
@@ -0,0 +1,317 @@
+"""
+Streaming Batch Scoring
+Scores newline-delimited JSON feature records in fixed-size chunks
+"""
+
+from typing import (
+    AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple,
+)
+import heapq
+import json
+import logging
+
+from .records import RiskAssessment
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+MAX_CHUNK_SIZE = 10_000  # Larger chunkSize values are clamped, bounding memory per chunk
+DEFAULT_TOP_K = 50
+READ_BLOCK_SIZE = 64 * 1024
+
+
+class InvalidLine(dict):
+    """Error record emitted in place of a line that is not a JSON object"""
+
+
+def stream_chunk_size(value: Optional[str]) -> int:
+    """
+    chunkSize query parameter (default DEFAULT_CHUNK_SIZE, at most MAX_CHUNK_SIZE)
+
+    Raises:
+        ValueError if it is not a positive integer
+    """
+    chunk_size = int(value) if value is not None else DEFAULT_CHUNK_SIZE
+    if chunk_size < 1:
+        raise ValueError('chunkSize must be a positive integer')
+    return min(chunk_size, MAX_CHUNK_SIZE)
+
+
+def iter_lines(stream, block_size: int = READ_BLOCK_SIZE) -> Iterator[bytes]:
+    """
+    Split a binary stream into lines, reading it in fixed-size blocks
+
+    WSGI input streams read byte by byte on readline(), which dominates
+    the cost of large uploads; block reads keep it proportional to size.
+    """
+    pending = b''
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            break
+        lines = (pending + block).split(b'\n')
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+
+def parse_line(line_number: int, line) -> Optional[Dict]:
+    """Parse one NDJSON line (None for blank lines, InvalidLine if malformed or not an object)"""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        # Decoded here so invalid UTF-8 is reported like any other
+        # malformed line (UnicodeDecodeError is a ValueError)
+        record = json.loads(line.decode('utf-8') if isinstance(line, bytes) else line)
+    except ValueError as e:
+        return InvalidLine(line=line_number, error=f'Invalid JSON: {e}')
+    if not isinstance(record, dict):
+        return InvalidLine(line=line_number, error='Expected a JSON object of features')
+    return record
+
+
+def iter_ndjson(lines: Iterable) -> Iterator[Dict]:
+    """
+    Parse newline-delimited JSON records one line at a time
+
+    Args:
+        lines: Iterable of bytes or str lines (e.g. a request stream)
+
+    Yields:
+        Parsed records; unparseable lines and JSON values other than
+        objects yield an InvalidLine ({'line': n, 'error': ...}) so results
+        stay aligned with input
+    """
+    for line_number, line in enumerate(lines, start=1):
+        record = parse_line(line_number, line)
+        if record is not None:
+            yield record
+
+
+async def aiter_ndjson(chunks: AsyncIterable[bytes]) -> AsyncIterator[Dict]:
+    """
+    Async counterpart of iter_ndjson(iter_lines(stream))
+
+    Args:
+        chunks: Async iterable of body chunks (e.g. an ASGI request body)
+
+    Yields:
+        Parsed records, with InvalidLine for unparseable or non-object lines
+    """
+    pending = b''
+    line_number = 0
+    async for chunk in chunks:
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop()
+        for line in lines:
+            line_number += 1
+            record = parse_line(line_number, line)
+            if record is not None:
+                yield record
+    if pending:
+        record = parse_line(line_number + 1, pending)
+        if record is not None:
+            yield record
+
+
+def score_ndjson(
+    records: Iterable[Dict],
+    scorer,
+    dumps: Callable[[Dict], str] = json.dumps,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[str]:
+    """
+    Score feature records chunk by chunk and yield NDJSON result lines
+
+    Only one chunk of records and results is held in memory at a time, so
+    memory stays flat regardless of how many students are streamed.
+
+    Args:
+        records: Feature dicts (as produced by iter_ndjson)
+        scorer: RiskScorer or CachedRiskScorer instance
+        dumps: JSON encoder for a single result
+        chunk_size: Number of students scored per batch_calculate call
+
+    Yields:
+        One JSON-encoded result per line, in input order
+    """
+    chunk: List[Dict] = []
+    total = 0
+
+    def flush():
+        return ''.join(dumps(result) + '\n' for result in _score_chunk(chunk, scorer))
+
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            total += len(chunk)
+            yield flush()
+            chunk = []
+
+    if chunk:
+        total += len(chunk)
+        yield flush()
+
+    logger.info(f'Streaming risk scoring completed for {total} records')
+
+
+async def ascore_ndjson(
+    records: AsyncIterable[Dict],
+    batch_calculate: Callable[[List[Dict]], Awaitable[List[Dict]]],
+    dumps: Callable[[Dict], str] = json.dumps,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> AsyncIterator[str]:
+    """
+    Async counterpart of score_ndjson
+
+    Args:
+        records: Async iterable of feature dicts (as produced by aiter_ndjson)
+        batch_calculate: Coroutine function scoring a list of features
+        dumps: JSON encoder for a single result
+        chunk_size: Number of students scored per batch_calculate call
+
+    Yields:
+        One JSON-encoded result per line, in input order
+    """
+    chunk: List[Dict] = []
+    total = 0
+
+    async def flush():
+        results = _merge_parse_errors(chunk, await batch_calculate(_valid_records(chunk)))
+        return ''.join(dumps(result) + '\n' for result in results)
+
+    async for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            total += len(chunk)
+            yield await flush()
+            chunk = []
+
+    if chunk:
+        total += len(chunk)
+        yield await flush()
+
+    logger.info(f'Streaming risk scoring completed for {total} records')
+
+
+def _valid_records(chunk: List[Dict]) -> List[Dict]:
+    """Records in a chunk that parsed to feature objects"""
+    return [record for record in chunk if not isinstance(record, InvalidLine)]
+
+
+def _merge_parse_errors(chunk: List[Dict], scored: List[Dict]) -> List[Dict]:
+    """Put parse errors back in their input positions among scored results"""
+    if len(scored) == len(chunk):
+        return scored
+    scored_iter = iter(scored)
+    return [
+        record if isinstance(record, InvalidLine) else next(scored_iter)
+        for record in chunk
+    ]
+
+
+def _score_chunk(chunk: List[Dict], scorer) -> List[Dict]:
+    """Score a chunk, passing parse errors through untouched"""
+    return _merge_parse_errors(chunk, scorer.batch_calculate(_valid_records(chunk)))
+
+
+class TopK:
+    """
+    The k highest-risk assessments seen so far
+
+    A min-heap of (score, -position, assessment) holds at most k entries,
+    so memory does not grow with the number of students. Equal scores are
+    ranked by input order, earliest first.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self.heap: List[Tuple[float, int, RiskAssessment]] = []
+        self.scored = 0
+        self.errors = 0
+        self.position = 0
+
+    def push(self, records: List[Dict], assessments: List[RiskAssessment]):
+        """Offer one scored chunk (records are counted for error totals)"""
+        self.errors += len(records) - len(assessments)
+        heap = self.heap
+        k = self.k
+        for assessment in assessments:
+            self.position += 1
+            if assessment.error is not None:
+                self.errors += 1
+                continue
+            self.scored += 1
+            score = assessment.risk_score
+            if len(heap) < k:
+                heapq.heappush(heap, (score, -self.position, assessment))
+            elif score > heap[0][0]:
+                heapq.heapreplace(heap, (score, -self.position, assessment))
+
+    def results(self) -> List[RiskAssessment]:
+        """Kept assessments, highest risk first"""
+        return [assessment for _, _, assessment in sorted(self.heap, key=lambda item: item[:2], reverse=True)]
+
+    def summary(self) -> Dict:
+        """Response fields describing the selection"""
+        return {'k': self.k, 'scored': self.scored, 'errors': self.errors}
+
+
+def select_top_k(
+    records: Iterable[Dict],
+    batch_assess: Callable[[List[Dict]], List[RiskAssessment]],
+    k: int = DEFAULT_TOP_K,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> TopK:
+    """
+    Score feature records chunk by chunk, keeping only the k highest risks
+
+    Args:
+        records: Feature dicts (as produced by iter_ndjson)
+        batch_assess: Scores a list of feature dicts into RiskAssessment records
+        k: Number of students to keep
+        chunk_size: Number of students scored per batch_assess call
+
+    Returns:
+        TopK with the kept assessments and scored/error counts
+    """
+    top = TopK(k)
+    chunk: List[Dict] = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            top.push(chunk, batch_assess(_feature_records(chunk)))
+            chunk = []
+    if chunk:
+        top.push(chunk, batch_assess(_feature_records(chunk)))
+
+    logger.info(f'Top-{k} risk selection completed for {top.scored + top.errors} records')
+    return top
+
+
+async def aselect_top_k(
+    records: AsyncIterable[Dict],
+    batch_assess: Callable[[List[Dict]], Awaitable[List[RiskAssessment]]],
+    k: int = DEFAULT_TOP_K,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> TopK:
+    """Async counterpart of select_top_k"""
+    top = TopK(k)
+    chunk: List[Dict] = []
+    async for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            top.push(chunk, await batch_assess(_feature_records(chunk)))
+            chunk = []
+    if chunk:
+        top.push(chunk, await batch_assess(_feature_records(chunk)))
+
+    logger.info(f'Top-{k} risk selection completed for {top.scored + top.errors} records')
+    return top
+
+
+def _feature_records(chunk: List[Dict]) -> List[Dict]:
+    """Records in a chunk that are feature objects (parse errors and other JSON values are skipped)"""
+    return [record for record in chunk if isinstance(record, dict) and not isinstance(record, InvalidLine)]
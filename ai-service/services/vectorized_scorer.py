@@ -0,0 +1,374 @@
+"""
+Vectorized Risk Scoring Engine
+Scores a whole batch of students at once with NumPy threshold lookups
+"""
+
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from .records import (
+    ASSESSMENT_COLUMNS, COMPONENT_NAMES, FACTOR_NAMES, FeatureColumns, RiskAssessment, RiskFactor, StudentFeatures,
+)
+from .risk_rules import COMPONENTS, RISK_LEVELS, CategoryRule, LadderRule, RuleSet, Trigger
+
+logger = logging.getLogger(__name__)
+
+STATIC_FACTOR_DESCRIPTIONS = {
+    1: 'Below benchmark in literacy or numeracy',
+    4: 'Previous dropout attempt or seasonal migration',
+}
+
+NUMBER_TYPES = {int, float, bool}
+
+
+def _ladder(values: np.ndarray, rule: LadderRule) -> np.ndarray:
+    """Look up the risk contribution for each value in a cutoff ladder"""
+    index = np.searchsorted(np.asarray(rule.breakpoints, dtype=np.float64), values, side=rule.side)
+    return np.asarray(rule.values, dtype=np.float64)[index]
+
+
+def _categorical(column: List, mapping: Dict[str, float]) -> np.ndarray:
+    """Map categorical values to their risk contribution (0 if unknown)"""
+    return np.fromiter(
+        (mapping.get(value, 0.0) if isinstance(value, str) else 0.0 for value in column),
+        dtype=np.float64,
+        count=len(column)
+    )
+
+
+def _flags(column: List) -> np.ndarray:
+    """Truthiness of each value as a boolean array"""
+    return np.fromiter((bool(value) for value in column), dtype=bool, count=len(column))
+
+
+def _valid_numbers(column: List) -> np.ndarray:
+    """
+    Mask of values that compare against numeric cutoffs like the scalar path
+
+    None, strings and NaN are rejected so those students fall back to
+    calculate_risk_score and get the same per-student error or result.
+    """
+    if set(map(type, column)) <= NUMBER_TYPES:
+        return np.ones(len(column), dtype=bool)
+    return np.fromiter(
+        (type(value) in NUMBER_TYPES for value in column),
+        dtype=bool,
+        count=len(column)
+    )
+
+
+def _numbers(column: List, valid: np.ndarray) -> np.ndarray:
+    """Column as float64, with rejected values replaced by 0"""
+    if not valid.all():
+        column = [value if ok else 0 for value, ok in zip(column, valid.tolist())]
+    return np.array(column, dtype=np.float64)
+
+
+def _round_values(values: np.ndarray) -> List[float]:
+    """
+    round(value, 2) for every element, as Python floats
+
+    Scores are sums of a few constants so there are only a handful of
+    distinct values; rounding each distinct value once is much cheaper
+    than calling round() per student and gives identical results.
+    """
+    unique, inverse = np.unique(values, return_inverse=True)
+    rounded = np.array([round(value, 2) for value in unique.tolist()], dtype=np.float64)
+    return rounded[inverse.reshape(values.shape)].tolist()
+
+
+def _describe_factor(factor_index: int, features: Dict) -> str:
+    """Same text as RiskScorer._get_factor_description, by factor index"""
+    if factor_index == 0:
+        return f"{features.get('absences30Days', 0)} absences in last 30 days"
+    if factor_index == 2:
+        return f"Contact response rate: {features.get('contactResponseRate', 0)}%"
+    if factor_index == 3:
+        return f"Location: {features.get('locationType', 'Unknown')}"
+    return STATIC_FACTOR_DESCRIPTIONS[factor_index]
+
+
+class VectorizedRiskScorer:
+    """Columnar scoring engine producing the same results as RiskScorer"""
+
+    def __init__(self, scorer):
+        self.scorer = scorer
+
+    def score_columns(
+        self,
+        features_list: List[Dict],
+        rules: Optional[RuleSet] = None,
+        risk_scores: Optional[np.ndarray] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Compute component risks, weighted scores and risk levels for a batch
+
+        Args:
+            features_list: List of student feature dicts, or FeatureColumns
+            rules: Rule set to apply (defaults to the scorer's current rules)
+            risk_scores: Overall scores to use instead of the weighted
+                component sum (e.g. model probabilities)
+
+        Returns:
+            Dict of NumPy arrays: one per component, 'riskScore', 'levelIndex',
+            'triggers' (one boolean array per recommendation rule) and 'valid'
+            (False where a student must go through the scalar path)
+        """
+        rules = rules if rules is not None else self.scorer.rules
+        # Rules and triggers often read the same feature, so each column
+        # (and its truthiness) is only built once
+        columns = {}
+        flag_columns = {}
+        columnar = isinstance(features_list, FeatureColumns)
+
+        def column(name, default=None):
+            key = (name, default)
+            values = columns.get(key)
+            if values is None:
+                if columnar:
+                    values = features_list.column(name, default)
+                else:
+                    values = [features.get(name, default) for features in features_list]
+                columns[key] = values
+            return values
+
+        def flags(name, default):
+            key = (name, default)
+            values = flag_columns.get(key)
+            if values is None:
+                values = flag_columns[key] = _flags(column(name, default))
+            return values
+
+        valid = np.ones(len(features_list), dtype=bool)
+        for key in rules.numeric_inputs:
+            valid &= _valid_numbers(column(*key))
+
+        numeric = {key: _numbers(column(*key), valid) for key in rules.numeric_inputs}
+        for values in numeric.values():
+            valid &= ~np.isnan(values)
+
+        def rule_values(rule):
+            if isinstance(rule, LadderRule):
+                return _ladder(numeric[(rule.feature, rule.default)], rule)
+            if isinstance(rule, CategoryRule):
+                return _categorical(column(rule.feature, rule.default), dict(rule.categories))
+            return np.where(flags(rule.feature, rule.default), rule.if_true, rule.if_false)
+
+        components = {}
+        for component in COMPONENTS:
+            total = None
+            for rule in rules.components[component]:
+                values = rule_values(rule)
+                total = values if total is None else total + values
+            if total is None:
+                total = np.zeros(len(features_list), dtype=np.float64)
+            components[component] = np.minimum(total, 1.0)
+
+        if risk_scores is not None:
+            risk_score = np.asarray(risk_scores, dtype=np.float64)
+        else:
+            weights = rules.weights
+            risk_score = (
+                components['attendance'] * weights['attendance'] +
+                components['learning'] * weights['learning'] +
+                components['contact'] * weights['contact'] +
+                components['demographics'] * weights['demographics'] +
+                components['historical'] * weights['historical']
+            )
+        level_index = np.searchsorted(
+            np.array(rules.level_breakpoints, dtype=np.float64), risk_score, side='right'
+        )
+
+        def matches(trigger: Trigger) -> np.ndarray:
+            kind = trigger.kind
+            if kind == 'levels':
+                return np.isin(level_index, [RISK_LEVELS.index(level) for level in trigger.target])
+            if kind == 'anyOf':
+                result = matches(trigger.children[0])
+                for child in trigger.children[1:]:
+                    result = result | matches(child)
+                return result
+            if kind == 'above':
+                return numeric[(trigger.feature, trigger.default)] > trigger.target
+            if kind == 'below':
+                return numeric[(trigger.feature, trigger.default)] < trigger.target
+            if kind == 'equals':
+                values = column(trigger.feature, trigger.default)
+                target = trigger.target
+                return np.fromiter((value == target for value in values), dtype=bool, count=len(values))
+            truthy = flags(trigger.feature, trigger.default)
+            return truthy if trigger.target else ~truthy
+
+        return {
+            **components,
+            'riskScore': risk_score,
+            'levelIndex': level_index,
+            'triggers': [matches(trigger) for trigger, _ in rules.recommendation_rules],
+            'valid': valid,
+        }
+
+    def _recommendation_masks(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        """Encode which recommendation rules apply to each student as a bitmask"""
+        masks = np.zeros(len(columns['riskScore']), dtype=np.int64)
+        for bit, flag in enumerate(columns['triggers']):
+            masks |= flag.astype(np.int64) << bit
+        return masks
+
+    def _recommendations_for(self, mask: int, rules: RuleSet) -> Tuple[str, ...]:
+        """
+        Recommendation list for a bitmask, built once per distinct mask (see calculate)
+
+        Masks index into the rule list, so the cache lives on the RuleSet: a
+        batch scored while the rules reload keeps using its own rules' lists.
+        """
+        cache = rules.recommendation_cache
+        recommendations = cache.get(mask)
+        if recommendations is None:
+            selected = []
+            for bit, (_, names) in enumerate(rules.recommendation_rules):
+                if mask & (1 << bit):
+                    selected.extend(names)
+            recommendations = tuple(dict.fromkeys(selected))[:rules.max_recommendations]
+            cache[mask] = recommendations
+        return recommendations
+
+    def calculate(
+        self,
+        features_list: List,
+        rules: Optional[RuleSet] = None,
+        risk_scores: Optional[List[float]] = None
+    ) -> List[Optional[RiskAssessment]]:
+        """
+        Build risk assessments for a batch of students
+
+        Args:
+            features_list: List of student feature dicts or StudentFeatures
+            rules: Rule set to apply (defaults to the scorer's current rules)
+            risk_scores: Overall score per student (same order as
+                features_list) replacing the weighted component sum
+
+        Returns:
+            List of risk assessment records (with studentId set), and None
+            for students that need the scalar path (malformed input)
+        """
+        results = [None] * len(features_list)
+        indices = [
+            index for index, features in enumerate(features_list)
+            if type(features) is dict or type(features) is StudentFeatures
+        ]
+        if not indices:
+            return results
+
+        rules = rules if rules is not None else self.scorer.rules
+        rows = [features_list[index] for index in indices]
+        if risk_scores is not None:
+            risk_scores = np.asarray(risk_scores, dtype=np.float64)[indices]
+        columns = self.score_columns(rows, rules, risk_scores)
+        component_matrix = np.column_stack([
+            columns['attendance'],
+            columns['learning'],
+            columns['contact'],
+            columns['demographics'],
+            columns['historical'],
+        ])
+        # Stable descending order keeps ties in factor order, like sorted(reverse=True)
+        factor_rows = np.argsort(-component_matrix, axis=1, kind='stable')[:, :rules.max_factors].tolist()
+        significant_rows = (component_matrix > rules.factor_min_score).tolist()
+        component_rows = _round_values(component_matrix)
+        scores = _round_values(columns['riskScore'])
+        levels = columns['levelIndex'].tolist()
+        masks = self._recommendation_masks(columns).tolist()
+        valid = columns['valid'].tolist()
+        model_version = self.scorer.model_version_for(rules)
+        # Factors repeat across students (a few hundred distinct ones), so
+        # they are shared; this also lets pickle send each one only once
+        factor_cache = {}
+        factor_tuples = {}
+
+        for position, features in enumerate(rows):
+            if not valid[position]:
+                continue
+
+            components = component_rows[position]
+            significant = significant_rows[position]
+            risk_factors = []
+            for factor_index in factor_rows[position]:
+                if significant[factor_index]:
+                    key = (factor_index, components[factor_index], _describe_factor(factor_index, features))
+                    factor = factor_cache.get(key)
+                    if factor is None:
+                        factor = factor_cache[key] = RiskFactor(FACTOR_NAMES[factor_index], key[1], key[2])
+                    risk_factors.append(factor)
+
+            risk_factors = tuple(risk_factors)
+            results[indices[position]] = RiskAssessment(
+                scores[position],
+                RISK_LEVELS[levels[position]],
+                components,
+                factor_tuples.setdefault(risk_factors, risk_factors),
+                self._recommendations_for(masks[position], rules),
+                model_version,
+                features.get('studentId'),
+            )
+
+        return results
+
+    def assess_columns(
+        self,
+        features: FeatureColumns,
+        rules: Optional[RuleSet] = None,
+        risk_scores: Optional[np.ndarray] = None
+    ) -> Tuple[Dict[str, List], List[int]]:
+        """
+        Build risk assessments for a columnar batch, as columns
+
+        Args:
+            features: Student features as columns
+            rules: Rule set to apply (defaults to the scorer's current rules)
+            risk_scores: Overall score per student replacing the weighted
+                component sum
+
+        Returns:
+            (ASSESSMENT_COLUMNS -> one value per student, indices of students
+            that need the scalar path, whose rows are left empty)
+        """
+        rules = rules if rules is not None else self.scorer.rules
+        count = len(features)
+        columns = self.score_columns(features, rules, risk_scores)
+        component_matrix = np.column_stack([columns[name] for name in COMPONENT_NAMES])
+        factor_rows = np.argsort(-component_matrix, axis=1, kind='stable')[:, :rules.max_factors].tolist()
+        significant_rows = (component_matrix > rules.factor_min_score).tolist()
+        masks = self._recommendation_masks(columns).tolist()
+
+        # Only a few dozen distinct factor selections and recommendation
+        # lists occur, so rows share them
+        factor_lists = {}
+        factors = []
+        for order, significant in zip(factor_rows, significant_rows):
+            key = tuple(index for index in order if significant[index])
+            names = factor_lists.get(key)
+            if names is None:
+                names = factor_lists[key] = [FACTOR_NAMES[index] for index in key]
+            factors.append(names)
+        recommendation_lists = {}
+        for mask in set(masks):
+            recommendation_lists[mask] = list(self._recommendations_for(mask, rules))
+
+        output = {
+            'studentId': list(features.column('studentId')),
+            'riskScore': _round_values(columns['riskScore']),
+            'riskLevel': np.array(RISK_LEVELS, dtype=object)[columns['levelIndex']].tolist(),
+            **{name: _round_values(columns[name]) for name in COMPONENT_NAMES},
+            'riskFactors': factors,
+            'recommendations': [recommendation_lists[mask] for mask in masks],
+            'modelVersion': [self.scorer.model_version_for(rules)] * count,
+            'error': [None] * count,
+        }
+
+        rejected = np.flatnonzero(~columns['valid']).tolist()
+        for index in rejected:
+            for name in ASSESSMENT_COLUMNS[1:]:
+                output[name][index] = None
+        return output, rejected
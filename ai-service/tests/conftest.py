@@ -0,0 +1,55 @@
+"""
+Shared Test Fixtures
+app.py (Flask) and asgi.py (Quart) behind one test client interface, with
+MongoDB and Redis disconnected so the tests run offline
+"""
+
+import asyncio
+
+import pytest
+
+OFFLINE = {'mongodb': None, 'redis': None, 'featureExtractor': None, 'jobQueue': None, 'jobWorkers': []}
+
+
+class AppClient:
+    """Sends a request to either app and returns (status, content type, body)"""
+
+    def __init__(self, name, module, loop=None):
+        self.name = name
+        self.module = module
+        self.client = module.app.test_client()
+        self.loop = loop
+
+    def request(self, method, path, body=None, content_type='application/json', headers=None):
+        headers = dict(headers or {})
+        if self.loop is None:
+            response = self.client.open(path, method=method, data=body, content_type=content_type, headers=headers)
+            return response.status_code, response.content_type, response.get_data()
+
+        async def send():
+            response = await self.client.open(
+                path, method=method, data=body or '', headers={'Content-Type': content_type, **headers}
+            )
+            return response.status_code, response.content_type, await response.get_data()
+
+        return self.loop.run_until_complete(send())
+
+
+@pytest.fixture(scope='session')
+def apps():
+    """Flask and Quart clients by name (one event loop for every Quart request)"""
+    import app as sync_app
+    import asgi as async_app
+
+    for module in (sync_app, async_app):
+        for name, value in OFFLINE.items():
+            module.RESOURCES[name].set(value)
+
+    loop = asyncio.new_event_loop()
+    yield {'flask': AppClient('flask', sync_app), 'quart': AppClient('quart', async_app, loop)}
+    loop.close()
+
+
+@pytest.fixture(params=['flask', 'quart'])
+def client(request, apps):
+    return apps[request.param]
@@ -0,0 +1,117 @@
+"""
+API Contract Tests
+app.py (Flask) and asgi.py (Quart) validate requests and build responses
+with services/api.py, so every route must answer both the same way
+"""
+
+import json
+
+import pytest
+
+from services.api import ENDPOINTS, SERVICE_VERSION
+from services.encoding import MSGPACK, msgpack_available
+from benchmarks.bench_async_serving import contract_cases
+from benchmarks.synthetic import generate_student_features
+
+SCHOOL = {'schoolData': {'name': 'Test School'}, 'studentRisks': [{'riskLevel': 'high'}]}
+
+ERRORS = [
+    ('POST', '/ai/detect-language', {}, 400, 'At least one of text, phone, or region is required'),
+    ('POST', '/ai/detect-language/batch', {'records': {}}, 400, 'records array is required'),
+    ('POST', '/ai/detect-language/phones', {'phones': ['0241234567', 3]}, 400, 'phones must be strings'),
+    ('POST', '/ai/score-risk', {}, 400, 'features object is required'),
+    ('POST', '/ai/score-risk/batch', {'students': []}, 400, 'students array is required'),
+    ('POST', '/ai/score-risk/batch/stream?chunkSize=0', None, 400, 'chunkSize must be a positive integer'),
+    ('POST', '/ai/score-risk/top-k?k=abc', None, 400, 'k and chunkSize must be positive integers'),
+    ('GET', '/ai/score-risk/school/abc', None, 503, 'MongoDB is not connected'),
+    ('POST', '/ai/score-risk/incremental/students', {}, 400, 'students array is required'),
+    ('POST', '/ai/score-risk/incremental/events', {'events': {}}, 400, 'events array is required'),
+    ('POST', '/ai/score-risk/incremental/events', {'events': [], 'asOf': 'soon'}, 400, 'Invalid asOf: '),
+    ('GET', '/ai/schools/summary?top=-1', None, 400, 'top must be a non-negative integer'),
+    ('POST', '/ai/jobs', {'kind': 'retrain', 'students': [{}]}, 400, 'kind must be one of: score-risk'),
+    ('POST', '/ai/jobs', {'students': [{}], 'chunkSize': 0}, 400, 'chunkSize must be'),
+    ('POST', '/ai/jobs', {'students': [{}]}, 503, 'Redis is not connected'),
+    ('GET', '/ai/jobs/abc123', None, 503, 'Redis is not connected'),
+    ('GET', '/ai/jobs/abc123/results?offset=-1', None, 400, 'offset must be a non-negative integer'),
+    ('GET', '/ai/jobs/abc123/stream', None, 503, 'Redis is not connected'),
+    ('DELETE', '/ai/jobs/abc123', None, 503, 'Redis is not connected'),
+    ('POST', '/ai/recommendations', {'studentData': {'_id': 'a'}}, 400, 'studentData and riskAssessment are required'),
+    ('POST', '/ai/recommendations/batch', {'students': {}}, 400, 'students array is required'),
+    ('POST', '/ai/recommendations/school', {'schoolData': {'name': 'Test School'}}, 400,
+     'schoolData and studentRisks are required'),
+    ('POST', '/ai/recommendations/school', {**SCHOOL, 'budget': -1}, 400, 'budget must be a non-negative number'),
+    ('POST', '/ai/recommendations/school', {**SCHOOL, 'budget': float('inf')}, 400,
+     'budget must be a non-negative number'),
+    ('POST', '/ai/recommendations/school', {**SCHOOL, 'budget': float('nan')}, 400,
+     'budget must be a non-negative number'),
+    ('POST', '/ai/recommendations/school', {**SCHOOL, 'unitCosts': {'Home Visit': 'x'}}, 400,
+     'unitCosts must map interventions to non-negative numbers'),
+    ('POST', '/ai/recommendations/school', {**SCHOOL, 'unitCosts': {'Home Visit': float('nan')}}, 400,
+     'unitCosts must map interventions to non-negative numbers'),
+    ('GET', '/missing', None, 404, 'Endpoint not found'),
+]
+
+
+def send(client, method, path, body=None):
+    status, _, data = client.request(method, path, json.dumps(body) if body is not None else None)
+    return status, json.loads(data)
+
+
+@pytest.mark.parametrize('method, path, body, content_type', [
+    pytest.param(*case, id=f'{case[0]} {case[1]}') for case in contract_cases()
+])
+def test_apps_answer_alike(apps, method, path, body, content_type):
+    flask_response = apps['flask'].request(method, path, body, content_type)
+    quart_response = apps['quart'].request(method, path, body, content_type)
+    assert flask_response == quart_response
+
+
+@pytest.mark.parametrize('method, path, body, status, error', ERRORS)
+def test_request_errors(client, method, path, body, status, error):
+    actual_status, payload = send(client, method, path, body)
+    assert actual_status == status
+    assert payload['error'].startswith(error)
+
+
+def test_health_and_root(client):
+    status, health = send(client, 'GET', '/health')
+    assert status == 200
+    assert (health['status'], health['version'], health['mongodb'], health['redis']) == (
+        'ok', SERVICE_VERSION, 'disconnected', 'disconnected'
+    )
+
+    status, root = send(client, 'GET', '/')
+    assert status == 200 and root['endpoints'] == ENDPOINTS
+
+
+def test_batch_scoring(client):
+    students = generate_student_features(20)
+    status, payload = send(client, 'POST', '/ai/score-risk/batch', {'students': students})
+    assert status == 200
+    assert len(payload['results']) == 20 and all('riskScore' in result for result in payload['results'])
+
+
+@pytest.mark.parametrize('body, content_type, status, error', [
+    (b'{"students": [', 'application/json', 400, 'Invalid JSON body'),
+    (b'', 'application/json', 400, 'Invalid JSON body'),
+    (b'students', 'text/plain', 415, 'Did not attempt to load JSON data'),
+    pytest.param(b'\xc1', MSGPACK.media_type, 400, 'Invalid MessagePack body', marks=pytest.mark.skipif(
+        not msgpack_available(), reason='msgpack is not installed'
+    )),
+])
+def test_unreadable_bodies(client, body, content_type, status, error):
+    # Batch bodies are decoded before the route's catch-all 500 handler
+    actual_status, _, data = client.request('POST', '/ai/score-risk/batch', body, content_type)
+    assert actual_status == status
+    assert json.loads(data)['error'].startswith(error)
+
+
+@pytest.mark.skipif(not msgpack_available(), reason='msgpack is not installed')
+def test_msgpack_matches_json(client):
+    body = {'students': generate_student_features(5)}
+    _, json_payload = send(client, 'POST', '/ai/score-risk/batch', body)
+    status, content_type, data = client.request(
+        'POST', '/ai/score-risk/batch', MSGPACK.body(body), MSGPACK.media_type, {'Accept': MSGPACK.media_type}
+    )
+    assert status == 200 and content_type == MSGPACK.media_type
+    assert MSGPACK.decode(data) == json_payload
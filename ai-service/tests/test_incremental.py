@@ -0,0 +1,74 @@
+"""
+Incremental Scoring Tests
+Assessments kept current by IncrementalRiskScorer must equal batch scoring
+of the recounted features, trend features included
+"""
+
+import random
+from datetime import date, timedelta
+
+from services.attendance_trends import AttendanceRows, trend_columns, window_trends
+from services.incremental import ATTENDANCE_FEATURES, IncrementalRiskScorer
+from services.risk_scorer import RiskScorer
+from benchmarks.bench_incremental import full_rescore, record
+from benchmarks.synthetic import generate_attendance_events, generate_student_features
+
+START = date(2025, 1, 6)
+
+
+def assert_matches_batch(scorer, incremental, students, history):
+    for expected in full_rescore(scorer, students, history, incremental.as_of):
+        assert incremental.assessment(expected.student_id).to_dict() == expected.to_dict(), expected.student_id
+
+
+def test_run_of_absences_matches_batch_scoring():
+    scorer = RiskScorer()
+    students = generate_student_features(200, 3)
+    for student in students:
+        for key in ATTENDANCE_FEATURES:
+            student.pop(key, None)
+    student_ids = [student['studentId'] for student in students]
+
+    incremental = IncrementalRiskScorer(scorer)
+    history = {}
+    events = generate_attendance_events(student_ids, START, 40)
+    # Half the students attend every day first, so their slope and longest
+    # streak move with each absence of the run below
+    steady = set(student_ids[::2])
+    events = [{**event, 'status': 'present'} if event['student'] in steady else event for event in events]
+    record(history, events)
+    as_of = START + timedelta(days=39)
+    incremental.apply_events(events, as_of=as_of)
+    incremental.register(students)
+    assert_matches_batch(scorer, incremental, students, history)
+
+    # A run of absences, one school day at a time
+    day = as_of
+    for _ in range(15):
+        day += timedelta(days=1)
+        if day.weekday() >= 5:
+            continue
+        absences = [{'student': student_id, 'date': day, 'status': 'absent'} for student_id in steady]
+        record(history, absences)
+        incremental.apply_events(absences, as_of=day)
+        assert_matches_batch(scorer, incremental, students, history)
+
+
+def test_window_trends_match_trend_columns():
+    generator = random.Random(5)
+    statuses = ['present', 'present', 'absent', 'late', 'excused']
+    as_of = date(2025, 3, 31)
+    for _ in range(200):
+        days = {
+            as_of - timedelta(days=age): generator.choice(statuses)
+            for age in generator.sample(range(90), generator.randint(0, 60))
+        }
+        rows = AttendanceRows.from_records(
+            [{'student': 's', 'date': day, 'status': status} for day, status in days.items()], as_of
+        )
+        columns = trend_columns(rows)
+        expected = (
+            (float(columns['attendanceTrend'][0]), int(columns['longestAbsenceStreak'][0]))
+            if days else (0.0, 0)
+        )
+        assert window_trends(days) == expected
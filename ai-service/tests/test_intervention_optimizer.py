@@ -0,0 +1,54 @@
+"""
+Intervention Optimizer Tests
+Budgeted plans: zero-cost interventions are always assigned, including
+when the budget is zero or used up, and amounts must be finite
+"""
+
+import json
+import math
+
+import pytest
+
+from services.intervention_optimizer import is_amount, plan_interventions
+from services.recommender import get_recommender
+
+COSTS = [5.0, 0.0]
+EFFECTS = [0.5, 0.1]
+
+
+@pytest.mark.parametrize('budget', [0, 5])
+def test_zero_cost_interventions_fit_any_budget(budget):
+    # Students 0 and 1 can take the free intervention (student 1 also the
+    # paid one), student 2 only the paid one
+    risks = [0.8, 0.6, 0.4]
+    assignments, total_cost, _ = plan_interventions(risks, [[1], [0, 1], [0]], COSTS, EFFECTS, budget)
+    free = sorted(student for student, intervention, _ in assignments if intervention == 1)
+    assert free == [0, 1]
+    assert total_cost == budget
+    if budget:
+        assert [(student, intervention) for student, intervention, _ in assignments][-1] == (1, 0)
+
+
+def test_amounts_must_be_finite():
+    assert is_amount(0) and is_amount(2.5)
+    for value in (-1, math.inf, math.nan, True, '5', None):
+        assert not is_amount(value)
+
+
+def test_school_plan_with_zero_budget(client):
+    student_risks = [
+        {'studentId': 'a', 'riskScore': 0.9, 'riskLevel': 'critical', 'recommendations': ['Home Visit']},
+        {'studentId': 'b', 'riskScore': 0.5, 'riskLevel': 'medium', 'recommendations': ['Parent Engagement Call']},
+        {'studentId': 'c', 'riskScore': 0.7, 'riskLevel': 'high', 'recommendations': ['Parent Engagement Call']},
+    ]
+    body = {
+        'schoolData': {'name': 'Test School'},
+        'studentRisks': student_risks,
+        'budget': 0,
+        'unitCosts': {'Parent Engagement Call': 0},
+    }
+    status, _, data = client.request('POST', '/ai/recommendations/school', json.dumps(body))
+    assert status == 200
+    expected = get_recommender().optimize_interventions(student_risks, 0, body['unitCosts'])
+    assert sorted(assignment['studentId'] for assignment in expected['assignments']) == ['b', 'c']
+    assert json.loads(data)['interventionPlan'] == expected
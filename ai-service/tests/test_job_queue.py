@@ -0,0 +1,199 @@
+"""
+Scoring Job Queue Tests
+Jobs run through fake Redis workers must match the batch endpoints, survive
+a worker that dies mid-chunk, skip duplicate and cancelled tasks, and answer
+alike through both apps' job routes
+"""
+
+import json
+import time
+
+import pytest
+
+fakeredis = pytest.importorskip('fakeredis')
+import fakeredis.aioredis  # noqa: E402
+
+from services.batch_recommendations import recommend_batch  # noqa: E402
+from services.job_queue import (  # noqa: E402
+    QUEUE_KEY, AsyncJobQueue, JobQueue, JobWorker, heartbeat_key, inputs_key, job_handlers, processing_key,
+)
+from services.recommender import get_recommender  # noqa: E402
+from services.risk_scorer import RiskScorer  # noqa: E402
+from benchmarks.synthetic import generate_student_features  # noqa: E402
+
+CLAIM_TIMEOUT = 0.01
+
+
+@pytest.fixture(scope='module')
+def scorer():
+    return RiskScorer()
+
+
+@pytest.fixture(scope='module')
+def handlers(scorer):
+    return job_handlers(scorer.batch_assess, get_recommender())
+
+
+def expected_assessments(scorer, students):
+    return [assessment.to_dict() for assessment in scorer.batch_assess(students)]
+
+
+def run_workers(workers, until, timeout=60):
+    """Run workers in threads until until() is true"""
+    threads = [worker.start() for worker in workers]
+    deadline = time.monotonic() + timeout
+    try:
+        while not until():
+            assert time.monotonic() < deadline, 'job did not complete'
+            time.sleep(0.005)
+    finally:
+        for worker in workers:
+            worker.stop()
+        for thread in threads:
+            thread.join()
+
+
+def completed(queue, job_id):
+    return lambda: queue.status(job_id)['status'] == 'completed'
+
+
+def test_score_risk_matches_batch_assess(scorer, handlers):
+    queue = JobQueue(fakeredis.FakeRedis())
+    students = generate_student_features(2_345, 5)
+    students[7] = {'avgLearningScore': 'n/a'}
+    job = queue.submit('score-risk', students, chunk_size=200)
+    workers = [JobWorker(queue, handlers, claim_timeout=CLAIM_TIMEOUT) for _ in range(3)]
+    run_workers(workers, completed(queue, job['jobId']))
+
+    page = queue.results(job['jobId'])
+    assert page['results'] == expected_assessments(scorer, students)
+    assert page['processed'] == page['next'] == len(students) and page['errors'] == 1
+    assert sum(worker.processed for worker in workers) == job['chunks']
+    # Paging from the middle of a chunk
+    assert queue.results(job['jobId'], 1_010)['results'] == page['results'][1_010:]
+
+
+def test_recommendations_match_recommend_batch(scorer, handlers):
+    queue = JobQueue(fakeredis.FakeRedis())
+    items = [
+        {'studentData': {'_id': f's{index}'}, 'features': features}
+        for index, features in enumerate(generate_student_features(300, 5))
+    ]
+    items.append(7)
+    job = queue.submit('recommendations', items, {'budget': 'low'}, chunk_size=64)
+    run_workers([JobWorker(queue, handlers, claim_timeout=CLAIM_TIMEOUT)], completed(queue, job['jobId']))
+    expected = recommend_batch(items, get_recommender(), scorer.batch_assess, 'low')
+    assert queue.results(job['jobId'])['results'] == json.loads(json.dumps(expected))
+
+
+def test_crashed_worker_chunk_is_done_once(scorer, handlers):
+    redis_client = fakeredis.FakeRedis()
+    queue = JobQueue(redis_client)
+    students = generate_student_features(1_000, 9)
+    job = queue.submit('score-risk', students, chunk_size=100)
+
+    # Claims a task, then dies before writing results: its heartbeat expires
+    task = queue.claim('crashed-worker', CLAIM_TIMEOUT)
+    redis_client.delete(heartbeat_key('crashed-worker'))
+
+    survivor = JobWorker(queue, handlers, claim_timeout=CLAIM_TIMEOUT)
+    survivor._next_recovery = float('inf')
+    while survivor.run_once():
+        pass
+    status = queue.status(job['jobId'])
+    assert status['status'] == 'running' and status['completedChunks'] == job['chunks'] - 1
+
+    survivor._next_recovery = 0.0
+    run_workers([survivor], completed(queue, job['jobId']))
+    assert redis_client.llen(processing_key('crashed-worker')) == 0
+    expected = expected_assessments(scorer, students)
+    assert queue.results(job['jobId'])['results'] == expected
+
+    # The dead worker wakes up and finishes its chunk late; a duplicate of
+    # the task is also queued: neither changes anything
+    assert not queue.work('crashed-worker', task, handlers)
+    redis_client.rpush(QUEUE_KEY, task)
+    assert not queue.work('late-worker', queue.claim('late-worker', CLAIM_TIMEOUT), handlers)
+    assert queue.results(job['jobId'])['results'] == expected
+    assert queue.status(job['jobId'])['processed'] == len(students)
+
+
+def test_cancelled_tasks_are_dropped(handlers):
+    queue = JobQueue(fakeredis.FakeRedis())
+    job = queue.submit('score-risk', generate_student_features(10), chunk_size=5)
+    assert queue.cancel(job['jobId']) and queue.status(job['jobId']) is None
+    worker = JobWorker(queue, handlers, claim_timeout=CLAIM_TIMEOUT)
+    run_workers([worker], lambda: queue.pending() == 0)
+    assert worker.processed == 0
+
+
+def test_corrupt_chunk_fails_instead_of_retrying(scorer, handlers):
+    redis_client = fakeredis.FakeRedis()
+    queue = JobQueue(redis_client)
+    students = generate_student_features(25)
+    job = queue.submit('score-risk', students, chunk_size=10)
+    redis_client.hset(inputs_key(job['jobId']), '2', b'{"students": [')
+
+    worker = JobWorker(queue, handlers, claim_timeout=CLAIM_TIMEOUT)
+    run_workers([worker], completed(queue, job['jobId']))
+    page = queue.results(job['jobId'])
+    assert page['results'][:20] == expected_assessments(scorer, students[:20])
+    assert len(page['results']) == 25 and all('error' in result for result in page['results'][20:])
+    assert page['errors'] == 5
+    assert redis_client.llen(processing_key(worker.worker_id)) == 0 and queue.pending() == 0
+
+
+@pytest.fixture
+def job_apps(apps):
+    """Both apps sharing one fake Redis, with no in-process workers"""
+    server = fakeredis.FakeServer()
+    queue = JobQueue(fakeredis.FakeRedis(server=server))
+    apps['flask'].module.job_queue.set(queue)
+    apps['quart'].module.job_queue.set(AsyncJobQueue(fakeredis.aioredis.FakeRedis(server=server)))
+    yield apps, queue
+    for client in apps.values():
+        client.module.job_queue.set(None)
+
+
+def test_job_routes_match_batch_endpoint(job_apps, scorer):
+    apps, queue = job_apps
+    flask, quart = apps['flask'], apps['quart']
+    students = generate_student_features(1_200, 11)
+    body = json.dumps({'students': students, 'chunkSize': 250})
+    _, _, data = flask.request('POST', '/ai/score-risk/batch', json.dumps({'students': students}))
+    expected = json.loads(data)['results']
+
+    def get(client, path):
+        status, _, data = client.request('GET', path)
+        return status, json.loads(data)
+
+    def streamed(client, job_id):
+        _, _, data = client.request('GET', f'/ai/jobs/{job_id}/stream')
+        events = [json.loads(line) for line in data.decode('utf-8').splitlines()]
+        assert events[-1]['event'] == 'completed'
+        return [result for event in events if event['event'] == 'results' for result in event['results']]
+
+    worker = JobWorker(queue, job_handlers(scorer.batch_assess, get_recommender()), claim_timeout=CLAIM_TIMEOUT)
+    status, _, data = flask.request('POST', '/ai/jobs', body)
+    assert status == 202, data
+    job_id = json.loads(data)['jobId']
+    assert get(flask, f'/ai/jobs/{job_id}')[1]['status'] == 'queued'
+
+    thread = worker.start()
+    try:
+        assert streamed(flask, job_id) == expected
+        assert get(flask, f'/ai/jobs/{job_id}/results')[1]['results'] == expected
+        assert quart.request('GET', f'/ai/jobs/{job_id}') == flask.request('GET', f'/ai/jobs/{job_id}')
+        assert get(quart, f'/ai/jobs/{job_id}/results?offset=300')[1]['results'] == expected[300:]
+
+        status, _, data = quart.request('POST', '/ai/jobs', body)
+        assert status == 202
+        async_job = json.loads(data)['jobId']
+        assert streamed(quart, async_job) == expected
+    finally:
+        worker.stop()
+        thread.join()
+
+    status, _, data = quart.request('DELETE', f'/ai/jobs/{async_job}')
+    assert json.loads(data)['cancelled']
+    assert get(quart, f'/ai/jobs/{async_job}')[0] == 404
@@ -0,0 +1,45 @@
+"""
+Language Detection Tests
+Phone prefixes: shared prefixes keep the prefix confidence for the first
+language and report every candidate's probability separately
+"""
+
+import json
+
+import pytest
+
+from services.language_detector import (
+    DEFAULT_LANGUAGE, PHONE_DEFAULT_CONFIDENCE, PHONE_PREFIX_CONFIDENCE, LanguageDetector,
+)
+
+
+@pytest.fixture(scope='module')
+def detector():
+    return LanguageDetector()
+
+
+def test_shared_prefix_keeps_prefix_confidence(detector):
+    result = detector.resolve_phone('+233 26 123 4567')
+    assert (result['language'], result['confidence'], result['prefix']) == ('Dagbani', PHONE_PREFIX_CONFIDENCE, '026')
+    assert result['candidates'] == [
+        {'language': 'Dagbani', 'probability': 0.5}, {'language': 'Hausa', 'probability': 0.5},
+    ]
+    assert detector.detect_from_phone('0541234567') == ('Twi', PHONE_PREFIX_CONFIDENCE)
+
+
+def test_unshared_and_unknown_prefixes(detector):
+    result = detector.resolve_phone('0201234567')
+    assert (result['language'], result['confidence']) == ('Ga', PHONE_PREFIX_CONFIDENCE)
+    assert result['candidates'] == [{'language': 'Ga', 'probability': 1.0}]
+    # Landline area codes are not mapped to languages
+    for phone in ('0382123456', '1234'):
+        assert detector.resolve_phone(phone) == {
+            'language': DEFAULT_LANGUAGE, 'confidence': PHONE_DEFAULT_CONFIDENCE, 'prefix': None, 'candidates': [],
+        }
+
+
+def test_bulk_route_matches_single_lookups(client, detector):
+    phones = ['0261234567', '233 55 123 4567', '0382123456', '0571234567']
+    status, _, data = client.request('POST', '/ai/detect-language/phones', json.dumps({'phones': phones}))
+    assert status == 200
+    assert json.loads(data)['results'] == [detector.resolve_phone(phone) for phone in phones]
@@ -0,0 +1,29 @@
+"""
+Parallel Execution Tests
+Resizing the shared process pool must not cancel work other requests
+already submitted to it
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from services.parallel import map_chunks, shutdown_executor
+
+
+def double(chunk):
+    return [item * 2 for item in chunk]
+
+
+def test_resizing_pool_keeps_running_batches():
+    items = list(range(2_000))
+
+    def run(workers):
+        return map_chunks(double, items, chunk_size=50, min_parallel=100, workers=workers)
+
+    try:
+        # Alternating sizes make every request replace the pool others are using
+        with ThreadPoolExecutor(max_workers=6) as threads:
+            results = list(threads.map(run, [2, 3] * 6))
+    finally:
+        shutdown_executor()
+
+    assert all(result == double(items) for result in results)
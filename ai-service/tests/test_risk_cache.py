@@ -0,0 +1,142 @@
+"""
+Risk Cache Tests
+Cached assessments must equal direct scoring: every feature the scorer
+reads is part of the cache key
+"""
+
+import asyncio
+import itertools
+import json
+
+import pytest
+
+fakeredis = pytest.importorskip('fakeredis')
+import fakeredis.aioredis  # noqa: E402
+
+from services.risk_cache import KEY_PREFIX, KEY_VERSION, AsyncCachedRiskScorer, CachedRiskScorer  # noqa: E402
+from services.risk_rules import DEFAULT_RULES_PATH, RuleSet, RuleStore, load_rules  # noqa: E402
+from services.risk_scorer import RiskScorer  # noqa: E402
+from benchmarks.bench_rule_tables import retuned  # noqa: E402
+from benchmarks.synthetic import generate_dropout_outcomes, generate_student_features  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def model_scorer(tmp_path_factory):
+    pytest.importorskip('sklearn')
+    pytest.importorskip('joblib')
+    from services.model_scorer import ModelRiskScorer
+    from scripts.train_risk_model import save_model, train_model
+
+    students = generate_student_features(3_000)
+    path = str(tmp_path_factory.mktemp('model') / 'risk_model.joblib')
+    save_model(train_model(students, generate_dropout_outcomes(students)), path)
+    return ModelRiskScorer(path)
+
+
+def cached(scorer):
+    return CachedRiskScorer(scorer, fakeredis.FakeRedis())
+
+
+def assert_matches_direct(scorer, students):
+    """Score through the cache twice (misses, then hits); both must equal direct scoring"""
+    cache = cached(scorer)
+    direct = [scorer.calculate_risk_score(features) for features in students]
+    for _ in range(2):
+        assert [cache.calculate_risk_score(features) for features in students] == direct
+    assert cache.hits == len(students)
+
+
+def test_keys_are_versioned():
+    key = cached(RiskScorer()).cache_key({'absences7Days': 1})
+    assert key.startswith(f'{KEY_PREFIX}:{KEY_VERSION}:')
+
+
+def test_ignores_ids():
+    cache = cached(RiskScorer())
+    assert cache.cache_key({'studentId': 'a', 'absences7Days': 1}) == cache.cache_key({'absences7Days': 1})
+
+
+@pytest.mark.parametrize('feature, values', [
+    ('attendanceTrend', (0, -10)),
+    ('longestAbsenceStreak', (0, 12)),
+])
+def test_rule_features_are_part_of_the_key(feature, values):
+    # Features only risk_rules.json reads (not hard-coded anywhere) must
+    # still tell students apart in the cache
+    scorer = RiskScorer()
+    assert feature in scorer.rules.features
+    base = generate_student_features(1)[0]
+    students = [{**base, 'studentId': name, feature: value} for name, value in zip('ab', values)]
+    assessments = [scorer.calculate_risk_score(features) for features in students]
+    assert assessments[0]['riskScore'] != assessments[1]['riskScore']
+    assert_matches_direct(scorer, students)
+
+
+def test_recommendation_features_are_part_of_the_key():
+    scorer = RiskScorer()
+    names = {feature for trigger, _ in scorer.rules.recommendation_rules for feature in trigger.features()}
+    assert names and names <= set(scorer.rules.features)
+
+
+def test_model_inputs_are_part_of_the_key(model_scorer):
+    base = generate_student_features(1)[0]
+    students = [{**base, 'studentId': 'a', 'absences90Days': 0}, {**base, 'studentId': 'b', 'absences90Days': 80}]
+    scores = model_scorer.predict(students)
+    assert scores[0] != scores[1]
+    assert_matches_direct(model_scorer, students)
+
+
+def test_batch_matches_direct(model_scorer):
+    students = generate_student_features(200)
+    cache = cached(model_scorer)
+    direct = model_scorer.batch_calculate(students)
+    assert cache.batch_calculate(students) == direct
+    assert cache.batch_calculate(students) == direct
+    assert cache.hits == len(students)
+
+
+class ReloadingStore(RuleStore):
+    """Rule store that switches tables on every read, as if reloaded in between"""
+
+    def __init__(self, *tables):
+        super().__init__(rules=tables[0])
+        self._tables = itertools.cycle(tables)
+
+    def current(self):
+        return next(self._tables)
+
+
+def assert_stored_under_own_version(redis_client):
+    keys = redis_client.keys(f'{KEY_PREFIX}:*')
+    assert keys
+    for key in keys:
+        model_version = key.decode('utf-8').split(':')[-2]
+        assert json.loads(redis_client.get(key))['modelVersion'] == model_version
+
+
+def reloading_scorer():
+    rules = load_rules(DEFAULT_RULES_PATH)
+    return RiskScorer(ReloadingStore(rules, RuleSet(retuned(rules.source))))
+
+
+def test_reload_mid_batch_keeps_keys_and_scores_together():
+    cache = cached(reloading_scorer())
+    students = generate_student_features(50)
+    cache.batch_assess(students)
+    for features in students[:5]:
+        cache.calculate_risk_score({**features, 'absences7Days': 9})
+    assert_stored_under_own_version(cache.redis)
+
+
+def test_async_reload_mid_batch_keeps_keys_and_scores_together():
+    server = fakeredis.FakeServer()
+    cache = AsyncCachedRiskScorer(reloading_scorer(), fakeredis.aioredis.FakeRedis(server=server))
+    students = generate_student_features(50)
+
+    async def score():
+        await cache.batch_assess(students)
+        for features in students[:5]:
+            await cache.calculate_risk_score({**features, 'absences7Days': 9})
+
+    asyncio.run(score())
+    assert_stored_under_own_version(fakeredis.FakeRedis(server=server))
@@ -0,0 +1,103 @@
+"""
+Risk Rule Table Tests
+Threshold lookups must score exactly like the hand-written rules they
+replaced, and rule tables are checked against the known feature names
+"""
+
+import copy
+import json
+import time
+
+import pytest
+
+from services.risk_rules import COMPONENTS, DEFAULT_RULES_PATH, RuleSet, RuleStore, load_rules
+from services.risk_scorer import RiskScorer
+from benchmarks.bench_rule_tables import check_equivalence, retuned
+from benchmarks.synthetic import generate_student_features
+
+
+@pytest.fixture(scope='module')
+def rules():
+    return load_rules(DEFAULT_RULES_PATH)
+
+
+def test_matches_hand_written_rules(rules):
+    # Edge cases (None, strings, NaN, bools) included, error messages too
+    check_equivalence(rules, generate_student_features(2_000))
+
+
+@pytest.mark.parametrize('when, cutoffs, value, expected', [
+    ('>=', [[3, 0.4], [2, 0.2]], 3, 0.4),
+    ('>=', [[3, 0.4], [2, 0.2]], 2.5, 0.2),
+    ('>=', [[3, 0.4], [2, 0.2]], 1, 0.05),
+    ('>', [[3, 0.4], [2, 0.2]], 3, 0.2),
+    ('<', [[50, 0.3], [70, 0.2]], 50, 0.2),
+    ('<=', [[50, 0.3], [70, 0.2]], 50, 0.3),
+    ('<=', [[50, 0.3], [70, 0.2]], float('nan'), 0.05),
+    ('<', [[50, 0.3], [70, 0.2]], True, 0.3),
+])
+def test_ladder_lookup(rules, when, cutoffs, value, expected):
+    source = copy.deepcopy(rules.source)
+    source['components']['attendance'] = [
+        {'feature': 'absences7Days', 'when': when, 'cutoffs': cutoffs, 'otherwise': 0.05}
+    ]
+    assert RuleSet(source).component_risk('attendance', {'absences7Days': value}) == expected
+
+
+def test_non_numbers_fail_like_comparisons(rules):
+    with pytest.raises(TypeError, match="'>=' not supported between instances of 'str' and 'int'"):
+        rules.component_risks({'absences7Days': '3'})
+
+
+@pytest.mark.parametrize('path', [
+    ('components', 'attendance', 0),
+    ('recommendations', 'rules', 1, 'when'),
+])
+def test_unknown_features_are_rejected(rules, path):
+    source = copy.deepcopy(rules.source)
+    spec = source
+    for key in path:
+        spec = spec[key]
+    spec['feature'] = 'absences7Dyas'
+    with pytest.raises(ValueError, match="'absences7Dyas' is not a known feature"):
+        RuleSet(source)
+
+
+def test_recommendation_cache_follows_rules(rules):
+    # Batches scored with two rule versions on one scorer (as during a hot
+    # reload) must each get their own recommendation lists
+    retuned_rules = RuleSet(retuned(rules.source))
+    scorers = [RiskScorer(RuleStore(rules=rules)), RiskScorer(RuleStore(rules=retuned_rules))]
+    vectorized = scorers[0]._vectorized_scorer()
+    students = generate_student_features(300)
+    for _ in range(2):
+        for scorer, table in zip(scorers, (rules, retuned_rules)):
+            batch = vectorized.calculate(students, table)
+            expected = [scorer.assess(features).recommendations for features in students]
+            assert [assessment.recommendations for assessment in batch] == expected
+
+
+def test_unknown_factor_description_is_empty():
+    assert RiskScorer()._get_factor_description('Something else', {}) == ''
+
+
+def test_reload_thread_picks_up_edits(rules, tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps(rules.source))
+    store = RuleStore(str(path), reload_seconds=0.01)
+    assert store.current().version == rules.version
+
+    edited = retuned(rules.source)
+    path.write_text(json.dumps(edited, indent=2))
+    deadline = time.monotonic() + 5
+    while store.current().version == rules.version and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store.current().version == RuleSet(edited).version
+
+
+def test_rounded_components_match_round(rules):
+    scorer = RiskScorer(RuleStore(rules=rules))
+    for features in generate_student_features(500):
+        components = rules.component_risks(features)
+        expected = {name: round(risk, 2) for name, risk in zip(COMPONENTS, components)}
+        assert scorer.assess(features).to_dict()['components'] == expected
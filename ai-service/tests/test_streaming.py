@@ -0,0 +1,116 @@
+"""
+Streaming Scoring Tests
+NDJSON parsing and chunked scoring: every input line gets exactly one
+output line, malformed and non-object lines included
+"""
+
+import asyncio
+import io
+import json
+
+import pytest
+
+from services.risk_scorer import RiskScorer
+from services.streaming import (
+    MAX_CHUNK_SIZE, InvalidLine, aiter_ndjson, ascore_ndjson, iter_lines, iter_ndjson, score_ndjson,
+    select_top_k, stream_chunk_size,
+)
+from benchmarks.synthetic import generate_student_features
+
+BODY = b'{"absences7Days":3}\n42\n\nnot json\n[1, 2]\n"text"\nnull\n{"studentId":"s2","absences30Days":12}'
+
+
+@pytest.fixture(scope='module')
+def scorer():
+    return RiskScorer()
+
+
+def parse(body: bytes):
+    return list(iter_ndjson(iter_lines(io.BytesIO(body), block_size=7)))
+
+
+def test_non_object_lines_are_invalid():
+    records = parse(BODY)
+    assert [isinstance(record, InvalidLine) for record in records] == [False, True, True, True, True, True, False]
+    assert records[1] == {'line': 2, 'error': 'Expected a JSON object of features'}
+    assert records[2]['line'] == 4 and records[2]['error'].startswith('Invalid JSON')
+    assert records[-1]['studentId'] == 's2'
+
+
+def test_invalid_utf8_lines_are_invalid():
+    records = parse(b'{"absences7Days":3}\n\xff\xfe\n{"studentId":"s2"}\n')
+    assert [isinstance(record, InvalidLine) for record in records] == [False, True, False]
+    assert records[1]['line'] == 2 and records[1]['error'].startswith('Invalid JSON')
+
+
+def test_async_parser_matches():
+    async def collect():
+        async def chunks():
+            for start in range(0, len(BODY), 5):
+                yield BODY[start:start + 5]
+        return [record async for record in aiter_ndjson(chunks())]
+
+    assert asyncio.run(collect()) == parse(BODY)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 500])
+def test_every_line_gets_one_result(scorer, chunk_size):
+    lines = ''.join(score_ndjson(parse(BODY), scorer, chunk_size=chunk_size)).splitlines()
+    results = [json.loads(line) for line in lines]
+    assert len(results) == 7
+    assert 'riskScore' in results[0] and results[-1]['studentId'] == 's2'
+    assert results[1:6] == [record for record in parse(BODY)[1:6]]
+
+
+def test_async_scoring_matches(scorer):
+    async def collect():
+        async def records():
+            for record in parse(BODY):
+                yield record
+
+        async def batch_calculate(features):
+            return scorer.batch_calculate(features)
+        return ''.join([line async for line in ascore_ndjson(records(), batch_calculate, chunk_size=3)])
+
+    assert asyncio.run(collect()) == ''.join(score_ndjson(parse(BODY), scorer, chunk_size=3))
+
+
+def test_top_k_counts_non_objects_as_errors(scorer):
+    students = generate_student_features(20)
+    body = ''.join(json.dumps(features) + '\n' for features in students).encode() + b'42\n[]\n'
+    top = select_top_k(parse(body), scorer.batch_assess, k=5, chunk_size=8)
+    assert top.summary() == {'k': 5, 'scored': 20, 'errors': 2}
+    expected = sorted(scorer.batch_assess(students), key=lambda assessment: -assessment.risk_score)[:5]
+    assert [assessment.risk_score for assessment in top.results()] == [assessment.risk_score for assessment in expected]
+
+
+@pytest.mark.parametrize('value, expected', [(None, 500), ('1', 1), ('750', 750), ('10000000', MAX_CHUNK_SIZE)])
+def test_chunk_size_is_clamped(value, expected):
+    assert stream_chunk_size(value) == expected
+
+
+@pytest.mark.parametrize('value', ['0', '-3', 'abc', '1.5'])
+def test_chunk_size_must_be_positive(value):
+    with pytest.raises(ValueError):
+        stream_chunk_size(value)
+
+
+def test_stream_route_reports_non_objects_inline():
+    import app
+
+    client = app.app.test_client()
+    response = client.post('/ai/score-risk/batch/stream?chunkSize=99999999', data=b'{"absences7Days":3}\n42\n')
+    assert response.status_code == 200
+    results = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(results) == 2 and 'riskScore' in results[0]
+    assert results[1] == {'line': 2, 'error': 'Expected a JSON object of features'}
+
+    response = client.post('/ai/score-risk/batch/stream', data=b'{"absences7Days":3}\n\xff\xfe\n{"studentId":"s2"}\n')
+    results = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(results) == 3 and results[1]['line'] == 2 and results[2]['studentId'] == 's2'
+
+    response = client.post('/ai/score-risk/top-k?k=1', data=b'{"absences7Days":3}\n\xff\xfe\n')
+    assert response.status_code == 200 and response.get_json()['errors'] == 1
+
+    response = client.post('/ai/score-risk/batch/stream?chunkSize=0', data=b'{}\n')
+    assert response.status_code == 400
@@ -0,0 +1,85 @@
+"""
+Vectorized Scoring Tests
+The batch path (VectorizedRiskScorer) must give exactly the assessments
+the scalar calculate_risk_score path gives, errors included
+"""
+
+import math
+
+import pytest
+
+from services.records import RiskAssessment
+from services.risk_scorer import RiskScorer
+from services.vectorized_scorer import VectorizedRiskScorer
+from benchmarks.synthetic import generate_student_features
+
+
+@pytest.fixture(scope='module')
+def scorer():
+    return RiskScorer()
+
+
+def scalar_results(scorer, students):
+    """What scoring each student on its own returns, errors reported per student"""
+    results = []
+    for features in students:
+        try:
+            result = scorer.calculate_risk_score(features)
+            result['studentId'] = features.get('studentId')
+        except Exception as e:
+            result = RiskAssessment.failed(features.get('studentId'), str(e)).to_dict()
+        results.append(result)
+    return results
+
+
+def test_batch_matches_scalar(scorer):
+    students = generate_student_features(5_000, seed=7)
+    assert scorer.batch_calculate(students) == scalar_results(scorer, students)
+
+
+def test_missing_features_match_scalar(scorer):
+    students = [{}, {'studentId': 'only-id'}, {'absences7Days': 4}, {'literacyLevel': 'below_benchmark'}]
+    assert scorer.batch_calculate(students) == scalar_results(scorer, students)
+
+
+@pytest.mark.parametrize('name', [
+    'absences7Days', 'absences30Days', 'attendanceRate30Days', 'consecutiveAbsences',
+    'avgLearningScore', 'contactResponseRate',
+])
+@pytest.mark.parametrize('value', [None, '3', 'n/a'])
+def test_bad_numeric_values_match_scalar(scorer, name, value):
+    students = generate_student_features(3, seed=1)
+    students[1] = {**students[1], name: value}
+    results = scorer.batch_calculate(students)
+
+    assert results == scalar_results(scorer, students)
+    assert 'error' in results[1] and results[1]['studentId'] == students[1]['studentId']
+    assert 'error' not in results[0] and 'error' not in results[2]
+
+
+@pytest.mark.parametrize('name', [
+    'literacyLevel', 'numeracyLevel', 'locationType', 'wealthProxy',
+    'contactVerified', 'hasDisability', 'seasonalMigrationRisk', 'previousDropoutAttempt',
+])
+@pytest.mark.parametrize('value', [None, '', 'unknown', 'yes'])
+def test_none_and_string_categories_match_scalar(scorer, name, value):
+    students = generate_student_features(3, seed=2)
+    students[1] = {**students[1], name: value}
+    assert scorer.batch_calculate(students) == scalar_results(scorer, students)
+
+
+def test_booleans_and_nan_match_scalar(scorer):
+    students = [
+        {'studentId': 'bool', 'absences7Days': True, 'attendanceRate30Days': False},
+        {'studentId': 'nan', 'attendanceRate30Days': math.nan, 'avgLearningScore': math.nan},
+        {'studentId': 'float', 'absences30Days': 5.5, 'consecutiveAbsences': 2.0},
+    ]
+    assert scorer.batch_calculate(students) == scalar_results(scorer, students)
+
+
+def test_columns_only_scores_match(scorer):
+    students = generate_student_features(500, seed=4)
+    expected = scalar_results(scorer, students)
+    columns = VectorizedRiskScorer(scorer).score_columns(students)
+    assert columns['valid'].all()
+    assert [round(score, 2) for score in columns['riskScore'].tolist()] == [result['riskScore'] for result in expected]